@@ -13,6 +13,8 @@ directory for licensing information.
 Marabou defines key functions that make up the main user interface to Maraboupy
 '''
 
+import hashlib
+import os
 import warnings
 from maraboupy.MarabouCore import *
 
@@ -31,21 +33,63 @@ try:
 except ImportError:
     warnings.warn("ONNX parser is unavailable because onnx or onnxruntime packages are not installed")
 
-def read_nnet(filename, normalize=False):
+def _cacheKey(filename, *args):
+    """Hash the content of a network file (or of all files of a model directory) together with the parser arguments
+
+    :meta private:
+    """
+    paths = [filename]
+    if os.path.isdir(filename):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(filename) for name in names)
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.relpath(path, filename).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    h.update(repr(args).encode())
+    return h.hexdigest()
+
+def _readCached(networkClass, cacheDir, filename, args, parse, attributes={}):
+    """Load a network from the cache directory, or parse it and store it in the cache
+
+    The arguments in args are part of the key of the cache entry. The attributes dictionary is not: its values
+    do not change the parsed network, and are set on a network loaded from the cache.
+
+    :meta private:
+    """
+    if cacheDir is None:
+        return parse()
+    dirname = os.path.join(cacheDir, networkClass.__name__ + "-" + _cacheKey(filename, *args))
+    if os.path.isdir(dirname):
+        network = networkClass.__new__(networkClass)
+        network.clear()
+        network.loadCache(dirname)
+        for attr, value in attributes.items():
+            setattr(network, attr, value)
+        return network
+    network = parse()
+    network.saveCache(dirname)
+    return network
+
+def read_nnet(filename, normalize=False, cacheDir=None):
     """Constructs a MarabouNetworkNnet object from a .nnet file
 
     Args:
         filename (str): Path to the .nnet file
         normalize (bool, optional): If true, incorporate input/output normalization
                   into first and last layers of network
+        cacheDir (str, optional): Directory of the cache of parsed networks. If given, the network is loaded from the
+                  cache when the same file was parsed before with the same arguments, and stored in it otherwise
 
     Returns:
         :class:`~maraboupy.MarabouNetworkNNet.MarabouNetworkNNet`
     """
-    return MarabouNetworkNNet(filename, normalize=normalize)
+    return _readCached(MarabouNetworkNNet, cacheDir, filename, (normalize,),
+                       lambda: MarabouNetworkNNet(filename, normalize=normalize))
 
 
-def read_tf(filename, inputNames=None, outputNames=None, modelType="frozen", savedModelTags=[]):
+def read_tf(filename, inputNames=None, outputNames=None, modelType="frozen", savedModelTags=[], cacheDir=None):
     """Constructs a MarabouNetworkTF object from a frozen Tensorflow protobuf
 
     Args:
@@ -56,24 +100,35 @@ def read_tf(filename, inputNames=None, outputNames=None, modelType="frozen", sav
                             Can also use "savedModel_v1" or "savedModel_v2" for the SavedModel format
                             created from either tensorflow versions 1.X or 2.X respectively.
         savedModelTags (list of str, optional): If loading a SavedModel, the user must specify tags used, default is []
+        cacheDir (str, optional): Directory of the cache of parsed networks. If given, the network is loaded from the
+                            cache when the same model was parsed before with the same arguments, and stored in it otherwise.
+                            A network loaded from the cache has no tensorflow session, so it can only be evaluated with Marabou
 
     Returns:
         :class:`~maraboupy.MarabouNetworkTF.MarabouNetworkTF`
     """
-    return MarabouNetworkTF(filename, inputNames, outputNames, modelType, savedModelTags)
+    return _readCached(MarabouNetworkTF, cacheDir, filename, (inputNames, outputNames, modelType, savedModelTags),
+                       lambda: MarabouNetworkTF(filename, inputNames, outputNames, modelType, savedModelTags))
 
-def read_onnx(filename, inputNames=None, outputNames=None, reindexOutputVars=True):
+def read_onnx(filename, inputNames=None, outputNames=None, reindexOutputVars=True, vectorize=True, cacheDir=None):
     """Constructs a MarabouNetworkONNX object from an ONNX file
 
     Args:
         filename (str): Path to the ONNX file
         inputNames (list of str, optional): List of node names corresponding to inputs
         outputNames (list of str, optional): List of node names corresponding to outputs
+        reindexOutputVars (bool, optional): Reindex the variables so that the output variables are immediate after input variables
+        vectorize (bool, optional): Build Conv, Gemm and MatMul equations with batched NumPy operations, defaults to True.
+            Set to False to add the addends one at a time
+        cacheDir (str, optional): Directory of the cache of parsed networks. If given, the network is loaded from the
+            cache when the same file was parsed before with the same arguments, and stored in it otherwise
 
     Returns:
         :class:`~maraboupy.MarabouNetworkONNX.MarabouNetworkONNX`
     """
-    return MarabouNetworkONNX(filename, inputNames, outputNames, reindexOutputVars=reindexOutputVars)
+    return _readCached(MarabouNetworkONNX, cacheDir, filename, (inputNames, outputNames, reindexOutputVars),
+                       lambda: MarabouNetworkONNX(filename, inputNames, outputNames, reindexOutputVars=reindexOutputVars, vectorize=vectorize),
+                       {"filename": filename, "vectorize": vectorize})
 
 def read_onnx_plus(filename, inputNames=None, outputNames=None):
     """Constructs a MarabouNetworkONNX object from an ONNX file
@@ -91,6 +146,9 @@ def read_onnx_plus(filename, inputNames=None, outputNames=None):
 def load_query(filename):
     """Load the serialized inputQuery from the given filename
 
+    Both the text format and the binary format written by ``saveQuery(..., binary=True)`` are accepted,
+    as well as gzip or zstd compressed query files.
+
     Args:
         filename (str): File to read for loading input query
 
@@ -139,7 +197,8 @@ def createOptions(numWorkers=1, initialTimeout=5, initialSplits=0, onlineSplits=
                   preprocessorBoundTolerance=0.0000000001, dumpBounds=False,
                   tighteningStrategy="deeppoly", milpTightening="none", milpSolverTimeout=0,
                   numSimulations=10, numBlasThreads=1, performLpTighteningAfterSplit=False,
-                  lpSolver=""):
+                  lpSolver="", noParallelDeepSoI=False, sncExportTreeFile="",
+                  sncImportTreeFile=""):
     """Create an options object for how Marabou should solve the query
 
     Args:
@@ -154,7 +213,7 @@ def createOptions(numWorkers=1, initialTimeout=5, initialSplits=0, onlineSplits=
         verbosity (int, optional): Verbosity level for Marabou, defaults to 2
         snc (bool, optional): If SnC mode should be used, defaults to False
         splittingStrategy (string, optional): Specifies which partitioning strategy to use (auto/largest-interval/relu-violation/polarity/earliest-relu)
-        sncSplittingStrategy (string, optional): Specifies which partitioning strategy to use in the SnC mode (auto/largest-interval/polarity).
+        sncSplittingStrategy (string, optional): Specifies which partitioning strategy to use in the SnC mode (auto/largest-interval/polarity/adaptive).
         restoreTreeStates (bool, optional): Whether to restore tree states in dnc mode, defaults to False
         solveWithMILP (bool, optional): Whther to solve the input query with a MILP encoding. Currently only works when Gurobi is installed. Defaults to False.
         preprocessorBoundTolerance ( float, optional): epsilon value for preprocess bound tightening . Defaults to 10^-10.
@@ -166,6 +225,9 @@ def createOptions(numWorkers=1, initialTimeout=5, initialSplits=0, onlineSplits=
         numBlasThreads (int, optional): Number of threads to use when using OpenBLAS matrix multiplication (e.g., for DeepPoly analysis), defaults to 1
         performLpTighteningAfterSplit (bool, optional): Whether to perform a LP tightening after a case split, defaults to False
         lpSolver (string, optional): the engine for solving LP (native/gurobi).
+        noParallelDeepSoI (bool, optional): Whether to partition the query in SnC mode instead of running DeepSoI in parallel when numWorkers > 1, defaults to False
+        sncExportTreeFile (string, optional): Path to save the SnC work tree to once the query is solved, defaults to ""
+        sncImportTreeFile (string, optional): Path to a saved SnC work tree to start from instead of the initial partition, defaults to ""
     Returns:
         :class:`~maraboupy.MarabouCore.Options`
     """
@@ -192,4 +254,7 @@ def createOptions(numWorkers=1, initialTimeout=5, initialSplits=0, onlineSplits=
     options._numBlasThreads = numBlasThreads
     options._performLpTighteningAfterSplit = performLpTighteningAfterSplit
     options._lpSolver = lpSolver
+    options._noParallelDeepSoI = noParallelDeepSoI
+    options._sncExportTreeFile = sncExportTreeFile
+    options._sncImportTreeFile = sncImportTreeFile
     return options
@@ -14,8 +14,10 @@
  ** [[ Add lengthier description here ]]
  **/
 
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <algorithm>
 #include <map>
 #include <vector>
 #include <set>
@@ -26,24 +28,30 @@
 #include <fcntl.h>
 #include "AcasParser.h"
 #include "CommonError.h"
+#include "CompressedFile.h"
 #include "DnCManager.h"
 #include "DisjunctionConstraint.h"
 #include "Engine.h"
 #include "FloatUtils.h"
+#include "GlobalConfiguration.h"
 #include "InputQuery.h"
 #include "MarabouError.h"
 #include "InputParserError.h"
 #include "MString.h"
+#include "MStringf.h"
 #include "MaxConstraint.h"
+#include "NetworkLevelReasoner.h"
 #include "Options.h"
 #include "PiecewiseLinearConstraint.h"
 #include "PropertyParser.h"
 #include "QueryLoader.h"
 #include "ReluConstraint.h"
+#include "ReluGradConstraint.h"
 #include "Set.h"
 #include "SnCDivideStrategy.h"
 #include "SigmoidConstraint.h"
 #include "SignConstraint.h"
+#include "Tightening.h"
 #include "TranscendentalConstraint.h"
 
 #ifdef _WIN32
@@ -106,6 +114,11 @@ void addSignConstraint(InputQuery& ipq, unsigned var1, unsigned var2){
     ipq.addPiecewiseLinearConstraint(r);
 }
 
+void addReluGradConstraint(InputQuery& ipq, unsigned b, unsigned gOut, unsigned gIn){
+    PiecewiseLinearConstraint* r = new ReluGradConstraint(b, gOut, gIn);
+    ipq.addPiecewiseLinearConstraint(r);
+}
+
 void addMaxConstraint(InputQuery& ipq, std::set<unsigned> elements, unsigned v){
     Set<unsigned> e;
     for(unsigned var: elements)
@@ -197,10 +210,176 @@ void addDisjunctionConstraint(InputQuery& ipq, const std::list<std::list<Equatio
     ipq.addPiecewiseLinearConstraint(new DisjunctionConstraint(disjunctList));
 }
 
+typedef py::array_t<double, py::array::c_style | py::array::forcecast> DoubleArray;
+typedef py::array_t<long long, py::array::c_style | py::array::forcecast> VariableArray;
+typedef py::array_t<long long, py::array::c_style | py::array::forcecast> IndexArray;
+typedef py::array_t<int, py::array::c_style | py::array::forcecast> IntArray;
+
+void checkVariables(const InputQuery& ipq, const VariableArray& vars, const char* method){
+    // Variables are read as signed integers, so that negative indices are rejected instead of wrapping around
+    long long numVariables = ipq.getNumberOfVariables();
+    const long long* data = vars.data();
+    for ( py::ssize_t i = 0; i < vars.size(); ++i )
+        if ( data[i] < 0 || data[i] >= numVariables )
+            throw py::value_error( std::string( method ) + ": variable " + std::to_string( data[i] ) +
+                                   " is not a variable of the query" );
+}
+
+void checkRowPointers(const IndexArray& rowPtr, py::ssize_t numRows, py::ssize_t size, const char* method){
+    // Row i spans [rowPtr[i], rowPtr[i+1]), so the pointers must go from 0 to size without decreasing
+    auto r = rowPtr.unchecked<1>();
+    if ( r.shape( 0 ) != numRows + 1 || r( 0 ) != 0 || r( numRows ) != size )
+        throw py::value_error( std::string( method ) + ": inconsistent array sizes" );
+    for ( py::ssize_t i = 0; i < numRows; ++i )
+        if ( r( i ) > r( i + 1 ) )
+            throw py::value_error( std::string( method ) + ": row pointers must be non-decreasing" );
+}
+
+void addEquations(InputQuery& ipq, IndexArray rowPtr, VariableArray cols, DoubleArray coeffs,
+                  DoubleArray scalars, IntArray types){
+    // Equation i has the addends coeffs[k] * cols[k] for k in [rowPtr[i], rowPtr[i+1])
+    auto r = rowPtr.unchecked<1>();
+    auto c = cols.unchecked<1>();
+    auto a = coeffs.unchecked<1>();
+    auto b = scalars.unchecked<1>();
+    auto t = types.unchecked<1>();
+    py::ssize_t numEquations = b.shape( 0 );
+    if ( t.shape( 0 ) != numEquations || c.shape( 0 ) != a.shape( 0 ) )
+        throw py::value_error( "addEquations: inconsistent array sizes" );
+    checkRowPointers( rowPtr, numEquations, c.shape( 0 ), "addEquations" );
+    checkVariables( ipq, cols, "addEquations" );
+    for ( py::ssize_t i = 0; i < numEquations; ++i )
+        if ( t( i ) != Equation::EQ && t( i ) != Equation::GE && t( i ) != Equation::LE )
+            throw py::value_error( "addEquations: invalid equation type " + std::to_string( t( i ) ) );
+
+    for ( py::ssize_t i = 0; i < numEquations; ++i )
+    {
+        Equation eq( static_cast<Equation::EquationType>( t( i ) ) );
+        for ( long long k = r( i ); k < r( i + 1 ); ++k )
+            eq.addAddend( a( k ), c( k ) );
+        eq.setScalar( b( i ) );
+        ipq.addEquation( eq );
+    }
+}
+
+void setLowerBounds(InputQuery& ipq, VariableArray vars, DoubleArray values){
+    auto v = vars.unchecked<1>();
+    auto x = values.unchecked<1>();
+    if ( v.shape( 0 ) != x.shape( 0 ) )
+        throw py::value_error( "setLowerBounds: inconsistent array sizes" );
+    checkVariables( ipq, vars, "setLowerBounds" );
+    for ( py::ssize_t i = 0; i < v.shape( 0 ); ++i )
+        ipq.setLowerBound( v( i ), x( i ) );
+}
+
+void setUpperBounds(InputQuery& ipq, VariableArray vars, DoubleArray values){
+    auto v = vars.unchecked<1>();
+    auto x = values.unchecked<1>();
+    if ( v.shape( 0 ) != x.shape( 0 ) )
+        throw py::value_error( "setUpperBounds: inconsistent array sizes" );
+    checkVariables( ipq, vars, "setUpperBounds" );
+    for ( py::ssize_t i = 0; i < v.shape( 0 ); ++i )
+        ipq.setUpperBound( v( i ), x( i ) );
+}
+
+void addReluConstraints(InputQuery& ipq, VariableArray pairs){
+    if ( pairs.size() == 0 )
+        return;
+    auto p = pairs.unchecked<2>();
+    if ( p.shape( 1 ) != 2 )
+        throw py::value_error( "addReluConstraints: expected an array of shape (n, 2)" );
+    checkVariables( ipq, pairs, "addReluConstraints" );
+    for ( py::ssize_t i = 0; i < p.shape( 0 ); ++i )
+        addReluConstraint( ipq, p( i, 0 ), p( i, 1 ) );
+}
+
+void addSigmoidConstraints(InputQuery& ipq, VariableArray pairs){
+    if ( pairs.size() == 0 )
+        return;
+    auto p = pairs.unchecked<2>();
+    if ( p.shape( 1 ) != 2 )
+        throw py::value_error( "addSigmoidConstraints: expected an array of shape (n, 2)" );
+    checkVariables( ipq, pairs, "addSigmoidConstraints" );
+    for ( py::ssize_t i = 0; i < p.shape( 0 ); ++i )
+        addSigmoidConstraint( ipq, p( i, 0 ), p( i, 1 ) );
+}
+
+void addMaxConstraints(InputQuery& ipq, IndexArray elementPtr, VariableArray elements, VariableArray outputs){
+    // Max constraint i has the output outputs[i] and the inputs elements[k] for k in [elementPtr[i], elementPtr[i+1])
+    auto r = elementPtr.unchecked<1>();
+    auto e = elements.unchecked<1>();
+    auto o = outputs.unchecked<1>();
+    py::ssize_t numConstraints = o.shape( 0 );
+    checkRowPointers( elementPtr, numConstraints, e.shape( 0 ), "addMaxConstraints" );
+    checkVariables( ipq, elements, "addMaxConstraints" );
+    checkVariables( ipq, outputs, "addMaxConstraints" );
+    for ( py::ssize_t i = 0; i < numConstraints; ++i )
+    {
+        Set<unsigned> inputs;
+        for ( long long k = r( i ); k < r( i + 1 ); ++k )
+            inputs.insert( e( k ) );
+        ipq.addPiecewiseLinearConstraint( new MaxConstraint( o( i ), inputs ) );
+    }
+}
+
+void addReluGradDisjunctions(InputQuery& ipq, VariableArray relus, double zero){
+    // Row i holds (v_in, v_out, g_in, g_out) for v_out = ReLU(v_in), where g_in and g_out are the gradients
+    if ( relus.size() == 0 )
+        return;
+    auto r = relus.unchecked<2>();
+    if ( r.shape( 1 ) != 4 )
+        throw py::value_error( "addReluGradDisjunctions: expected an array of shape (n, 4)" );
+    checkVariables( ipq, relus, "addReluGradDisjunctions" );
+    for ( py::ssize_t i = 0; i < r.shape( 0 ); ++i )
+    {
+        unsigned vIn = r( i, 0 );
+        unsigned gIn = r( i, 2 );
+        unsigned gOut = r( i, 3 );
+
+        // v_in <= -zero or g_in = g_out
+        PiecewiseLinearCaseSplit inactive;
+        inactive.storeBoundTightening( Tightening( vIn, -zero, Tightening::UB ) );
+        PiecewiseLinearCaseSplit passGradient;
+        Equation equal;
+        equal.addAddend( 1, gIn );
+        equal.addAddend( -1, gOut );
+        equal.setScalar( 0 );
+        passGradient.addEquation( equal );
+        List<PiecewiseLinearCaseSplit> positive;
+        positive.append( inactive );
+        positive.append( passGradient );
+        ipq.addPiecewiseLinearConstraint( new DisjunctionConstraint( positive ) );
+
+        // v_in >= 0 or g_in = 0
+        PiecewiseLinearCaseSplit active;
+        active.storeBoundTightening( Tightening( vIn, 0, Tightening::LB ) );
+        PiecewiseLinearCaseSplit zeroGradient;
+        zeroGradient.storeBoundTightening( Tightening( gIn, 0, Tightening::LB ) );
+        zeroGradient.storeBoundTightening( Tightening( gIn, 0, Tightening::UB ) );
+        List<PiecewiseLinearCaseSplit> negative;
+        negative.append( active );
+        negative.append( zeroGradient );
+        ipq.addPiecewiseLinearConstraint( new DisjunctionConstraint( negative ) );
+    }
+}
+
+void addReluGradConstraints(InputQuery& ipq, VariableArray relus){
+    // Row i holds (v_in, v_out, g_in, g_out) for v_out = ReLU(v_in), where g_in and g_out are the gradients
+    if ( relus.size() == 0 )
+        return;
+    auto r = relus.unchecked<2>();
+    if ( r.shape( 1 ) != 4 )
+        throw py::value_error( "addReluGradConstraints: expected an array of shape (n, 4)" );
+    checkVariables( ipq, relus, "addReluGradConstraints" );
+    for ( py::ssize_t i = 0; i < r.shape( 0 ); ++i )
+        ipq.addPiecewiseLinearConstraint( new ReluGradConstraint( r( i, 0 ), r( i, 3 ), r( i, 2 ) ) );
+}
+
 struct MarabouOptions {
     MarabouOptions()
         : _snc( Options::get()->getBool( Options::DNC_MODE ) )
         , _restoreTreeStates( Options::get()->getBool( Options::RESTORE_TREE_STATES ) )
+        , _noParallelDeepSoI( Options::get()->getBool( Options::NO_PARALLEL_DEEPSOI ) )
         , _solveWithMILP( Options::get()->getBool( Options::SOLVE_WITH_MILP ) )
         , _dumpBounds( Options::get()->getBool( Options::DUMP_BOUNDS ) )
         , _numWorkers( Options::get()->getInt( Options::NUM_WORKERS ) )
@@ -221,6 +400,8 @@ struct MarabouOptions {
         , _tighteningStrategyString( Options::get()->getString( Options::SYMBOLIC_BOUND_TIGHTENING_TYPE ).ascii() )
         , _milpTighteningString( Options::get()->getString( Options::MILP_SOLVER_BOUND_TIGHTENING_TYPE ).ascii() )
         , _lpSolverString( Options::get()->getString( Options::LP_SOLVER ).ascii() )
+        , _sncExportTreeFileString( Options::get()->getString( Options::SNC_EXPORT_TREE_FILE ).ascii() )
+        , _sncImportTreeFileString( Options::get()->getString( Options::SNC_IMPORT_TREE_FILE ).ascii() )
         , _produceProofs( Options::get()->getBool( Options::PRODUCE_PROOFS ))
     {};
 
@@ -229,6 +410,7 @@ struct MarabouOptions {
     // Bool options
     Options::get()->setBool( Options::DNC_MODE, _snc );
     Options::get()->setBool( Options::RESTORE_TREE_STATES, _restoreTreeStates );
+    Options::get()->setBool( Options::NO_PARALLEL_DEEPSOI, _noParallelDeepSoI );
     Options::get()->setBool( Options::SOLVE_WITH_MILP, _solveWithMILP );
     Options::get()->setBool( Options::DUMP_BOUNDS, _dumpBounds );
     Options::get()->setBool( Options::PERFORM_LP_TIGHTENING_AFTER_SPLIT, _performLpTighteningAfterSplit );
@@ -255,10 +437,13 @@ struct MarabouOptions {
     Options::get()->setString( Options::SYMBOLIC_BOUND_TIGHTENING_TYPE, _tighteningStrategyString );
     Options::get()->setString( Options::MILP_SOLVER_BOUND_TIGHTENING_TYPE, _milpTighteningString );
     Options::get()->setString( Options::LP_SOLVER, _lpSolverString );
+    Options::get()->setString( Options::SNC_EXPORT_TREE_FILE, _sncExportTreeFileString );
+    Options::get()->setString( Options::SNC_IMPORT_TREE_FILE, _sncImportTreeFileString );
   }
 
     bool _snc;
     bool _restoreTreeStates;
+    bool _noParallelDeepSoI;
     bool _solveWithMILP;
     bool _dumpBounds;
     bool _performLpTighteningAfterSplit;
@@ -280,6 +465,8 @@ struct MarabouOptions {
     std::string _tighteningStrategyString;
     std::string _milpTighteningString;
     std::string _lpSolverString;
+    std::string _sncExportTreeFileString;
+    std::string _sncImportTreeFileString;
 };
 
 
@@ -335,6 +522,103 @@ std::string exitCodeToString( IEngine::ExitCode code )
     }
 }
 
+/*
+  Tighten the bounds of an input query with the preprocessor and the
+  bound tightening selected in the options (e.g., DeepPoly or the MILP
+  solver), without solving it.
+*/
+std::tuple<std::string, std::map<int, std::pair<double, double>>, Statistics>
+    calculateBounds(InputQuery &inputQuery, MarabouOptions &options, std::string redirect="")
+{
+    // Arguments: InputQuery object, filename to redirect output
+    // Returns: map from variable number to its (lower, upper) bounds
+    std::string resultString = "";
+    std::map<int, std::pair<double, double>> ret;
+    Statistics retStats;
+    int output=-1;
+    if(redirect.length()>0)
+        output=redirectOutputToFile(redirect);
+    try{
+        options.setOptions();
+        Engine engine;
+        if(engine.processInputQuery(inputQuery)){
+            engine.extractBounds(inputQuery);
+            for(unsigned int i=0; i<inputQuery.getNumberOfVariables(); ++i)
+                ret[i] = std::make_pair(inputQuery.getLowerBound(i), inputQuery.getUpperBound(i));
+        }
+        resultString = exitCodeToString(engine.getExitCode());
+        retStats = *(engine.getStatistics());
+    }
+    catch(const MarabouError &e){
+        printf( "Caught a MarabouError. Code: %u. Message: %s\n", e.getCode(), e.getUserMessage() );
+        resultString = "ERROR";
+        ret.clear();
+    }
+    if(output != -1)
+        restoreOutputStream(output);
+    return std::make_tuple(resultString, ret, retStats);
+}
+
+/*
+  Solve an input query whose options have already been set. Shared by
+  solve and solveBatch, which handle redirecting the output.
+*/
+std::tuple<std::string, std::map<int, double>, Statistics>
+    solveInputQuery(InputQuery &inputQuery)
+{
+    std::string resultString = "";
+    std::map<int, double> ret;
+    Statistics retStats;
+
+    bool dnc = Options::get()->getBool( Options::DNC_MODE );
+
+    Engine engine;
+
+    if(!engine.processInputQuery(inputQuery))
+        return std::make_tuple(exitCodeToString(engine.getExitCode()),
+                               ret, *(engine.getStatistics()));
+    if ( dnc )
+    {
+        auto dncManager = std::unique_ptr<DnCManager>( new DnCManager( &inputQuery ) );
+
+        dncManager->solve();
+        resultString = dncManager->getResultString().ascii();
+        switch ( dncManager->getExitCode() )
+        {
+        case DnCManager::SAT:
+        {
+            retStats = Statistics();
+            dncManager->getSolution( ret, inputQuery );
+            break;
+        }
+        case DnCManager::TIMEOUT:
+        {
+            retStats = Statistics();
+            retStats.timeout();
+            return std::make_tuple( resultString, ret, retStats );
+        }
+        default:
+            return std::make_tuple( resultString, ret, Statistics() ); // TODO: meaningful DnCStatistics
+        }
+    } else
+    {
+        unsigned timeoutInSeconds = Options::get()->getInt( Options::TIMEOUT );
+        engine.solve(timeoutInSeconds);
+
+        resultString = exitCodeToString(engine.getExitCode());
+
+        if (engine.getExitCode() == Engine::SAT)
+        {
+            engine.extractSolution(inputQuery);
+            for(unsigned int i=0; i<inputQuery.getNumberOfVariables(); ++i)
+                ret[i] = inputQuery.getSolutionValue(i);
+        }
+
+        retStats = *(engine.getStatistics());
+    }
+    return std::make_tuple(resultString, ret, retStats);
+}
+
 /* The default parameters here are just for readability, you should specify
  * them in the to make them work*/
 std::tuple<std::string, std::map<int, double>, Statistics>
@@ -343,81 +627,432 @@ std::tuple<std::string, std::map<int, double>, Statistics>
 {
     // Arguments: InputQuery object, filename to redirect output
     // Returns: map from variable number to value
-    std::string resultString = "";
-    std::map<int, double> ret;
-    Statistics retStats;
+    std::tuple<std::string, std::map<int, double>, Statistics> result;
     int output=-1;
     if(redirect.length()>0)
         output=redirectOutputToFile(redirect);
     try{
         options.setOptions();
+        result = solveInputQuery(inputQuery);
+    }
+    catch(const MarabouError &e){
+        printf( "Caught a MarabouError. Code: %u. Message: %s\n", e.getCode(), e.getUserMessage() );
+        return std::make_tuple
+            ("ERROR",
+             std::map<int, double>(), Statistics());
+    }
+    if(output != -1)
+        restoreOutputStream(output);
+    return result;
+}
 
-        bool dnc = Options::get()->getBool( Options::DNC_MODE );
+/*
+  Bound the shared query by the hull of all the property bounds. The
+  input box of every property lies inside the hull, so whatever is
+  derived over the hull holds for each property as well.
+*/
+InputQuery boundingHull(const InputQuery &baseQuery, const std::vector<InputQuery *> &properties)
+{
+    InputQuery hull = baseQuery;
+    if ( properties.empty() )
+        return hull;
 
-        Engine engine;
+    const InputQuery *first = properties.front();
+    for ( const auto &bound : first->getLowerBounds() )
+    {
+        unsigned variable = bound.first;
+        double lb = bound.second;
+        bool boundedByAll = true;
+        for ( const auto &property : properties )
+        {
+            if ( !property->getLowerBounds().exists( variable ) )
+                boundedByAll = false;
+            else
+                lb = std::min( lb, property->getLowerBounds().get( variable ) );
+        }
+        if ( boundedByAll && variable < hull.getNumberOfVariables() &&
+             lb > hull.getLowerBound( variable ) )
+            hull.setLowerBound( variable, lb );
+    }
+    for ( const auto &bound : first->getUpperBounds() )
+    {
+        unsigned variable = bound.first;
+        double ub = bound.second;
+        bool boundedByAll = true;
+        for ( const auto &property : properties )
+        {
+            if ( !property->getUpperBounds().exists( variable ) )
+                boundedByAll = false;
+            else
+                ub = std::max( ub, property->getUpperBounds().get( variable ) );
+        }
+        if ( boundedByAll && variable < hull.getNumberOfVariables() &&
+             ub < hull.getUpperBound( variable ) )
+            hull.setUpperBound( variable, ub );
+    }
+    return hull;
+}
+
+bool inputsBounded(const InputQuery &query)
+{
+    for ( const auto &variable : query.getInputVariables() )
+    {
+        if ( !FloatUtils::isFinite( query.getLowerBound( variable ) ) ||
+             !FloatUtils::isFinite( query.getUpperBound( variable ) ) )
+            return false;
+    }
+    return true;
+}
+
+/*
+  Tighten the bounds of the shared query once for a whole batch of
+  properties, with DeepPoly over the hull of the property bounds.
+*/
+void tightenSharedBounds(InputQuery &baseQuery, const std::vector<InputQuery *> &properties)
+{
+    if ( properties.empty() )
+        return;
+
+    // DeepPoly needs a bounded input region
+    InputQuery hull = boundingHull( baseQuery, properties );
+    if ( !inputsBounded( hull ) )
+        return;
+
+    if ( !hull.constructNetworkLevelReasoner() )
+        return;
+
+    NLR::NetworkLevelReasoner *nlr = hull.getNetworkLevelReasoner();
+    nlr->obtainCurrentBounds( hull );
+    nlr->deepPolyPropagation();
+
+    List<Tightening> tightenings;
+    nlr->getConstraintTightenings( tightenings );
+    for ( const auto &tightening : tightenings )
+    {
+        unsigned variable = tightening._variable;
+        if ( tightening._type == Tightening::LB &&
+             tightening._value > baseQuery.getLowerBound( variable ) )
+            baseQuery.setLowerBound( variable, tightening._value );
+        else if ( tightening._type == Tightening::UB &&
+                  tightening._value < baseQuery.getUpperBound( variable ) )
+            baseQuery.setUpperBound( variable, tightening._value );
+    }
+}
+
+/*
+  Add the bounds, equations and constraints of a property to a copy of
+  the shared query. Property bounds only ever tighten the shared ones.
+*/
+void applyProperty(InputQuery &query, const InputQuery &property)
+{
+    if ( property.getNumberOfVariables() > query.getNumberOfVariables() )
+        query.setNumberOfVariables( property.getNumberOfVariables() );
+
+    for ( const auto &bound : property.getLowerBounds() )
+    {
+        if ( bound.second > query.getLowerBound( bound.first ) )
+            query.setLowerBound( bound.first, bound.second );
+    }
+    for ( const auto &bound : property.getUpperBounds() )
+    {
+        if ( bound.second < query.getUpperBound( bound.first ) )
+            query.setUpperBound( bound.first, bound.second );
+    }
+
+    for ( const auto &equation : property.getEquations() )
+        query.addEquation( equation );
+    for ( const auto &constraint : property.getPiecewiseLinearConstraints() )
+        query.addPiecewiseLinearConstraint( constraint->duplicateConstraint() );
+    for ( const auto &constraint : property.getTranscendentalConstraints() )
+        query.addTranscendentalConstraint( constraint->duplicateConstraint() );
+}
+
+typedef std::tuple<std::string, std::map<int, double>, Statistics> SolveResult;
+
+/*
+  Solve the properties in order, skipping the rest of a group of
+  consecutive properties once one of them is sat or times out, if
+  stopEarly is set. A property that fails gets an ERROR result and the
+  batch goes on.
+*/
+template <typename SolveProperty>
+std::vector<SolveResult> solveGroups(unsigned numProperties, const std::vector<unsigned> &groupSizes,
+                                     bool stopEarly, SolveProperty solveProperty)
+{
+    std::vector<SolveResult> results;
+    unsigned groupEnd = 0;
+    unsigned group = 0;
+    for ( unsigned i = 0; i < numProperties; ++i )
+    {
+        if ( i == groupEnd )
+            groupEnd = ( group < groupSizes.size() ? i + groupSizes[group++] : numProperties );
+        try{
+            results.push_back( solveProperty( i ) );
+        }
+        catch(const MarabouError &e){
+            printf( "Caught a MarabouError. Code: %u. Message: %s\n", e.getCode(), e.getUserMessage() );
+            results.push_back( std::make_tuple( "ERROR", std::map<int, double>(), Statistics() ) );
+        }
 
-        if(!engine.processInputQuery(inputQuery))
-            return std::make_tuple(exitCodeToString(engine.getExitCode()),
-                                   ret, *(engine.getStatistics()));
-        if ( dnc )
+        const std::string &exitCode = std::get<0>( results.back() );
+        if ( stopEarly && ( exitCode == "sat" || exitCode == "TIMEOUT" ) )
+            i = groupEnd - 1;
+    }
+    return results;
+}
+
+/*
+  Whether the properties can be solved by one engine: every property
+  only bounds variables of the shared query and adds linear equations
+  over them, and the engine solves on its own with the native simplex.
+*/
+bool canShareEngine(const InputQuery &baseQuery, const std::vector<InputQuery *> &properties)
+{
+    if ( Options::get()->getBool( Options::DNC_MODE ) ||
+         Options::get()->getBool( Options::SOLVE_WITH_MILP ) ||
+         Options::get()->getBool( Options::PRODUCE_PROOFS ) ||
+         Options::get()->getLPSolverType() != LPSolverType::NATIVE ||
+         !GlobalConfiguration::PREPROCESS_INPUT_QUERY )
+        return false;
+
+    for ( const auto &property : properties )
+    {
+        if ( property->getNumberOfVariables() > baseQuery.getNumberOfVariables() ||
+             !property->getPiecewiseLinearConstraints().empty() ||
+             !property->getTranscendentalConstraints().empty() )
+            return false;
+    }
+    return true;
+}
+
+/*
+  Solve a batch of properties with a single engine. Every distinct left
+  hand side of the property equations is defined once in the shared
+  query by an auxiliary variable, so that each property only bounds
+  variables. The shared query is preprocessed once over the hull of the
+  property bounds, which also builds its network level reasoner once,
+  and each property is then solved with its bounds tightened in a
+  context pushed on top of the preprocessed query.
+*/
+std::vector<SolveResult> solveBatchWithSharedEngine(const InputQuery &baseQuery,
+                                                    const std::vector<InputQuery *> &properties,
+                                                    bool stopEarly, const std::vector<unsigned> &groupSizes)
+{
+    InputQuery sharedQuery = boundingHull( baseQuery, properties );
+    unsigned numVariables = baseQuery.getNumberOfVariables();
+
+    std::map<std::vector<std::pair<double, unsigned>>, unsigned> addendsToAuxiliary;
+    std::vector<List<Tightening>> propertyBounds( properties.size() );
+    for ( unsigned i = 0; i < properties.size(); ++i )
+    {
+        for ( const auto &bound : properties[i]->getLowerBounds() )
+            propertyBounds[i].append( Tightening( bound.first, bound.second, Tightening::LB ) );
+        for ( const auto &bound : properties[i]->getUpperBounds() )
+            propertyBounds[i].append( Tightening( bound.first, bound.second, Tightening::UB ) );
+
+        for ( const auto &equation : properties[i]->getEquations() )
         {
-            auto dncManager = std::unique_ptr<DnCManager>( new DnCManager( &inputQuery ) );
+            std::vector<std::pair<double, unsigned>> addends;
+            for ( const auto &addend : equation._addends )
+                addends.push_back( std::make_pair( addend._coefficient, addend._variable ) );
 
-            dncManager->solve();
-            resultString = dncManager->getResultString().ascii();
-            switch ( dncManager->getExitCode() )
-            {
-            case DnCManager::SAT:
+            if ( !addendsToAuxiliary.count( addends ) )
             {
-                retStats = Statistics();
-                dncManager->getSolution( ret, inputQuery );
-                break;
+                // aux = sum of the addends
+                unsigned auxiliary = sharedQuery.getNumberOfVariables();
+                sharedQuery.setNumberOfVariables( auxiliary + 1 );
+                Equation definition;
+                for ( const auto &addend : equation._addends )
+                    definition.addAddend( addend._coefficient, addend._variable );
+                definition.addAddend( -1, auxiliary );
+                definition.setScalar( 0 );
+                sharedQuery.addEquation( definition );
+                addendsToAuxiliary[addends] = auxiliary;
             }
-            case DnCManager::TIMEOUT:
+
+            unsigned auxiliary = addendsToAuxiliary[addends];
+            if ( equation._type != Equation::GE )
+                propertyBounds[i].append( Tightening( auxiliary, equation._scalar, Tightening::UB ) );
+            if ( equation._type != Equation::LE )
+                propertyBounds[i].append( Tightening( auxiliary, equation._scalar, Tightening::LB ) );
+        }
+    }
+
+    Engine engine;
+    if ( !engine.processInputQuery( sharedQuery ) )
+    {
+        // The hull is infeasible, and so is every property
+        SolveResult result = std::make_tuple( exitCodeToString( engine.getExitCode() ),
+                                              std::map<int, double>(), *( engine.getStatistics() ) );
+        return std::vector<SolveResult>( properties.size(), result );
+    }
+
+    EngineState initialState;
+    engine.storeState( initialState, TableauStateStorageLevel::STORE_ENTIRE_TABLEAU_STATE );
+    const Preprocessor *preprocessor = engine.getPreprocessor();
+    unsigned timeoutInSeconds = Options::get()->getInt( Options::TIMEOUT );
+
+    return solveGroups( properties.size(), groupSizes, stopEarly, [&]( unsigned i )
+    {
+        // Map the bounds of the property to the variables of the preprocessed query
+        PiecewiseLinearCaseSplit split;
+        for ( const auto &bound : propertyBounds[i] )
+        {
+            unsigned variable = bound._variable;
+            while ( preprocessor->variableIsMerged( variable ) )
+                variable = preprocessor->getMergedIndex( variable );
+            if ( preprocessor->variableIsFixed( variable ) )
             {
-                retStats = Statistics();
-                retStats.timeout();
-                return std::make_tuple( resultString, ret, retStats );
-            }
-            default:
-                return std::make_tuple( resultString, ret, Statistics() ); // TODO: meaningful DnCStatistics
+                double value = preprocessor->getFixedValue( variable );
+                if ( ( bound._type == Tightening::LB && FloatUtils::gt( bound._value, value ) ) ||
+                     ( bound._type == Tightening::UB && FloatUtils::lt( bound._value, value ) ) )
+                    return std::make_tuple( std::string( "unsat" ), std::map<int, double>(), Statistics() );
+                continue;
             }
-        } else
+            split.storeBoundTightening( Tightening( preprocessor->getNewIndex( variable ),
+                                                    bound._value, bound._type ) );
+        }
+
+        engine.restoreState( initialState );
+        engine.reset();
+        engine.pushSubQueryContext();
+        try{
+            engine.applySnCSplit( split, Stringf( "%u", i ) );
+            engine.solve( timeoutInSeconds );
+        }
+        catch(const MarabouError &){
+            // Leave the engine at the root context for the next property
+            engine.popSubQueryContext();
+            throw;
+        }
+
+        std::map<int, double> ret;
+        if ( engine.getExitCode() == Engine::SAT )
         {
-            unsigned timeoutInSeconds = Options::get()->getInt( Options::TIMEOUT );
-            engine.solve(timeoutInSeconds);
+            InputQuery solution;
+            solution.setNumberOfVariables( numVariables );
+            engine.extractSolution( solution );
+            for ( unsigned j = 0; j < numVariables; ++j )
+                ret[j] = solution.getSolutionValue( j );
+        }
+        SolveResult result = std::make_tuple( exitCodeToString( engine.getExitCode() ), ret,
+                                              *( engine.getStatistics() ) );
 
-            resultString = exitCodeToString(engine.getExitCode());
+        // Drop the bounds of the property
+        engine.popSubQueryContext();
+        return result;
+    });
+}
 
-            if (engine.getExitCode() == Engine::SAT)
-            {
-                engine.extractSolution(inputQuery);
-                for(unsigned int i=0; i<inputQuery.getNumberOfVariables(); ++i)
-                    ret[i] = inputQuery.getSolutionValue(i);
-            }
+std::vector<SolveResult>
+    solveBatch(InputQuery &baseQuery, std::vector<InputQuery *> properties,
+               MarabouOptions &options, std::string redirect="", bool stopEarly=false,
+               std::vector<unsigned> groupSizes=std::vector<unsigned>())
+{
+    // Arguments: shared InputQuery, one InputQuery per property holding only
+    //            the property bounds, equations and constraints
+    // Returns: one (exitCode, vals, stats) tuple per property that was solved
+    std::vector<SolveResult> results;
+    int output=-1;
+    if(redirect.length()>0)
+        output=redirectOutputToFile(redirect);
+    try{
+        options.setOptions();
 
-            retStats = *(engine.getStatistics());
+        if ( canShareEngine( baseQuery, properties ) &&
+             inputsBounded( boundingHull( baseQuery, properties ) ) )
+            results = solveBatchWithSharedEngine( baseQuery, properties, stopEarly, groupSizes );
+        else
+        {
+            // Each property is solved on its own copy of the tightened shared query
+            InputQuery sharedQuery = baseQuery;
+            tightenSharedBounds( sharedQuery, properties );
+            results = solveGroups( properties.size(), groupSizes, stopEarly, [&]( unsigned i )
+            {
+                InputQuery query = sharedQuery;
+                applyProperty( query, *properties[i] );
+                return solveInputQuery( query );
+            });
         }
     }
     catch(const MarabouError &e){
         printf( "Caught a MarabouError. Code: %u. Message: %s\n", e.getCode(), e.getUserMessage() );
-        return std::make_tuple
-            ("ERROR",
-             ret, retStats);
+        results.push_back( std::make_tuple( "ERROR", std::map<int, double>(), Statistics() ) );
     }
     if(output != -1)
         restoreOutputStream(output);
-    return std::make_tuple(resultString, ret, retStats);
+    return results;
 }
 
-void saveQuery(InputQuery& inputQuery, std::string filename){
-    inputQuery.saveQuery(String(filename));
+void saveQuery(InputQuery& inputQuery, std::string filename, bool binary){
+    inputQuery.saveQuery(String(filename), binary);
 }
 
 InputQuery loadQuery(std::string filename){
     return QueryLoader::loadQuery(String(filename));
 }
 
+bool compressionSupported(std::string filename){
+    return CompressedFile::supported( CompressedFile::compressionFromFileName( String( filename ) ) );
+}
+
+DoubleArray evaluateNetwork(InputQuery& inputQuery, DoubleArray inputs){
+    // Row i of inputs holds the values of the input variables, ordered by their input index
+    auto x = inputs.unchecked<2>();
+    unsigned numInputs = inputQuery.getNumInputVariables();
+    unsigned numOutputs = inputQuery.getNumOutputVariables();
+    if ( x.shape( 1 ) != (py::ssize_t)numInputs )
+        throw py::value_error( "evaluateNetwork: expected one column per input variable" );
+
+    if ( !inputQuery.constructNetworkLevelReasoner() )
+        throw py::value_error( "evaluateNetwork: the network level reasoner could not be constructed" );
+    NLR::NetworkLevelReasoner *nlr = inputQuery.getNetworkLevelReasoner();
+
+    // Position of every input variable in the input layer, and the neuron of every output variable
+    NLR::Layer *inputLayer = nlr->getLayer( 0 );
+    std::vector<unsigned> inputNeurons( numInputs );
+    for ( unsigned i = 0; i < numInputs; ++i )
+        inputNeurons[i] = inputLayer->variableToNeuron( inputQuery.inputVariableByIndex( i ) );
+
+    std::vector<NLR::NeuronIndex> outputNeurons;
+    for ( unsigned i = 0; i < numOutputs; ++i )
+    {
+        unsigned variable = inputQuery.outputVariableByIndex( i );
+        bool found = false;
+        for ( unsigned layer = 0; layer < nlr->getNumberOfLayers() && !found; ++layer )
+        {
+            const NLR::Layer *nlrLayer = nlr->getLayer( layer );
+            for ( unsigned neuron = 0; neuron < nlrLayer->getSize() && !found; ++neuron )
+            {
+                if ( nlrLayer->neuronHasVariable( neuron ) && nlrLayer->neuronToVariable( neuron ) == variable )
+                {
+                    outputNeurons.push_back( NLR::NeuronIndex( layer, neuron ) );
+                    found = true;
+                }
+            }
+        }
+        if ( !found )
+            throw py::value_error( Stringf( "evaluateNetwork: output variable %u is not computed by the network "
+                                            "level reasoner", variable ).ascii() );
+    }
+
+    DoubleArray outputs( { (py::ssize_t)x.shape( 0 ), (py::ssize_t)numOutputs } );
+    auto y = outputs.mutable_unchecked<2>();
+    std::vector<double> input( inputLayer->getSize() );
+    for ( py::ssize_t row = 0; row < x.shape( 0 ); ++row )
+    {
+        for ( unsigned i = 0; i < numInputs; ++i )
+            input[inputNeurons[i]] = x( row, i );
+        inputLayer->setAssignment( input.data() );
+        for ( unsigned layer = 1; layer < nlr->getNumberOfLayers(); ++layer )
+            nlr->getLayer( layer )->computeAssignment();
+
+        for ( unsigned i = 0; i < numOutputs; ++i )
+            y( row, i ) = nlr->getLayer( outputNeurons[i]._layer )->getAssignment( outputNeurons[i]._neuron );
+    }
+    return outputs;
+}
+
 // Code necessary to generate Python library
 // Describes which classes and functions are exposed to API
 PYBIND11_MODULE(MarabouCore, m) {
@@ -439,6 +1074,9 @@ PYBIND11_MODULE(MarabouCore, m) {
         .def_readwrite("_solveWithMILP", &MarabouOptions::_solveWithMILP)
         .def_readwrite("_dumpBounds", &MarabouOptions::_dumpBounds)
         .def_readwrite("_restoreTreeStates", &MarabouOptions::_restoreTreeStates)
+        .def_readwrite("_noParallelDeepSoI", &MarabouOptions::_noParallelDeepSoI)
+        .def_readwrite("_sncExportTreeFile", &MarabouOptions::_sncExportTreeFileString)
+        .def_readwrite("_sncImportTreeFile", &MarabouOptions::_sncImportTreeFileString)
         .def_readwrite("_splittingStrategy", &MarabouOptions::_splittingStrategyString)
         .def_readwrite("_sncSplittingStrategy", &MarabouOptions::_sncSplittingStrategyString)
         .def_readwrite("_tighteningStrategy", &MarabouOptions::_tighteningStrategyString)
@@ -462,6 +1100,24 @@ PYBIND11_MODULE(MarabouCore, m) {
                  InputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): the preprocessed input query
          )pbdoc",
          py::arg("inputQuery"), py::arg("options"), py::arg("redirect") = "", py::arg("returnFullyProcessedQuery") = false);
+    m.def("calculateBounds", &calculateBounds, R"pbdoc(
+        Tightens the bounds of an InputQuery without solving it
+
+        The preprocessor and the bound tightening selected in the options (e.g., DeepPoly or
+        the MILP solver) are run, and the bounds of the query are tightened in place.
+
+        Args:
+            inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Marabou input query to be tightened
+            options (class:`~maraboupy.MarabouCore.Options`): Object defining the options used for Marabou
+            redirect (str, optional): Filepath to direct standard output, defaults to ""
+
+        Returns:
+            (tuple): tuple containing:
+                - exitCode (str): "unsat" if the bounds are inconsistent, "UNKNOWN" otherwise, or "ERROR"
+                - bounds (Dict[int, Tuple[float, float]]): Empty dictionary if UNSAT, otherwise the lower and upper bound of every variable
+                - stats (:class:`~maraboupy.MarabouCore.Statistics`): A Statistics object to how Marabou performed
+        )pbdoc",
+        py::arg("inputQuery"), py::arg("options"), py::arg("redirect") = "");
     m.def("solve", &solve, R"pbdoc(
         Takes in a description of the InputQuery and returns the solution
 
@@ -477,16 +1133,48 @@ PYBIND11_MODULE(MarabouCore, m) {
                 - stats (:class:`~maraboupy.MarabouCore.Statistics`): A Statistics object to how Marabou performed
         )pbdoc",
         py::arg("inputQuery"), py::arg("options"), py::arg("redirect") = "");
+    m.def("solveBatch", &solveBatch, R"pbdoc(
+        Solves a batch of properties over one shared InputQuery
+
+        The shared query is preprocessed once over the hull of the property bounds, which also
+        builds its network level reasoner once, and one engine solves every property. Each
+        distinct left hand side of the property equations is defined once in the shared query
+        by an auxiliary variable, so a property only tightens bounds before it is solved. When
+        the properties add variables or non-linear constraints, or the options need another
+        engine (SnC mode, MILP, proofs or an LP solver other than the native one), DeepPoly is
+        run once over the hull instead and each property is solved on a copy of the tightened query.
+
+        Args:
+            baseQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Query encoding the network, shared by all properties
+            properties (list of :class:`~maraboupy.MarabouCore.InputQuery`): One query per property, holding only
+                the bounds, equations and constraints that the property adds to the shared query
+            options (class:`~maraboupy.MarabouCore.Options`): Object defining the options used for Marabou
+            redirect (str, optional): Filepath to direct standard output, defaults to ""
+            stopEarly (bool, optional): If true, skip the rest of a group after the first property of the
+                group that is sat or times out
+            groupSizes (list of int, optional): Sizes of the groups of consecutive properties, defaults to
+                a single group of all properties
+
+        Returns:
+            (list of tuples): one (exitCode, vals, stats) tuple per solved property, as returned by :func:`solve`
+        )pbdoc",
+        py::arg("baseQuery"), py::arg("properties"), py::arg("options"), py::arg("redirect") = "",
+        py::arg("stopEarly") = false, py::arg("groupSizes") = std::vector<unsigned>());
     m.def("saveQuery", &saveQuery, R"pbdoc(
         Serializes the inputQuery in the given filename
 
         Args:
             inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Marabou input query to be saved
-            filename (str): Name of file to save query
+            filename (str): Name of file to save query. Names ending in .gz or .zst are
+                written gzip or zstd compressed
+            binary (bool): If true, write the versioned binary format, which loads much faster
+                than the text format for large queries
         )pbdoc",
-        py::arg("inputQuery"), py::arg("filename"));
+        py::arg("inputQuery"), py::arg("filename"), py::arg("binary") = false);
     m.def("loadQuery", &loadQuery, R"pbdoc(
-        Loads and returns a serialized InputQuery from the given filename
+        Loads and returns a serialized InputQuery from the given filename.
+        Both the text and the binary format are accepted, and gzip or zstd
+        compressed files are decompressed while they are read
 
         Args:
             filename (str): Name of file to load into an InputQuery
@@ -495,6 +1183,34 @@ PYBIND11_MODULE(MarabouCore, m) {
             :class:`~maraboupy.MarabouCore.InputQuery`
         )pbdoc",
         py::arg("filename"));
+    m.def("compressionSupported", &compressionSupported, R"pbdoc(
+        Checks whether this build can read and write files compressed as their name implies
+
+        Args:
+            filename (str): Name of a query file. Names ending in .gz or .zst are gzip or zstd
+                compressed, and other names are not compressed
+
+        Returns:
+            (bool): True if the compression of the file is supported
+        )pbdoc",
+        py::arg("filename"));
+    m.def("evaluateNetwork", &evaluateNetwork, R"pbdoc(
+        Evaluates the network encoded by an InputQuery on a batch of inputs, without solving
+
+        The network level reasoner is built from the query once, and a forward pass is run
+        for every row of inputs. This is much faster than fixing the input bounds and calling
+        :func:`solve` for every input.
+
+        Args:
+            inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Query encoding the network
+            inputs (numpy array of float): Array of shape (n, number of input variables), holding the
+                values of the input variables ordered by their input index
+
+        Returns:
+            (numpy array of float): Array of shape (n, number of output variables), holding the values
+            of the output variables ordered by their output index
+        )pbdoc",
+        py::arg("inputQuery"), py::arg("inputs"));
     m.def("addReluConstraint", &addReluConstraint, R"pbdoc(
         Add a Relu constraint to the InputQuery
 
@@ -540,6 +1256,36 @@ PYBIND11_MODULE(MarabouCore, m) {
             f (int): Output variable
         )pbdoc",
         py::arg("inputQuery"), py::arg("b"), py::arg("f"));
+    m.def("addReluGradDisjunctions", &addReluGradDisjunctions, R"pbdoc(
+        Add the disjunctions computing the gradient through ReLUs to the InputQuery
+
+        For v_out = ReLU(v_in), with gradients g_in and g_out, two disjunctions are added:
+        (v_in <= -zero or g_in = g_out) and (v_in >= 0 or g_in = 0).
+
+        Args:
+            inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Marabou input query to be solved
+            relus (numpy array of int): Array of shape (n, 4), holding v_in, v_out, g_in and g_out of each ReLU
+            zero (float): Margin below zero under which a ReLU is considered inactive
+        )pbdoc",
+        py::arg("inputQuery"), py::arg("relus"), py::arg("zero"));
+    m.def("addReluGradConstraint", &addReluGradConstraint, R"pbdoc(
+        Add a ReLU gradient constraint gIn = ReLU'(b) * gOut to the InputQuery
+
+        Args:
+            inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Marabou input query to be solved
+            b (int): Input variable of the ReLU
+            gOut (int): Gradient of the output of the ReLU
+            gIn (int): Gradient of the input of the ReLU
+        )pbdoc",
+        py::arg("inputQuery"), py::arg("b"), py::arg("gOut"), py::arg("gIn"));
+    m.def("addReluGradConstraints", &addReluGradConstraints, R"pbdoc(
+        Add a ReLU gradient constraint for each row of an array to the InputQuery
+
+        Args:
+            inputQuery (:class:`~maraboupy.MarabouCore.InputQuery`): Marabou input query to be solved
+            relus (numpy array of int): Array of shape (n, 4), holding v_in, v_out, g_in and g_out of each ReLU
+        )pbdoc",
+        py::arg("inputQuery"), py::arg("relus"));
     m.def("addDisjunctionConstraint", &addDisjunctionConstraint, R"pbdoc(
         Add a disjunction constraint to the InputQuery
 
@@ -565,12 +1311,70 @@ PYBIND11_MODULE(MarabouCore, m) {
         .def("inputVariableByIndex", &InputQuery::inputVariableByIndex)
         .def("markInputVariable", &InputQuery::markInputVariable)
         .def("markOutputVariable", &InputQuery::markOutputVariable)
-        .def("outputVariableByIndex", &InputQuery::outputVariableByIndex);
+        .def("outputVariableByIndex", &InputQuery::outputVariableByIndex)
+        .def("addEquations", &addEquations, R"pbdoc(
+        Add equations given in compressed sparse row format
+
+        Equation i is sum_k coeffs[k] * cols[k] (type types[i]) scalars[i], for k in [rowPtr[i], rowPtr[i+1]).
+        A ValueError is raised if the row pointers do not go from 0 to len(cols) without decreasing, if a type
+        is not an EquationType, or if a variable is not a variable of the query. The bulk methods below check
+        their variables in the same way.
+
+        Args:
+            rowPtr (numpy array of int): Start of each equation in cols and coeffs, followed by the number of addends
+            cols (numpy array of int): Variable of each addend
+            coeffs (numpy array of float): Coefficient of each addend
+            scalars (numpy array of float): Scalar of each equation
+            types (numpy array of int): :class:`~maraboupy.MarabouCore.EquationType` of each equation, as integer
+        )pbdoc",
+        py::arg("rowPtr"), py::arg("cols"), py::arg("coeffs"), py::arg("scalars"), py::arg("types"))
+        .def("setLowerBounds", &setLowerBounds, R"pbdoc(
+        Set the lower bounds of several variables
+
+        Args:
+            vars (numpy array of int): Variables
+            values (numpy array of float): Lower bound of each variable
+        )pbdoc",
+        py::arg("vars"), py::arg("values"))
+        .def("setUpperBounds", &setUpperBounds, R"pbdoc(
+        Set the upper bounds of several variables
+
+        Args:
+            vars (numpy array of int): Variables
+            values (numpy array of float): Upper bound of each variable
+        )pbdoc",
+        py::arg("vars"), py::arg("values"))
+        .def("addReluConstraints", &addReluConstraints, R"pbdoc(
+        Add Relu constraints
+
+        Args:
+            pairs (numpy array of int): Array of shape (n, 2), each row holds the input and output variable of a Relu
+        )pbdoc",
+        py::arg("pairs"))
+        .def("addSigmoidConstraints", &addSigmoidConstraints, R"pbdoc(
+        Add Sigmoid constraints
+
+        Args:
+            pairs (numpy array of int): Array of shape (n, 2), each row holds the input and output variable of a Sigmoid
+        )pbdoc",
+        py::arg("pairs"))
+        .def("addMaxConstraints", &addMaxConstraints, R"pbdoc(
+        Add Max constraints
+
+        The inputs of constraint i are elements[k] for k in [elementPtr[i], elementPtr[i+1])
+
+        Args:
+            elementPtr (numpy array of int): Start of the inputs of each constraint in elements, followed by the number of inputs
+            elements (numpy array of int): Input variables of all constraints
+            outputs (numpy array of int): Output variable of each constraint
+        )pbdoc",
+        py::arg("elementPtr"), py::arg("elements"), py::arg("outputs"));
     py::enum_<PiecewiseLinearFunctionType>(m, "PiecewiseLinearFunctionType")
         .value("ReLU", PiecewiseLinearFunctionType::RELU)
         .value("AbsoluteValue", PiecewiseLinearFunctionType::ABSOLUTE_VALUE)
         .value("Max", PiecewiseLinearFunctionType::MAX)
         .value("Disjunction", PiecewiseLinearFunctionType::DISJUNCTION)
+        .value("ReluGrad", PiecewiseLinearFunctionType::RELU_GRAD)
         .export_values();
     py::class_<Equation> eq(m, "Equation");
     py::enum_<Equation::EquationType>(eq, "EquationType")
@@ -655,5 +1459,22 @@ PYBIND11_MODULE(MarabouCore, m) {
         .def("getLongAttribute", &Statistics::getLongAttribute)
         .def("getDoubleAttribute", &Statistics::getDoubleAttribute)
         .def("getTotalTimeInMicro", &Statistics::getTotalTimeInMicro)
-        .def("hasTimedOut", &Statistics::hasTimedOut);
+        .def("hasTimedOut", &Statistics::hasTimedOut)
+        .def("merge", &Statistics::merge, R"pbdoc(
+        Fold in the statistics of another run, e.g. of a query solved in parallel with this one.
+        Counters and times are added up, and all other attributes keep the more extreme value
+
+        Args:
+            other (:class:`~maraboupy.MarabouCore.Statistics`): Statistics to fold in
+        )pbdoc",
+        py::arg("other"))
+        .def(py::pickle(
+            [](const Statistics &statistics) {
+                return py::bytes(statistics.serialize().ascii());
+            },
+            [](py::bytes state) {
+                Statistics statistics;
+                statistics.deserialize(String(std::string(state).c_str()));
+                return statistics;
+            }));
 }
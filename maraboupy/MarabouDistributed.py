@@ -0,0 +1,468 @@
+'''
+Top contributors (to current version):
+    - Andrew Wu
+
+This file is part of the Marabou project.
+Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+in the top-level source directory) and their institutional affiliations.
+All rights reserved. See the file COPYING in the top-level source
+directory for licensing information.
+
+MarabouDistributed solves a query in split-and-conquer (SnC) mode with worker processes that
+may run on other machines. A coordinator divides the input region of the query, hands the
+sub-regions to the workers over TCP or Unix sockets, and divides further the sub-regions that
+time out. Sub-regions held by a worker that disconnects or stops responding are handed to
+another worker.
+
+Workers on other machines are started with::
+
+    python -m maraboupy.MarabouDistributed worker --address <host>:<port> --authkey <hex key>
+'''
+
+import argparse
+import collections
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener, wait
+from maraboupy import MarabouCore
+from maraboupy.MarabouUtils import optionValues, optionsFromValues
+
+
+def divideRegion(region, numBisects):
+    """Divide an input region by repeatedly bisecting the largest interval of each sub-region,
+    as the largest-interval divider of the SnC mode does
+
+    Args:
+        region (list of tuples): One (variable, lower bound, upper bound) tuple per input variable
+        numBisects (int): Number of times to bisect, which creates 2^numBisects sub-regions
+
+    Returns:
+        (list): the sub-regions, in the same format as region
+
+    :meta private:
+    """
+    regions = [region]
+    for _ in range(numBisects):
+        newRegions = []
+        for region in regions:
+            index = max(range(len(region)), key=lambda i: region[i][2] - region[i][1])
+            var, lb, ub = region[index]
+            mid = (lb + ub) / 2
+            newRegions.append(region[:index] + [(var, lb, mid)] + region[index + 1:])
+            newRegions.append(region[:index] + [(var, mid, ub)] + region[index + 1:])
+        regions = newRegions
+    return regions
+
+
+def runWorker(address, authkey):
+    """Connect to a coordinator and solve the sub-regions it sends, one at a time,
+    until it stops or the connection is lost
+
+    Args:
+        address (tuple or str): (host, port) of a coordinator listening on TCP, or the path of its Unix socket
+        authkey (bytes): Key shared with the coordinator
+    """
+    with Client(address, authkey=authkey) as connection:
+        queryBytes, values = connection.recv()
+        with tempfile.TemporaryDirectory() as dirname:
+            queryFile = os.path.join(dirname, "query.ipqb")
+            with open(queryFile, "wb") as f:
+                f.write(queryBytes)
+            baseQuery = MarabouCore.loadQuery(queryFile)
+
+        options = optionsFromValues(values)
+        # Each worker solves one region at a time, the coordinator divides them
+        options._snc = False
+
+        while True:
+            try:
+                task = connection.recv()
+            except (EOFError, OSError):
+                break
+            if task is None:
+                break
+
+            queryId, region, timeoutInSeconds = task
+            ipq = MarabouCore.InputQuery(baseQuery)
+            for var, lb, ub in region:
+                ipq.setLowerBound(var, lb)
+                ipq.setUpperBound(var, ub)
+            options._timeoutInSeconds = timeoutInSeconds
+            exitCode, vals, stats = MarabouCore.solve(ipq, options)
+            try:
+                connection.send((queryId, exitCode, vals, stats))
+            except (EOFError, OSError):
+                break
+
+
+class Coordinator:
+    """Solve a query in SnC mode with worker processes connected over sockets
+
+    The input region of the query is divided into 2^initialSplits sub-regions, each solved
+    with the initial timeout. A sub-region that times out is divided into 2^onlineSplits
+    sub-regions whose timeout is multiplied by the timeout factor. The number of splits and the
+    timeouts are read from the options, as in the SnC mode of :func:`~maraboupy.MarabouCore.solve`.
+
+    Workers can connect at any time, either started with :func:`startLocalWorkers` or with
+    :func:`runWorker` in another process. A worker that disconnects, or that does not answer
+    within twice the timeout of its sub-region plus lostWorkerTimeout seconds, is considered
+    lost and its sub-region is solved again by another worker. A sub-region that was lost more than
+    maxRetries times, or that is left without any worker for lostWorkerTimeout seconds once workers
+    were started or lost, makes :func:`solve` return ERROR. The workers stay connected between calls
+    to :func:`solve` until the coordinator is closed.
+
+    Args:
+        ipq (:class:`~maraboupy.MarabouCore.InputQuery`): Query to solve, whose input variables have finite bounds
+        options (:class:`~maraboupy.MarabouCore.Options`, optional): Options to solve the query with
+        address (tuple or str, optional): (host, port) to listen on for TCP connections, or the path
+            of a Unix socket. Port 0 picks a free port. Defaults to ("localhost", 0)
+        authkey (bytes, optional): Key that the workers must present, defaults to a random key
+        lostWorkerTimeout (float, optional): Seconds to wait for a late worker, defaults to 10
+        maxRetries (int, optional): Number of times a lost sub-region is solved again, defaults to 3
+
+    Attributes:
+        address (tuple or str): Address that the coordinator listens on
+        authkey (bytes): Key that the workers must present
+        numLostWorkers (int): Number of workers lost so far
+    """
+    def __init__(self, ipq, options=None, address=("localhost", 0), authkey=None, lostWorkerTimeout=10,
+                 maxRetries=3):
+        if options is None:
+            options = MarabouCore.Options()
+        self.options = options
+        self.authkey = authkey if authkey is not None else os.urandom(16)
+        self.lostWorkerTimeout = lostWorkerTimeout
+        self.maxRetries = maxRetries
+        self.numLostWorkers = 0
+
+        self.inputRegion = []
+        for i in range(ipq.getNumInputVariables()):
+            var = ipq.inputVariableByIndex(i)
+            self.inputRegion.append((var, ipq.getLowerBound(var), ipq.getUpperBound(var)))
+
+        with tempfile.TemporaryDirectory() as dirname:
+            queryFile = os.path.join(dirname, "query.ipqb")
+            MarabouCore.saveQuery(ipq, queryFile, True)
+            with open(queryFile, "rb") as f:
+                self.queryBytes = f.read()
+        self.optionValues = optionValues(options)
+
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.closing = False
+        self.newConnections = []
+        self.connectionsLock = threading.Lock()
+
+        # The connected workers that wait for a sub-region, that solve a sub-region of the current
+        # solve, and that solve a sub-region of an earlier solve which returned before they answered
+        self.idle = collections.deque()
+        self.inFlight = {}
+        self.stale = set()
+
+        self.acceptThread = threading.Thread(target=self.acceptWorkers, daemon=True)
+        self.acceptThread.start()
+        self.localWorkers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def acceptWorkers(self):
+        """Accept the connections of workers and send them the query, in a background thread
+
+        :meta private:
+        """
+        while not self.closing:
+            try:
+                connection = self.listener.accept()
+            except (EOFError, OSError, multiprocessing.AuthenticationError):
+                if self.closing:
+                    break
+                continue
+            if self.closing:
+                connection.close()
+                break
+            try:
+                connection.send((self.queryBytes, self.optionValues))
+            except (EOFError, OSError):
+                connection.close()
+                continue
+            with self.connectionsLock:
+                self.newConnections.append(connection)
+
+    def startLocalWorkers(self, numWorkers):
+        """Start worker processes on this machine, which are stopped when the coordinator is closed
+
+        Args:
+            numWorkers (int): Number of worker processes to start
+        """
+        context = multiprocessing.get_context("spawn")
+        for _ in range(numWorkers):
+            process = context.Process(target=runWorker, args=(self.address, self.authkey), daemon=True)
+            process.start()
+            self.localWorkers.append(process)
+
+    def hasWorkers(self):
+        """Whether a worker is connected, or a local worker is still running and may connect
+
+        :meta private:
+        """
+        with self.connectionsLock:
+            if self.newConnections:
+                return True
+        return (len(self.idle) > 0 or len(self.inFlight) > 0 or len(self.stale) > 0 or
+                any(process.is_alive() for process in self.localWorkers))
+
+    def solve(self, timeoutInSeconds=None, verbose=False):
+        """Solve the query with the connected workers
+
+        Args:
+            timeoutInSeconds (int, optional): Timeout for the whole query, 0 for none. Defaults to the timeout of the options
+            verbose (bool, optional): Whether to print the result of each sub-region, defaults to False
+
+        Returns:
+            (tuple): tuple containing:
+                - exitCode (str): A string representing the exit code (sat/unsat/TIMEOUT/ERROR/UNKNOWN/QUIT_REQUESTED).
+                - vals (Dict[int, float]): Empty dictionary if UNSAT, otherwise a dictionary of SATisfying values for variables
+                - stats (:class:`~maraboupy.MarabouCore.Statistics`): The statistics of the sub-regions that were solved,
+                  None if no sub-region was solved
+        """
+        if timeoutInSeconds is None:
+            timeoutInSeconds = self.options._timeoutInSeconds
+        startTime = time.time()
+
+        initialTimeout = self.options._initialTimeout
+        pending = collections.deque()
+        for i, region in enumerate(divideRegion(self.inputRegion, self.options._initialDivides)):
+            pending.append((str(i + 1), region, initialTimeout))
+
+        stats, timedOutStats = None, None
+        numRetries = collections.Counter()
+        failedQueryId = None
+        numLostWorkers = self.numLostWorkers
+        lastWorkerTime = time.time()
+
+        def loseWorker(connection):
+            nonlocal failedQueryId
+            connection.close()
+            if connection in self.idle:
+                self.idle.remove(connection)
+            self.stale.discard(connection)
+            if connection in self.inFlight:
+                # Solve the sub-region of the worker first once another worker is available
+                task = self.inFlight.pop(connection)[0]
+                numRetries[task[0]] += 1
+                if numRetries[task[0]] > self.maxRetries:
+                    failedQueryId = task[0]
+                else:
+                    pending.appendleft(task)
+            self.numLostWorkers += 1
+
+        def result(exitCode, vals=None):
+            # The answers of the workers that are still solving are ignored by the next solve
+            self.stale.update(self.inFlight)
+            self.inFlight.clear()
+            resultStats = stats
+            if exitCode == "TIMEOUT" and timedOutStats is not None:
+                resultStats = timedOutStats
+                if stats is not None:
+                    resultStats.merge(stats)
+            return [exitCode, vals if vals is not None else {}, resultStats]
+
+        while pending or self.inFlight:
+            with self.connectionsLock:
+                self.idle.extend(self.newConnections)
+                self.newConnections = []
+
+            # Hand the pending sub-regions to the idle workers
+            while pending and self.idle:
+                connection = self.idle.popleft()
+                task = pending.popleft()
+                try:
+                    connection.send(task)
+                except (EOFError, OSError):
+                    pending.appendleft(task)
+                    loseWorker(connection)
+                    continue
+                self.inFlight[connection] = (task, time.time())
+
+            if timeoutInSeconds > 0 and time.time() - startTime >= timeoutInSeconds:
+                return result("TIMEOUT")
+
+            for connection in wait(list(self.inFlight) + list(self.stale), timeout=0.1):
+                try:
+                    queryId, exitCode, vals, regionStats = connection.recv()
+                except (EOFError, OSError):
+                    loseWorker(connection)
+                    continue
+                self.idle.append(connection)
+                if connection in self.stale:
+                    self.stale.remove(connection)
+                    continue
+                (_, region, regionTimeout), _ = self.inFlight.pop(connection)
+                if verbose:
+                    print("Query {} {}, {} pending".format(queryId, exitCode, len(pending) + len(self.inFlight)))
+
+                if exitCode == "TIMEOUT":
+                    if timedOutStats is None:
+                        timedOutStats = regionStats
+                    else:
+                        timedOutStats.merge(regionStats)
+                    newTimeout = int(regionTimeout * self.options._timeoutFactor)
+                    subRegions = divideRegion(region, self.options._onlineDivides)
+                    for i, subRegion in enumerate(subRegions):
+                        pending.append(("{}-{}".format(queryId, i + 1), subRegion, newTimeout))
+                    continue
+
+                if stats is None:
+                    stats = regionStats
+                else:
+                    stats.merge(regionStats)
+                if exitCode != "unsat":
+                    # sat, or the worker could not solve the sub-region
+                    return result(exitCode, vals)
+
+            # Give up on the workers that are much later than the timeout of their sub-region
+            now = time.time()
+            for connection, ((_, _, regionTimeout), sentTime) in list(self.inFlight.items()):
+                if regionTimeout > 0 and now - sentTime > 2 * regionTimeout + self.lostWorkerTimeout:
+                    loseWorker(connection)
+
+            if failedQueryId is not None:
+                if verbose:
+                    print("Query {} lost {} workers".format(failedQueryId, numRetries[failedQueryId]))
+                return result("ERROR")
+
+            # Without workers the pending sub-regions are never solved, unless workers connect in time
+            if self.hasWorkers():
+                lastWorkerTime = now
+            elif ((self.localWorkers or self.numLostWorkers > numLostWorkers) and
+                  now - lastWorkerTime > self.lostWorkerTimeout):
+                if verbose:
+                    print("No worker left, {} pending".format(len(pending)))
+                return result("ERROR")
+
+        return result("unsat")
+
+    def close(self):
+        """Stop the workers and stop listening for new ones
+        """
+        if self.closing:
+            return
+        self.closing = True
+
+        # Wake up the thread waiting for connections
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except (EOFError, OSError, multiprocessing.AuthenticationError):
+            pass
+        self.acceptThread.join()
+        self.listener.close()
+
+        # Workers that are still solving read the request to stop once they are done
+        with self.connectionsLock:
+            connections, self.newConnections = self.newConnections, []
+        connections += list(self.idle) + list(self.inFlight) + list(self.stale)
+        self.idle.clear()
+        self.inFlight.clear()
+        self.stale.clear()
+        for connection in connections:
+            try:
+                connection.send(None)
+            except (EOFError, OSError):
+                pass
+            connection.close()
+
+        # Local workers that are still solving a sub-region are stopped
+        for process in self.localWorkers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.localWorkers = []
+
+
+def solve_distributed(ipq, numWorkers, options=None, address=("localhost", 0), verbose=False):
+    """Solve a query in SnC mode with worker processes started on this machine
+
+    Args:
+        ipq (:class:`~maraboupy.MarabouCore.InputQuery`): Query to solve, whose input variables have finite bounds
+        numWorkers (int): Number of worker processes
+        options (:class:`~maraboupy.MarabouCore.Options`, optional): Options to solve the query with
+        address (tuple or str, optional): Address of the coordinator, see :class:`Coordinator`
+        verbose (bool, optional): Whether to print the result of each sub-region, defaults to False
+
+    Returns:
+        (tuple): exitCode, vals and stats, as returned by :func:`Coordinator.solve`
+    """
+    with Coordinator(ipq, options, address) as coordinator:
+        coordinator.startLocalWorkers(numWorkers)
+        return coordinator.solve(verbose=verbose)
+
+
+def parseAddress(address):
+    """Parse host:port into a TCP address, and anything else into the path of a Unix socket
+
+    :meta private:
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return (host, int(port))
+    return address
+
+
+def main():
+    """Run a worker, or a coordinator of a saved query, from the command line
+
+    :meta private:
+    """
+    parser = argparse.ArgumentParser(description="Distributed split-and-conquer solving with Marabou")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    workerParser = subparsers.add_parser("worker", help="Solve the sub-regions sent by a coordinator")
+    workerParser.add_argument("--address", required=True, help="host:port of the coordinator, or path of its Unix socket")
+    workerParser.add_argument("--authkey", required=True, help="Key of the coordinator, in hexadecimal")
+
+    coordinatorParser = subparsers.add_parser("coordinator", help="Solve a saved query with remote workers")
+    coordinatorParser.add_argument("query", help="Query saved with saveQuery")
+    coordinatorParser.add_argument("--address", default="0.0.0.0:0", help="host:port or Unix socket path to listen on")
+    coordinatorParser.add_argument("--authkey", required=True, help="Key that the workers must present, in hexadecimal")
+    coordinatorParser.add_argument("--local-workers", type=int, default=0, help="Number of workers to start on this machine")
+    coordinatorParser.add_argument("--timeout", type=int, default=0, help="Timeout in seconds, 0 for none")
+    coordinatorParser.add_argument("--initial-divides", type=int, default=0)
+    coordinatorParser.add_argument("--initial-timeout", type=int, default=5)
+    coordinatorParser.add_argument("--num-online-divides", type=int, default=2)
+    coordinatorParser.add_argument("--timeout-factor", type=float, default=1.5)
+    args = parser.parse_args()
+
+    authkey = bytes.fromhex(args.authkey)
+    if args.command == "worker":
+        runWorker(parseAddress(args.address), authkey)
+        return
+
+    options = MarabouCore.Options()
+    options._verbosity = 0
+    options._initialDivides = args.initial_divides
+    options._initialTimeout = args.initial_timeout
+    options._onlineDivides = args.num_online_divides
+    options._timeoutFactor = args.timeout_factor
+    ipq = MarabouCore.loadQuery(args.query)
+    with Coordinator(ipq, options, parseAddress(args.address), authkey) as coordinator:
+        print("Listening on {}".format(coordinator.address), flush=True)
+        coordinator.startLocalWorkers(args.local_workers)
+        exitCode, vals, _ = coordinator.solve(args.timeout, verbose=True)
+    print(exitCode)
+    if exitCode == "sat":
+        for i in range(ipq.getNumInputVariables()):
+            print("input {} = {}".format(i, vals[ipq.inputVariableByIndex(i)]))
+        for i in range(ipq.getNumOutputVariables()):
+            print("output {} = {}".format(i, vals[ipq.outputVariableByIndex(i)]))
+
+
+if __name__ == "__main__":
+    main()
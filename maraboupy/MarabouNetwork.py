@@ -19,17 +19,40 @@ MarabouNetwork defines an abstract class that represents neural networks with pi
 from socket import IP_DEFAULT_MULTICAST_LOOP
 from maraboupy import MarabouCore
 from maraboupy import MarabouUtils
-from collections import defaultdict
 import numpy as np
-from typing import List, Dict, Tuple
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import List, Dict, Optional, Tuple
 ZERO = 10**-5
 
+def solveRobustnessClass(args):
+    """Solve whether a class can reach the value of the original class, in a worker process
+
+    :meta private:
+    """
+    queryFile, values, originalVar, candidate, candidateVar = args
+    ipq = MarabouCore.loadQuery(queryFile)
+    eq = MarabouCore.Equation(MarabouCore.Equation.LE)
+    eq.addAddend(1.0, originalVar)
+    eq.addAddend(-1.0, candidateVar)
+    eq.setScalar(0.0)
+    ipq.addEquation(eq)
+
+    exitCode, vals, stats = MarabouCore.solve(ipq, MarabouUtils.optionsFromValues(values))
+    return candidate, exitCode, vals, stats
+
 class MarabouNetwork:
     """Abstract class representing general Marabou network
-    
+
+    Subclasses list in cacheAttributes the parser specific attributes that :func:`saveCache` should store.
+    These must be numpy arrays or values that can be written as JSON.
+
     Attributes:
         numVars (int): Total number of variables to represent network
-        equList (list of :class:`~maraboupy.MarabouUtils.Equation`): Network equations
+        equList (:class:`~maraboupy.MarabouUtils.EquationTable`): Network equations
         reluList (list of tuples): List of relu constraint tuples, where each tuple contains the backward and forward variables
         sigmoidList (list of tuples): List of sigmoid constraint tuples, where each tuple contains the backward and forward variables
         maxList (list of tuples): List of max constraint tuples, where each tuple conatins the set of input variables and output variable
@@ -40,6 +63,9 @@ class MarabouNetwork:
         inputVars (list of numpy arrays): Input variables
         outputVars (list of numpy arrays): Output variables
     """
+    CACHE_VERSION = 2
+    cacheAttributes = []
+
     def __init__(self):
         """Constructs a MarabouNetwork object and calls function to initialize
         """
@@ -52,7 +78,7 @@ class MarabouNetwork:
         """
         self.numVars = 0
         self.numGradVars = 0
-        self.equList = []
+        self.equList = MarabouUtils.EquationTable()
         self.additionalEquList = [] # used to store user defined equations
         self.reluList = []
         self.sigmoidList = []
@@ -64,18 +90,23 @@ class MarabouNetwork:
 
         #constraints for gradient
         self.reluList = []
-        self.accumulatedGrad = defaultdict(list)
+        self.accumulatedGrad = MarabouUtils.SparseJacobian()
 
         self.lowerBounds = dict()
         self.upperBounds = dict()
+        self.resetEquationIndex()
+        self.resetBaseQuery()
         self.inputVars = []
         self.outputVars = []
 
         #keep the forward Input Query
         self.forward_ipq: MarabouCore.InputQuery
 
-        #the list of constraints for the backward computation
-        self.backward_constraints: List[MarabouUtils.Equation | MarabouUtils.ReLUGradEquation] = []
+        #the linear constraints for the backward computation
+        self.backward_equations = MarabouUtils.EquationTable()
+
+        #the (v_in, v_out, g_in, g_out) variables of the ReLU gradient constraints, one row per ReLU
+        self.relu_grads = np.zeros((0, 4), dtype=np.int64)
 
         #the list of gradient nodes corresponding to pre-ReLU value
         self.grad_ins: List[int] = []
@@ -114,6 +145,127 @@ class MarabouNetwork:
         self.numGradVars += 1
         return self.numGradVars - 1
 
+    def resetEquationIndex(self):
+        """Forget the output variable to equation index, so that it is rebuilt on the next lookup
+
+        Call this after the variables of the equations in equList are changed in place.
+
+        :meta private:
+        """
+        self.equationIndex = dict()
+        self.equationIndexTable = None
+        self.equationIndexSize = 0
+
+    def resetBaseQuery(self):
+        """Forget the cached query of the network, so that it is rebuilt on the next solve
+
+        Call this after the equations, constraints or input/output variables of the network are changed in place.
+        Additions are detected without it.
+
+        :meta private:
+        """
+        self.baseQuery = None
+        self.baseQueryKey = None
+
+    def getBaseQuery(self)->MarabouCore.InputQuery:
+        """Function to get the query encoding the network, without the property
+
+        The query holds the variables, equations and constraints of the network, but neither
+        the property equations nor any bounds, which are all removed by :func:`clearProperty`.
+        It is built once and reused until the network changes, so that solving one property
+        after another does not re-add the whole network each time.
+
+        Returns:
+            :class:`~maraboupy.MarabouCore.InputQuery`
+
+        :meta private:
+        """
+        key = (self.numVars, id(self.equList), len(self.equList), len(self.reluList), len(self.sigmoidList),
+               len(self.maxList), len(self.absList), len(self.signList), len(self.disjunctionList),
+               tuple(id(inputVarArray) for inputVarArray in self.inputVars),
+               tuple(id(outputVarArray) for outputVarArray in self.outputVars))
+        if self.baseQuery is not None and self.baseQueryKey == key:
+            return self.baseQuery
+
+        ipq = MarabouCore.InputQuery()
+        ipq.setNumberOfVariables(self.numVars)
+
+        i = 0
+        for inputVarArray in self.inputVars:
+            for inputVar in inputVarArray.flatten():
+                ipq.markInputVariable(inputVar, i)
+                i+=1
+
+        i = 0
+        for outputVarArray in self.outputVars:
+            for outputVar in outputVarArray.flatten():
+                ipq.markOutputVariable(outputVar, i)
+                i+=1
+        #forward equations
+        assert np.all(self.equList.cols < self.numVars)
+        self.equList.addToInputQuery(ipq)
+
+        reluPairs = np.array(self.reluList, dtype=np.int64).reshape(-1, 2)
+        assert np.all(reluPairs < self.numVars)
+        ipq.addReluConstraints(reluPairs)
+
+        sigmoidPairs = np.array(self.sigmoidList, dtype=np.int64).reshape(-1, 2)
+        assert np.all(sigmoidPairs < self.numVars)
+        ipq.addSigmoidConstraints(sigmoidPairs)
+
+        maxElements = [list(m[0]) for m in self.maxList]
+        maxPtr = np.concatenate([[0], np.cumsum([len(elements) for elements in maxElements], dtype=np.int64)])
+        maxElements = np.array([e for elements in maxElements for e in elements], dtype=np.int64)
+        maxOutputs = np.array([m[1] for m in self.maxList], dtype=np.int64)
+        assert np.all(maxElements < self.numVars) and np.all(maxOutputs < self.numVars)
+        ipq.addMaxConstraints(maxPtr, maxElements, maxOutputs)
+
+        for b, f in self.absList:
+            MarabouCore.addAbsConstraint(ipq, b, f)
+
+        for b, f in self.signList:
+            MarabouCore.addSignConstraint(ipq, b, f)
+
+        for disjunction in self.disjunctionList:
+            MarabouCore.addDisjunctionConstraint(ipq, disjunction)
+
+        self.baseQuery = ipq
+        self.baseQueryKey = key
+        return ipq
+
+    def getEquationIndices(self, variables):
+        """Function to find the equations that define the given variables
+
+        An equation defines a variable when the variable is its last addend and has coefficient -1,
+        which is how the parsers write the output of linear operations. The index from variables to
+        equations is extended with the equations added since the last lookup, so a lookup does not
+        scan equList again.
+
+        If several equations define the same variable, only the first of them is indexed. Callers that
+        fold a constant into the defining equation therefore change only that equation, whereas the
+        previous scan of equList adjusted the scalar of every matching equation. The parsers define
+        each variable once, so this only matters for equations added by hand.
+
+        Args:
+            variables (numpy array of int): Variables to look up
+
+        Returns:
+            (numpy array of int): Index in equList of the equation defining each variable, or -1 if there is none
+
+        :meta private:
+        """
+        if self.equationIndexTable is not self.equList or self.equationIndexSize > len(self.equList):
+            self.resetEquationIndex()
+            self.equationIndexTable = self.equList
+        start = self.equationIndexSize
+        if start < len(self.equList):
+            lastCoeffs, lastVars = self.equList.lastAddends(start)
+            rows = np.flatnonzero(lastCoeffs == -1)
+            for var, row in zip(lastVars[rows].tolist(), (rows + start).tolist()):
+                self.equationIndex.setdefault(var, row)
+            self.equationIndexSize = len(self.equList)
+        return np.array([self.equationIndex.get(var, -1) for var in np.asarray(variables).reshape(-1).tolist()], dtype=np.int64)
+
     def addEquation(self, x, isProperty=False):
         """Function to add new equation to the network
 
@@ -124,7 +276,7 @@ class MarabouNetwork:
         if isProperty:
             self.additionalEquList += [x]
         else:
-            self.equList += [x]
+            self.equList.append(x)
 
     def setLowerBound(self, x, v):
         """Function to set lower bound for variable
@@ -260,185 +412,445 @@ class MarabouNetwork:
         e.setScalar(scalar)
         self.addEquation(e, isProperty)
 
+    def addEquationArrays(self, coefficients, variables, scalars, EquationType=MarabouCore.Equation.EQ, isProperty=False):
+        r"""Function to add a batch of equations given as arrays
+
+        Row i of the arrays describes the equation
+
+        .. math::
+            \sum_j coefficients_{ij} * variables_{ij} = scalars_i
+
+        Args:
+            coefficients (2D numpy array of float): Coefficients, one row per equation
+            variables (2D numpy array of int): Variable numbers, same shape as coefficients
+            scalars (numpy array of float): Right hand side constant of each equation
+            EquationType (:class:`~maraboupy.MarabouCore.EquationType`): Type of all equations, defaults to EQ
+            isProperty (bool): If true, these constraints can be removed later by clearProperty() method
+        """
+        coefficients = np.asarray(coefficients, dtype=np.float64)
+        variables = np.asarray(variables, dtype=np.int64)
+        scalars = np.asarray(scalars, dtype=np.float64).reshape(-1)
+        assert coefficients.shape == variables.shape
+        assert coefficients.shape[0] == len(scalars)
+        if not isProperty:
+            self.equList.appendArrays(coefficients, variables, scalars, EquationType)
+            return
+        for i in range(len(scalars)):
+            e = MarabouUtils.Equation(EquationType)
+            e.setAddends(coefficients[i], variables[i])
+            e.setScalar(scalars[i])
+            self.addEquation(e, isProperty)
+
+    def addMatMulEquations(self, input1, input2, outputVars, scalars, firstInputConstant=False, isProperty=False):
+        """Function to add the equations of outputVars = input1 * input2 + scalars in one batch
+
+        Exactly one of the two inputs holds variables, the other one holds constants. The coefficient
+        and variable arrays of all equations are computed with a single NumPy operation, and the
+        equations are added in the same order as a loop over the rows and columns of outputVars would.
+
+        Args:
+            input1 (2D numpy array): Left matrix of shape (m, k)
+            input2 (2D numpy array): Right matrix of shape (k, n)
+            outputVars (2D numpy array of int): Output variables of shape (m, n)
+            scalars (numpy array of float): Constants added to the product, broadcastable to shape (m, n)
+            firstInputConstant (bool): If true, input1 holds constants and input2 variables, otherwise input1 holds
+                variables and input2 constants. Defaults to False
+            isProperty (bool): If true, these constraints can be removed later by clearProperty() method
+        """
+        m, k = input1.shape
+        n = input2.shape[1]
+        assert input2.shape[0] == k
+        assert outputVars.shape == (m, n)
+
+        # Row i * n + j of the arrays corresponds to outputVars[i][j], which depends on
+        # row i of input1 and column j of input2. The output variable is the last addend.
+        coefficients = np.empty((m * n, k + 1))
+        variables = np.empty((m * n, k + 1), dtype=np.int64)
+        if firstInputConstant:
+            coefficients[:, :k] = np.repeat(input1, n, axis=0)
+            variables[:, :k] = np.tile(np.transpose(input2), (m, 1))
+        else:
+            coefficients[:, :k] = np.tile(np.transpose(input2), (m, 1))
+            variables[:, :k] = np.repeat(input1, n, axis=0)
+        coefficients[:, k] = -1
+        variables[:, k] = outputVars.reshape(-1)
+        scalars = 0.0 - np.broadcast_to(scalars, (m, n)).reshape(-1)
+        self.addEquationArrays(coefficients, variables, scalars, isProperty=isProperty)
+
+    def addConv2DEquations(self, inputVars, filters, outputVars, scalars, strides, pads):
+        """Function to add the equations of a 2D convolution in one batch
+
+        The equations are built with an im2col index gather: for every output position, the indices of the
+        input variables under the filter are computed at once, and filter taps that fall into the padding
+        are dropped. Equations are added in (batch, height, width, channel) order of the output, and the
+        addends of each equation in (filter height, filter width, input channel) order, followed by the output variable.
+
+        Args:
+            inputVars (4D numpy array of int): Input variables with shape (batch, height, width, channels)
+            filters (4D numpy array of float): Filters with shape (filter height, filter width, channels, number of filters)
+            outputVars (4D numpy array of int): Output variables with shape (batch, out height, out width, number of filters)
+            scalars (numpy array of float): Constants added to the convolution, broadcastable to the shape of outputVars
+            strides (list of int): Strides along the height and width
+            pads (list of int): Padding added at the beginning of the height and width
+        """
+        in_num, in_height, in_width, in_channels = inputVars.shape
+        filter_height, filter_width, filter_channels, num_filters = filters.shape
+        out_num, out_height, out_width, out_channels = outputVars.shape
+        assert in_num == out_num and in_channels == filter_channels and num_filters == out_channels
+
+        # Input row (column) used by each output row (column) and filter row (column)
+        h_ind = strides[0] * np.arange(out_height)[:, None] + np.arange(filter_height)[None, :] - pads[0]
+        w_ind = strides[1] * np.arange(out_width)[:, None] + np.arange(filter_width)[None, :] - pads[1]
+        h_valid = (h_ind >= 0) & (h_ind < in_height)
+        w_valid = (w_ind >= 0) & (w_ind < in_width)
+
+        # Gather the patches, with shape (batch, out height, out width, filter height, filter width, channels)
+        patches = inputVars[:, np.clip(h_ind, 0, in_height - 1)[:, None, :, None],
+                            np.clip(w_ind, 0, in_width - 1)[None, :, None, :], :]
+        patchSize = filter_height * filter_width * in_channels
+        patches = patches.reshape(out_num, out_height, out_width, 1, patchSize)
+        valid = h_valid[:, None, :, None, None] & w_valid[None, :, None, :, None]
+        valid = np.broadcast_to(valid, (out_height, out_width, filter_height, filter_width, in_channels))
+        valid = valid.reshape(1, out_height, out_width, 1, patchSize)
+
+        # One row per output variable, with the output variable as the last addend
+        shape = (out_num, out_height, out_width, out_channels, patchSize + 1)
+        variables = np.empty(shape, dtype=np.int64)
+        variables[..., :-1] = patches
+        variables[..., -1] = outputVars
+        coefficients = np.empty(shape)
+        coefficients[..., :-1] = np.transpose(filters.reshape(patchSize, num_filters))
+        coefficients[..., -1] = -1
+        mask = np.ones(shape, dtype=bool)
+        mask[..., :-1] = valid
+
+        rowLengths = mask.sum(axis=-1).reshape(-1)
+        rowPtr = np.concatenate([[0], np.cumsum(rowLengths)])
+        scalars = 0.0 - np.broadcast_to(scalars, outputVars.shape).reshape(-1)
+        self.equList.appendSparse(rowPtr, variables[mask], coefficients[mask], scalars)
+
+    def getOutputVariablePermutation(self, numInVars, outVars):
+        """Function to compute the renumbering that moves the output variables after the input variables
+
+        Input variables keep their numbers, the output variables are numbered from numInVars on,
+        and every other variable is shifted up by the number of output variables that come after it.
+
+        Args:
+            numInVars (int): Number of input variables
+            outVars (numpy array of int): Original output variables
+
+        Returns:
+            (numpy array of int): Array perm such that variable var is renumbered to perm[var]
+
+        :meta private:
+        """
+        outVars = np.asarray(outVars, dtype=np.int64).reshape(-1)
+        variables = np.arange(self.numVars, dtype=np.int64)
+        perm = variables + len(outVars) - np.searchsorted(np.sort(outVars), variables, side='right')
+        perm[:numInVars] = variables[:numInVars]
+        perm[outVars] = numInVars + np.arange(len(outVars))
+        return perm
+
+    def permuteVariables(self, perm):
+        """Function to renumber the variables in all equations, constraints and bounds
+
+        Args:
+            perm (numpy array of int): Array such that variable var is renumbered to perm[var]
+
+        :meta private:
+        """
+        cols = self.equList.cols
+        cols[:] = perm[cols]
+        self.resetEquationIndex()
+        self.resetBaseQuery()
+
+        for eq in self.additionalEquList:
+            eq.addendList = [(c, int(perm[var])) for c, var in eq.addendList]
+
+        def permutePairs(pairs):
+            return [tuple(pair) for pair in perm[np.array(pairs, dtype=np.int64).reshape(-1, 2)].tolist()]
+        self.reluList = permutePairs(self.reluList)
+        self.sigmoidList = permutePairs(self.sigmoidList)
+        self.absList = permutePairs(self.absList)
+        self.signList = permutePairs(self.signList)
+        self.maxList = [(set(perm[list(elements)].tolist()), int(perm[outVar])) for elements, outVar in self.maxList]
+
+        for bounds in [self.lowerBounds, self.upperBounds]:
+            variables = np.fromiter(bounds.keys(), dtype=np.int64, count=len(bounds))
+            newBounds = dict(zip(perm[variables].tolist(), bounds.values()))
+            bounds.clear()
+            bounds.update(newBounds)
+
     def getMarabouQuery(self, legacy:bool = True)->MarabouCore.InputQuery:
         return self.getForwardQuery()
 
     def getForwardQuery(self)->MarabouCore.InputQuery:
         """Function to convert network into Marabou InputQuery
 
+        The query is a copy of the cached query of the network from :func:`getBaseQuery`,
+        with the property equations and the bounds added to it.
+
         Returns:
             :class:`~maraboupy.MarabouCore.InputQuery`
         """
-        ipq = MarabouCore.InputQuery()
-        ipq.setNumberOfVariables(self.numVars)
-
-        i = 0
-        for inputVarArray in self.inputVars:
-            for inputVar in inputVarArray.flatten():
-                ipq.markInputVariable(inputVar, i)
-                i+=1
-
-        i = 0
-        for outputVarArray in self.outputVars:
-            for outputVar in outputVarArray.flatten():
-                ipq.markOutputVariable(outputVar, i)
-                i+=1
-        #forward equations
-        for e in self.equList:
-            eq = MarabouCore.Equation(e.EquationType)
-            for (c, v) in e.addendList:
-                assert v < self.numVars
-                eq.addAddend(c, v)
-            eq.setScalar(e.scalar)
-            ipq.addEquation(eq)
-
-        for e in self.additionalEquList:
-            eq = MarabouCore.Equation(e.EquationType)
-            for (c, v) in e.addendList:
-                assert v < self.numVars
-                eq.addAddend(c, v)
-            eq.setScalar(e.scalar)
-            ipq.addEquation(eq)
-
-        for r in self.reluList:
-            assert r[1] < self.numVars and r[0] < self.numVars
-            MarabouCore.addReluConstraint(ipq, r[0], r[1])
-
-        for r in self.sigmoidList:
-            assert r[1] < self.numVars and r[0] < self.numVars
-            MarabouCore.addSigmoidConstraint(ipq, r[0], r[1])
-
-        for m in self.maxList:
-            assert m[1] < self.numVars
-            for e in m[0]:
-                assert e < self.numVars
-            MarabouCore.addMaxConstraint(ipq, m[0], m[1])
+        ipq = MarabouCore.InputQuery(self.getBaseQuery())
 
-        for b, f in self.absList:
-            MarabouCore.addAbsConstraint(ipq, b, f)
+        additionalEquations = MarabouUtils.EquationTable()
+        additionalEquations += self.additionalEquList
+        assert np.all(additionalEquations.cols < self.numVars)
+        additionalEquations.addToInputQuery(ipq)
 
-        for b, f in self.signList:
-            MarabouCore.addSignConstraint(ipq, b, f)
-
-        for disjunction in self.disjunctionList:
-            MarabouCore.addDisjunctionConstraint(ipq, disjunction)
         #set bounds for forward variables
-        for l in self.lowerBounds:
-            assert l < self.numVars
-            ipq.setLowerBound(l, self.lowerBounds[l])
+        lowerVars = np.fromiter(self.lowerBounds.keys(), dtype=np.int64, count=len(self.lowerBounds))
+        assert np.all(lowerVars < self.numVars)
+        ipq.setLowerBounds(lowerVars, np.fromiter(self.lowerBounds.values(), dtype=np.float64, count=len(self.lowerBounds)))
 
-        for u in self.upperBounds:
-            assert u < self.numVars
-            ipq.setUpperBound(u, self.upperBounds[u])
+        upperVars = np.fromiter(self.upperBounds.keys(), dtype=np.int64, count=len(self.upperBounds))
+        assert np.all(upperVars < self.numVars)
+        ipq.setUpperBounds(upperVars, np.fromiter(self.upperBounds.values(), dtype=np.float64, count=len(self.upperBounds)))
 
         self.forward_ipq = ipq
         return ipq
 
-    def addBackwardQuery(self, to_be_abstracted: List[int], fused_bounds: Dict[int, Tuple[float, float]])->MarabouCore.InputQuery:
-        print("To be abstracted", to_be_abstracted)
+    def addBackwardQuery(self, to_be_abstracted: List[int], fused_bounds: Dict[int, Tuple[float, float]],
+                         useReluGradConstraint: bool = True)->MarabouCore.InputQuery:
+        """Function to add the backward pass to the joint forward and backward query
+
+        Every ReLU gradient gate g_in = ReLU'(v_in) * g_out is encoded exactly, unless its g_in
+        variable is in to_be_abstracted. Abstracted gates are replaced by the convex hull of the
+        gate over the fused bounds of v_in and g_out, which over-approximates the gate.
+
+        Args:
+            to_be_abstracted (List[int]): The g_in variables of the gates to abstract
+            fused_bounds (Dict[int, Tuple[float, float]]): Bounds of the variables, as computed by :meth:`fusion`
+            useReluGradConstraint (bool): If true, encode the exact gates as ReLU gradient constraints,
+                otherwise as disjunctions
+
+        Returns:
+            :class:`~maraboupy.MarabouCore.InputQuery`
+        """
         if len(to_be_abstracted)>0:
             assert len(fused_bounds) > 0, "Must run .fusion() first if we want to use abstraction"
-        assert len(self.backward_constraints)>0, "Must build backward constraints before calling this function"
+        assert len(self.backward_equations)>0, "Must build backward constraints before calling this function"
 
-        print("adding backward queries...")
-        c: MarabouUtils.Equation | MarabouUtils.ReLUGradEquation
-        for c in self.backward_constraints:
-            if isinstance(c, MarabouUtils.Equation): #a linear constraint
-                self.FB_ipq.addEquation(c.toCoreEquation())
+        self.backward_equations.addToInputQuery(self.FB_ipq)
+
+        abstracted = np.isin(self.relu_grads[:, 2], np.asarray(to_be_abstracted, dtype=np.int64))
+        if useReluGradConstraint:
+            MarabouCore.addReluGradConstraints(self.FB_ipq, self.relu_grads[~abstracted])
+        else:
+            MarabouCore.addReluGradDisjunctions(self.FB_ipq, self.relu_grads[~abstracted], ZERO)
+
+        for v_in, v_out, g_in, g_out in self.relu_grads[abstracted].tolist():
+            g_out_lower, g_out_upper = fused_bounds[g_out]
+            v_in_lower, v_in_upper = fused_bounds[v_in]
+            #case 1: v_in_upper < 0: the gradient must be 0
+            if v_in_upper <0:
+                self.FB_ipq.setLowerBound(g_in, 0)
+                self.FB_ipq.setUpperBound(g_in, 0)
+            #case 2: v_in_lower > 0: the gradient is passed on
+            elif v_in_lower > 0:
+                c1 = MarabouUtils.Equation(MarabouCore.Equation.EQ)
+                c1.addAddend(1, g_in)
+                c1.addAddend(-1, g_out)
+                c1.setScalar(0)
+                self.FB_ipq.addEquation(c1.toCoreEquation())
+            #case 3: g_out_lower >= 0. g_in <= g_out and g_in >=0
+            elif g_out_lower >= 0:
+                self.FB_ipq.setLowerBound(g_in, 0)
+                c1 = MarabouUtils.Equation(MarabouCore.Equation.LE)
+                c1.addAddend(1,g_in)
+                c1.addAddend(-1, g_out)
+                c1.setScalar(0)
+                self.FB_ipq.addEquation(c1.toCoreEquation())
+            #case 4: g_out_upper <= 0. g_in >= g_out and g_in <=0
+            elif g_out_upper <= 0:
+                self.FB_ipq.setUpperBound(g_in, 0)
+                c1 = MarabouUtils.Equation(MarabouCore.Equation.GE)
+                c1.addAddend(1, g_in)
+                c1.addAddend(-1, g_out)
+                c1.setScalar(0)
+                self.FB_ipq.addEquation(c1.toCoreEquation())
+            #case 5: the hull of (l, 0), (l, l), (u, 0), (u, u) for g_out in [l, u]
             else:
-                assert isinstance(c, MarabouUtils.ReLUGradEquation)
-                assert len(c.disjunct)==2
-                assert len(c.disjunct[0])==2
-                assert len(c.disjunct[1])==2
-                if c.g_in in to_be_abstracted:
-                    print(f"abstracting the computation of {c.g_in}")
-
-                    g_in = c.g_in
-                    g_out = c.g_out
-                    v_in = c.v_in
-
-                    g_out_lower, g_out_upper = fused_bounds[g_out]
-                    v_in_lower, v_in_upper = fused_bounds[v_in]
-                    print(g_out_lower, g_out_upper, v_in_lower, v_in_upper)
-                    #case 1: v_in_upper < 0: the gradient must be 0
-                    if v_in_upper <0:
-                        self.FB_ipq.setLowerBound(g_in, 0)
-                        self.FB_ipq.setUpperBound(g_in, 0)
-                    #case 2: g_out_lower > 0. g_in < g_out and g_in >=0
-                    elif g_out_lower > 0:
-                        self.FB_ipq.setLowerBound(g_in, 0)
-                        c1 = MarabouUtils.Equation(MarabouCore.Equation.LE)
-                        c1.addAddend(1,g_in)
-                        c1.addAddend(-1, g_out)
-                        c1.setScalar(-ZERO)
-                        self.FB_ipq.addEquation(c1.toCoreEquation())
-                    #case 3: g_out_uper < 0. g_in >= g_out and g_in <=0
-                    elif g_out_upper < 0:
-                        self.FB_ipq.setUpperBound(g_in, 0)
-                        c1 = MarabouUtils.Equation(MarabouCore.Equation.GE)
-                        c1.addAddend(1, g_in)
-                        c1.addAddend(-1, g_out)
-                        c1.setScalar(ZERO)
-                        self.FB_ipq.addEquation(c1.toCoreEquation())
-                    else:
-                        assert g_out_upper >0 and g_out_lower <0
-                        c1 = MarabouUtils.Equation(MarabouCore.Equation.LE)
-                        c1.addAddend((g_out_upper - g_out_lower)/g_out_upper, g_in)
-                        c1.addAddend(-1, g_out)
-                        c1.setScalar(-g_out_lower)
-                        self.FB_ipq.addEquation(c1.toCoreEquation())
-
-                        c2 = MarabouUtils.Equation(MarabouCore.Equation.GE)
-                        c2.addAddend((g_out_upper - g_out_lower)/g_out_lower, g_in)
-                        c2.addAddend(-1, g_out)
-                        c2.setScalar(-g_out_upper)
-                        self.FB_ipq.addEquation(c2.toCoreEquation())
+                assert g_out_upper >0 and g_out_lower <0
+                #g_in <= u * (g_out - l) / (u - l)
+                c1 = MarabouUtils.Equation(MarabouCore.Equation.LE)
+                c1.addAddend((g_out_upper - g_out_lower)/g_out_upper, g_in)
+                c1.addAddend(-1, g_out)
+                c1.setScalar(-g_out_lower)
+                self.FB_ipq.addEquation(c1.toCoreEquation())
+
+                #g_in >= l * (u - g_out) / (u - l)
+                c2 = MarabouUtils.Equation(MarabouCore.Equation.LE)
+                c2.addAddend((g_out_upper - g_out_lower)/g_out_lower, g_in)
+                c2.addAddend(1, g_out)
+                c2.setScalar(g_out_upper)
+                self.FB_ipq.addEquation(c2.toCoreEquation())
 
-                else:
-                    pos_disjunct = [[c.disjunct[0][0].toCoreEquation()],
-                                [c.disjunct[0][1].toCoreEquation()]]
-                    neg_disjunct = [[c.disjunct[1][0].toCoreEquation()],
-                                [c.disjunct[1][1].toCoreEquation()]]
+        return self.FB_ipq
 
-                
-                    MarabouCore.addDisjunctionConstraint(self.FB_ipq, pos_disjunct)
-                    MarabouCore.addDisjunctionConstraint(self.FB_ipq, neg_disjunct)
+    def fusion(self, options=None)->Dict[int, Tuple[float, float]]:
+        """Function to tighten the bounds of the joint forward and backward query
 
-        return self.FB_ipq
+        The bounds set on FB_ipq, e.g. those of the gradient property, are tightened over the
+        query with every ReLU gradient gate encoded exactly, using the preprocessor and the bound
+        tightening selected in the options (DeepPoly by default, or the MILP solver). FB_ipq
+        itself is left unchanged.
+
+        Args:
+            options (:class:`~maraboupy.MarabouCore.Options`): Object for specifying Marabou options, defaults to None
+
+        Returns:
+            (Dict[int, Tuple[float, float]]): The lower and upper bound of every variable, empty if the bounds prove the query UNSAT
+        """
+        if options == None:
+            options = MarabouCore.Options()
+        baseQuery = self.FB_ipq
+        self.FB_ipq = MarabouCore.InputQuery(baseQuery)
+        try:
+            ipq = self.addBackwardQuery([], dict())
+        finally:
+            self.FB_ipq = baseQuery
+        exitCode, bounds, _ = MarabouCore.calculateBounds(ipq, options)
+        return dict(bounds)
+
+    def scoreReluGrads(self, fused_bounds: Dict[int, Tuple[float, float]])->np.ndarray:
+        """Function to score how expensive the exact encoding of each ReLU gradient gate is
+
+        A gate whose phase is fixed by the fused bounds needs no case split, and scores 0.
+        Otherwise, the score is how far the interval of v_in reaches across 0 on its shorter
+        side: the further, the less likely the phase gets fixed by bound tightening during the
+        search, and the more likely the gate has to be split on.
+
+        Args:
+            fused_bounds (Dict[int, Tuple[float, float]]): Bounds of the variables, as computed by :meth:`fusion`
+
+        Returns:
+            (np.ndarray): The score of every row of relu_grads
+        """
+        def bounds(variables):
+            lower = np.array([fused_bounds[v][0] for v in variables.tolist()], dtype=np.float64)
+            upper = np.array([fused_bounds[v][1] for v in variables.tolist()], dtype=np.float64)
+            return lower, upper
+
+        v_in_lower, v_in_upper = bounds(self.relu_grads[:, 0])
+        g_in_lower, g_in_upper = bounds(self.relu_grads[:, 2])
+        fixed = (v_in_upper < 0) | (v_in_lower > 0) | (g_in_lower > 0) | (g_in_upper < 0)
+        return np.where(fixed, 0.0, np.minimum(-v_in_lower, v_in_upper))
+
+    def selectAbstraction(self, fused_bounds: Dict[int, Tuple[float, float]], threshold: float = 0.0)->List[int]:
+        """Function to select the ReLU gradient gates to abstract
+
+        Args:
+            fused_bounds (Dict[int, Tuple[float, float]]): Bounds of the variables, as computed by :meth:`fusion`
+            threshold (float): Gates scoring above this, see :meth:`scoreReluGrads`, are abstracted
+
+        Returns:
+            (List[int]): The g_in variables of the gates to abstract, the most expensive first
+        """
+        if len(fused_bounds) == 0:
+            return []
+        scores = self.scoreReluGrads(fused_bounds)
+        order = np.argsort(-scores, kind="stable")
+        order = order[scores[order] > threshold]
+        return self.relu_grads[order, 2].tolist()
+
+    def findSpuriousReluGrads(self, vals: Dict[int, float], to_be_abstracted: List[int])->List[int]:
+        """Function to find the abstracted ReLU gradient gates that a counterexample violates
+
+        Args:
+            vals (Dict[int, float]): Satisfying assignment of the abstract query
+            to_be_abstracted (List[int]): The g_in variables of the abstracted gates
+
+        Returns:
+            (List[int]): The g_in variables of the violated gates
+
+        :meta private:
+        """
+        violated = []
+        abstracted = np.isin(self.relu_grads[:, 2], np.asarray(to_be_abstracted, dtype=np.int64))
+        for v_in, v_out, g_in, g_out in self.relu_grads[abstracted].tolist():
+            if vals[v_in] > ZERO:
+                satisfied = abs(vals[g_in] - vals[g_out]) <= ZERO
+            elif vals[v_in] < -ZERO:
+                satisfied = abs(vals[g_in]) <= ZERO
+            else:
+                satisfied = abs(vals[g_in] - vals[g_out]) <= ZERO or abs(vals[g_in]) <= ZERO
+            if not satisfied:
+                violated.append(g_in)
+        return violated
+
+    def solveBackwardQuery(self, options=None, threshold: float = 0.0, maxRefinements: Optional[int] = None,
+                           verbose: bool = False):
+        """Function to solve the joint forward and backward query with automatic abstraction
+
+        The bounds are first tightened with :meth:`fusion`, and the gates predicted to be
+        expensive, see :meth:`selectAbstraction`, are abstracted. The abstraction over-approximates
+        the gates, so UNSAT is final. A SAT assignment that violates an abstracted gate is a
+        spurious counterexample: the violated gates are encoded exactly, and the query is solved
+        again (CEGAR). The bounds of the property must be set on FB_ipq before calling this function.
+
+        Args:
+            options (:class:`~maraboupy.MarabouCore.Options`): Object for specifying Marabou options, defaults to None
+            threshold (float): Gates scoring above this are abstracted, see :meth:`scoreReluGrads`
+            maxRefinements (int, optional): Encode every gate exactly after this many refinements
+            verbose (bool): If true, print the number of abstracted gates in every iteration
+
+        Returns:
+            (tuple): tuple containing:
+                - exitCode (str): A string representing the exit code (sat/unsat/TIMEOUT/ERROR/UNKNOWN/QUIT_REQUESTED).
+                - vals (Dict[int, float]): Empty dictionary if UNSAT, otherwise a dictionary of SATisfying values for variables
+                - stats (:class:`~maraboupy.MarabouCore.Statistics`): A Statistics object of the last iteration
+                - to_be_abstracted (List[int]): The g_in variables of the gates abstracted in the last iteration
+        """
+        if options == None:
+            options = MarabouCore.Options()
+        baseQuery = MarabouCore.InputQuery(self.FB_ipq)
+        fused_bounds = self.fusion(options)
+        to_be_abstracted = self.selectAbstraction(fused_bounds, threshold)
+
+        # The fused bounds hold for every solution, so they also tighten the abstractions
+        for var, (lower, upper) in fused_bounds.items():
+            baseQuery.setLowerBound(var, lower)
+            baseQuery.setUpperBound(var, upper)
+
+        refinements = 0
+        while True:
+            if maxRefinements is not None and refinements >= maxRefinements:
+                to_be_abstracted = []
+            self.FB_ipq = MarabouCore.InputQuery(baseQuery)
+            ipq = self.addBackwardQuery(to_be_abstracted, fused_bounds)
+            exitCode, vals, stats = MarabouCore.solve(ipq, options)
+            if verbose:
+                print("{} abstracted gates: {}".format(len(to_be_abstracted), exitCode))
+            if exitCode != "sat" or len(to_be_abstracted) == 0:
+                return exitCode, vals, stats, to_be_abstracted
+
+            spurious = self.findSpuriousReluGrads(vals, to_be_abstracted)
+            if len(spurious) == 0:
+                return exitCode, vals, stats, to_be_abstracted
+            spurious = set(spurious)
+            to_be_abstracted = [g_in for g_in in to_be_abstracted if g_in not in spurious]
+            refinements += 1
 
     def buildBackwardConstraints(self)->None:
         self.FB_ipq = MarabouCore.InputQuery(self.forward_ipq)
         self.FB_ipq.setNumberOfVariables(self.numVars*2)
 
-        print("output names", self.outputVars)
-        with open("accumulated_grad.txt", "w") as f:
-            f.write(str(self.accumulatedGrad))
         #backward equations
         offset = self.numVars
 
         #set linear grad constraints
-        assert len(self.accumulatedGrad.keys())>0
-        for gradv in self.accumulatedGrad:
-            addendList = self.accumulatedGrad[gradv]
-            eq = MarabouUtils.Equation(MarabouCore.Equation.EQ)
-            if len(addendList)==0: continue
-            for (v, c) in addendList:
-                eq.addAddend(c,int(v)+offset)
-            eq.addAddend(-1, int(gradv)+offset)
-            eq.setScalar(0)
-            self.backward_constraints.append(eq)
+        assert len(self.accumulatedGrad)>0
+        self.backward_equations = self.accumulatedGrad.toEquationTable(offset)
 
         #set Relu constraints:
-        for i in range(len(self.reluList)):
-            relu = self.reluList[i]
-
-            relu_grad_constraint = MarabouUtils.ReLUGradEquation(v_in = relu[0],
-                                                                 v_out = relu[1],
-                                                                 g_in = relu[0]+offset,
-                                                                 g_out = relu[1]+offset) 
-            self.grad_ins.append(relu[0]+offset)
-            self.backward_constraints.append(relu_grad_constraint)
-           
+        relus = np.array(self.reluList, dtype=np.int64).reshape(-1, 2)
+        assert np.all(relus[:, 0] < relus[:, 1])
+        self.relu_grads = np.concatenate([relus, relus + offset], axis=1)
+        self.grad_ins = self.relu_grads[:, 2].tolist()
+
     def solve(self, filename="", verbose=True, options=None):
         """Function to solve query represented by this network
 
@@ -470,7 +882,7 @@ class MarabouNetwork:
 
         return [exitCode, vals, stats]
 
-    def evaluateLocalRobustness(self, input, epsilon, originalClass, verbose=True, options=None, targetClass=None):
+    def evaluateLocalRobustness(self, input, epsilon, originalClass, verbose=True, options=None, targetClass=None, numWorkers=1):
         """Function evaluating a specific input is a local robustness within the scope of epslion
 
         Args:
@@ -480,6 +892,9 @@ class MarabouNetwork:
             verbose (bool): If true, print out solution after solve finishes
             options (:class:`~maraboupy.MarabouCore.Options`): Object for specifying Marabou options, defaults to None
             targetClass (int): If set, find a feasible solution with which the value of targetClass is max within outputs.
+            numWorkers (int): If greater than 1 and targetClass is not set, check the output classes in parallel in
+                this many processes. The remaining classes are cancelled once any class is SAT or times out, and
+                maxClass is then the first class found rather than the lowest one.
 
         Returns:
             (tuple): tuple containing:
@@ -524,7 +939,9 @@ class MarabouNetwork:
         maxClass = None
         outputStartIndex = self.outputVars[0][0][0]
 
-        if targetClass is None:
+        if targetClass is None and numWorkers > 1:
+            vals, stats, maxClass = self.evaluateClassesInParallel(originalClass, options, numWorkers)
+        elif targetClass is None:
             outputLayerSize = len(self.outputVars[0][0])
             # loop for all of output classes except for original class
             for outputLayerIndex in range(outputLayerSize):
@@ -560,14 +977,237 @@ class MarabouNetwork:
 
         return [vals, stats, maxClass]
 
-    def saveQuery(self, filename=""):
+    def evaluateClassesInParallel(self, originalClass, options, numWorkers):
+        """Check in a process pool whether any output class can reach the value of the original class
+
+        The query is saved once in the binary format and each worker adds the inequality of one class.
+        Statistics of all the finished classes are merged into one object.
+
+        :meta private:
+        """
+        outputVars = np.asarray(self.outputVars[0]).flatten()
+        candidates = [c for c in range(len(outputVars)) if c != originalClass]
+        values = MarabouUtils.optionValues(options)
+
+        vals, stats, maxClass = {}, None, None
+        with tempfile.TemporaryDirectory() as dirname:
+            queryFile = os.path.join(dirname, "query.ipqb")
+            MarabouCore.saveQuery(self.getForwardQuery(), queryFile, True)
+            tasks = [(queryFile, values, int(outputVars[originalClass]), c, int(outputVars[c]))
+                     for c in candidates]
+
+            # Leaving the pool terminates the workers that are still solving other classes
+            with multiprocessing.Pool(min(numWorkers, len(candidates))) as pool:
+                for candidate, exitCode, classVals, classStats in pool.imap_unordered(solveRobustnessClass, tasks):
+                    if stats is None:
+                        stats = classStats
+                    else:
+                        stats.merge(classStats)
+                    if classStats.hasTimedOut():
+                        break
+                    elif exitCode == "sat":
+                        vals, maxClass = classVals, candidate
+                        break
+        return vals, stats, maxClass
+
+    def evaluateLocalRobustnessBatch(self, properties, verbose=False, options=None):
+        """Function evaluating the local robustness of many inputs with one shared query
+
+        The query encoding the network is built and preprocessed once for all properties, and its network
+        level reasoner is built once. Each class checked for an input then only tightens the bounds of the
+        input box and of its output inequalities before it is solved, instead of rebuilding the whole query
+        as repeated calls to :func:`evaluateLocalRobustness` do. All properties are solved by a single call
+        to :func:`~maraboupy.MarabouCore.solveBatch`.
+
+        Args:
+            properties (list of tuples): One (input, epsilon, originalClass, targetClass) tuple per property,
+                with the same meaning as the arguments of :func:`evaluateLocalRobustness`. targetClass may be None
+            verbose (bool): If true, print out the result of each property
+            options (:class:`~maraboupy.MarabouCore.Options`): Object for specifying Marabou options, defaults to None
+
+        Returns:
+            (list): one [vals, stats, maxClass] list per property, as returned by :func:`evaluateLocalRobustness`
+        """
+        inputVars = self.inputVars[0][0] if type(self.inputVars) is list else self.inputVars[0]
+        flattenInputVars = np.asarray(inputVars).flatten()
+        outputVars = np.asarray(self.outputVars[0]).flatten()
+
+        if options == None:
+            options = MarabouCore.Options()
+
+        # Each candidate class of an input gets a property query holding only the input box
+        # and an inequality saying that the candidate is at least the reference class
+        groups = []
+        propertyQueries = []
+        for input, epsilon, originalClass, targetClass in properties:
+            if inputVars.shape != input.shape:
+                raise RuntimeError("Input shape of the model should be same as the input shape\n input shape of the model: {0}, shape of the input: {1}".format(inputVars.shape, input.shape))
+            flattenInput = np.asarray(input, dtype=np.float64).flatten()
+
+            if targetClass is None:
+                candidates = [(c, [originalClass]) for c in range(len(outputVars)) if c != originalClass]
+            else:
+                candidates = [(targetClass, [c for c in range(len(outputVars)) if c != targetClass])]
+            groups.append(candidates)
+
+            for candidate, others in candidates:
+                ipq = MarabouCore.InputQuery()
+                ipq.setNumberOfVariables(self.numVars)
+                ipq.setLowerBounds(flattenInputVars, flattenInput - epsilon)
+                ipq.setUpperBounds(flattenInputVars, flattenInput + epsilon)
+                for other in others:
+                    eq = MarabouCore.Equation(MarabouCore.Equation.LE)
+                    eq.addAddend(1.0, int(outputVars[other]))
+                    eq.addAddend(-1.0, int(outputVars[candidate]))
+                    eq.setScalar(0.0)
+                    ipq.addEquation(eq)
+                propertyQueries.append(ipq)
+
+        # The classes of an input are solved until one of them is sat or times out
+        batchResults = MarabouCore.solveBatch(self.getForwardQuery(), propertyQueries, options, stopEarly=True,
+                                              groupSizes=[len(candidates) for candidates in groups])
+        results = []
+        start = 0
+        for candidates in groups:
+            # The results of an input end with its first sat or timed out class, or with its last class
+            end = start
+            while end < min(start + len(candidates), len(batchResults)):
+                end += 1
+                if batchResults[end - 1][0] in ["sat", "TIMEOUT"]:
+                    break
+            if end == start:
+                # The batch failed before this input was solved
+                exitCode, vals, stats = batchResults[-1]
+            else:
+                exitCode, vals, stats = batchResults[end - 1]
+            maxClass = None
+            if exitCode == "sat":
+                maxClass = candidates[end - start - 1][0]
+            start = end
+
+            if verbose:
+                if stats.hasTimedOut():
+                    print("TO")
+                elif exitCode == "sat":
+                    print("sat")
+                    for i in range(flattenInputVars.size):
+                        print("input {} = {}".format(i, vals[flattenInputVars[i]]))
+                    for i in range(outputVars.size):
+                        print("output {} = {}".format(i, vals[outputVars[i]]))
+                else:
+                    print(exitCode)
+
+            results.append([vals, stats, maxClass])
+        return results
+
+    def saveQuery(self, filename="", binary=False):
         """Serializes the inputQuery in the given filename
 
         Args:
-            filename: (string) file to write serialized inputQuery
+            filename: (string) file to write serialized inputQuery, compressed if it ends in .gz or .zst
+            binary: (bool) If true, write the binary query format, which can be memory-mapped when loading
         """
         ipq = self.getForwardQuery()
-        MarabouCore.saveQuery(ipq, str(filename))
+        MarabouCore.saveQuery(ipq, str(filename), binary)
+
+    def saveCache(self, dirname):
+        """Store the equations, constraints, bounds and input/output variables of the network
+
+        The cache is a directory of .npy files, so that :func:`loadCache` can memory-map the arrays, and of JSON
+        files for the other attributes. Nothing is pickled, so loading a cache entry cannot run code.
+        It is written to a temporary directory first and then renamed, so concurrent readers never see a
+        partially written cache. Networks with disjunctions or property equations are not stored.
+
+        Args:
+            dirname (str): Directory of the cache entry
+
+        Returns:
+            (bool): True if the cache entry was written
+        """
+        if self.disjunctionList or self.additionalEquList:
+            return False
+        arrays = {
+            "equ_rowPtr": self.equList.rowPtr, "equ_cols": self.equList.cols, "equ_coeffs": self.equList.coeffs,
+            "equ_scalars": self.equList.scalars, "equ_types": self.equList.types,
+        }
+        for name, pairs in [("relu", self.reluList), ("sigmoid", self.sigmoidList), ("abs", self.absList), ("sign", self.signList)]:
+            arrays[name] = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        maxElements = [sorted(elements) for elements, _ in self.maxList]
+        arrays["max_ptr"] = np.concatenate([[0], np.cumsum([len(elements) for elements in maxElements], dtype=np.int64)])
+        arrays["max_elements"] = np.array([e for elements in maxElements for e in elements], dtype=np.int64)
+        arrays["max_outputs"] = np.array([outVar for _, outVar in self.maxList], dtype=np.int64)
+        for name, bounds in [("lower", self.lowerBounds), ("upper", self.upperBounds)]:
+            arrays[name + "_vars"] = np.fromiter(bounds.keys(), dtype=np.int64, count=len(bounds))
+            arrays[name + "_values"] = np.fromiter(bounds.values(), dtype=np.float64, count=len(bounds))
+        for i, inputVars in enumerate(self.inputVars):
+            arrays["input_%d" % i] = np.asarray(inputVars)
+        for i, outputVars in enumerate(self.outputVars):
+            arrays["output_%d" % i] = np.asarray(outputVars)
+        extra = {}
+        for attr in self.cacheAttributes:
+            value = getattr(self, attr)
+            if isinstance(value, np.ndarray):
+                arrays["attr_" + attr] = value
+            else:
+                extra[attr] = value
+        meta = {"version": self.CACHE_VERSION, "class": type(self).__name__, "numVars": int(self.numVars),
+                "numInputs": len(self.inputVars), "numOutputs": len(self.outputVars),
+                "arrayAttributes": [attr for attr in self.cacheAttributes if attr not in extra]}
+
+        parent = os.path.dirname(os.path.abspath(dirname))
+        os.makedirs(parent, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(dir=parent)
+        try:
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmpdir, name + ".npy"), arr, allow_pickle=False)
+            with open(os.path.join(tmpdir, "extra.json"), "w") as f:
+                json.dump(extra, f)
+            with open(os.path.join(tmpdir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            os.rename(tmpdir, dirname)
+        except OSError:
+            # Another process stored the same network first
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            if not os.path.isdir(dirname):
+                raise
+        return True
+
+    def loadCache(self, dirname):
+        """Restore a network stored with :func:`saveCache`
+
+        The equation arrays are memory-mapped copy-on-write, so they are read from disk only when used
+        and can still be edited in memory.
+
+        Args:
+            dirname (str): Directory of the cache entry
+        """
+        with open(os.path.join(dirname, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != self.CACHE_VERSION or meta["class"] != type(self).__name__:
+            raise RuntimeError("Cache entry %s was not written by this version of %s" % (dirname, type(self).__name__))
+        def load(name, mmap_mode=None):
+            return np.load(os.path.join(dirname, name + ".npy"), mmap_mode=mmap_mode)
+
+        self.numVars = meta["numVars"]
+        self.equList = MarabouUtils.EquationTable.fromArrays(*[load("equ_" + name, mmap_mode="c")
+                                                               for name in ["rowPtr", "cols", "coeffs", "scalars", "types"]])
+        self.resetEquationIndex()
+        self.resetBaseQuery()
+        self.reluList = [tuple(pair) for pair in load("relu").tolist()]
+        self.sigmoidList = [tuple(pair) for pair in load("sigmoid").tolist()]
+        self.absList = [tuple(pair) for pair in load("abs").tolist()]
+        self.signList = [tuple(pair) for pair in load("sign").tolist()]
+        maxPtr, maxElements = load("max_ptr").tolist(), load("max_elements").tolist()
+        self.maxList = [(set(maxElements[maxPtr[i]:maxPtr[i + 1]]), outVar) for i, outVar in enumerate(load("max_outputs").tolist())]
+        self.lowerBounds = dict(zip(load("lower_vars").tolist(), load("lower_values").tolist()))
+        self.upperBounds = dict(zip(load("upper_vars").tolist(), load("upper_values").tolist()))
+        self.inputVars = [load("input_%d" % i) for i in range(meta["numInputs"])]
+        self.outputVars = [load("output_%d" % i) for i in range(meta["numOutputs"])]
+        for attr in meta["arrayAttributes"]:
+            setattr(self, attr, load("attr_" + attr))
+        with open(os.path.join(dirname, "extra.json")) as f:
+            for attr, value in json.load(f).items():
+                setattr(self, attr, value)
 
     def evaluateWithMarabou(self, inputValues, filename="evaluateWithMarabou.log", options=None):
         """Function to evaluate network at a given point using Marabou as solver
@@ -613,6 +1253,37 @@ class MarabouNetwork:
             outputValues[i] = outputValues[i].reshape(outputVars[i].shape)
         return outputValues, outputDict
 
+    def evaluateWithNLR(self, inputValues):
+        """Function to evaluate network at a given point using the network level reasoner
+
+        The network level reasoner is built from the query of the network and forward passes are run
+        on it directly, so no solver is called. Each input array may also hold a batch of several inputs
+        of the network, in which case every output array has one entry per input along its first dimension.
+
+        Args:
+            inputValues (list of np arrays): Inputs to evaluate
+
+        Returns:
+            (list of np arrays): Values representing the outputs of the network
+        """
+        inputValues = [np.asarray(inVal, dtype=np.float64) for inVal in inputValues]
+        batchSize = inputValues[0].size // self.inputVars[0].size
+        inputs = np.concatenate([inVal.reshape(batchSize, -1) for inVal in inputValues], axis=1)
+        outputs = MarabouCore.evaluateNetwork(self.getForwardQuery(), inputs)
+
+        outputValues = []
+        start = 0
+        for outVars in self.outputVars:
+            values = outputs[:, start:start + outVars.size]
+            start += outVars.size
+            if batchSize == 1:
+                outputValues.append(values.reshape(outVars.shape))
+            elif outVars.shape[:1] == (1,):
+                outputValues.append(values.reshape((batchSize,) + outVars.shape[1:]))
+            else:
+                outputValues.append(values.reshape((batchSize,) + outVars.shape))
+        return outputValues
+
     def evaluate(self, inputValues, useMarabou=True, options=None, filename="evaluateWithMarabou.log"):
         """Function to evaluate network at a given point
 
@@ -630,18 +1301,31 @@ class MarabouNetwork:
         if not useMarabou:
             return self.evaluateWithoutMarabou(inputValues)
 
-    def findError(self, inputValues, options=None, filename="evaluateWithMarabou.log"):
+    def findError(self, inputValues, options=None, filename="evaluateWithMarabou.log", useNLR=True):
         """Function to find error between Marabou solver and TF/Nnet at a given point
 
         Args:
             inputValues (list of np arrays): Input values to evaluate
             options (:class:`~maraboupy.MarabouCore.Options`) Object for specifying Marabou options, defaults to None
             filename (str): Path to redirect output if using Marabou solver, defaults to "evaluateWithMarabou.log"
+            useNLR (bool): Whether to evaluate the Marabou encoding with the network level reasoner instead of the
+                solver, when the network level reasoner can be built for it, defaults to True
 
         Returns:
-            (list of np arrays): Values representing the error in each output variable
+            (list of np arrays): Values representing the error in each output variable, or None if the
+            Marabou encoding is UNSAT at the given point
         """
-        outMar = self.evaluate(inputValues, useMarabou=True, options=options, filename=filename)
+        outMar = None
+        if useNLR:
+            try:
+                outMar = self.evaluateWithNLR(inputValues)
+            except ValueError:
+                pass
+        if outMar is None:
+            solution = self.evaluate(inputValues, useMarabou=True, options=options, filename=filename)
+            if solution is None:
+                return None
+            outMar = solution[0]
         outNotMar = self.evaluate(inputValues, useMarabou=False, options=options, filename=filename)
         assert len(outMar) == len(outNotMar)
         err = [np.abs(outMar[i] - outNotMar[i]) for i in range(len(outMar))]
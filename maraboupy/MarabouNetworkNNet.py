@@ -51,6 +51,9 @@ class MarabouNetworkNNet(MarabouNetwork.MarabouNetwork):
                                 with the normalization already incorporated.
 
     """
+    cacheAttributes = ['normalize', 'numLayers', 'layerSizes', 'inputSize', 'outputSize', 'maxLayersize',
+                       'inputMinimums', 'inputMaximums', 'inputMeans', 'inputRanges', 'outputMean', 'outputRange',
+                       'weights', 'biases', 'f_variables', 'b_variables']
 
     def __init__(self, filename='', normalize=False):
         super().__init__()
@@ -583,13 +586,14 @@ class MarabouNetworkNNet(MarabouNetwork.MarabouNetwork):
 
     def evaluateNNet(self, inputs, first_layer = 0, last_layer=-1, normalize_inputs=False,
                      normalize_outputs=False, activate_output_layer=False):
-        """ Evaluate nnet directly (without Marabou) at a given point
+        """ Evaluate nnet directly (without Marabou) at a given point or batch of points
 
         Evaluates the network on input inputs between layer first_layer (input layer by default)
-        and layer last_layer (output layer by default)
+        and layer last_layer (output layer by default). A 2-D array of inputs is evaluated as a batch
+        with one input per row, which is much faster than evaluating the rows one at a time.
 
         Args:
-            inputs (list of float):         Network inputs to be evaluated
+            inputs (list of float or 2-D np array): Network inputs to be evaluated
             first_layer  (int):              The initial layer of the evaluation
             last_layer (int):                The last layer of the evaluation
             normalize_inputs (bool):         If True and first_layer==0, normalization of inputs is performed
@@ -597,7 +601,7 @@ class MarabouNetworkNNet(MarabouNetwork.MarabouNetwork):
             activate_output_layer (bool):    If True, the last layer is activated, otherwise it is not.
 
         Returns:
-            (list of float): the result of the evaluation
+            (np array): the result of the evaluation, with one row per input if inputs is a batch
         """
         num_layers = self.numLayers
         input_size = self.inputSize
@@ -613,34 +617,28 @@ class MarabouNetworkNNet(MarabouNetwork.MarabouNetwork):
         if last_layer == -1:
             last_layer = num_layers
 
-        inputs_norm = inputs[:]
+        inputs = np.asarray(inputs, dtype=np.float64)
+        batched = inputs.ndim == 2
+        inputs_norm = np.atleast_2d(inputs)
 
         # Prepare the inputs to the neural network
         if normalize_inputs:
             if (first_layer == 0):
-
-
-                for i in range(input_size):
-                    if inputs[i] < mins[i]:
-                        inputs_norm[i] = (mins[i] - means[i]) / ranges[i]
-                    elif inputs[i] > maxes[i]:
-                        inputs_norm[i] = (maxes[i] - means[i]) / ranges[i]
-                    else:
-                        inputs_norm[i] = (inputs[i] - means[i]) / ranges[i]
+                inputs_norm = (np.clip(inputs_norm, mins[:input_size], maxes[:input_size]) - means[:input_size]) \
+                    / ranges[:input_size]
             else:
                 warnings.warn('Normalization of inputs is supported for the input layer only. Request for '
                               'normalization of inputs ignored.')
 
-        # Evaluate the neural network
+        # Evaluate the neural network, with one input per row
         for layer in range(first_layer, last_layer - 1):
-            inputs_norm = np.maximum(np.dot(weights[layer], inputs_norm) + biases[layer], 0)
+            inputs_norm = np.maximum(inputs_norm @ np.asarray(weights[layer]).T + biases[layer], 0)
 
         layer = last_layer - 1
 
+        outputs = inputs_norm @ np.asarray(weights[layer]).T + biases[layer]
         if (activate_output_layer):
-            outputs = np.maximum(np.dot(weights[layer], inputs_norm) + biases[layer], 0)
-        else:
-            outputs = np.dot(weights[layer], inputs_norm) + biases[layer]
+            outputs = np.maximum(outputs, 0)
 
         # Undo output normalization
         if (normalize_outputs):
@@ -651,28 +649,31 @@ class MarabouNetworkNNet(MarabouNetwork.MarabouNetwork):
                 output_mean = means[layer - 1]
                 output_range = ranges[layer - 1]
 
-            for i in range(output_size):
-                outputs[i] = outputs[i] * output_range + output_mean
+            outputs[:, :output_size] = outputs[:, :output_size] * output_range + output_mean
 
-        return outputs
+        return outputs if batched else outputs[0]
 
-    def createRandomInputsForNetwork(self):
-        """Create a random input for the network.
+    def createRandomInputsForNetwork(self, numInputs=None):
+        """Create a random input for the network, or a batch of them.
 
         The value for each input variable is chosen uniformly at random between the lower and the upper bounds
         for that variable.
 
+        Args:
+            numInputs (int, optional): If set, create this many inputs at once, as the rows of a 2-D array
+
         Returns:
-            (list of float)
+            (list of float), or (2-D np array) if numInputs is set
         """
-        inputs = []
-        for input_var in self.inputVars[0].flatten():
+        inputVars = self.inputVars[0].flatten()
+        for input_var in inputVars:
             assert self.upperBoundExists(input_var)
             assert self.lowerBoundExists(input_var)
-            random_value = np.random.uniform(low=self.lowerBounds[input_var],
-                                             high=self.upperBounds[input_var])
-            inputs.append(random_value)
-        return inputs
+        lows = np.array([self.lowerBounds[input_var] for input_var in inputVars])
+        highs = np.array([self.upperBounds[input_var] for input_var in inputVars])
+        if numInputs is None:
+            return list(np.random.uniform(low=lows, high=highs))
+        return np.random.uniform(low=lows, high=highs, size=(numInputs, len(inputVars)))
 
     def buildEquations(self):
         """Construct the Marabou equations
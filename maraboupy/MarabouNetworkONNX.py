@@ -32,12 +32,18 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         filename (str): Path to the ONNX file
         inputNames: (list of str, optional): List of node names corresponding to inputs
         outputNames: (list of str, optional): List of node names corresponding to outputs
+        reindexOutputVars: (bool, optional): Reindex the variables so that the output variables are immediate after input variables
+        vectorize: (bool, optional): Build the equations of Conv, Gemm and MatMul nodes with batched NumPy operations
+            instead of adding one addend at a time. Defaults to True
 
     Returns:
         :class:`~maraboupy.Marabou.marabouNetworkONNX.marabouNetworkONNX`
     """
-    def __init__(self, filename, inputNames=None, outputNames=None, reindexOutputVars=True):
+    cacheAttributes = ['inputNames', 'outputNames']
+
+    def __init__(self, filename, inputNames=None, outputNames=None, reindexOutputVars=True, vectorize=True):
         super().__init__()
+        self.vectorize = vectorize
         self.readONNX(filename, inputNames, outputNames, reindexOutputVars=reindexOutputVars)
 
     def clear(self):
@@ -51,6 +57,8 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         self.inputNames = None
         self.outputNames = None
         self.graph = None
+        self.session = None
+        self.sessionThreads = (0, 0)
 
     def shallowClear(self):
         """Reset values to represent new copy
@@ -65,6 +73,7 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         self.inputNames = None
         self.outputNames = None
         self.graph = None
+        self.session = None
 
     def readONNX(self, filename, inputNames, outputNames, reindexOutputVars=True):
         """Read an ONNX file and create a MarabouNetworkONNX object
@@ -591,6 +600,12 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         weights = self.constantMap[node.input[1]]
         outVars = self.makeNewVariables(nodeName)
 
+        if self.vectorize:
+            # Move the channels to the last axis, as expected by addConv2DEquations
+            self.addConv2DEquations(np.transpose(inVars, (0, 2, 3, 1)), np.transpose(weights, (2, 3, 1, 0)),
+                                    np.transpose(outVars, (0, 2, 3, 1)), biases, strides, [pad_left, pad_bottom])
+            return
+
         ### Generate actual equations ###
         # There is one equation for every output variable
         for i in range(out_width):
@@ -674,6 +689,10 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
 
         # Create new variables
         outputVariables = self.makeNewVariables(nodeName)
+        if self.vectorize:
+            self.addMatMulEquations(input1, input2 * alpha, outputVariables, input3 * beta)
+            return
+
         # Generate equations
         for i in range(shape1[0]):
             for j in range(shape2[1]):
@@ -739,6 +758,14 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         if len(outputVariables.shape) == 1 and len(shape2) > 1:
             outputVariables = outputVariables.reshape([1, outputVariables.shape[0]])
 
+        if self.vectorize:
+            # Treat matrix-vector multiplication as multiplication with a single column matrix
+            if len(shape2) == 1:
+                input2 = input2.reshape([shape2[0], 1])
+                outputVariables = outputVariables.reshape([shape1[0], 1])
+            self.addMatMulEquations(input1, input2, outputVariables, 0.0, firstInputConstant=firstInputConstant)
+            return
+
         # Generate equations
         for i in range(shape1[0]):
             # Differentiate between matrix-vector multiplication and matrix-matrix multiplication
@@ -1019,25 +1046,19 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         constInput = constInput.reshape(-1)
         varInput = varInput.reshape(-1)
 
-        # Adjust equations to incorporate the constant addition
-        numEquationsChanged = 0
-        for equ in self.equList:
-            (c,var) = equ.addendList[-1]
-            assert c == -1
-            if var in varInput:
-                ind = np.where(var == varInput)[0][0]
-
-                # Adjust the equation
-                equ.setScalar(equ.scalar-constInput[ind])
-                numEquationsChanged += 1
-
-        # If we changed one equation for every input variable, then
-        # we don't need any new equations
-        if numEquationsChanged == len(varInput):
+        # Look up the equations whose output variables are the input variables
+        equationIndices = self.getEquationIndices(varInput)
+        numEquationsFound = np.count_nonzero(equationIndices >= 0)
+
+        # If there is one equation for every input variable, then adjust
+        # their scalars and we don't need any new equations
+        if numEquationsFound == len(varInput):
+            self.equList.scalars[equationIndices] -= constInput
+            self.resetBaseQuery()
             self.varMap[nodeName] = varInput
         else:
-            # Otherwise, assert no equations were changed, and we need to create new equations
-            assert numEquationsChanged == 0
+            # Otherwise, assert no equations were found, and we need to create new equations
+            assert numEquationsFound == 0
             outputVariables = self.makeNewVariables(nodeName).reshape(-1)
             for i in range(len(outputVariables)):
                 e = MarabouUtils.Equation()
@@ -1142,30 +1163,6 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
             if nodeName not in self.varMap and nodeName not in self.constantMap:
                 self.shapeMap.pop(nodeName)
                 
-    def reassignVariable(self, var, numInVars, outVars, newOutVars):
-        """Reassign output variable so that output variables follow input variables
-
-        This function computes what the given variable should be when the output variables are 
-        moved to come after the input variables.
-
-        Args:
-            var (int): Original variable number
-            numInVars (int): Number of input variables
-            outVars (numpy array of int): Original output variables
-            newOutVars (numpy array of int): New output variables
-
-        Returns:
-            (int): New variable assignment
-
-        :meta private:
-        """
-        if var < numInVars:
-            return var
-        if var in outVars:
-            ind = np.where(var == outVars)[0][0]
-            return newOutVars[ind]
-        return var + len([outVar for outVar in outVars if outVar > var])
-    
     def reassignOutputVariables(self):
         """Reassign output variables so output variable numbers follow input variable numbers
         
@@ -1182,41 +1179,8 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         numOutVars = len(outVars)
         newOutVars = np.array(range(numInVars, numInVars+numOutVars))
         
-        # Adjust equation variables
-        for eq in self.equList:
-            for i, (c,var) in enumerate(eq.addendList):
-                eq.addendList[i] = (c, self.reassignVariable(var, numInVars, outVars, newOutVars))
-
-        # Adjust equation variables
-        for eq in self.additionalEquList:
-            for i, (c,var) in enumerate(eq.addendList):
-                eq.addendList[i] = (c, self.reassignVariable(var, numInVars, outVars, newOutVars))
-
-        # Adjust relu list
-        for i, variables in enumerate(self.reluList):
-            self.reluList[i] = tuple([self.reassignVariable(var, numInVars, outVars, newOutVars) for var in variables])
-
-        # Adjust sigmoid list
-        for i, variables in enumerate(self.sigmoidList):
-            self.sigmoidList[i] = tuple([self.reassignVariable(var, numInVars, outVars, newOutVars) for var in variables])
-
-        # Adjust max pool list
-        for i, (elements, outVar) in enumerate(self.maxList):
-            newOutVar = self.reassignVariable(outVar, numInVars, outVars, newOutVars)
-            newElements = set()
-            for var in elements:
-                newElements.add(self.reassignVariable(var, numInVars, outVars, newOutVars))
-            self.maxList[i] = (newElements, newOutVar)
-            
-        # Adjust upper/lower bounds
-        newLowerBounds = dict()
-        newUpperBounds = dict()
-        for var in self.lowerBounds:
-            newLowerBounds[self.reassignVariable(var, numInVars, outVars, newOutVars)] = self.lowerBounds[var]
-        for var in self.upperBounds:
-            newUpperBounds[self.reassignVariable(var, numInVars, outVars, newOutVars)] = self.upperBounds[var]
-        self.lowerBounds = newLowerBounds
-        self.upperBounds = newUpperBounds
+        # Renumber all variables with one permutation array
+        self.permuteVariables(self.getOutputVariablePermutation(numInVars, outVars))
 
         # Assign output variables to the new array
         for outputName in self.outputNames:
@@ -1226,15 +1190,28 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
 
         self.outputVars = [self.varMap[outputName] for outputName in self.outputNames]
     
-    def evaluateWithoutMarabou(self, inputValues):
-        """Try to evaluate the network with the given inputs using ONNX
+    def setSessionThreads(self, intraOpNumThreads=0, interOpNumThreads=0):
+        """Set the number of threads of the onnxruntime session used by :func:`evaluateWithoutMarabou`
 
         Args:
-            inputValues (list of numpy array): Input values representing inputs to network
+            intraOpNumThreads (int): Threads used to parallelize the execution within nodes, 0 lets onnxruntime choose
+            interOpNumThreads (int): Threads used to parallelize the execution of the graph, 0 lets onnxruntime choose
+        """
+        self.sessionThreads = (intraOpNumThreads, interOpNumThreads)
+        self.session = None
 
-        Returns:
-            (list of numpy array): Output values of neural network
+    def getSession(self):
+        """Get the onnxruntime session of the network, which is created and checked on first use
+
+        :meta private:
         """
+        if self.session is not None:
+            return self.session
+
+        # The graph is not stored in the cache of parsed networks, so load it if needed
+        if self.graph is None:
+            self.graph = onnx.load(self.filename).graph
+
         # Check that all input variables are designated as inputs in the graph
         # Unlike Tensorflow, ONNX only allows assignment of values to input/output nodes
         onnxInputNames = [node.name for node in self.graph.input]
@@ -1248,24 +1225,68 @@ class MarabouNetworkONNX(MarabouNetwork.MarabouNetwork):
         for outputName in self.outputNames:
             if outputName not in onnxOutputNames:
                 raise NotImplementedError("ONNX does not allow intermediate layers to be set as the output!")
-        
-        initNames =  [node.name for node in self.graph.initializer]
-        graphInputs = [inp.name for inp in self.graph.input if inp.name not in initNames]
-        if len(inputValues) != len(graphInputs):
-            raise RuntimeError("There are %d inputs to network, but only %d input arrays were given."%(len(graphInputs), len(inputValues)))
-            
-        # Use onnxruntime session to evaluate the point
-        sess = onnxruntime.InferenceSession(self.filename)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads, options.inter_op_num_threads = self.sessionThreads
+        session = onnxruntime.InferenceSession(self.filename, sess_options=options)
+
+        initNames = set(node.name for node in self.graph.initializer)
+        self.numGraphInputs = len([inp.name for inp in self.graph.input if inp.name not in initNames])
+        self.sessionInputs = [sessionInput for sessionInput in session.get_inputs() if sessionInput.name in self.inputNames]
+        for sessionInput in self.sessionInputs:
+            # Inputs are cast to float32
+            if 'float' not in sessionInput.type:
+                raise NotImplementedError("Inputs to network expected to be of type 'float', not %s" % sessionInput.type)
+        self.session = session
+        return session
+
+    def evaluateWithoutMarabou(self, inputValues):
+        """Try to evaluate the network with the given inputs using ONNX
+
+        The onnxruntime session is created on the first call and reused afterwards. Each input array
+        may also hold a batch of several inputs of the network, in which case every output array has
+        one entry per input along its first dimension.
+
+        Args:
+            inputValues (list of numpy array): Input values representing inputs to network
+
+        Returns:
+            (list of numpy array): Output values of neural network
+        """
+        sess = self.getSession()
+        if len(inputValues) != self.numGraphInputs:
+            raise RuntimeError("There are %d inputs to network, but only %d input arrays were given."%(self.numGraphInputs, len(inputValues)))
+
+        inputValues = [np.asarray(inputValue) for inputValue in inputValues]
+        batchSizes = [inputValues[i].size // max(self.inputVars[i].size, 1) for i in range(len(self.inputNames))]
+        if len(set(batchSizes)) > 1:
+            raise RuntimeError("The input arrays hold batches of different sizes: %s" % ", ".join(map(str, batchSizes)))
+        batchSize = batchSizes[0] if batchSizes else 0
+        shapes = [self.inputVars[i].shape for i in range(len(self.inputNames))]
+        if batchSize > 1:
+            if any(inputValues[i].size != batchSize * self.inputVars[i].size or shapes[i][:1] != (1,)
+                   for i in range(len(self.inputNames))):
+                raise RuntimeError("Batches of inputs need a batch dimension of size 1 in every network input")
+
+            # Models with a fixed batch dimension are run once per input of the batch
+            if any(isinstance(sessionInput.shape[0], int) for sessionInput in self.sessionInputs):
+                outputs = [self.runSession(sess, [inputValue.reshape((batchSize,) + shape[1:])[j]
+                                                  for inputValue, shape in zip(inputValues, shapes)], shapes)
+                           for j in range(batchSize)]
+                # Outputs without a batch dimension of their own get a new one
+                return [np.concatenate(output, axis=0) if output[0].shape[:1] == (1,) else np.stack(output)
+                        for output in zip(*outputs)]
+            shapes = [(batchSize,) + shape[1:] for shape in shapes]
+        return self.runSession(sess, inputValues, shapes)
+
+    def runSession(self, sess, inputValues, shapes):
+        """Run the onnxruntime session on inputs reshaped to the given shapes
+
+        :meta private:
+        """
         input_dict = dict()
         for i, inputName in enumerate(self.inputNames):
-            
-            # Try to cast input to correct type
-            onnxType = sess.get_inputs()[i].type
-            if 'float' in onnxType:
-                inputType = 'float32'
-            else:
-                raise NotImplementedError("Inputs to network expected to be of type 'float', not %s" % onnxType)
-            input_dict[inputName] = inputValues[i].reshape(self.inputVars[i].shape).astype(inputType)
+            input_dict[inputName] = inputValues[i].reshape(shapes[i]).astype('float32')
         return sess.run(self.outputNames, input_dict)
 
 def getBroadcastShape(shape1, shape2):
@@ -12,7 +12,6 @@ directory for licensing information.
 MarabouNetworkONNX represents neural networks with piecewise linear constraints derived from the ONNX format
 '''
 import torch
-from collections import defaultdict
 import numpy as np
 import onnx
 import onnxruntime
@@ -589,7 +588,7 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
                                     c = weights[k][dk][di][dj]
                                     e.addAddend(c, var)
 
-                                    self.accumulatedGrad[var].append((outVars[0][k][i][j], c))
+                                    self.accumulatedGrad.add(var, outVars[0][k][i][j], c)
 
                     # Add output variable
                     e.addAddend(-1, outVars[0][k][i][j])
@@ -702,18 +701,18 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
                 input2 = np.transpose(fake_net.fc3.weight.detach().numpy())
                 input3 = np.broadcast_to(fake_net.fc3.bias.detach().numpy(), outShape)
 
-        for i in range(shape1[0]):
-            for j in range(shape2[1]):
-                #forward equation
-                e = MarabouUtils.Equation()
-                for k in range(shape1[1]):
-                    e.addAddend(input2[k][j]*alpha, input1[i][k])
-                    #accumulate grad
-                    self.accumulatedGrad[input1[i][k]].append((outputVariables[i][j], input2[k][j]*alpha))
-                # Put output variable as the last addend last
-                e.addAddend(-1, outputVariables[i][j])
-                e.setScalar(-input3[i][j]*beta)
-                self.addEquation(e)
+        # Equation (i, j) has the addends input2[k][j]*alpha * input1[i][k], with the output variable as the last addend
+        numRows, numInner, numCols = shape1[0], shape1[1], shape2[1]
+        weights = np.asarray(input2, dtype=np.float64) * alpha
+        coefficients = np.concatenate([np.broadcast_to(weights.T, (numRows, numCols, numInner)),
+                                       -np.ones((numRows, numCols, 1))], axis=2)
+        variables = np.concatenate([np.broadcast_to(input1[:, None, :], (numRows, numCols, numInner)),
+                                    outputVariables[:, :, None]], axis=2)
+        self.addEquationArrays(coefficients.reshape(numRows * numCols, -1), variables.reshape(numRows * numCols, -1),
+                               -np.asarray(input3, dtype=np.float64).reshape(-1) * beta)
+
+        #accumulate grad
+        self.accumulatedGrad.addBlock(input1[:, :, None], outputVariables[:, None, :], weights[None, :, :])
     
     def matMulEquations(self, node, makeEquations):
         """Function to generate equations corresponding to matrix multiplication
@@ -775,11 +774,8 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
                     for k in range(shape1[1]):
                         if firstInputConstant:
                             e.addAddend(input1[i][k], input2[k][j])
-                            #accumulate grad
-                            self.accumulatedGrad[input2[k][j]].append((outputVariables[i][j], input1[i][k]))
                         else:
                             e.addAddend(input2[k][j], input1[i][k])
-                            self.accumulatedGrad[input1[i][k]].append((outputVariables[i][j], input2[k][j]))
                     # Put output variable as the last addend last
                     e.addAddend(-1, outputVariables[i][j])
                     e.setScalar(0.0)
@@ -796,6 +792,13 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
                 e.setScalar(0.0)
                 self.addEquation(e)
 
+        #accumulate grad
+        if len(shape2) > 1:
+            if firstInputConstant:
+                self.accumulatedGrad.addBlock(input2[None, :, :], outputVariables[:, None, :], np.asarray(input1)[:, :, None])
+            else:
+                self.accumulatedGrad.addBlock(input1[:, :, None], outputVariables[:, None, :], np.asarray(input2)[None, :, :])
+
 
     def mulEquations(self, node, makeEquations):
         nodeName = node.output[0]
@@ -905,25 +908,19 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
         constInput = constInput.reshape(-1)
         varInput = varInput.reshape(-1)
 
-        # Adjust equations to incorporate the constant addition
-        numEquationsChanged = 0
-        for equ in self.equList:
-            (c,var) = equ.addendList[-1]
-            assert c == -1
-            if var in varInput:
-                ind = np.where(var == varInput)[0][0]
-
-                # Adjust the equation
-                equ.setScalar(equ.scalar-constInput[ind])
-                numEquationsChanged += 1
-
-        # If we changed one equation for every input variable, then
-        # we don't need any new equations
-        if numEquationsChanged == len(varInput):
+        # Look up the equations whose output variables are the input variables
+        equationIndices = self.getEquationIndices(varInput)
+        numEquationsFound = np.count_nonzero(equationIndices >= 0)
+
+        # If there is one equation for every input variable, then adjust
+        # their scalars and we don't need any new equations
+        if numEquationsFound == len(varInput):
+            self.equList.scalars[equationIndices] -= constInput
+            self.resetBaseQuery()
             self.varMap[nodeName] = varInput
         else:
-            # Otherwise, assert no equations were changed, and we need to create new equations
-            assert numEquationsChanged == 0
+            # Otherwise, assert no equations were found, and we need to create new equations
+            assert numEquationsFound == 0
             outputVariables = self.makeNewVariables(nodeName).reshape(-1)
             for i in range(len(outputVariables)):
                 e = MarabouUtils.Equation()
@@ -997,35 +994,6 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
             if nodeName not in self.varMap and nodeName not in self.constantMap:
                 self.shapeMap.pop(nodeName)
                 
-    def reassignVariable(self, var:int, numInVars:int, outVars, newOutVars):
-        """Reassign output variable so that output variables follow input variables
-
-        This function computes what the given variable should be when the output variables are 
-        moved to come after the input variables.
-
-        Args:
-            var (int): Original variable number
-            numInVars (int): Number of input variables
-            outVars (numpy array of int): Original output variables
-            newOutVars (numpy array of int): New output variables
-
-        Returns:
-            (int): New variable assignment
-
-        :meta private:
-        """
-        new_var_id:int
-        if var < numInVars:
-            new_var_id = var
-            return new_var_id
-        if var in outVars:
-            ind = np.where(var == outVars)[0][0]
-            new_var_id =  newOutVars[ind]
-            return new_var_id
-        new_var_id = var + len([outVar for outVar in outVars if outVar > var])
-        return new_var_id    
-
-
     def reassignOutputVariables(self):
         """Reassign output variables so output variable numbers follow input variable numbers
         
@@ -1042,55 +1010,18 @@ class MarabouNetworkONNXPlus(MarabouNetwork.MarabouNetwork):
         numOutVars = len(outVars)
         newOutVars = np.array(range(numInVars, numInVars+numOutVars))
         
-        # Adjust equation variables
-        for eq in self.equList:
-            for i, (c,var) in enumerate(eq.addendList):
-                eq.addendList[i] = (c, self.reassignVariable(var, numInVars, outVars, newOutVars))
-                
-        # Adjust relu list
-        for i, variables in enumerate(self.reluList):
-            self.reluList[i] = tuple([self.reassignVariable(var, numInVars, outVars, newOutVars) for var in variables])
-
-        # Adjust sigmoid list
-        for i, variables in enumerate(self.sigmoidList):
-            self.sigmoidList[i] = tuple([self.reassignVariable(var, numInVars, outVars, newOutVars) for var in variables])
-
-        # Adjust max pool list
-        for i, (elements, outVar) in enumerate(self.maxList):
-            newOutVar = self.reassignVariable(outVar, numInVars, outVars, newOutVars)
-            newElements = set()
-            for var in elements:
-                newElements.add(self.reassignVariable(var, numInVars, outVars, newOutVars))
-            self.maxList[i] = (newElements, newOutVar)
+        # Renumber all variables with one permutation array
+        perm = self.getOutputVariablePermutation(numInVars, outVars)
+        self.permuteVariables(perm)
 
         # Adjust backward equations:
-        newAccumulatedGrad = defaultdict(list)
-        for k in self.accumulatedGrad:
-            new_k = self.reassignVariable(k, numInVars, outVars, newOutVars)
-            for v, coeff in self.accumulatedGrad[k]:
-                new_v = self.reassignVariable(v, numInVars, outVars, newOutVars)
-                newAccumulatedGrad[new_k].append((new_v, coeff))
-        self.accumulatedGrad = newAccumulatedGrad
-
-        # Adjust upper/lower bounds
-        newLowerBounds = dict()
-        newUpperBounds = dict()
-        for var in self.lowerBounds:
-            newLowerBounds[self.reassignVariable(var, numInVars, outVars, newOutVars)] = self.lowerBounds[var]
-        for var in self.upperBounds:
-            newUpperBounds[self.reassignVariable(var, numInVars, outVars, newOutVars)] = self.upperBounds[var]
-        self.lowerBounds = newLowerBounds
-        self.upperBounds = newUpperBounds
+        self.accumulatedGrad.permute(perm)
 
         # Adjust variables in intermediate nodes
         for node in self.varMap:
             if node in self.outputNames or node in self.inputNames:
                 continue
-            new_v = []
-            #NHAM: we assume that all immediate nodes are smaller than the output node
-            assert np.max(self.varMap[node]) < np.min(outVars), print(node, self.varMap) 
-            f = lambda x: x + len([outVar for outVar in outVars])
-            self.varMap[node] = f(self.varMap[node])
+            self.varMap[node] = perm[self.varMap[node]]
 
         # Assign output variables to the new array
         for outputName in self.outputNames:
@@ -662,44 +662,14 @@ class MarabouNetworkTF(MarabouNetwork.MarabouNetwork):
         # Try to get scalar values in case this operation is followed by BiasAddition
         scalars, sgnVar, sgnScalar = self.getScalars(op, outputVars)
 
-        # Generate equations
+        # Generate equations with an im2col index gather
         # There is one equation for every output variable
-        for n in range(out_num):
-            for i in range(out_height):
-                for j in range(out_width):
-                    for k in range(out_channels): # Out_channel also corresponds to filter number
-                        e = MarabouUtils.Equation()
-                        
-                        # The equation convolves the filter with the specified input region
-                        # Iterate over the filter
-                        for di in range(filter_height):
-                            for dj in range(filter_width):
-                                for dk in range(filter_channels):
-                                    
-                                    # Get 2D location of filter with respect to input variables
-                                    h_ind = strides_height * i + di - pad_top
-                                    w_ind = strides_width * j + dj - pad_left
-                                    
-                                    # Build equation when h_ind and w_ind are valid
-                                    if h_ind < in_height and h_ind >= 0 and w_ind < in_width and w_ind >= 0:
-                                        if data_format == 'NHWC':
-                                            var = inputVars[n][h_ind][w_ind][dk]
-                                            c = filters[di][dj][dk][k] * sgnVar
-                                            e.addAddend(c, var)
-                                        else:
-                                            var = inputVars[n][dk][h_ind][w_ind]
-                                            c = filters[di][dj][dk][k] * sgnVar
-                                            e.addAddend(c, var)
-                                            
-                        # Add output variable
-                        if data_format == 'NHWC':
-                            e.addAddend(-1, outputVars[n][i][j][k])
-                            e.setScalar(-sgnScalar * scalars[n][i][j][k])
-                            self.addEquation(e)
-                        else:
-                            e.addAddend(-1, outputVars[n][k][i][j])
-                            e.setScalar(-sgnScalar * scalars[n][k][i][j])
-                            self.addEquation(e)
+        if data_format == 'NCHW':
+            inputVars = np.transpose(inputVars, (0, 2, 3, 1))
+            outputVars = np.transpose(outputVars, (0, 2, 3, 1))
+            scalars = np.transpose(np.broadcast_to(scalars, (out_num, out_channels, out_height, out_width)), (0, 2, 3, 1))
+        self.addConv2DEquations(inputVars, filters * sgnVar, outputVars, sgnScalar * scalars,
+                                [strides_height, strides_width], [pad_top, pad_left])
 
     def reluEquations(self, op):
         """Function to generate equations corresponding to pointwise Relu
@@ -819,32 +789,6 @@ class MarabouNetworkTF(MarabouNetwork.MarabouNetwork):
             self.setLowerBound(outVar, -1.0)
             self.setUpperBound(outVar, 1.0)
 
-    def reassignVariable(self, var, numInVars, outVars, newOutVars):
-        """ Reassign variable number so output variables follow input variables
-
-        Args:
-            var: (int) Original variable number
-            numInVars: (int) Number of input variables
-            outVars: (array of int) Original output variables
-            newOutVars: (array of int) New output variables
-
-        Returns:
-            (int) New variable assignment
-
-        :meta private:
-        """
-        # Do not change input variables
-        if var < numInVars:
-            return var
-        
-        # Map output variables to new values
-        if var in outVars:
-            ind = np.where(var == outVars)[0][0]
-            return newOutVars[ind]
-        
-        # Adjust other variables as needed to make room for output variables
-        return var + newOutVars.size - np.sum([outVar < var for outVar in outVars])
-    
     def reassignOutputVariables(self):
         """Reassign all variables so that output variables follow input variables
 
@@ -858,41 +802,8 @@ class MarabouNetworkTF(MarabouNetwork.MarabouNetwork):
         numOutVars = outVars.size
         newOutVars = np.array(range(numInVars,numInVars+numOutVars))
         
-        # Build dictionary mapping old variable assignments to their new assignment
-        reassignMap = dict()
-        for var in range(self.numVars):
-            reassignMap[var] = self.reassignVariable(var, numInVars, outVars, newOutVars)
-        
-        # Adjust equation variables
-        for eq in self.equList:
-            for i, (c,var) in enumerate(eq.addendList):
-                eq.addendList[i] = (c, reassignMap[var])
-                
-        # Adjust relu list
-        for i, variables in enumerate(self.reluList):
-            self.reluList[i] = tuple([reassignMap[var] for var in variables])
-        
-        # Adjust sign list
-        for i, variables in enumerate(self.signList):
-            self.signList[i] = tuple([reassignMap[var] for var in variables])
-
-        # Adjust maxpool list
-        for i, (elements, outVar) in enumerate(self.maxList):
-            newOutVar = reassignMap[outVar]
-            newElements = set()
-            for var in elements:
-                newElements.add(reassignMap[var])
-            self.maxList[i] = (newElements, newOutVar)
-            
-        # Adjust upper/lower bounds
-        newLowerBounds = dict()
-        newUpperBounds = dict()
-        for var in self.lowerBounds:
-            newLowerBounds[reassignMap[var]] = self.lowerBounds[var]
-        for var in self.upperBounds:
-            newUpperBounds[reassignMap[var]] = self.upperBounds[var]
-        self.lowerBounds = newLowerBounds
-        self.upperBounds = newUpperBounds
+        # Renumber all variables with one permutation array
+        self.permuteVariables(self.getOutputVariablePermutation(numInVars, outVars))
 
         # Assign output variables to the new array
         self.outputVars = []
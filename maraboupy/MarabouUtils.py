@@ -15,7 +15,28 @@ MarabouUtils contains supporting Maraboupy code that doesn't fit in other files
 
 from maraboupy import MarabouCore
 from typing import List, Tuple
-from maraboupy.MarabouNetwork import ZERO
+import numpy as np
+
+
+def optionValues(options):
+    """Read the attributes of an options object, so that they can be sent to another process
+
+    :meta private:
+    """
+    return {name: getattr(options, name) for name in dir(options)
+            if name.startswith('_') and not name.startswith('__')
+            and not callable(getattr(options, name))}
+
+
+def optionsFromValues(values):
+    """Create an options object from attributes read with :func:`optionValues`
+
+    :meta private:
+    """
+    options = MarabouCore.Options()
+    for name, value in values.items():
+        setattr(options, name, value)
+    return options
 
 
 
@@ -26,14 +47,36 @@ class Equation:
         addendList (list of tuples): Each addend tuple contains a coefficient and variable number
         scalar (float): Scalar term for equation
         EquationType (:class:`~maraboupy.MarabouCore.EquationType`): Equation type (EQ, LE, GE)
+        coefficients (numpy array of float): Coefficients of the addends, if they were set with :func:`setAddends`
+        variables (numpy array of int): Variables of the addends, if they were set with :func:`setAddends`
     """
     def __init__(self, EquationType=MarabouCore.Equation.EQ):
         """Construct empty equation
         """
-        self.addendList:List[Tuple[float, int]] = []
+        self._addendList:List[Tuple[float, int]] = []
+        self.coefficients = None
+        self.variables = None
         self.scalar:float = float('-inf')
         self.EquationType = EquationType
 
+    @property
+    def addendList(self):
+        """List of (coefficient, variable) tuples
+
+        If the addends were given as arrays, the list is only built the first time it is accessed
+        """
+        if self.coefficients is not None:
+            self._addendList = list(zip(self.coefficients.tolist(), self.variables.tolist()))
+            self.coefficients = None
+            self.variables = None
+        return self._addendList
+
+    @addendList.setter
+    def addendList(self, addends):
+        self.coefficients = None
+        self.variables = None
+        self._addendList = addends
+
     def setScalar(self, x):
         """Set scalar of equation
 
@@ -50,8 +93,23 @@ class Equation:
             x (int): variable number of variable in addend
         """
         self.addendList += [(c, x)]
+
+    def setAddends(self, coefficients, variables):
+        """Set all addends of the equation at once
+
+        The arrays are kept as they are, so no per-addend Python objects are created
+        unless :attr:`addendList` is accessed.
+
+        Args:
+            coefficients (numpy array of float): Coefficients of the addends
+            variables (numpy array of int): Variable numbers of the addends
+        """
+        assert len(coefficients) == len(variables)
+        self._addendList = []
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.variables = np.asarray(variables, dtype=np.int64)
+
     def toCoreEquation(self)->MarabouCore.Equation:
-        print(self)
         eq = MarabouCore.Equation(self.EquationType)
         for (c, v) in self.addendList:
             eq.addAddend(c, v)
@@ -79,57 +137,465 @@ class Equation:
         lhs = " + ".join(terms)
         return "{} {} {}".format(lhs, sign, rhs)
 
-class ReLUGradEquation:
+class EquationView(Equation):
+    """Equation of an :class:`~maraboupy.MarabouUtils.EquationTable`, as returned by indexing the table
+
+    Reading the view reads the row of the table, and editing it with :func:`setScalar`, :func:`addAddend`,
+    :func:`setAddends` or by assigning its attributes writes the row back into the table.
     """
-    Given v_out = ReLU(v_in)
-    The corresponding g_in can be computed knowing g_out and v_out
+    def __init__(self, table, index):
+        """Construct view of an equation of a table
+
+        Args:
+            table (:class:`~maraboupy.MarabouUtils.EquationTable`): Table holding the equation
+            index (int): Index of the equation in the table
+        """
+        self._table = table
+        self._index = index
+
+    @property
+    def coefficients(self):
+        start, end = self._table._rowPtr[self._index], self._table._rowPtr[self._index + 1]
+        return self._table._coeffs[start:end].copy()
+
+    @property
+    def variables(self):
+        start, end = self._table._rowPtr[self._index], self._table._rowPtr[self._index + 1]
+        return self._table._cols[start:end].copy()
+
+    @property
+    def addendList(self):
+        return list(zip(self.coefficients.tolist(), self.variables.tolist()))
+
+    @addendList.setter
+    def addendList(self, addends):
+        self._table._setAddends(self._index, [c for c, _ in addends], [v for _, v in addends])
+
+    @property
+    def scalar(self):
+        return float(self._table._scalars[self._index])
+
+    @scalar.setter
+    def scalar(self, x):
+        self._table._scalars[self._index] = x
+
+    @property
+    def EquationType(self):
+        return MarabouCore.Equation.EquationType(int(self._table._types[self._index]))
+
+    @EquationType.setter
+    def EquationType(self, EquationType):
+        self._table._types[self._index] = int(EquationType)
+
+    def setAddends(self, coefficients, variables):
+        assert len(coefficients) == len(variables)
+        self._table._setAddends(self._index, coefficients, variables)
+
+class EquationTable:
+    """Compact table of equations stored in compressed sparse row (CSR) format
+
+    The addends of equation i are the pairs (coeffs[k], cols[k]) for k in range(rowPtr[i], rowPtr[i+1]).
+    The table needs memory proportional to the number of addends instead of one Python object per addend.
+    It behaves like a list of :class:`~maraboupy.MarabouUtils.Equation`: it supports len, iteration,
+    indexing, slicing and +=. Indexing returns an :class:`~maraboupy.MarabouUtils.EquationView` that edits
+    the equation in the table, and slicing returns a new table, so modifying its equations does not change
+    this one.
 
-    This is the class to convenietly represent the disjuct computing 
-    g_in
+    Attributes:
+        rowPtr (numpy array of int): Start of each equation in cols and coeffs, followed by the number of addends
+        cols (numpy array of int): Variable of each addend
+        coeffs (numpy array of float): Coefficient of each addend
+        scalars (numpy array of float): Scalar of each equation
+        types (numpy array of int): :class:`~maraboupy.MarabouCore.EquationType` of each equation, as integer
     """
-    def __init__(self, v_in: int, v_out: int, g_in: int, g_out: int):
-        """
-        Construct the disjunct of 2 MarabouUtils.Equation
-        """
-        assert v_in < v_out
-        assert g_in - v_in == g_out - v_out
-        self.g_in = g_in #we need this to keep track of what ReLU to be abstracted
-        self.g_out = g_out
-        self.v_in = v_in
-        self.v_out = v_out
-        self.disjunct: List[List[Equation]] = []
-        #example: v10 = relu(v7)
-        #grad constraints:
-        #if v7 > 0 then g7 = g10 ~ (g7=g10)or(v7<=0): pos_grad constraints
-        #v7<=0 then g7 = 0 ~ (g7=0) or (v7 >= 0)
-        #positive grad
-        pos_condition = Equation(MarabouCore.Equation.LE)
-        pos_condition.addAddend(1, v_in); 
-        pos_condition.setScalar(-ZERO)
-
-        pos_body = Equation(MarabouCore.Equation.EQ)
-        pos_body.addAddend(1, g_in)
-        pos_body.addAddend(-1, g_out)
-        pos_body.setScalar(0)
-
-        self.disjunct.append([pos_condition, pos_body])
-        print("IF POSITIVE:", pos_condition, "OR", pos_body)
-
-        
-        #negative grad
-        neg_condition = Equation(MarabouCore.Equation.GE)
-        neg_condition.addAddend(1, v_in); 
-        neg_condition.setScalar(0)
-
-        neg_body = Equation(MarabouCore.Equation.EQ)
-        neg_body.addAddend(1, g_in)
-        neg_body.setScalar(0)
-
-        self.disjunct.append([neg_condition, neg_body])
-        print("IF NEGATIVE:", neg_condition, "OR", neg_body)
-
-    def abstract(self, v_in_bounds: List[float],
-                 v_out_bounds: List[float],
-                 g_out_bounds: List[float])->List[Equation]:
-        abstraction: List[Equation] = []
-        return abstraction
\ No newline at end of file
+    def __init__(self):
+        """Construct empty table
+        """
+        self.clear()
+
+    def clear(self):
+        """Remove all equations
+        """
+        self.numEquations = 0
+        self.numAddends = 0
+        self._rowPtr = np.zeros(1, dtype=np.int64)
+        self._cols = np.zeros(0, dtype=np.int64)
+        self._coeffs = np.zeros(0, dtype=np.float64)
+        self._scalars = np.zeros(0, dtype=np.float64)
+        self._types = np.zeros(0, dtype=np.int8)
+
+    @classmethod
+    def fromArrays(cls, rowPtr, cols, coeffs, scalars, types):
+        """Construct a table that uses the given CSR arrays without copying them
+
+        The arrays may be memory-mapped; they are only copied once equations are appended.
+
+        Args:
+            rowPtr (numpy array of int): Start of each equation in cols and coeffs, followed by the number of addends
+            cols (numpy array of int): Variable of each addend
+            coeffs (numpy array of float): Coefficient of each addend
+            scalars (numpy array of float): Scalar of each equation
+            types (numpy array of int): :class:`~maraboupy.MarabouCore.EquationType` of each equation, as integer
+
+        Returns:
+            :class:`~maraboupy.MarabouUtils.EquationTable`
+        """
+        assert len(rowPtr) == len(scalars) + 1 and len(types) == len(scalars)
+        assert len(cols) == len(coeffs) == rowPtr[-1]
+        table = cls()
+        table._rowPtr, table._cols, table._coeffs, table._scalars, table._types = rowPtr, cols, coeffs, scalars, types
+        table.numEquations = len(scalars)
+        table.numAddends = len(cols)
+        return table
+
+    @property
+    def rowPtr(self):
+        return self._rowPtr[:self.numEquations + 1]
+
+    @property
+    def cols(self):
+        return self._cols[:self.numAddends]
+
+    @property
+    def coeffs(self):
+        return self._coeffs[:self.numAddends]
+
+    @property
+    def scalars(self):
+        return self._scalars[:self.numEquations]
+
+    @property
+    def types(self):
+        return self._types[:self.numEquations]
+
+    @property
+    def nbytes(self):
+        """(int): Number of bytes used by the arrays of the table
+        """
+        return sum(arr.nbytes for arr in [self._rowPtr, self._cols, self._coeffs, self._scalars, self._types])
+
+    def reserve(self, numEquations, numAddends):
+        """Make room for additional equations and addends
+
+        The arrays grow geometrically, so appending equations one at a time takes amortized constant time.
+
+        Args:
+            numEquations (int): Number of equations that will be appended
+            numAddends (int): Number of addends that will be appended
+        """
+        rowsNeeded = self.numEquations + numEquations
+        if rowsNeeded > len(self._scalars):
+            capacity = max(rowsNeeded, 2 * len(self._scalars), 16)
+            self._rowPtr = self._resize(self._rowPtr, capacity + 1)
+            self._scalars = self._resize(self._scalars, capacity)
+            self._types = self._resize(self._types, capacity)
+        addendsNeeded = self.numAddends + numAddends
+        if addendsNeeded > len(self._cols):
+            capacity = max(addendsNeeded, 2 * len(self._cols), 64)
+            self._cols = self._resize(self._cols, capacity)
+            self._coeffs = self._resize(self._coeffs, capacity)
+
+    @staticmethod
+    def _resize(arr, size):
+        resized = np.zeros(size, dtype=arr.dtype)
+        resized[:len(arr)] = arr
+        return resized
+
+    def append(self, equation):
+        """Add an equation at the end of the table
+
+        Args:
+            equation (:class:`~maraboupy.MarabouUtils.Equation`): Equation to add
+        """
+        if equation.coefficients is not None:
+            coefficients, variables = equation.coefficients, equation.variables
+        else:
+            addends = equation.addendList
+            coefficients = [c for c, _ in addends]
+            variables = [v for _, v in addends]
+        self.appendArrays([coefficients], [variables], [equation.scalar], equation.EquationType)
+
+    def appendArrays(self, coefficients, variables, scalars, EquationType=MarabouCore.Equation.EQ):
+        """Add equations with the same number of addends at the end of the table
+
+        Args:
+            coefficients (2D numpy array of float): Coefficients, one row per equation
+            variables (2D numpy array of int): Variable numbers, same shape as coefficients
+            scalars (numpy array of float): Scalar of each equation
+            EquationType (:class:`~maraboupy.MarabouCore.EquationType`): Type of all equations, defaults to EQ
+        """
+        coefficients = np.asarray(coefficients, dtype=np.float64)
+        variables = np.asarray(variables, dtype=np.int64)
+        scalars = np.asarray(scalars, dtype=np.float64).reshape(-1)
+        numEquations = len(scalars)
+        coefficients = coefficients.reshape(numEquations, -1)
+        variables = variables.reshape(numEquations, -1)
+        assert coefficients.shape == variables.shape
+        numAddends = coefficients.size
+        self.reserve(numEquations, numAddends)
+
+        r, n = self.numEquations, self.numAddends
+        self._cols[n:n + numAddends] = variables.reshape(-1)
+        self._coeffs[n:n + numAddends] = coefficients.reshape(-1)
+        self._rowPtr[r + 1:r + numEquations + 1] = n + coefficients.shape[1] * np.arange(1, numEquations + 1)
+        self._scalars[r:r + numEquations] = scalars
+        self._types[r:r + numEquations] = int(EquationType)
+        self.numEquations += numEquations
+        self.numAddends += numAddends
+
+    def appendSparse(self, rowPtr, cols, coeffs, scalars, EquationType=MarabouCore.Equation.EQ):
+        """Add equations given in CSR format at the end of the table
+
+        Args:
+            rowPtr (numpy array of int): Start of each equation in cols and coeffs, followed by the number of addends
+            cols (numpy array of int): Variable of each addend
+            coeffs (numpy array of float): Coefficient of each addend
+            scalars (numpy array of float): Scalar of each equation
+            EquationType (:class:`~maraboupy.MarabouCore.EquationType`): Type of all equations, defaults to EQ
+        """
+        rowPtr = np.asarray(rowPtr, dtype=np.int64)
+        scalars = np.asarray(scalars, dtype=np.float64).reshape(-1)
+        numEquations = len(scalars)
+        numAddends = len(cols)
+        assert len(rowPtr) == numEquations + 1 and rowPtr[0] == 0 and rowPtr[-1] == numAddends
+        assert len(coeffs) == numAddends
+        self.reserve(numEquations, numAddends)
+
+        r, n = self.numEquations, self.numAddends
+        self._cols[n:n + numAddends] = cols
+        self._coeffs[n:n + numAddends] = coeffs
+        self._rowPtr[r + 1:r + numEquations + 1] = n + rowPtr[1:]
+        self._scalars[r:r + numEquations] = scalars
+        self._types[r:r + numEquations] = int(EquationType)
+        self.numEquations += numEquations
+        self.numAddends += numAddends
+
+    def extend(self, equations):
+        """Add equations at the end of the table
+
+        Args:
+            equations (:class:`~maraboupy.MarabouUtils.EquationTable` or list of :class:`~maraboupy.MarabouUtils.Equation`):
+                Equations to add
+        """
+        if not isinstance(equations, EquationTable):
+            for e in equations:
+                self.append(e)
+            return
+        numEquations = len(equations)
+        numAddends = equations.numAddends
+        self.reserve(numEquations, numAddends)
+        r, n = self.numEquations, self.numAddends
+        self._cols[n:n + numAddends] = equations.cols
+        self._coeffs[n:n + numAddends] = equations.coeffs
+        self._rowPtr[r + 1:r + numEquations + 1] = n + equations.rowPtr[1:]
+        self._scalars[r:r + numEquations] = equations.scalars
+        self._types[r:r + numEquations] = equations.types
+        self.numEquations += numEquations
+        self.numAddends += numAddends
+
+    def __iadd__(self, equations):
+        self.extend(equations)
+        return self
+
+    def __len__(self):
+        return self.numEquations
+
+    def __iter__(self):
+        for i in range(self.numEquations):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self.numEquations)[index])
+        if index < 0:
+            index += self.numEquations
+        if not 0 <= index < self.numEquations:
+            raise IndexError("Equation index out of range")
+        return EquationView(self, index)
+
+    def _setAddends(self, index, coefficients, variables):
+        """Replace the addends of an equation, moving the addends of the following equations if their number changes
+
+        :meta private:
+        """
+        coefficients = np.asarray(coefficients, dtype=np.float64).reshape(-1)
+        variables = np.asarray(variables, dtype=np.int64).reshape(-1)
+        start, end = self._rowPtr[index], self._rowPtr[index + 1]
+        delta = len(coefficients) - (end - start)
+        if delta != 0:
+            self.reserve(0, max(delta, 0))
+            n = self.numAddends
+            self._cols[end + delta:n + delta] = self._cols[end:n].copy()
+            self._coeffs[end + delta:n + delta] = self._coeffs[end:n].copy()
+            self._rowPtr[index + 1:self.numEquations + 1] += delta
+            self.numAddends += delta
+        self._cols[start:start + len(variables)] = variables
+        self._coeffs[start:start + len(coefficients)] = coefficients
+
+    def take(self, indices):
+        """Build a new table from a subset of the equations
+
+        Args:
+            indices (numpy array of int): Indices of the equations to keep, in order
+
+        Returns:
+            :class:`~maraboupy.MarabouUtils.EquationTable`
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.rowPtr[indices]
+        lengths = self.rowPtr[indices + 1] - starts
+        table = EquationTable()
+        table.reserve(len(indices), int(lengths.sum()))
+        rowPtr = np.concatenate([[0], np.cumsum(lengths)])
+        # Position of every kept addend in the arrays of this table
+        addends = np.repeat(starts - rowPtr[:-1], lengths) + np.arange(rowPtr[-1])
+        table._rowPtr[:len(indices) + 1] = rowPtr
+        table._cols[:rowPtr[-1]] = self._cols[addends]
+        table._coeffs[:rowPtr[-1]] = self._coeffs[addends]
+        table._scalars[:len(indices)] = self._scalars[indices]
+        table._types[:len(indices)] = self._types[indices]
+        table.numEquations = len(indices)
+        table.numAddends = int(rowPtr[-1])
+        return table
+
+    def lastAddends(self, start=0):
+        """Get the last addend of every equation from the given one on
+
+        Args:
+            start (int): Index of the first equation to look at
+
+        Returns:
+            (tuple of numpy arrays): Coefficients and variables of the last addend of each equation
+        """
+        last = self._rowPtr[start + 1:self.numEquations + 1] - 1
+        return self._coeffs[last], self._cols[last]
+
+    def addToInputQuery(self, ipq):
+        """Add all equations of the table to an InputQuery
+
+        Args:
+            ipq (:class:`~maraboupy.MarabouCore.InputQuery`): Query to add the equations to
+        """
+        ipq.addEquations(self.rowPtr, self.cols, self.coeffs, self.scalars, self.types)
+
+class SparseJacobian:
+    """Sparse matrix of the weights of the linear layers, stored in coordinate (COO) format
+
+    Entry (rows[k], cols[k], coeffs[k]) means that variable cols[k] is computed from variable rows[k] with
+    coefficient coeffs[k]. Each row is therefore a column of a forward weight matrix, and the matrix maps the
+    gradients of the layer outputs back to the gradients of the layer inputs.
+
+    Entries can be added one at a time with :meth:`add` or a whole layer at once with :meth:`addBlock`.
+
+    Attributes:
+        rows (numpy array of int): Input variable of each entry
+        cols (numpy array of int): Output variable of each entry
+        coeffs (numpy array of float): Coefficient of each entry
+    """
+    def __init__(self):
+        """Construct empty matrix
+        """
+        self.clear()
+
+    def clear(self):
+        """Remove all entries
+        """
+        self._blocks = []
+        self._pending = ([], [], [])
+
+    def add(self, row, col, coeff):
+        """Add one entry
+
+        Args:
+            row (int): Input variable
+            col (int): Output variable
+            coeff (float): Coefficient of the input variable in the equation of the output variable
+        """
+        self._pending[0].append(row)
+        self._pending[1].append(col)
+        self._pending[2].append(coeff)
+
+    def addBlock(self, rows, cols, coeffs):
+        """Add many entries at once
+
+        Args:
+            rows (numpy array of int): Input variables
+            cols (numpy array of int): Output variables, broadcastable to the shape of rows
+            coeffs (numpy array of float): Coefficients, broadcastable to the shape of rows
+        """
+        rows, cols, coeffs = np.broadcast_arrays(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64),
+                                                 np.asarray(coeffs, dtype=np.float64))
+        self._flush()
+        self._blocks.append((rows.reshape(-1), cols.reshape(-1), coeffs.reshape(-1)))
+
+    def _flush(self):
+        if self._pending[0]:
+            self._blocks.append((np.array(self._pending[0], dtype=np.int64), np.array(self._pending[1], dtype=np.int64),
+                                 np.array(self._pending[2], dtype=np.float64)))
+            self._pending = ([], [], [])
+
+    def _arrays(self):
+        self._flush()
+        if len(self._blocks) != 1:
+            blocks = list(zip(*self._blocks)) or [[np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)],
+                                                  [np.zeros(0, dtype=np.float64)]]
+            self._blocks = [tuple(np.concatenate(arrays) for arrays in blocks)]
+        return self._blocks[0]
+
+    @property
+    def rows(self):
+        return self._arrays()[0]
+
+    @property
+    def cols(self):
+        return self._arrays()[1]
+
+    @property
+    def coeffs(self):
+        return self._arrays()[2]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def permute(self, perm):
+        """Renumber the variables of all entries
+
+        Args:
+            perm (numpy array of int): New number of every variable
+        """
+        perm = np.asarray(perm, dtype=np.int64)
+        rows, cols, coeffs = self._arrays()
+        self._blocks = [(perm[rows], perm[cols], coeffs)]
+
+    def toEquationTable(self, offset):
+        """Build the backward equations, one per input variable
+
+        The gradient of variable v is the variable v + offset. The equation of input variable v is
+        sum(coeffs[k] * (cols[k] + offset) for the entries k of row v) - (v + offset) = 0.
+
+        Args:
+            offset (int): Difference between the gradient of a variable and the variable
+
+        Returns:
+            :class:`~maraboupy.MarabouUtils.EquationTable`
+        """
+        rows, cols, coeffs = self._arrays()
+        order = np.argsort(rows, kind="stable")
+        rows, cols, coeffs = rows[order], cols[order], coeffs[order]
+        gradVars, counts = np.unique(rows, return_counts=True)
+
+        # Each equation has the entries of its row followed by the gradient of the row variable
+        rowPtr = np.concatenate([[0], np.cumsum(counts + 1)])
+        last = rowPtr[1:] - 1
+        entries = np.ones(rowPtr[-1], dtype=bool)
+        entries[last] = False
+        equationCols = np.empty(rowPtr[-1], dtype=np.int64)
+        equationCoeffs = np.empty(rowPtr[-1], dtype=np.float64)
+        equationCols[entries] = cols + offset
+        equationCoeffs[entries] = coeffs
+        equationCols[last] = gradVars + offset
+        equationCoeffs[last] = -1
+
+        table = EquationTable()
+        table.appendSparse(rowPtr, equationCols, equationCoeffs, np.zeros(len(gradVars)))
+        return table
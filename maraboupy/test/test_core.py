@@ -4,6 +4,7 @@ warnings.filterwarnings('ignore', category = DeprecationWarning)
 warnings.filterwarnings('ignore', category = PendingDeprecationWarning)
 
 import pytest
+import numpy as np
 from maraboupy import MarabouCore
 from maraboupy.Marabou import createOptions
 
@@ -57,6 +58,112 @@ def test_dump_query():
     assert ipq.getLowerBound(2) > -LARGE
     assert ipq.getUpperBound(2) < LARGE
 
+def test_calculate_bounds():
+    """
+    This function tests that MarabouCore.calculateBounds tightens the bounds of a query
+    without solving it.
+    """
+    ipq = define_ipq(3.0)
+    exitCode, bounds, stats = MarabouCore.calculateBounds(ipq, OPT)
+    assert exitCode == "UNKNOWN"
+    assert len(bounds) == 3
+    for var, (lower, upper) in bounds.items():
+        assert lower <= upper
+        assert ipq.getLowerBound(var) == lower and ipq.getUpperBound(var) == upper
+
+    # relu(x) <= 1 and y = relu(x)
+    assert bounds[1][1] <= 1 + 1e-6
+    assert bounds[2][0] >= -1e-6 and bounds[2][1] <= 1 + 1e-6
+
+def test_bulk_construction():
+    """
+    This function tests that an input query built with the bulk NumPy entry points
+    is solved the same way as one built one element at a time.
+    """
+    for property_bound, expected in [(-2.0, "unsat"), (3.0, "sat")]:
+        ipq = define_ipq_bulk(property_bound)
+        assert ipq.getLowerBound(0) == -1 and ipq.getUpperBound(1) == LARGE
+        exitCode, vals, stats = MarabouCore.solve(ipq, OPT)
+        assert exitCode == expected
+        if expected == "sat":
+            assert abs(vals[2] - max(vals[0], 0)) < 1e-6
+            assert vals[0] + vals[2] <= property_bound + 1e-6
+
+    # Arrays of inconsistent sizes are rejected
+    ipq = MarabouCore.InputQuery()
+    ipq.setNumberOfVariables(3)
+    with pytest.raises(ValueError):
+        ipq.setLowerBounds(np.array([0, 1]), np.array([0.0]))
+    with pytest.raises(ValueError):
+        ipq.addEquations(np.array([0, 2]), np.array([0]), np.array([1.0]), np.array([0.0]), np.array([0]))
+
+    # As are row pointers that decrease, invalid equation types, and variables out of range
+    with pytest.raises(ValueError):
+        ipq.addEquations(np.array([0, 5, 2]), np.array([0, 1]), np.array([1.0, 1.0]), np.array([0.0, 0.0]),
+                         np.array([0, 0]))
+    with pytest.raises(ValueError):
+        ipq.addEquations(np.array([1, 2]), np.array([0, 1]), np.array([1.0, 1.0]), np.array([0.0]), np.array([0]))
+    with pytest.raises(ValueError):
+        ipq.addEquations(np.array([0, 1]), np.array([0]), np.array([1.0]), np.array([0.0]), np.array([3]))
+    with pytest.raises(ValueError):
+        ipq.addEquations(np.array([0, 1]), np.array([-1]), np.array([1.0]), np.array([0.0]), np.array([0]))
+    with pytest.raises(ValueError):
+        ipq.setUpperBounds(np.array([3]), np.array([0.0]))
+    with pytest.raises(ValueError):
+        ipq.addReluConstraints(np.array([[0, -1]]))
+    with pytest.raises(ValueError):
+        ipq.addMaxConstraints(np.array([0, 2, 1]), np.array([0, 1]), np.array([2, 2]))
+
+def test_relu_grad_constraint():
+    """
+    This function tests the ReLU gradient constraint g_in = ReLU'(b) * g_out, with g_out = 1,
+    against its disjunctive encoding.
+    """
+    # (lower bound of g_in, bounds of b, expected result)
+    cases = [(0.5, (-1, 1), "sat"), (0.5, (-1, -0.5), "unsat"), (-LARGE, (-1, -0.5), "sat"),
+             (0.5, (0.2, 1), "sat"), (-0.5, (0.2, 1), "sat")]
+    for gInLowerBound, (bLowerBound, bUpperBound), expected in cases:
+        for native in [True, False]:
+            ipq = MarabouCore.InputQuery()
+            ipq.setNumberOfVariables(3)
+            ipq.setLowerBound(0, bLowerBound)
+            ipq.setUpperBound(0, bUpperBound)
+            ipq.setLowerBound(1, 1)
+            ipq.setUpperBound(1, 1)
+            ipq.setLowerBound(2, gInLowerBound)
+            ipq.setUpperBound(2, LARGE)
+            if native:
+                MarabouCore.addReluGradConstraint(ipq, 0, 1, 2)
+            else:
+                MarabouCore.addReluGradDisjunctions(ipq, np.array([[0, 0, 2, 1]]), 0.0)
+            exitCode, vals, stats = MarabouCore.solve(ipq, OPT)
+            assert exitCode == expected
+            if expected == "sat":
+                if vals[0] > 1e-6:
+                    assert abs(vals[2] - vals[1]) < 1e-6
+                elif vals[0] < -1e-6:
+                    assert abs(vals[2]) < 1e-6
+
+def define_ipq_bulk(property_bound):
+    """
+    This function defines the query of define_ipq with the bulk construction methods
+    Arguments:
+        property_bound: (float) value of upper bound for x + y
+    Returns:
+        ipq (MarabouCore.InputQuery) input query object representing network and constraints
+    """
+    ipq = MarabouCore.InputQuery()
+    ipq.setNumberOfVariables(3)
+    ipq.setLowerBounds(np.array([0, 1, 2]), np.array([-1, 0, -LARGE]))
+    ipq.setUpperBounds(np.array([0, 1]), np.array([1, LARGE]))
+    ipq.addReluConstraints(np.array([[0, 1]]))
+
+    # y - relu(x) = 0 and x + y <= property_bound
+    ipq.addEquations(np.array([0, 2, 4]), np.array([2, 1, 0, 2]), np.array([1.0, -1.0, 1.0, 1.0]),
+                     np.array([0.0, property_bound]),
+                     np.array([int(MarabouCore.Equation.EQ), int(MarabouCore.Equation.LE)]))
+    return ipq
+
 def define_ipq(property_bound):
     """
     This function defines a simple input query directly through MarabouCore
@@ -0,0 +1,149 @@
+# Tests distributed split-and-conquer solving with socket workers
+import pytest
+from .. import Marabou
+from .. import MarabouCore
+from .. import MarabouDistributed
+from multiprocessing.connection import Client
+import os
+import threading
+import time
+
+# Global settings
+OPT = Marabou.createOptions(verbosity=0, initialSplits=2)    # Turn off printing, start with four regions
+NETWORK_FOLDER = "../../resources/nnet/acasxu"                # Folder for test network
+
+def getNetwork(outputLowerBound):
+    """Load the 1,1 experimental ACAS Xu network around a test point, with a lower bound on the first output
+
+    Args:
+        outputLowerBound (float): Lower bound of the first output variable
+
+    Returns:
+        :class:`~maraboupy.MarabouNetworkNNet.MarabouNetworkNNet`
+    """
+    filename =  "ACASXU_experimental_v2a_1_1.nnet"
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, filename)
+    network = Marabou.read_nnet(filename)
+    centerPoint = [-0.2454504737724233, -0.4774648292756546, 0.0, -0.3181818181818182, 0.0]
+    for var, val in zip(network.inputVars[0][0], centerPoint):
+        network.setLowerBound(var, val - 0.002)
+        network.setUpperBound(var, val + 0.002)
+    network.setLowerBound(network.outputVars[0][0][0], outputLowerBound)
+    return network
+
+def test_distributed_unsat(tmpdir):
+    """
+    Test a query that cannot be satisfied, with two local workers connected over a Unix socket
+    """
+    network = getNetwork(0.1)
+    address = tmpdir.join("coordinator.sock").strpath
+    exitCode, vals, stats = MarabouDistributed.solve_distributed(network.getMarabouQuery(), 2, OPT, address)
+    assert exitCode == "unsat"
+    assert len(vals) == 0
+    assert not stats.hasTimedOut()
+
+def test_distributed_sat():
+    """
+    Test a query that can be satisfied, with two local workers connected over TCP
+    """
+    network = getNetwork(0.0)
+    exitCode, vals, _ = MarabouDistributed.solve_distributed(network.getMarabouQuery(), 2, OPT)
+    assert exitCode == "sat"
+    outVar = network.outputVars[0][0][0]
+    assert vals[outVar] >= 0.0
+    for var in network.inputVars[0][0]:
+        assert network.lowerBounds[var] <= vals[var] <= network.upperBounds[var]
+
+def test_distributed_solve_twice():
+    """
+    Test that the workers of a coordinator solve the query again, and that they are stopped when it is closed
+    """
+    network = getNetwork(0.1)
+    with MarabouDistributed.Coordinator(network.getMarabouQuery(), OPT) as coordinator:
+        coordinator.startLocalWorkers(2)
+        localWorkers = list(coordinator.localWorkers)
+        for _ in range(2):
+            exitCode, _, _ = coordinator.solve(timeoutInSeconds=60)
+            assert exitCode == "unsat"
+        assert coordinator.numLostWorkers == 0
+
+    # The workers stop by themselves instead of being terminated
+    for process in localWorkers:
+        assert process.exitcode == 0
+
+def test_distributed_lost_worker():
+    """
+    Test that the region of a worker that disconnects is solved by another worker
+    """
+    network = getNetwork(0.1)
+    with MarabouDistributed.Coordinator(network.getMarabouQuery(), OPT) as coordinator:
+        # A worker that takes a region and disconnects without answering
+        def loseRegion():
+            with Client(coordinator.address, authkey=coordinator.authkey) as connection:
+                connection.recv()
+                connection.recv()
+        lostWorker = threading.Thread(target=loseRegion)
+        lostWorker.start()
+
+        # Start the other worker once the lost one is connected, so that the lost one gets the first region
+        while not coordinator.newConnections:
+            time.sleep(0.01)
+        coordinator.startLocalWorkers(1)
+
+        exitCode, _, _ = coordinator.solve()
+        lostWorker.join()
+        assert exitCode == "unsat"
+        assert coordinator.numLostWorkers == 1
+
+def loseRegions(coordinator, numRegions):
+    """Connect workers to a coordinator one after the other, each of which takes a region and disconnects
+    without answering
+
+    Args:
+        coordinator (:class:`~maraboupy.MarabouDistributed.Coordinator`): Coordinator to connect to
+        numRegions (int): Number of workers to connect
+
+    Returns:
+        (threading.Thread): The thread connecting the workers
+    """
+    def run():
+        for _ in range(numRegions):
+            with Client(coordinator.address, authkey=coordinator.authkey) as connection:
+                connection.recv()
+                connection.recv()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_distributed_failed_region():
+    """
+    Test that a region which every worker loses is reported as an error once it was solved again maxRetries times
+    """
+    network = getNetwork(0.1)
+    with MarabouDistributed.Coordinator(network.getMarabouQuery(), OPT, maxRetries=2) as coordinator:
+        lostWorkers = loseRegions(coordinator, 3)
+        exitCode, _, _ = coordinator.solve()
+        lostWorkers.join()
+        assert exitCode == "ERROR"
+        assert coordinator.numLostWorkers == 3
+
+def test_distributed_no_worker_left():
+    """
+    Test that the solve is reported as an error once every worker is lost and no other one connects
+    """
+    network = getNetwork(0.1)
+    with MarabouDistributed.Coordinator(network.getMarabouQuery(), OPT, lostWorkerTimeout=1) as coordinator:
+        lostWorkers = loseRegions(coordinator, 1)
+        startTime = time.time()
+        exitCode, _, _ = coordinator.solve()
+        lostWorkers.join()
+        assert exitCode == "ERROR"
+        assert coordinator.numLostWorkers == 1
+        assert time.time() - startTime < 30
+
+        # Local workers that stopped count as lost too
+        coordinator.startLocalWorkers(1)
+        for process in coordinator.localWorkers:
+            process.terminate()
+            process.join()
+        assert coordinator.solve()[0] == "ERROR"
@@ -2,6 +2,7 @@
 import pytest
 from .. import Marabou
 import os
+import re
 import numpy as np
 
 # Global settings
@@ -53,6 +54,58 @@ def test_dnc_sat():
     exitCode, vals, stats = network.solve(options = OPT, filename = "", verbose=False)
     assert exitCode == "sat" and len(vals) == network.numVars
 
+def test_dnc_work_tree(tmpdir, capfd):
+    """
+    Test exporting the work tree of an SnC run and importing it to solve related queries.
+    The tree of an unsat query can be reused by a more restrictive query, and its solved
+    regions are solved again for a less restrictive one.
+    """
+    filename =  "ACASXU_experimental_v2a_1_1.nnet"
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, filename)
+    network = Marabou.read_nnet(filename)
+    centerPoint = [-0.2454504737724233, -0.4774648292756546, 0.0, -0.3181818181818182, 0.0]
+
+    # A region large enough for the query not to be solved by preprocessing alone, in which
+    # the first output stays below 0.1
+    for var, val in zip(network.inputVars[0][0], centerPoint):
+        network.setLowerBound(var, val - 0.005)
+        network.setUpperBound(var, val + 0.005)
+    outVar = network.outputVars[0][0][0]
+    network.setLowerBound(outVar, 0.1)
+
+    # Without a timeout, the tree holds the four initial regions, all of them unsat
+    treeFile = tmpdir.join("tree.txt").strpath
+    opt = Marabou.createOptions(verbosity=0, snc=True, numWorkers=2, initialSplits=2, initialTimeout=0,
+                                noParallelDeepSoI=True, sncExportTreeFile=treeFile)
+    exitCode, _, _ = network.solve(options=opt, verbose=False)
+    assert exitCode == "unsat"
+    assert os.path.isfile(treeFile)
+
+    # A higher lower bound on the output restricts the query, so every region is skipped
+    network.setLowerBound(outVar, 0.11)
+    opt = Marabou.createOptions(verbosity=1, snc=True, numWorkers=2, initialTimeout=0,
+                                noParallelDeepSoI=True, sncImportTreeFile=treeFile)
+    capfd.readouterr()
+    exitCode, _, _ = network.solve(options=opt, verbose=False)
+    assert exitCode == "unsat"
+    assert importedRegions(capfd.readouterr().out) == (4, 4)
+
+    # A lower one does not, and the query can be satisfied
+    network.setLowerBound(outVar, 0.0)
+    exitCode, vals, _ = network.solve(options=opt, verbose=False)
+    assert exitCode == "sat" and len(vals) == network.numVars
+    assert importedRegions(capfd.readouterr().out) == (4, 0)
+
+def importedRegions(output):
+    """
+    Get the numbers of imported and skipped regions printed by an SnC run that imported a work tree
+
+    :meta private:
+    """
+    match = re.search(r"Imported (\d+) regions from the work tree, skipped (\d+) solved ones", output)
+    assert match is not None
+    return int(match.group(1)), int(match.group(2))
+
 def test_dnc_eval():
     """
     Test the 1,1 experimental ACAS Xu network. 
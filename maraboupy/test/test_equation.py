@@ -5,6 +5,8 @@ warnings.filterwarnings('ignore', category = PendingDeprecationWarning)
 
 import pytest
 from .. import Marabou
+from .. import MarabouCore
+from .. import MarabouUtils
 import numpy as np
 import os
 
@@ -107,7 +109,85 @@ def test_inequality_input():
     exitCode, vals, _ = network.solve(options = OPT, verbose = False)
     assert np.dot([vals[inVar] for inVar in inputVars], weights) <= averageInputValue
     assert vals[outputVar] >= minOutputValue
-    
+
+def test_equation_table():
+    """
+    Test that the CSR equation table behaves like a list of equations
+    """
+    equations = []
+    for i in range(5):
+        e = MarabouUtils.Equation(MarabouCore.Equation.LE if i % 2 else MarabouCore.Equation.EQ)
+        for j in range(i + 1):
+            e.addAddend(j + 0.5, i + j)
+        e.setScalar(float(i))
+        equations.append(e)
+
+    table = MarabouUtils.EquationTable()
+    table += equations[:3]
+    table.appendArrays([[1.0, -1.0]], [[7, 8]], [2.0], MarabouCore.Equation.GE)
+    table.append(equations[3])
+    assert len(table) == 5
+    assert table.numAddends == 1 + 2 + 3 + 2 + 4
+    assert list(table.rowPtr) == [0, 1, 3, 6, 8, 12]
+
+    expected = equations[:3] + [None] + equations[3:4]
+    for e1, e2 in zip(table, expected):
+        if e2 is None:
+            assert e1.EquationType == MarabouCore.Equation.GE
+            assert e1.addendList == [(1.0, 7), (-1.0, 8)]
+            assert e1.scalar == 2.0
+            continue
+        assert e1.EquationType == e2.EquationType
+        assert e1.addendList == e2.addendList
+        assert e1.scalar == e2.scalar
+
+    # Slicing keeps the selected rows
+    sub = table[1:-1]
+    assert len(sub) == 3
+    assert sub[0].addendList == equations[1].addendList
+    assert sub[-1].addendList == [(1.0, 7), (-1.0, 8)]
+    assert table[::2][2].addendList == equations[3].addendList
+    assert list(table.lastAddends()[1]) == [0, 2, 4, 8, 6]
+    assert list(table.lastAddends(3)[1]) == [8, 6]
+
+    # Scalars can be edited in place
+    table.scalars[0] -= 1.0
+    assert table[0].scalar == -1.0
+
+    # Equations got by indexing edit the table, and the addends of the following equations are moved
+    table[1].setScalar(4.0)
+    table[1].addAddend(-1.0, 20)
+    table[-2].EquationType = MarabouCore.Equation.LE
+    assert table.scalars[1] == 4.0
+    assert table[1].addendList == equations[1].addendList + [(-1.0, 20)]
+    assert table[3].EquationType == MarabouCore.Equation.LE
+    assert list(table.rowPtr) == [0, 1, 4, 7, 9, 13]
+    assert table[4].addendList == equations[3].addendList
+    table[2].setAddends(np.array([3.0]), np.array([9]))
+    assert list(table.rowPtr) == [0, 1, 4, 5, 7, 11]
+    assert table[2].addendList == [(3.0, 9)] and table[3].addendList == [(1.0, 7), (-1.0, 8)]
+    assert table.numAddends == 11 and table[4].addendList == equations[3].addendList
+    assert sub[0].addendList == equations[1].addendList
+
+def test_sparse_jacobian():
+    """
+    Test that the backward equations built from a sparse Jacobian sum the gradients of the outputs of
+    every variable, whether the entries were added one at a time or as blocks
+    """
+    jacobian = MarabouUtils.SparseJacobian()
+    jacobian.add(1, 3, 0.5)
+    jacobian.addBlock(np.array([[0], [1]]), np.array([[2, 3]]), np.array([[1.0, -2.0], [3.0, 4.0]]))
+    jacobian.add(0, 4, 5.0)
+    assert len(jacobian) == 6
+
+    # Renumber the variables, then build the equations with gradient variable v + 10
+    jacobian.permute([0, 1, 2, 3, 5, 4])
+    table = jacobian.toEquationTable(10)
+    assert len(table) == 2
+    assert table[0].addendList == [(1.0, 12), (-2.0, 13), (5.0, 15), (-1.0, 10)]
+    assert table[1].addendList == [(0.5, 13), (3.0, 12), (4.0, 13), (-1.0, 11)]
+    assert all(e.scalar == 0.0 and e.EquationType == MarabouCore.Equation.EQ for e in table)
+
 def load_network():
     """
     The test network fc1.onnx is used, which has two input variables and two output variables.
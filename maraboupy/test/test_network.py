@@ -659,6 +659,214 @@ def test_local_robustness_sat_of_onnx_3D():
     # should be not local robustness
     assert(len(vals) > 0)
 
+def test_local_robustness_parallel():
+    """
+    Tests that checking the output classes in parallel agrees with checking them one by one
+    """
+    filename = "fc_2-2-3.onnx"
+    options = Marabou.createOptions(verbosity = 0)
+
+    for input, epsilon in [(np.array([1, 0]), 0.1), (np.array([1, 0]), 1.0)]:
+        network = loadNetworkInONNX(filename)
+        expectedVals, _, _ = network.evaluateLocalRobustness(input=input, epsilon=epsilon, originalClass=0,
+                                                             verbose=False, options=options)
+
+        network = loadNetworkInONNX(filename)
+        vals, stats, maxClass = network.evaluateLocalRobustness(input=input, epsilon=epsilon, originalClass=0,
+                                                                verbose=False, options=options, numWorkers=2)
+        assert (len(vals) > 0) == (len(expectedVals) > 0)
+        assert not stats.hasTimedOut()
+        if len(vals) > 0:
+            outputVars = network.outputVars[0].flatten()
+            assert maxClass in (1, 2)
+            assert vals[outputVars[maxClass]] >= vals[outputVars[0]] - TOL
+        else:
+            assert maxClass is None
+
+def test_local_robustness_batch():
+    """
+    Tests that a batch of local robustness properties agrees with evaluating them one by one
+    """
+    filename = "fc_2-2-3.onnx"
+    options = Marabou.createOptions(verbosity = 0)
+
+    properties = [(np.array([1, 0]), 0.1, 0, None),
+                  (np.array([1, 0]), 1.0, 0, None),
+                  (np.array([1, -2]), 0.1, 0, 1)]
+    network = loadNetworkInONNX(filename)
+    results = network.evaluateLocalRobustnessBatch(properties, options=options)
+    assert len(results) == len(properties)
+
+    for (input, epsilon, originalClass, targetClass), (vals, stats, maxClass) in zip(properties, results):
+        network = loadNetworkInONNX(filename)
+        expectedVals, _, _ = network.evaluateLocalRobustness(input=input, epsilon=epsilon, originalClass=originalClass,
+                                                             verbose=False, options=options, targetClass=targetClass)
+        assert (len(vals) > 0) == (len(expectedVals) > 0)
+        if len(vals) > 0:
+            assert maxClass is not None
+
+            # The counterexample lies in the input region and maxClass is at least the original class
+            inputVars = network.inputVars[0].flatten()
+            outputVars = network.outputVars[0].flatten()
+            for i, x in enumerate(input.flatten()):
+                assert abs(vals[inputVars[i]] - x) <= epsilon + TOL
+            assert vals[outputVars[maxClass]] >= vals[outputVars[originalClass]] - TOL
+            if targetClass is not None:
+                assert maxClass == targetClass
+
+def test_solve_batch():
+    """
+    Tests that solving properties with the shared engine of MarabouCore.solveBatch agrees with
+    solving each property on its own copy of the base query, and that groups stop at their first sat property
+    """
+    network = loadNetworkInONNX("fc_2-2-3.onnx")
+    inputVars = network.inputVars[0].flatten()
+    outputVars = network.outputVars[0].flatten()
+    baseQuery = network.getForwardQuery()
+
+    cases = [(input, epsilon, other) for input, epsilon in [(np.array([1, 0]), 0.1), (np.array([1, 0]), 1.0),
+                                                            (np.array([1, -2]), 0.1)] for other in [1, 2]]
+
+    def addProperty(ipq, input, epsilon, other):
+        # The input box, and output 0 being at most output other
+        ipq.setLowerBounds(inputVars, input - epsilon)
+        ipq.setUpperBounds(inputVars, input + epsilon)
+        eq = MarabouCore.Equation(MarabouCore.Equation.LE)
+        eq.addAddend(1.0, int(outputVars[0]))
+        eq.addAddend(-1.0, int(outputVars[other]))
+        eq.setScalar(0.0)
+        ipq.addEquation(eq)
+        return ipq
+
+    def defineProperties(numVars):
+        properties = []
+        for input, epsilon, other in cases:
+            ipq = MarabouCore.InputQuery()
+            ipq.setNumberOfVariables(numVars)
+            properties.append(addProperty(ipq, input, epsilon, other))
+        return properties
+
+    # Properties with a variable the base query does not have are solved on copies of the base query
+    shared = MarabouCore.solveBatch(baseQuery, defineProperties(network.numVars), OPT)
+    copies = MarabouCore.solveBatch(baseQuery, defineProperties(network.numVars + 1), OPT)
+    assert [exitCode for exitCode, _, _ in shared] == [exitCode for exitCode, _, _ in copies]
+    assert "sat" in [exitCode for exitCode, _, _ in shared]
+
+    for (exitCode, vals, _), (input, epsilon, other) in zip(shared, cases):
+        expectedExitCode, _, _ = MarabouCore.solve(addProperty(MarabouCore.InputQuery(baseQuery), input, epsilon, other), OPT)
+        assert exitCode == expectedExitCode
+        if exitCode == "sat":
+            for var, x in zip(inputVars, input):
+                assert abs(vals[var] - x) <= epsilon + TOL
+            assert vals[outputVars[0]] <= vals[outputVars[other]] + TOL
+
+    # Each group of two properties stops at its first sat property
+    grouped = MarabouCore.solveBatch(baseQuery, defineProperties(network.numVars), OPT, stopEarly=True,
+                                     groupSizes=[2, 2, 2])
+    expected = []
+    for group in range(3):
+        for exitCode, _, _ in shared[2 * group:2 * group + 2]:
+            expected.append(exitCode)
+            if exitCode == "sat":
+                break
+    assert [exitCode for exitCode, _, _ in grouped] == expected
+
+def test_incremental_solve():
+    """
+    Tests that solving several properties in a row reuses the query of the network,
+    and that the query is rebuilt when the network changes
+    """
+    network = loadNetworkInONNX("fc_2-2-3.onnx")
+    inputVars = network.inputVars[0].flatten()
+    outputVars = network.outputVars[0].flatten()
+
+    results = []
+    for epsilon in [0.1, 1.0, 0.1]:
+        network.clearProperty()
+        for var, x in zip(inputVars, [1, 0]):
+            network.setLowerBound(var, x - epsilon)
+            network.setUpperBound(var, x + epsilon)
+        network.addInequality([outputVars[0], outputVars[1]], [1, -1], 0, isProperty=True)
+        baseQuery = network.getBaseQuery()
+        exitCode, vals, _ = network.solve(verbose=False, options=OPT)
+        assert network.getBaseQuery() is baseQuery
+        results.append(exitCode)
+
+        # The property holds in the counterexample
+        if exitCode == "sat":
+            assert vals[outputVars[0]] <= vals[outputVars[1]] + TOL
+            for var, x in zip(inputVars, [1, 0]):
+                assert abs(vals[var] - x) <= epsilon + TOL
+
+    # Each solve agrees with a network without the cached query
+    for epsilon, exitCode in zip([0.1, 1.0], results):
+        network = loadNetworkInONNX("fc_2-2-3.onnx")
+        for var, x in zip(inputVars, [1, 0]):
+            network.setLowerBound(var, x - epsilon)
+            network.setUpperBound(var, x + epsilon)
+        network.addInequality([outputVars[0], outputVars[1]], [1, -1], 0, isProperty=True)
+        assert network.solve(verbose=False, options=OPT)[0] == exitCode
+    assert results[0] == results[2]
+
+    # Adding a constraint to the network rebuilds its query
+    baseQuery = network.getBaseQuery()
+    network.addRelu(outputVars[0], network.getNewVariable())
+    assert network.getBaseQuery() is not baseQuery
+    assert network.getBaseQuery().getNumberOfVariables() == network.numVars
+
+def test_backward_query_abstraction():
+    """
+    Tests that solving the joint forward and backward query with automatic abstraction
+    agrees with the exact encoding of the ReLU gradient gates.
+    """
+    for threshold, expected in [(0.5, "sat"), (5.0, "unsat")]:
+        results = []
+        for automatic in [False, True]:
+            network = loadBackwardQuery("fc1.onnx", 0.5, threshold)
+            if automatic:
+                exitCode, vals, stats, abstracted = network.solveBackwardQuery(OPT)
+            else:
+                exitCode, vals, stats = MarabouCore.solve(network.addBackwardQuery([], dict()), OPT)
+            assert exitCode == expected
+            if exitCode == "sat":
+                # The counterexample satisfies every gate exactly
+                assert len(network.findSpuriousReluGrads(vals, network.grad_ins)) == 0
+
+    # The abstraction only selects gates whose phase is not fixed by the fused bounds
+    network = loadBackwardQuery("fc1.onnx", 0.5, 0.5)
+    fused_bounds = network.fusion(OPT)
+    scores = network.scoreReluGrads(fused_bounds)
+    abstracted = network.selectAbstraction(fused_bounds)
+    assert len(abstracted) == np.count_nonzero(scores)
+    for v_in, v_out, g_in, g_out in network.relu_grads.tolist():
+        if g_in in abstracted:
+            assert fused_bounds[v_in][0] < 0 < fused_bounds[v_in][1]
+
+def loadBackwardQuery(filename, epsilon, threshold):
+    """
+    Load an onnx network and build its joint forward and backward query, asking for a gradient
+    of the first input of at least threshold, for the gradient (1, 0, ...) of the output
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_ONNX_FOLDER, filename)
+    network = Marabou.read_onnx_plus(filename)
+    inputVars = network.inputVars[0].flatten()
+    outputVars = network.outputVars[0].flatten()
+    for var in inputVars:
+        network.setLowerBound(var, -epsilon)
+        network.setUpperBound(var, epsilon)
+    network.getForwardQuery()
+    network.buildBackwardConstraints()
+
+    offset = network.numVars
+    for var in range(offset, 2 * offset):
+        network.FB_ipq.setLowerBound(var, -100)
+        network.FB_ipq.setUpperBound(var, 100)
+    for i, var in enumerate(outputVars):
+        network.FB_ipq.setLowerBound(var + offset, 1.0 if i == 0 else 0.0)
+        network.FB_ipq.setUpperBound(var + offset, 1.0 if i == 0 else 0.0)
+    network.FB_ipq.setLowerBound(inputVars[0] + offset, threshold)
+    return network
+
 def loadNetwork(filename):
     # Load network relative to this file's location
     filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, filename)
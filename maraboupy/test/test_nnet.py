@@ -5,6 +5,7 @@ warnings.filterwarnings('ignore', category = PendingDeprecationWarning)
 
 import pytest
 from .. import Marabou
+import numpy as np
 import os
 
 # Global settings
@@ -135,6 +136,42 @@ def test_evaluateUNSAT():
     marabouEval = network.evaluateWithMarabou([testInput], options=OPT, filename="")
     assert marabouEval is None
 
+def test_cache(tmpdir):
+    """
+    Test that a network loaded from the cache of parsed networks is the same as the parsed network
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, "acasxu/ACASXU_experimental_v2a_1_1.nnet")
+    cacheDir = tmpdir.mkdir("cache").strpath
+    network = Marabou.read_nnet(filename, cacheDir=cacheDir)
+    assert len(os.listdir(cacheDir)) == 1
+    cached = Marabou.read_nnet(filename, cacheDir=cacheDir)
+    assert len(os.listdir(cacheDir)) == 1
+
+    # Different parser arguments use a different cache entry
+    Marabou.read_nnet(filename, normalize=True, cacheDir=cacheDir)
+    assert len(os.listdir(cacheDir)) == 2
+
+    assert cached.numVars == network.numVars
+    assert list(cached.equList.rowPtr) == list(network.equList.rowPtr)
+    assert list(cached.equList.cols) == list(network.equList.cols)
+    assert list(cached.equList.coeffs) == list(network.equList.coeffs)
+    assert list(cached.equList.scalars) == list(network.equList.scalars)
+    assert cached.reluList == network.reluList
+    assert cached.lowerBounds == network.lowerBounds and cached.upperBounds == network.upperBounds
+    assert (cached.inputVars[0] == network.inputVars[0]).all() and (cached.outputVars[0] == network.outputVars[0]).all()
+
+    # The cached network can be evaluated and solved
+    testInput = [[-0.31182839647533234, 0.0, -0.2387324146378273, -0.5, -0.4166666666666667]]
+    expected = np.array(network.evaluateWithoutMarabou(np.array(testInput))).flatten()
+    assert max(abs(np.array(cached.evaluateWithoutMarabou(np.array(testInput))).flatten() - expected)) < TOL
+    for var, value in zip(cached.inputVars[0].flatten(), testInput[0]):
+        cached.setLowerBound(var, value)
+        cached.setUpperBound(var, value)
+    exitCode, vals, _ = cached.solve(options = OPT, verbose = False)
+    assert exitCode == "sat"
+    outputs = [vals[var] for var in cached.outputVars[0].flatten()]
+    assert max(abs(np.array(outputs) - expected)) < TOL
+
 def evaluateFile(filename, testInputs, testOutputs, normalize = False, normInput = False, denormOutput = False):
     """
     Load network and evaluate testInputs with and without Marabou
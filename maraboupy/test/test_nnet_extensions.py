@@ -66,6 +66,34 @@ def test_evaluate_network():
 
         assert (output1 == output2).all()
 
+def test_evaluate_batch():
+    """
+    Test that evaluating a batch of inputs agrees with evaluating the inputs one by one
+    """
+    nnet_object = Marabou.read_nnet(filename=NETWORK_FILENAME)
+
+    N = 20
+    inputs = nnet_object.createRandomInputsForNetwork(N)
+    assert inputs.shape == (N, nnet_object.inputSize)
+
+    # Push some inputs out of the normalization range, so that they are clipped
+    inputs[0] = np.array(nnet_object.inputMinimums) - 1
+    inputs[1] = np.array(nnet_object.inputMaximums) + 1
+
+    for normalize in [False, True]:
+        outputs = nnet_object.evaluateNNet(inputs, normalize_inputs=normalize, normalize_outputs=normalize)
+        assert outputs.shape == (N, nnet_object.outputSize)
+        for i in range(N):
+            output = nnet_object.evaluateNNet(list(inputs[i]), normalize_inputs=normalize,
+                                              normalize_outputs=normalize)
+            assert np.allclose(outputs[i], output, atol=TOL)
+
+        layer_outputs = nnet_object.evaluateNNet(inputs, last_layer=LAYER, normalize_inputs=normalize,
+                                                 activate_output_layer=True)
+        outputs_from_layer = nnet_object.evaluateNNet(layer_outputs, first_layer=LAYER,
+                                                      normalize_outputs=normalize)
+        assert np.allclose(outputs, outputs_from_layer, atol=TOL)
+
 def test_write_read_evaluate(tmpdir):
     """
     Test writeNNet by writing an nnet into a file, reading from that file, and comparing by evaluating on
@@ -5,8 +5,11 @@ warnings.filterwarnings('ignore', category = PendingDeprecationWarning)
 
 import pytest
 from .. import Marabou
+from .. import MarabouUtils
 import numpy as np
+import onnx
 import os
+import shutil
 
 # Global settings
 OPT = Marabou.createOptions(verbosity = 0) # Turn off printing
@@ -174,6 +177,214 @@ def test_shallow_clear():
             assert(c1 == c2 and v1 + numVar1 == v2)
         assert(eq1.scalar == eq2.scalar)
 
+def test_vectorize():
+    """
+    Test that the vectorized Conv, Gemm and MatMul equations are the same as the ones
+    built one addend at a time, including convolutions with padding and strides
+    """
+    for filename in ["fc1.onnx", "fc_matMul.onnx", "multiInput_add.onnx", "conv_mp1.onnx", "KJ_TinyTaxiNet.onnx"]:
+        filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, filename)
+        network = Marabou.read_onnx(filename)
+        network_loop = Marabou.read_onnx(filename, vectorize=False)
+
+        assert network.numVars == network_loop.numVars
+        assert len(network.equList) == len(network_loop.equList)
+        for eq1, eq2 in zip(network.equList, network_loop.equList):
+            assert eq1.EquationType == eq2.EquationType
+            assert eq1.scalar == pytest.approx(eq2.scalar)
+            assert len(eq1.addendList) == len(eq2.addendList)
+            for (c1, v1), (c2, v2) in zip(eq1.addendList, eq2.addendList):
+                assert v1 == v2
+                assert c1 == pytest.approx(c2)
+
+def test_reassign_output_variables():
+    """
+    Test that moving the output variables after the input variables renumbers the variables
+    in all equations, constraints and bounds consistently
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, "conv_mp1.onnx")
+    network = Marabou.read_onnx(filename, reindexOutputVars=False)
+    network_reindexed = Marabou.read_onnx(filename)
+
+    numInVars = sum(inVars.size for inVars in network.inputVars)
+    outVars = np.concatenate([outVars.flatten() for outVars in network.outputVars])
+    def newVar(var):
+        if var < numInVars:
+            return var
+        if var in outVars:
+            return numInVars + np.where(outVars == var)[0][0]
+        return var + np.sum(outVars > var)
+
+    assert list(network_reindexed.outputVars[0].flatten()) == list(range(numInVars, numInVars + len(outVars)))
+    assert list(network_reindexed.equList.cols) == [newVar(var) for var in network.equList.cols]
+    assert network_reindexed.reluList == [(newVar(b), newVar(f)) for b, f in network.reluList]
+    assert network_reindexed.maxList == [({newVar(e) for e in elements}, newVar(f)) for elements, f in network.maxList]
+
+def test_deep_bias_folding(tmpdir, monkeypatch):
+    """
+    Test that bias additions after the MatMul layers of a 20-layer network are folded into the
+    scalars of the MatMul equations, using the output variable to equation index, and that the
+    index looks at every equation only once, so parsing scales linearly with the number of layers
+    """
+    numLayers, width = 20, 50
+    weights = [np.random.random((width, width)).astype(np.float32) - 0.5 for _ in range(numLayers)]
+    biases = [np.random.random(width).astype(np.float32) for _ in range(numLayers)]
+    nodes, initializers = [], []
+    prevName = 'X'
+    for i in range(numLayers):
+        initializers += [onnx.numpy_helper.from_array(weights[i], 'W%d' % i),
+                         onnx.numpy_helper.from_array(biases[i], 'b%d' % i)]
+        addName = 'Y' if i == numLayers - 1 else 'add%d' % i
+        nodes += [onnx.helper.make_node('MatMul', [prevName, 'W%d' % i], ['matmul%d' % i]),
+                  onnx.helper.make_node('Add', ['matmul%d' % i, 'b%d' % i], [addName])]
+        if i < numLayers - 1:
+            nodes.append(onnx.helper.make_node('Relu', [addName], ['relu%d' % i]))
+            prevName = 'relu%d' % i
+    graph = onnx.helper.make_graph(nodes, 'deep', [onnx.helper.make_tensor_value_info('X', onnx.TensorProto.FLOAT, [1, width])],
+                                   [onnx.helper.make_tensor_value_info('Y', onnx.TensorProto.FLOAT, [1, width])], initializers)
+    filename = tmpdir.join("deep.onnx").strpath
+    onnx.save(onnx.helper.make_model(graph), filename)
+
+    # Count the equations looked at by the index while parsing. Scanning equList for every addition
+    # would look at numLayers * (numLayers + 1) / 2 * width equations.
+    lastAddends = MarabouUtils.EquationTable.lastAddends
+    numExamined = []
+    def countingLastAddends(table, start=0):
+        result = lastAddends(table, start)
+        numExamined.append(len(result[0]))
+        return result
+    monkeypatch.setattr(MarabouUtils.EquationTable, 'lastAddends', countingLastAddends)
+
+    network = Marabou.read_onnx(filename, reindexOutputVars=False)
+
+    # No extra equations are needed for the additions
+    assert len(network.equList) == numLayers * width
+    assert len(numExamined) == numLayers
+    assert sum(numExamined) == numLayers * width
+    for i in range(numLayers):
+        assert np.allclose(network.equList.scalars[i * width:(i + 1) * width], -biases[i])
+    outputVars = network.outputVars[0].flatten()
+    assert list(network.getEquationIndices(outputVars)) == list(range((numLayers - 1) * width, numLayers * width))
+    assert list(network.getEquationIndices(network.inputVars[0].flatten())) == [-1] * width
+
+def test_cache(tmpdir):
+    """
+    Test that an ONNX network loaded from the cache of parsed networks matches the parsed network
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, "conv_mp1.onnx")
+    cacheDir = tmpdir.mkdir("cache").strpath
+    network = Marabou.read_onnx(filename, cacheDir=cacheDir)
+    cached = Marabou.read_onnx(filename, cacheDir=cacheDir)
+    assert len(os.listdir(cacheDir)) == 1
+    assert cached.graph is None
+
+    assert cached.numVars == network.numVars
+    for name in ["rowPtr", "cols", "coeffs", "scalars", "types"]:
+        assert np.array_equal(getattr(cached.equList, name), getattr(network.equList, name))
+    assert cached.reluList == network.reluList and cached.maxList == network.maxList
+    assert cached.inputNames == network.inputNames and cached.outputNames == network.outputNames
+
+    # Nothing in the cache entry is pickled
+    entry = os.path.join(cacheDir, os.listdir(cacheDir)[0])
+    assert all(name.endswith(".npy") or name.endswith(".json") for name in os.listdir(entry))
+
+    # The same file at another path, or parsed with another vectorize flag, uses the same cache entry,
+    # and the network loaded from it gets the arguments of the call
+    copy = tmpdir.join("copy.onnx").strpath
+    shutil.copyfile(filename, copy)
+    cachedCopy = Marabou.read_onnx(copy, vectorize=False, cacheDir=cacheDir)
+    assert len(os.listdir(cacheDir)) == 1
+    assert cachedCopy.filename == copy and not cachedCopy.vectorize
+    assert cached.filename == filename and cached.vectorize
+
+    # Equations loaded from the cache can still be extended and evaluated
+    cached.addEquality([cached.outputVars[0].flatten()[0]], [1.0], 0.0)
+    assert len(cached.equList) == len(network.equList) + 1
+    testInput = [np.random.random(inVars.shape) for inVars in network.inputVars]
+    assert np.allclose(cached.evaluateWithoutMarabou(testInput)[0], network.evaluateWithoutMarabou(testInput)[0])
+
+def test_evaluate_batch():
+    """
+    Test that the onnxruntime session is reused, and that batches of inputs give the same outputs as single inputs
+    """
+    for name in ["fc_2-2-3.onnx", "conv_mp1.onnx"]:
+        filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, name)
+        network = Marabou.read_onnx(filename)
+        network.setSessionThreads(intraOpNumThreads=1, interOpNumThreads=1)
+
+        testInputs = [np.random.random(network.inputVars[0].shape) for _ in range(5)]
+        outputs = [network.evaluateWithoutMarabou([testInput])[0] for testInput in testInputs]
+        session = network.session
+        assert session is not None
+
+        batchOutput = network.evaluateWithoutMarabou([np.concatenate(testInputs, axis=0)])[0]
+        assert network.session is session
+        assert batchOutput.shape[0] == len(testInputs)
+        for output, expected in zip(batchOutput, outputs):
+            assert np.allclose(output, expected.reshape(output.shape))
+
+def test_evaluate_batch_sizes():
+    """
+    Test that input arrays holding batches of different sizes are rejected
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, "multiInput_add.onnx")
+    network = Marabou.read_onnx(filename)
+    inputs = [np.concatenate([np.random.random(inVars.shape) for _ in range(batchSize)])
+              for inVars, batchSize in zip(network.inputVars, [2, 3])]
+    with pytest.raises(RuntimeError, match="batches of different sizes: 2, 3"):
+        network.evaluateWithoutMarabou(inputs)
+
+    # A single input in every array is evaluated
+    inputs = [np.random.random(inVars.shape) for inVars in network.inputVars]
+    assert network.evaluateWithoutMarabou(inputs)[0].size == network.outputVars[0].size
+
+def test_evaluate_with_nlr():
+    """
+    Test that evaluating the Marabou encoding with the network level reasoner matches ONNX,
+    for single inputs and for batches of inputs
+    """
+    for name in ["fc_2-2-3.onnx", "cnn_max_mninst2.onnx", "multiInput_add.onnx"]:
+        filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, name)
+        network = Marabou.read_onnx(filename)
+
+        testInputs = [[np.random.random(inVars.shape) for inVars in network.inputVars] for _ in range(5)]
+        for testInput in testInputs:
+            nlrEval = network.evaluateWithNLR(testInput)
+            onnxEval = network.evaluateWithoutMarabou(testInput)
+            for i in range(len(nlrEval)):
+                assert np.allclose(nlrEval[i].flatten(), onnxEval[i].flatten(), atol=TOL)
+
+        batch = [np.concatenate([testInput[i] for testInput in testInputs]) for i in range(len(network.inputVars))]
+        nlrBatch = network.evaluateWithNLR(batch)
+        for j, testInput in enumerate(testInputs):
+            nlrEval = network.evaluateWithNLR(testInput)
+            for i in range(len(nlrEval)):
+                assert np.allclose(nlrBatch[i][j].flatten(), nlrEval[i].flatten())
+
+def test_find_error_with_solver(monkeypatch):
+    """
+    Test that findError evaluates the Marabou encoding with the solver when the network level reasoner
+    cannot be built for it, and when it is not asked to use the network level reasoner
+    """
+    filename = os.path.join(os.path.dirname(__file__), NETWORK_FOLDER, "fc_2-2-3.onnx")
+    network = Marabou.read_onnx(filename)
+    testInput = [np.random.random(inVars.shape) for inVars in network.inputVars]
+    err = network.findError(testInput, options=OPT, filename="", useNLR=False)
+    assert len(err) == len(network.outputVars)
+    assert max(err[0].flatten()) < TOL
+
+    def evaluateWithNLR(inputValues):
+        raise ValueError("The network level reasoner cannot be built")
+    monkeypatch.setattr(network, "evaluateWithNLR", evaluateWithNLR)
+    err = network.findError(testInput, options=OPT, filename="")
+    assert len(err) == len(network.outputVars)
+    assert max(err[0].flatten()) < TOL
+
+    # No error can be computed at a point where the encoding is UNSAT
+    outVar = network.outputVars[0].flatten()[0]
+    network.setUpperBound(outVar, network.evaluateWithoutMarabou(testInput)[0].flatten()[0] - 1.0)
+    assert network.findError(testInput, options=OPT, filename="") is None
+
 def test_batch_norm():
     """
     Test a network exported from pytorch
@@ -123,6 +123,65 @@ def test_get_marabou_query(tmpdir):
     diff = call(['diff', ipq1_filename, ipq2_filename])
     assert not diff
 
+def test_binary_query(tmpdir):
+    """
+    Test that a query saved in the binary format loads into the same query as the text format
+    """
+    network = load_acas_network()
+    network.setLowerBound(network.outputVars[0].flatten()[0], 1500.0)
+
+    queryDir = tmpdir.mkdir("query")
+    textFile = queryDir.join("query.txt").strpath
+    binaryFile = queryDir.join("query.ipqb").strpath
+    network.saveQuery(textFile)
+    network.saveQuery(binaryFile, binary=True)
+    assert os.path.getsize(binaryFile) < os.path.getsize(textFile)
+
+    # Save both loaded queries in the text format and compare the files
+    textFile2 = queryDir.join("query_from_text.txt").strpath
+    binaryFile2 = queryDir.join("query_from_binary.txt").strpath
+    MarabouCore.saveQuery(Marabou.load_query(textFile), textFile2)
+    MarabouCore.saveQuery(Marabou.load_query(binaryFile), binaryFile2)
+    diff = call(['diff', textFile2, binaryFile2])
+    assert not diff
+
+def test_compressed_query(tmpdir):
+    """
+    Test that gzip compressed queries, in the text and the binary format, load into the same query
+    """
+    network = load_acas_network()
+    network.setLowerBound(network.outputVars[0].flatten()[0], 1500.0)
+
+    queryDir = tmpdir.mkdir("query")
+    textFile = queryDir.join("query.txt").strpath
+    network.saveQuery(textFile)
+    for name, binary in [("query.txt.gz", False), ("query.ipqb.gz", True)]:
+        compressedFile = queryDir.join(name).strpath
+        network.saveQuery(compressedFile, binary=binary)
+        with open(compressedFile, "rb") as f:
+            assert f.read(2) == b"\x1f\x8b"
+        assert os.path.getsize(compressedFile) < os.path.getsize(textFile)
+
+        textFile2 = queryDir.join(name + ".txt").strpath
+        MarabouCore.saveQuery(Marabou.load_query(compressedFile), textFile2)
+        diff = call(['diff', textFile, textFile2])
+        assert not diff
+
+def test_compression_supported(tmpdir):
+    """
+    Test that queries can be saved exactly with the compressions that the build supports
+    """
+    network = load_acas_network()
+    assert MarabouCore.compressionSupported("query.ipqb")
+    for name in ["query.ipqb", "query.ipqb.gz", "query.ipqb.zst"]:
+        filename = tmpdir.join(name).strpath
+        if MarabouCore.compressionSupported(name):
+            network.saveQuery(filename, binary=True)
+            assert Marabou.load_query(filename).getNumberOfVariables() == network.numVars
+        else:
+            with pytest.raises(RuntimeError):
+                network.saveQuery(filename, binary=True)
+
 
 def load_onnx_network():
     """
@@ -0,0 +1,86 @@
+# Tests the batch mode of resources/runMarabou.py
+import pytest
+import csv
+import json
+import numpy as np
+import os
+import subprocess
+import sys
+
+# Global settings
+RUN_MARABOU = os.path.join(os.path.dirname(__file__), "../../resources/runMarabou.py")   # Script to test
+NETWORK_FILE = os.path.join(os.path.dirname(__file__), "../../resources/nnet/fc_2-2-3.nnet")  # Network with 2 inputs and 3 outputs
+EPSILONS = [0.01, 0.1]                                                                  # Epsilons of every batch
+
+def runBatch(dataset, results, indices):
+    """Run runMarabou.py in batch mode on the test network, for every epsilon and every target but the label
+
+    Args:
+        dataset (str): .npz file with the test points
+        results (str): .jsonl or .csv file to append the results to
+        indices (str): Indices of the points to verify, e.g. 0-1
+
+    Returns:
+        (str): The output of the script
+    """
+    command = [sys.executable, RUN_MARABOU, NETWORK_FILE, "--dataset", dataset, "--batch-results", results,
+               "--batch-indices", indices, "--batch-epsilons", ",".join(str(e) for e in EPSILONS),
+               "--batch-workers", "2", "--timeout", "60"]
+    return subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+def readRecords(results):
+    """Read the records of a results file, failing on a line that is not well-formed
+
+    Args:
+        results (str): .jsonl or .csv results file
+
+    Returns:
+        (list of dict): The records of the file
+    """
+    with open(results) as f:
+        if results.endswith(".csv"):
+            lines = f.read().splitlines()
+            assert lines[0] == "index,epsilon,target,label,result,time"
+            records = list(csv.DictReader(lines))
+            assert all(len(record) == 6 and None not in record.values() for record in records)
+            return records
+        return [json.loads(line) for line in f.read().splitlines()]
+
+@pytest.mark.parametrize("extension", [".jsonl", ".csv"])
+def test_batch_resume(tmpdir, extension):
+    """
+    Test that a batch interrupted while writing a record is resumed without running its completed jobs again
+    """
+    dataset = tmpdir.join("dataset.npz").strpath
+    labels = np.array([0, 1, 2, 0])
+    np.savez(dataset, x_test=np.random.random((4, 2)), y_test=labels)
+    results = tmpdir.join("results" + extension).strpath
+
+    # Points 0 and 1, with two targets per point
+    output = runBatch(dataset, results, "0-1")
+    assert output.count("index ") == 2 * len(EPSILONS) * 2
+    firstRecords = readRecords(results)
+    assert len(firstRecords) == 2 * len(EPSILONS) * 2
+
+    # The batch is interrupted while the record of a job of point 2 is written
+    with open(results, "a") as f:
+        f.write('{"index": 2, "epsilon"' if extension == ".jsonl" else "2,0.01,0,2,un")
+
+    # Only the jobs of points 2 and 3 are run when the batch is resumed
+    output = runBatch(dataset, results, "0-3")
+    assert output.count("index ") == 2 * len(EPSILONS) * 2
+    assert "index 0 " not in output and "index 1 " not in output
+    records = readRecords(results)
+    assert records[:len(firstRecords)] == firstRecords
+
+    jobs = [(int(r["index"]), float(r["epsilon"]), int(r["target"])) for r in records]
+    assert len(jobs) == len(set(jobs))
+    assert set(jobs) == {(index, epsilon, target) for index in range(4) for epsilon in EPSILONS
+                         for target in range(3) if target != labels[index]}
+    for record in records:
+        assert int(record["label"]) == labels[int(record["index"])]
+        assert record["result"] in ["sat", "unsat"]
+
+    # Resuming a finished batch runs nothing
+    assert runBatch(dataset, results, "0-3").count("index ") == 0
+    assert readRecords(results) == records
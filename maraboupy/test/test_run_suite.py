@@ -0,0 +1,83 @@
+# Tests the runner of the regression suite in regress/run_suite.py
+import pytest
+import os
+import sys
+
+# Global settings
+REGRESS_FOLDER = os.path.join(os.path.dirname(__file__), "../../regress")   # Folder of the regression scripts
+
+sys.path.insert(0, REGRESS_FOLDER)
+import run_suite
+
+def test_baseline_regressions():
+    """
+    Test that benchmarks are flagged when they got slower or bigger than the baseline, beyond the tolerances
+    """
+    baseline = run_suite.Baseline(None)
+    baseline.benchmarks["bench"] = {"wall_time": 10.0, "max_rss_kb": 1000, "statistics": {}}
+
+    def regressions(wall_time, max_rss_kb, name="bench"):
+        measurements = {"wall_time": wall_time, "max_rss_kb": max_rss_kb, "statistics": {}}
+        return baseline.regressions(name, measurements, time_tolerance=0.25, min_time_delta=1.0, rss_tolerance=0.25)
+
+    # Within the tolerances, or faster and smaller
+    assert regressions(12.0, 1200) == []
+    assert regressions(5.0, 500) == []
+
+    # Slower, bigger, or both
+    assert regressions(13.0, 1000) == ["time 10.00s -> 13.00s"]
+    assert regressions(10.0, 1300) == ["rss 1000KB -> 1300KB"]
+    assert len(regressions(13.0, 1300)) == 2
+
+    # Slowdowns of less than min_time_delta are noise, and new benchmarks have no baseline
+    baseline.benchmarks["fast"] = {"wall_time": 0.1, "max_rss_kb": 1000, "statistics": {}}
+    assert regressions(0.5, 1000, name="fast") == []
+    assert regressions(100.0, 10000, name="new") == []
+
+@pytest.mark.parametrize("extension", [".json", ".sqlite"])
+def test_baseline_file(tmpdir, extension):
+    """
+    Test that a baseline saved as JSON or SQLite is loaded with the same measurements
+    """
+    path = tmpdir.join("baseline" + extension).strpath
+    baseline = run_suite.Baseline(path)
+    assert baseline.benchmarks == {}
+    baseline.benchmarks = {
+        "bench1": {"wall_time": 1.5, "max_rss_kb": 2048, "statistics": {"num_splits": 3}},
+        "bench2": {"wall_time": 0.25, "max_rss_kb": 1024, "statistics": {}},
+    }
+    baseline.save()
+    assert run_suite.Baseline(path).benchmarks == baseline.benchmarks
+
+    # Saving again replaces the measurements of a benchmark
+    baseline.benchmarks["bench1"]["wall_time"] = 2.5
+    baseline.save()
+    assert run_suite.Baseline(path).benchmarks["bench1"]["wall_time"] == 2.5
+
+def test_run_benchmark():
+    """
+    Test that a benchmark is checked against its expected result, and killed once it times out
+    """
+    passing = run_suite.Benchmark("pass", {0}, sys.executable, ["-c", "print('unsat')"], "unsat", [])
+    measurements = run_suite.run_benchmark(passing, timeout=60)
+    assert measurements["result"] == "pass"
+    assert measurements["max_rss_kb"] > 0
+
+    failing = run_suite.Benchmark("fail", {0}, sys.executable, ["-c", "print('sat')"], "unsat", [])
+    assert run_suite.run_benchmark(failing, timeout=60)["result"] == "fail"
+
+    sleeping = run_suite.Benchmark("timeout", {0}, sys.executable, ["-c", "import time; time.sleep(60)"], "unsat", [])
+    measurements = run_suite.run_benchmark(sleeping, timeout=1)
+    assert measurements["result"] == "timeout"
+    assert measurements["wall_time"] < 30
+
+def test_run_benchmark_without_waitid(monkeypatch):
+    """
+    Test that benchmarks are reaped and killed on platforms where os.waitid is not available
+    """
+    monkeypatch.delattr(os, "waitid", raising=False)
+    passing = run_suite.Benchmark("pass", {0}, sys.executable, ["-c", "print('unsat')"], "unsat", [])
+    assert run_suite.run_benchmark(passing, timeout=60)["result"] == "pass"
+
+    sleeping = run_suite.Benchmark("timeout", {0}, sys.executable, ["-c", "import time; time.sleep(60)"], "unsat", [])
+    assert run_suite.run_benchmark(sleeping, timeout=1)["result"] == "timeout"
@@ -0,0 +1,325 @@
+'''
+Runs the regression benchmarks registered with ctest in parallel, under a
+CPU budget, and checks both their answers and their performance.
+
+For every benchmark the wall time, the peak RSS and the statistics from
+Marabou's summary file are recorded. Results can be stored as a baseline in
+a JSON or SQLite file (chosen by the extension), and later runs flag wrong
+answers as well as benchmarks that got slower or bigger than the baseline.
+
+Example:
+    python regress/run_suite.py --build-dir build --levels 0,1 --cpus 8 --baseline regress_baseline.sqlite --update-baseline
+    python regress/run_suite.py --build-dir build --levels 0,1 --cpus 8 --baseline regress_baseline.sqlite
+'''
+
+import argparse
+import json
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from run_regression import DEFAULT_TIMEOUT, EXPECTED_RESULT_OPTIONS, analyze_process_result
+
+# Fields #3-#8 of the summary file, which follow the result and the time in seconds
+SUMMARY_STATISTICS = ['num_visited_tree_states', 'average_pivot_time_micro', 'num_splits',
+                      'num_main_loop_iterations', 'num_simplex_steps', 'preprocessing_time_micro']
+
+
+class Benchmark:
+    """A regression benchmark, parsed from the run_regression.py command ctest would run"""
+
+    def __init__(self, name, levels, binary, files, expected_result, arguments):
+        self.name = name
+        self.levels = levels
+        self.binary = binary
+        self.files = files
+        self.expected_result = expected_result
+        self.arguments = arguments
+
+    @staticmethod
+    def from_ctest(test):
+        command = test.get('command', [])
+        script = next((i for i, arg in enumerate(command) if arg.endswith('run_regression.py')), None)
+        if script is None:
+            return None
+        args = command[script + 1:]
+        result_index = next((i for i, arg in enumerate(args) if i > 1 and arg in EXPECTED_RESULT_OPTIONS), None)
+        if result_index is None:
+            return None
+
+        levels = set()
+        for prop in test.get('properties', []):
+            if prop['name'] == 'LABELS':
+                for label in ' '.join(prop['value']).split():
+                    match = re.fullmatch(r'regress(\d+)', label)
+                    if match:
+                        levels.add(int(match.group(1)))
+        return Benchmark(test['name'], levels, args[0], args[1:result_index], args[result_index],
+                         [arg for arg in args[result_index + 1:] if arg])
+
+    def cpus(self):
+        """Number of threads the benchmark runs with"""
+        for i, arg in enumerate(self.arguments):
+            if arg.startswith('--num-workers='):
+                return int(arg.split('=')[1])
+            if arg == '--num-workers' and i + 1 < len(self.arguments):
+                return int(self.arguments[i + 1])
+        return 1
+
+    def command(self, summary_file):
+        network_file = self.files[0]
+        extension = os.path.splitext(network_file)[1]
+        if extension == '.mps':
+            return [self.binary, network_file] + self.arguments
+        if extension == '.ipq':
+            command = [self.binary, '--input-query', network_file]
+        else:
+            command = [self.binary] + self.files
+        return command + self.arguments + ['--summary-file={}'.format(summary_file)]
+
+
+def list_benchmarks(build_dir):
+    output = subprocess.run(['ctest', '--show-only=json-v1'], cwd=build_dir, check=True,
+                            stdout=subprocess.PIPE).stdout
+    benchmarks = [Benchmark.from_ctest(test) for test in json.loads(output)['tests']]
+    return [benchmark for benchmark in benchmarks if benchmark is not None]
+
+
+def wait_for_exit(proc, lock):
+    """Wait for a child process to exit and reap it, holding `lock` while it is
+    reaped, and return its wait status and resource usage. The return code of
+    the process is set under the lock, so that a thread that only kills the
+    process while it holds the lock and the return code is None never signals
+    a reused PID."""
+    if hasattr(os, 'waitid'):
+        # Wait for the exit without reaping, so that the PID stays reserved
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+    while True:
+        with lock:
+            pid, status, rusage = os.wait4(proc.pid, 0 if hasattr(os, 'waitid') else os.WNOHANG)
+            if pid:
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                return status, rusage
+        time.sleep(0.01)
+
+
+def run_benchmark(benchmark, timeout):
+    """Run a benchmark and return its measurements. The peak RSS is taken from
+    the resource usage of the child process, in kilobytes."""
+    with tempfile.TemporaryDirectory() as dirname:
+        summary_file = os.path.join(dirname, 'summary.txt')
+        out_file = open(os.path.join(dirname, 'out.txt'), 'w+')
+        err_file = open(os.path.join(dirname, 'err.txt'), 'w+')
+
+        start = time.monotonic()
+        proc = subprocess.Popen(benchmark.command(summary_file), cwd=dirname, stdin=subprocess.DEVNULL,
+                                stdout=out_file, stderr=err_file)
+        killed = threading.Event()
+        lock = threading.Lock()
+
+        def kill():
+            # Once the child is reaped its PID may belong to another process.
+            # Popen.kill would poll, and could reap it before wait_for_exit does
+            with lock:
+                if proc.returncode is None:
+                    killed.set()
+                    os.kill(proc.pid, signal.SIGKILL)
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        status, rusage = wait_for_exit(proc, lock)
+        wall_time = time.monotonic() - start
+        if timer:
+            timer.cancel()
+        timed_out = killed.is_set()
+        if timed_out:
+            proc.returncode = 124
+
+        out_file.seek(0)
+        err_file.seek(0)
+        out, err = out_file.read().strip(), err_file.read().strip()
+        out_file.close()
+        err_file.close()
+
+        statistics = {}
+        if os.path.isfile(summary_file):
+            with open(summary_file) as f:
+                fields = f.read().split()
+            for name, value in zip(SUMMARY_STATISTICS, fields[2:]):
+                statistics[name] = int(value)
+
+    passed = not timed_out and analyze_process_result(out, err, proc.returncode, benchmark.expected_result)
+    return {'result': 'pass' if passed else ('timeout' if timed_out else 'fail'),
+            'wall_time': wall_time,
+            'max_rss_kb': rusage.ru_maxrss,
+            'statistics': statistics}
+
+
+def run_suite(benchmarks, cpus, timeout, report):
+    """Run the benchmarks with at most `cpus` threads busy at any time, and
+    call report(benchmark, measurements) as each one finishes"""
+    available = [cpus]
+    condition = threading.Condition()
+    threads = []
+
+    def run(benchmark, cost):
+        try:
+            measurements = run_benchmark(benchmark, timeout)
+        except Exception as e:
+            measurements = {'result': 'fail', 'wall_time': 0, 'max_rss_kb': 0, 'statistics': {}, 'error': str(e)}
+        with condition:
+            report(benchmark, measurements)
+            available[0] += cost
+            condition.notify_all()
+
+    for benchmark in benchmarks:
+        cost = min(benchmark.cpus(), cpus)
+        with condition:
+            condition.wait_for(lambda: available[0] >= cost)
+            available[0] -= cost
+        thread = threading.Thread(target=run, args=(benchmark, cost))
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+
+class Baseline:
+    """Measurements per benchmark, stored in a JSON or SQLite (.db, .sqlite) file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.benchmarks = {}
+        if path and os.path.isfile(path):
+            self.load()
+
+    def is_sqlite(self):
+        return os.path.splitext(self.path)[1] in ('.db', '.sqlite', '.sqlite3')
+
+    def load(self):
+        if self.is_sqlite():
+            with sqlite3.connect(self.path) as connection:
+                rows = connection.execute('SELECT name, wall_time, max_rss_kb, statistics FROM benchmarks')
+                for name, wall_time, max_rss_kb, statistics in rows:
+                    self.benchmarks[name] = {'wall_time': wall_time, 'max_rss_kb': max_rss_kb,
+                                             'statistics': json.loads(statistics)}
+        else:
+            with open(self.path) as f:
+                self.benchmarks = json.load(f)['benchmarks']
+
+    def save(self):
+        if self.is_sqlite():
+            with sqlite3.connect(self.path) as connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS benchmarks (name TEXT PRIMARY KEY, '
+                                   'wall_time REAL, max_rss_kb INTEGER, statistics TEXT, updated REAL)')
+                connection.executemany('INSERT OR REPLACE INTO benchmarks VALUES (?, ?, ?, ?, ?)',
+                                       [(name, m['wall_time'], m['max_rss_kb'], json.dumps(m['statistics']),
+                                         time.time()) for name, m in self.benchmarks.items()])
+        else:
+            with open(self.path, 'w') as f:
+                json.dump({'version': 1, 'benchmarks': self.benchmarks}, f, indent=2, sort_keys=True)
+
+    def regressions(self, name, measurements, time_tolerance, min_time_delta, rss_tolerance):
+        """Describe how a benchmark got worse than its baseline, if it did"""
+        if name not in self.benchmarks:
+            return []
+        baseline = self.benchmarks[name]
+        regressions = []
+        if (measurements['wall_time'] > baseline['wall_time'] * (1 + time_tolerance) and
+                measurements['wall_time'] - baseline['wall_time'] > min_time_delta):
+            regressions.append('time {:.2f}s -> {:.2f}s'.format(baseline['wall_time'], measurements['wall_time']))
+        if measurements['max_rss_kb'] > baseline['max_rss_kb'] * (1 + rss_tolerance):
+            regressions.append('rss {}KB -> {}KB'.format(baseline['max_rss_kb'], measurements['max_rss_kb']))
+        return regressions
+
+
+def main():
+    default_build_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'build')
+    parser = argparse.ArgumentParser(
+        description='Runs the regression benchmarks in parallel and checks their answers and performance')
+    parser.add_argument('--build-dir', default=default_build_dir,
+                        help='Configured build directory whose ctest benchmarks are run')
+    parser.add_argument('--levels', default='0',
+                        help='Comma separated regression levels to run, or all')
+    parser.add_argument('--filter', default=None,
+                        help='Only run benchmarks whose name matches this regular expression')
+    parser.add_argument('--cpus', type=int, default=os.cpu_count(),
+                        help='Number of CPUs that the running benchmarks may use together')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help='Timeout of each benchmark in seconds')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON or SQLite (.db, .sqlite) file with the baseline measurements')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Store the measurements of the passing benchmarks in the baseline')
+    parser.add_argument('--results', default=None,
+                        help='JSON or SQLite file to store the measurements of this run in')
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help='Relative slowdown over the baseline that is flagged as a regression')
+    parser.add_argument('--min-time-delta', type=float, default=1.0,
+                        help='Slowdowns of fewer seconds than this are never flagged')
+    parser.add_argument('--rss-tolerance', type=float, default=0.25,
+                        help='Relative growth of the peak RSS over the baseline that is flagged as a regression')
+    args = parser.parse_args()
+
+    benchmarks = list_benchmarks(args.build_dir)
+    if args.levels != 'all':
+        levels = {int(level) for level in args.levels.split(',')}
+        benchmarks = [benchmark for benchmark in benchmarks if benchmark.levels & levels]
+    if args.filter:
+        benchmarks = [benchmark for benchmark in benchmarks if re.search(args.filter, benchmark.name)]
+
+    baseline = Baseline(args.baseline)
+    results = Baseline(args.results)
+
+    # Start the slowest benchmarks first, so that they do not finish last
+    benchmarks.sort(key=lambda b: -baseline.benchmarks.get(b.name, {}).get('wall_time', float('inf')))
+
+    failures = []
+    regressions = []
+
+    def report(benchmark, measurements):
+        status = measurements['result'].upper()
+        regression = []
+        if measurements['result'] == 'pass':
+            regression = baseline.regressions(benchmark.name, measurements, args.time_tolerance,
+                                              args.min_time_delta, args.rss_tolerance)
+            if regression:
+                status = 'REGRESSION'
+                regressions.append((benchmark.name, regression))
+            results.benchmarks[benchmark.name] = measurements
+        else:
+            failures.append(benchmark.name)
+        print('{:<10} {:>8.2f}s {:>9}KB  {}  {}'.format(status, measurements['wall_time'], measurements['max_rss_kb'],
+                                                       benchmark.name, ', '.join(regression)), flush=True)
+
+    print('Running {} benchmarks on {} CPUs'.format(len(benchmarks), args.cpus))
+    run_suite(benchmarks, args.cpus, args.timeout, report)
+
+    if args.results:
+        results.save()
+    if args.baseline and args.update_baseline:
+        baseline.benchmarks.update(results.benchmarks)
+        baseline.save()
+
+    print('\n{} passed, {} failed, {} regressed'.format(len(benchmarks) - len(failures), len(failures),
+                                                        len(regressions)))
+    for name in failures:
+        print('FAILED: {}'.format(name))
+    for name, regression in regressions:
+        print('REGRESSED: {} ({})'.format(name, ', '.join(regression)))
+    return not failures and not regressions
+
+
+if __name__ == '__main__':
+    if main():
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -11,10 +11,14 @@ directory for licensing information.
 '''
 
 import argparse
+import csv
+import json
+import multiprocessing
 import numpy as np
 import os
 import sys
 import tempfile
+import time
 
 import pathlib
 sys.path.insert(0, os.path.join(str(pathlib.Path(__file__).parent.absolute()), "../"))
@@ -26,6 +30,21 @@ import subprocess
 
 def main():
         args, unknown = arguments().parse_known_args()
+
+        if args.batch_results:
+            runBatch(args, unknown)
+            return
+
+        marabou_binary = args.marabou_binary
+        if not os.access(marabou_binary, os.X_OK):
+            sys.exit('"{}" does not exist or is not executable'.format(marabou_binary))
+
+        # Marabou reads (compressed) query files directly
+        if args.input_query:
+            print("Running Marabou with the following arguments: ", unknown)
+            subprocess.run([marabou_binary] + ["--input-query={}".format(args.input_query)] + unknown )
+            return
+
         query, network = createQuery(args)
         if query == None:
             print("Unable to create an input query!")
@@ -36,33 +55,37 @@ def main():
                   "target label (-t), and the index of the point in the test set (-i).")
             exit(1)
 
-        marabou_binary = args.marabou_binary
-        if not os.access(marabou_binary, os.X_OK):
-            sys.exit('"{}" does not exist or is not executable'.format(marabou_binary))
-
-        temp = tempfile.NamedTemporaryFile(dir=args.temp_dir, delete=False)
+        # Write the query as compressed binary, which Marabou decompresses while loading,
+        # or as plain binary if gzip support was not compiled in
+        suffix = ".ipqb.gz" if MarabouCore.compressionSupported(".ipqb.gz") else ".ipqb"
+        temp = tempfile.NamedTemporaryFile(dir=args.temp_dir, suffix=suffix, delete=False)
         name = temp.name
-        MarabouCore.saveQuery(query, name)
+        temp.close()
+        MarabouCore.saveQuery(query, name, True)
 
         print("Running Marabou with the following arguments: ", unknown)
         subprocess.run([marabou_binary] + ["--input-query={}".format(name)] + unknown )
         os.remove(name)
 
-def createQuery(args):
-    if args.input_query:
-        query = Marabou.load_query(args.input_query)
-        return query, None
-    networkPath = args.network
-
+def createNetwork(networkPath):
     suffix = networkPath.split('.')[-1]
     if suffix == "nnet":
-        network = Marabou.read_nnet(networkPath)
+        return Marabou.read_nnet(networkPath)
     elif suffix == "pb":
-        network = Marabou.read_tf(networkPath)
+        return Marabou.read_tf(networkPath)
     elif suffix == "onnx":
-        network = Marabou.read_onnx(networkPath)
+        return Marabou.read_onnx(networkPath)
     else:
         print("The network must be in .pb, .nnet, or .onnx format!")
+        return None
+
+def createQuery(args):
+    if args.input_query:
+        query = Marabou.load_query(args.input_query)
+        return query, None
+
+    network = createNetwork(args.network)
+    if network == None:
         return None, None
 
     if  args.prop != None:
@@ -134,6 +157,155 @@ def encode_cifar10_linf(network, index, epsilon, target_label):
                                       [1, -1], 0)
     return
 
+def load_dataset(dataset):
+    """Load the test set of a dataset as flattened points in [0, 1] and their labels
+
+    dataset is mnist, cifar10, or an .npz file holding x_test and y_test arrays.
+    """
+    if dataset == 'mnist':
+        from tensorflow.keras.datasets import mnist
+        (X_train, Y_train), (X_test, Y_test) = mnist.load_data()
+        return np.array(X_test).reshape(len(X_test), -1) / 255, np.array(Y_test).flatten()
+    elif dataset == 'cifar10':
+        import torchvision.datasets as datasets
+        import torchvision.transforms as transforms
+        cifar_test = datasets.CIFAR10('./data/cifardata/', train=False, download=True, transform=transforms.ToTensor())
+        points = np.array([X.numpy().flatten() for X, y in cifar_test])
+        return points, np.array([y for X, y in cifar_test])
+    elif dataset.endswith('.npz'):
+        data = np.load(dataset)
+        return np.array(data['x_test'], dtype=np.float64).reshape(len(data['x_test']), -1), np.array(data['y_test']).flatten()
+    else:
+        sys.exit('Unknown dataset "{}"'.format(dataset))
+
+def parseList(string, dtype):
+    """Parse a comma separated list in which integer ranges may be given as start-end"""
+    values = []
+    for item in string.split(','):
+        if dtype == int and '-' in item[1:]:
+            start, end = item.split('-')
+            values += list(range(int(start), int(end) + 1))
+        else:
+            values.append(dtype(item))
+    return values
+
+def readBatchResults(path):
+    """Read the (index, epsilon, target) jobs already in a results file, so that a batch can be resumed"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        if path.endswith('.csv'):
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            done.add((int(record['index']), float(record['epsilon']), int(record['target'])))
+    return done
+
+def dropPartialRecord(path):
+    """Remove the last line of a results file if an interrupted batch left it incomplete"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+
+BATCH_FIELDS = ['index', 'epsilon', 'target', 'label', 'result', 'time']
+
+# State of a batch worker process, set up once by initBatchWorker
+batchWorker = {}
+
+def initBatchWorker(networkPath, timeout, verbosity):
+    network = createNetwork(networkPath)
+    batchWorker['network'] = network
+    batchWorker['query'] = network.getMarabouQuery()
+    batchWorker['inputVars'] = np.array(network.inputVars).flatten()
+    batchWorker['outputVars'] = np.array(network.outputVars).flatten()
+    batchWorker['options'] = Marabou.createOptions(timeoutInSeconds=timeout, verbosity=verbosity)
+
+def solveBatchJob(job):
+    """Check whether the target label can be the maximal output in the L_inf ball of a point"""
+    index, epsilon, target, label, point = job
+    network = batchWorker['network']
+    outputVars = batchWorker['outputVars']
+
+    # The property only adds the input box and the output inequalities to the shared query
+    property = MarabouCore.InputQuery()
+    property.setNumberOfVariables(network.numVars)
+    property.setLowerBounds(batchWorker['inputVars'], np.maximum(0, point - epsilon))
+    property.setUpperBounds(batchWorker['inputVars'], np.minimum(1, point + epsilon))
+    for i in range(len(outputVars)):
+        if i != target:
+            eq = MarabouCore.Equation(MarabouCore.Equation.LE)
+            eq.addAddend(1, int(outputVars[i]))
+            eq.addAddend(-1, int(outputVars[target]))
+            eq.setScalar(0)
+            property.addEquation(eq)
+
+    start = time.time()
+    exitCode, vals, stats = MarabouCore.solveBatch(batchWorker['query'], [property], batchWorker['options'])[0]
+    return {'index': index, 'epsilon': epsilon, 'target': target, 'label': label,
+            'result': exitCode, 'time': round(time.time() - start, 3)}
+
+def runBatch(args, unknown):
+    """Verify many (index, epsilon, target) jobs on one network with a pool of workers
+
+    The network and the dataset are loaded once, and results are appended to
+    args.batch_results as soon as they are known. Jobs already in the results
+    file are skipped, so an interrupted batch can be resumed. A record that an
+    interrupted batch only partially wrote is dropped, and its job run again.
+    """
+    options, unknown = batchArguments().parse_known_args(unknown)
+    if unknown:
+        sys.exit('Unsupported arguments in batch mode: {}'.format(' '.join(unknown)))
+    if args.network == None or args.dataset == None or args.batch_indices == None:
+        sys.exit('Batch mode needs a network, --dataset and --batch-indices')
+
+    points, labels = load_dataset(args.dataset)
+    numLabels = np.array(createNetwork(args.network).outputVars).size
+    epsilons = parseList(args.batch_epsilons, float) if args.batch_epsilons else [args.epsilon]
+    dropPartialRecord(args.batch_results)
+    done = readBatchResults(args.batch_results)
+
+    def jobs():
+        for index in parseList(args.batch_indices, int):
+            label = int(labels[index])
+            if args.batch_targets == 'all':
+                targets = [t for t in range(numLabels) if t != label]
+            else:
+                targets = parseList(args.batch_targets, int)
+            for epsilon in epsilons:
+                for target in targets:
+                    if (index, epsilon, target) not in done:
+                        yield index, epsilon, target, label, points[index]
+
+    isCsv = args.batch_results.endswith('.csv')
+    writeHeader = isCsv and (not os.path.exists(args.batch_results) or os.path.getsize(args.batch_results) == 0)
+    with open(args.batch_results, 'a', newline='') as f, \
+         multiprocessing.Pool(args.batch_workers, initializer=initBatchWorker,
+                              initargs=(args.network, options.timeout, options.verbosity)) as pool:
+        writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS) if isCsv else None
+        if writeHeader:
+            writer.writeheader()
+        for result in pool.imap_unordered(solveBatchJob, jobs()):
+            if isCsv:
+                writer.writerow(result)
+            else:
+                f.write(json.dumps(result) + '\n')
+            f.flush()
+            print("index {index} epsilon {epsilon} target {target}: {result} ({time}s)".format(**result))
+
+def batchArguments():
+    # Marabou options that are applied to every query of a batch
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--timeout', type=int, default=0,
+                        help='Timeout of each query in seconds, 0 for no timeout')
+    parser.add_argument('--verbosity', type=int, default=0,
+                        help='Verbosity of Marabou')
+    return parser
+
 def arguments():
     ################################ Arguments parsing ##############################
     parser = argparse.ArgumentParser(description="Script to run some canonical benchmarks with Marabou (e.g., ACAS benchmarks, l-inf robustness checks on mnist/cifar10).")
@@ -143,9 +315,9 @@ def arguments():
     parser.add_argument('prop', type=str, nargs='?', default=None,
                         help='The property file name')
     parser.add_argument('-q', '--input-query', type=str, default=None,
-                        help='The input query file name')
+                        help='The input query file name, optionally gzip (.gz) or zstd (.zst) compressed')
     parser.add_argument('--dataset', type=str, default=None,
-                        help="the dataset (mnist,cifar10)")
+                        help="the dataset (mnist,cifar10), or in batch mode also an .npz file with x_test and y_test")
     parser.add_argument('-e', '--epsilon', type=float, default=0,
                         help='The epsilon for L_infinity perturbation')
     parser.add_argument('-t', '--target-label', type=int, default=-1,
@@ -154,6 +326,18 @@ def arguments():
                         help='The index of the point in the test set')
     parser.add_argument('--temp-dir', type=str, default="/tmp/",
                         help='Temporary directory')
+    # batch mode
+    parser.add_argument('--batch-results', type=str, default=None,
+                        help='Verify many jobs in one run and append the results to this .jsonl or .csv file. '
+                        'Jobs already in the file are skipped, so an interrupted batch can be resumed')
+    parser.add_argument('--batch-indices', type=str, default=None,
+                        help='Indices of the points in the test set for batch mode, e.g. 0-99,200')
+    parser.add_argument('--batch-epsilons', type=str, default=None,
+                        help='Comma separated epsilons for batch mode, defaults to --epsilon')
+    parser.add_argument('--batch-targets', type=str, default='all',
+                        help='Comma separated target labels for batch mode, or all labels but the correct one')
+    parser.add_argument('--batch-workers', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of worker processes in batch mode')
     marabou_path = os.path.join(str(pathlib.Path(__file__).parent.absolute()),
                                 "../build/Marabou" )
     parser.add_argument('--marabou-binary', type=str, default=marabou_path,
@@ -0,0 +1,417 @@
+/*********************                                                        */
+/*! \file CompressedFile.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz, Christopher Lazarus
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+ **/
+
+#include "CommonError.h"
+#include "CompressedFile.h"
+#include "ConstSimpleData.h"
+#include "HeapData.h"
+#include "MStringf.h"
+
+#include <algorithm>
+#include <cstring>
+#include <string>
+
+#ifdef ENABLE_ZLIB
+#include <zlib.h>
+#endif
+
+#ifdef ENABLE_ZSTD
+#include <zstd.h>
+#endif
+
+CompressedFile::CompressedFile( const String &path, Compression compression )
+    : _path( path )
+    , _compression( compression )
+    , _mode( MODE_READ )
+    , _isOpen( false )
+    , _bufferStart( 0 )
+    , _bufferEnd( 0 )
+    , _endOfStream( false )
+    , _gzFile( NULL )
+    , _file( NULL )
+    , _zstdStream( NULL )
+    , _compressedStart( 0 )
+    , _compressedEnd( 0 )
+{
+}
+
+CompressedFile::~CompressedFile()
+{
+    try
+    {
+        closeIfNeeded();
+    }
+    catch ( ... )
+    {
+    }
+}
+
+CompressedFile::Compression CompressedFile::compressionFromFileName( const String &path )
+{
+    String name( path );
+    if ( name.endsWith( ".gz" ) )
+        return GZIP;
+    if ( name.endsWith( ".zst" ) )
+        return ZSTD;
+    return NONE;
+}
+
+CompressedFile::Compression CompressedFile::detectCompression( const String &path )
+{
+    FILE *file = fopen( path.ascii(), "rb" );
+    if ( !file )
+        return NONE;
+
+    unsigned char magic[4] = { 0 };
+    size_t n = fread( magic, 1, sizeof( magic ), file );
+    fclose( file );
+
+    if ( n >= 2 && magic[0] == 0x1f && magic[1] == 0x8b )
+        return GZIP;
+    if ( n == 4 && magic[0] == 0x28 && magic[1] == 0xb5 && magic[2] == 0x2f && magic[3] == 0xfd )
+        return ZSTD;
+    return NONE;
+}
+
+bool CompressedFile::supported( Compression compression )
+{
+    switch ( compression )
+    {
+    case NONE:
+        return true;
+
+    case GZIP:
+#ifdef ENABLE_ZLIB
+        return true;
+#else
+        return false;
+#endif
+
+    case ZSTD:
+#ifdef ENABLE_ZSTD
+        return true;
+#else
+        return false;
+#endif
+    }
+
+    return false;
+}
+
+void CompressedFile::open( Mode openMode )
+{
+    if ( !supported( _compression ) )
+        throw CommonError( CommonError::UNSUPPORTED_COMPRESSION,
+                           Stringf( "Marabou was built without support for the compression of %s",
+                                    _path.ascii() ).ascii() );
+    if ( openMode == MODE_WRITE_APPEND )
+        throw CommonError( CommonError::OPEN_FAILED, "Compressed files cannot be appended to" );
+
+    closeIfNeeded();
+
+    _mode = openMode;
+    _buffer.resize( CHUNK_SIZE );
+    _bufferStart = 0;
+    _bufferEnd = 0;
+    _endOfStream = false;
+    bool reading = ( openMode == MODE_READ );
+
+    if ( _compression == GZIP )
+    {
+#ifdef ENABLE_ZLIB
+        String mode = reading ? String( "rb" ) : Stringf( "wb%d", GZIP_COMPRESSION_LEVEL );
+        gzFile file = gzopen( _path.ascii(), mode.ascii() );
+        if ( !file )
+            throw CommonError( CommonError::OPEN_FAILED, _path.ascii() );
+        gzbuffer( file, CHUNK_SIZE );
+        _gzFile = file;
+#endif
+    }
+    else
+    {
+        _file = fopen( _path.ascii(), reading ? "rb" : "wb" );
+        if ( !_file )
+            throw CommonError( CommonError::OPEN_FAILED, _path.ascii() );
+
+#ifdef ENABLE_ZSTD
+        if ( _compression == ZSTD )
+        {
+            _compressedStart = 0;
+            _compressedEnd = 0;
+            if ( reading )
+            {
+                ZSTD_DStream *stream = ZSTD_createDStream();
+                ZSTD_initDStream( stream );
+                _zstdStream = stream;
+                _compressedBuffer.resize( ZSTD_DStreamInSize() );
+            }
+            else
+            {
+                ZSTD_CStream *stream = ZSTD_createCStream();
+                ZSTD_initCStream( stream, ZSTD_COMPRESSION_LEVEL );
+                _zstdStream = stream;
+                _compressedBuffer.resize( ZSTD_CStreamOutSize() );
+            }
+        }
+#endif
+    }
+
+    _isOpen = true;
+}
+
+bool CompressedFile::fillBuffer()
+{
+    if ( _endOfStream )
+        return false;
+
+    _bufferStart = 0;
+    _bufferEnd = 0;
+
+    if ( _compression == GZIP )
+    {
+#ifdef ENABLE_ZLIB
+        int n = gzread( (gzFile)_gzFile, _buffer.data(), _buffer.size() );
+        if ( n < 0 )
+            throw CommonError( CommonError::READ_FAILED, _path.ascii() );
+        _bufferEnd = n;
+#endif
+    }
+    else if ( _compression == ZSTD )
+    {
+#ifdef ENABLE_ZSTD
+        ZSTD_outBuffer output = { _buffer.data(), _buffer.size(), 0 };
+        while ( output.pos == 0 )
+        {
+            if ( _compressedStart == _compressedEnd )
+            {
+                _compressedStart = 0;
+                _compressedEnd = fread( _compressedBuffer.data(), 1, _compressedBuffer.size(), _file );
+                if ( _compressedEnd == 0 )
+                    break;
+            }
+
+            ZSTD_inBuffer input = { _compressedBuffer.data(), _compressedEnd, _compressedStart };
+            size_t result = ZSTD_decompressStream( (ZSTD_DStream *)_zstdStream, &output, &input );
+            if ( ZSTD_isError( result ) )
+                throw CommonError( CommonError::READ_FAILED,
+                                   Stringf( "%s: %s", _path.ascii(), ZSTD_getErrorName( result ) ).ascii() );
+            _compressedStart = input.pos;
+        }
+        _bufferEnd = output.pos;
+#endif
+    }
+    else
+    {
+        _bufferEnd = fread( _buffer.data(), 1, _buffer.size(), _file );
+    }
+
+    if ( _bufferEnd == 0 )
+    {
+        _endOfStream = true;
+        return false;
+    }
+
+    return true;
+}
+
+void CompressedFile::flushBuffer( bool endOfStream )
+{
+    if ( _compression == GZIP )
+    {
+#ifdef ENABLE_ZLIB
+        if ( _bufferEnd > 0 &&
+             gzwrite( (gzFile)_gzFile, _buffer.data(), _bufferEnd ) != (int)_bufferEnd )
+            throw CommonError( CommonError::WRITE_FAILED, _path.ascii() );
+#endif
+    }
+    else if ( _compression == ZSTD )
+    {
+#ifdef ENABLE_ZSTD
+        ZSTD_CStream *stream = (ZSTD_CStream *)_zstdStream;
+        ZSTD_inBuffer input = { _buffer.data(), _bufferEnd, 0 };
+        bool done = false;
+        while ( !done )
+        {
+            ZSTD_outBuffer output = { _compressedBuffer.data(), _compressedBuffer.size(), 0 };
+            size_t result;
+            if ( input.pos < input.size )
+                result = ZSTD_compressStream( stream, &output, &input );
+            else if ( endOfStream )
+                result = ZSTD_endStream( stream, &output );
+            else
+                result = 0;
+
+            if ( ZSTD_isError( result ) )
+                throw CommonError( CommonError::WRITE_FAILED,
+                                   Stringf( "%s: %s", _path.ascii(), ZSTD_getErrorName( result ) ).ascii() );
+            if ( fwrite( _compressedBuffer.data(), 1, output.pos, _file ) != output.pos )
+                throw CommonError( CommonError::WRITE_FAILED, _path.ascii() );
+
+            done = ( input.pos == input.size ) && ( !endOfStream || result == 0 );
+        }
+#endif
+    }
+    else
+    {
+        if ( fwrite( _buffer.data(), 1, _bufferEnd, _file ) != _bufferEnd )
+            throw CommonError( CommonError::WRITE_FAILED, _path.ascii() );
+    }
+
+    _bufferEnd = 0;
+}
+
+void CompressedFile::writeBytes( const void *data, uint64_t size )
+{
+    const char *bytes = static_cast<const char *>( data );
+    while ( size > 0 )
+    {
+        uint64_t n = std::min<uint64_t>( size, _buffer.size() - _bufferEnd );
+        memcpy( _buffer.data() + _bufferEnd, bytes, n );
+        _bufferEnd += n;
+        bytes += n;
+        size -= n;
+
+        if ( _bufferEnd == _buffer.size() )
+            flushBuffer( false );
+    }
+}
+
+uint64_t CompressedFile::readBytes( void *data, uint64_t size )
+{
+    char *bytes = static_cast<char *>( data );
+    uint64_t total = 0;
+    while ( total < size )
+    {
+        if ( _bufferStart == _bufferEnd && !fillBuffer() )
+            break;
+
+        uint64_t n = std::min<uint64_t>( size - total, _bufferEnd - _bufferStart );
+        memcpy( bytes + total, _buffer.data() + _bufferStart, n );
+        _bufferStart += n;
+        total += n;
+    }
+    return total;
+}
+
+void CompressedFile::write( const String &line )
+{
+    writeBytes( line.ascii(), line.length() );
+}
+
+String CompressedFile::readLine( char lineSeparatingChar )
+{
+    std::string line;
+    bool readAnything = false;
+    while ( true )
+    {
+        if ( _bufferStart == _bufferEnd && !fillBuffer() )
+        {
+            if ( !readAnything )
+                throw CommonError( CommonError::READ_FAILED );
+            break;
+        }
+        readAnything = true;
+
+        const char *start = _buffer.data() + _bufferStart;
+        const char *separator = static_cast<const char *>(
+            memchr( start, lineSeparatingChar, _bufferEnd - _bufferStart ) );
+        if ( separator )
+        {
+            line.append( start, separator - start );
+            _bufferStart += ( separator - start ) + 1;
+            break;
+        }
+
+        line.append( start, _bufferEnd - _bufferStart );
+        _bufferStart = _bufferEnd;
+    }
+
+    return String( line.c_str(), line.length() );
+}
+
+void CompressedFile::read( HeapData &buffer, unsigned maxReadSize )
+{
+    std::vector<char> readBuffer( maxReadSize );
+    uint64_t bytesRead = readBytes( readBuffer.data(), maxReadSize );
+    buffer = ConstSimpleData( readBuffer.data(), bytesRead );
+}
+
+void CompressedFile::close()
+{
+    closeIfNeeded();
+}
+
+void CompressedFile::closeIfNeeded()
+{
+    if ( !_isOpen )
+        return;
+    _isOpen = false;
+
+    bool writing = ( _mode != MODE_READ );
+    bool failed = false;
+
+    try
+    {
+        if ( writing )
+            flushBuffer( true );
+    }
+    catch ( ... )
+    {
+        failed = true;
+    }
+
+#ifdef ENABLE_ZLIB
+    if ( _gzFile )
+    {
+        if ( gzclose( (gzFile)_gzFile ) != Z_OK )
+            failed = true;
+        _gzFile = NULL;
+    }
+#endif
+
+#ifdef ENABLE_ZSTD
+    if ( _zstdStream )
+    {
+        if ( writing )
+            ZSTD_freeCStream( (ZSTD_CStream *)_zstdStream );
+        else
+            ZSTD_freeDStream( (ZSTD_DStream *)_zstdStream );
+        _zstdStream = NULL;
+    }
+#endif
+
+    if ( _file )
+    {
+        if ( fclose( _file ) != 0 )
+            failed = true;
+        _file = NULL;
+    }
+
+    _buffer.clear();
+    _buffer.shrink_to_fit();
+    _compressedBuffer.clear();
+    _compressedBuffer.shrink_to_fit();
+
+    if ( writing && failed )
+        throw CommonError( CommonError::WRITE_FAILED, _path.ascii() );
+}
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -0,0 +1,129 @@
+/*********************                                                        */
+/*! \file CompressedFile.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz, Christopher Lazarus
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** \brief A file that is transparently gzip or zstd (de)compressed
+ **
+ ** Data is streamed through a fixed-size buffer in both directions, so
+ ** neither the compressed nor the uncompressed file is ever held in
+ ** memory as a whole. Gzip support requires zlib (ENABLE_ZLIB) and zstd
+ ** support requires libzstd (ENABLE_ZSTD).
+ **/
+
+#ifndef __CompressedFile_h__
+#define __CompressedFile_h__
+
+#include "IFile.h"
+#include "MString.h"
+
+#include <cstdint>
+#include <cstdio>
+#include <vector>
+
+class CompressedFile : public IFile
+{
+public:
+    enum Compression {
+        NONE = 0,
+        GZIP = 1,
+        ZSTD = 2,
+    };
+
+    enum {
+        CHUNK_SIZE = 1 << 18,
+        GZIP_COMPRESSION_LEVEL = 1,
+        ZSTD_COMPRESSION_LEVEL = 3,
+    };
+
+    CompressedFile( const String &path, Compression compression );
+    ~CompressedFile();
+
+    /*
+      The compression implied by the file name: .gz for gzip and .zst
+      for zstd
+    */
+    static Compression compressionFromFileName( const String &path );
+
+    /*
+      The compression of an existing file, detected from its magic
+      bytes
+    */
+    static Compression detectCompression( const String &path );
+
+    /*
+      Whether support for the compression was compiled in
+    */
+    static bool supported( Compression compression );
+
+    /*
+      Only MODE_READ and MODE_WRITE_TRUNCATE are supported
+    */
+    void open( Mode openMode );
+    void write( const String &line );
+    String readLine( char lineSeparatingChar = '\n' );
+    void read( HeapData &buffer, unsigned maxReadSize );
+    void close();
+
+    /*
+      Raw access to the uncompressed stream. readBytes returns the
+      number of bytes read, which is less than size only at the end of
+      the stream.
+    */
+    void writeBytes( const void *data, uint64_t size );
+    uint64_t readBytes( void *data, uint64_t size );
+
+private:
+    String _path;
+    Compression _compression;
+    Mode _mode;
+    bool _isOpen;
+
+    /*
+      Uncompressed data that has been read but not consumed, or written
+      but not yet compressed
+    */
+    std::vector<char> _buffer;
+    uint64_t _bufferStart;
+    uint64_t _bufferEnd;
+    bool _endOfStream;
+
+    // Gzip state
+    void *_gzFile;
+
+    // Zstd state
+    FILE *_file;
+    void *_zstdStream;
+    std::vector<char> _compressedBuffer;
+    uint64_t _compressedStart;
+    uint64_t _compressedEnd;
+
+    /*
+      Refill _buffer with the next chunk of uncompressed data. Return
+      false at the end of the stream.
+    */
+    bool fillBuffer();
+
+    /*
+      Compress and write out the contents of _buffer
+    */
+    void flushBuffer( bool endOfStream );
+
+    void closeIfNeeded();
+};
+
+#endif // __CompressedFile_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -14,9 +14,13 @@
  **/
 
 #include "FloatUtils.h"
+#include "MStringf.h"
 #include "Statistics.h"
 #include "TimeUtils.h"
 
+#include <cstdlib>
+#include <vector>
+
 Statistics::Statistics()
     : _timedOut( false )
 {
@@ -42,6 +46,7 @@ Statistics::Statistics()
     _unsignedAttributes[NUM_CERTIFIED_LEAVES] = 0;
     _unsignedAttributes[NUM_DELEGATED_LEAVES] = 0;
 
+    _longAttributes[PREPROCESSING_TIME_MICRO] = 0;
     _longAttributes[NUM_MAIN_LOOP_ITERATIONS] = 0;
     _longAttributes[NUM_SIMPLEX_STEPS] = 0;
     _longAttributes[TIME_SIMPLEX_STEPS_MICRO] = 0;
@@ -464,6 +469,100 @@ unsigned Statistics::getAveragePivotTimeInMicro() const
         _longAttributes[NUM_TABLEAU_PIVOTS];
 }
 
+void Statistics::merge( const Statistics &other )
+{
+    for ( const auto &attribute : other._unsignedAttributes )
+    {
+        switch ( attribute.first )
+        {
+        case NUM_PL_VALID_SPLITS:
+        case NUM_PL_SMT_ORIGINATED_SPLITS:
+        case NUM_PRECISION_RESTORATIONS:
+        case NUM_SPLITS:
+        case NUM_POPS:
+        case NUM_CONTEXT_PUSHES:
+        case NUM_CONTEXT_POPS:
+        case NUM_VISITED_TREE_STATES:
+        case PP_NUM_TIGHTENING_ITERATIONS:
+        case TOTAL_NUMBER_OF_VALID_CASE_SPLITS:
+        case NUM_CERTIFIED_LEAVES:
+        case NUM_DELEGATED_LEAVES:
+            _unsignedAttributes[attribute.first] += attribute.second;
+            break;
+
+        default:
+            if ( attribute.second > _unsignedAttributes[attribute.first] )
+                _unsignedAttributes[attribute.first] = attribute.second;
+        }
+    }
+
+    for ( const auto &attribute : other._longAttributes )
+        _longAttributes[attribute.first] += attribute.second;
+
+    for ( const auto &attribute : other._doubleAttributes )
+    {
+        if ( attribute.first == COST_OF_CURRENT_PHASE_PATTERN ||
+             attribute.first == MIN_COST_OF_PHASE_PATTERN )
+        {
+            if ( attribute.second < _doubleAttributes[attribute.first] )
+                _doubleAttributes[attribute.first] = attribute.second;
+        }
+        else if ( attribute.second > _doubleAttributes[attribute.first] )
+            _doubleAttributes[attribute.first] = attribute.second;
+    }
+
+    if ( other._startTime.tv_sec < _startTime.tv_sec ||
+         ( other._startTime.tv_sec == _startTime.tv_sec &&
+           other._startTime.tv_nsec < _startTime.tv_nsec ) )
+        _startTime = other._startTime;
+
+    _timedOut = _timedOut || other._timedOut;
+}
+
+String Statistics::serialize() const
+{
+    String serialized = Stringf( "S %lld %ld %d\n",
+                                 (long long)_startTime.tv_sec,
+                                 (long)_startTime.tv_nsec,
+                                 _timedOut ? 1 : 0 );
+
+    for ( const auto &attribute : _unsignedAttributes )
+        serialized += Stringf( "U %u %u\n", attribute.first, attribute.second );
+    for ( const auto &attribute : _longAttributes )
+        serialized += Stringf( "L %u %llu\n", attribute.first, attribute.second );
+    for ( const auto &attribute : _doubleAttributes )
+        serialized += Stringf( "D %u %.17g\n", attribute.first, attribute.second );
+
+    return serialized;
+}
+
+void Statistics::deserialize( const String &serialized )
+{
+    for ( const auto &line : serialized.tokenize( "\n" ) )
+    {
+        List<String> tokens = line.tokenize( " " );
+        std::vector<String> fields( tokens.begin(), tokens.end() );
+        if ( fields.size() < 3 )
+            continue;
+
+        const char *key = fields[1].ascii();
+        const char *value = fields[2].ascii();
+
+        if ( fields[0] == "S" && fields.size() == 4 )
+        {
+            _startTime.tv_sec = strtoll( key, NULL, 10 );
+            _startTime.tv_nsec = strtol( value, NULL, 10 );
+            _timedOut = ( atoi( fields[3].ascii() ) != 0 );
+        }
+        else if ( fields[0] == "U" )
+            _unsignedAttributes[(StatisticsUnsignedAttribute)atoi( key )] = strtoul( value, NULL, 10 );
+        else if ( fields[0] == "L" )
+            _longAttributes[(StatisticsLongAttribute)atoi( key )] = strtoull( value, NULL, 10 );
+        else if ( fields[0] == "D" )
+            _doubleAttributes[(StatisticsDoubleAttribute)atoi( key )] = strtod( value, NULL );
+    }
+}
+
 void Statistics::timeout()
 {
     _timedOut = true;
@@ -17,6 +17,7 @@
 #define __Statistics_h__
 
 #include "List.h"
+#include "MString.h"
 #include "Map.h"
 #include "TimeUtils.h"
 
@@ -310,6 +311,21 @@ public:
     void timeout();
     bool hasTimedOut() const;
 
+    /*
+      Fold in the statistics of another run, e.g. of a query that was
+      solved in parallel with this one. Counters and times are added up,
+      all other attributes keep the more extreme value, and the earlier
+      starting time is kept.
+    */
+    void merge( const Statistics &other );
+
+    /*
+      Serialize all the attributes to a string and restore them from
+      one, e.g. to send the statistics between processes
+    */
+    String serialize() const;
+    void deserialize( const String &serialized );
+
     /*
       For debugging purposes
     */
@@ -0,0 +1,128 @@
+/*********************                                                        */
+/*! \file Test_CompressedFile.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** \brief [[ Add one-line brief description here ]]
+ **
+ ** [[ Add lengthier description here ]]
+ **/
+
+#include <cxxtest/TestSuite.h>
+
+#include "CommonError.h"
+#include "CompressedFile.h"
+#include "List.h"
+#include "MString.h"
+#include "MStringf.h"
+#include "MockErrno.h"
+
+#include <cstdio>
+
+class CompressedFileTestSuite : public CxxTest::TestSuite
+{
+public:
+    MockErrno *mockErrno;
+
+    void setUp()
+    {
+        TS_ASSERT( mockErrno = new MockErrno );
+    }
+
+    void tearDown()
+    {
+        TS_ASSERT_THROWS_NOTHING( delete mockErrno );
+    }
+
+    void test_compression_from_file_name()
+    {
+        TS_ASSERT_EQUALS( CompressedFile::compressionFromFileName( "query.ipq.gz" ),
+                          CompressedFile::GZIP );
+        TS_ASSERT_EQUALS( CompressedFile::compressionFromFileName( "query.ipq.zst" ),
+                          CompressedFile::ZSTD );
+        TS_ASSERT_EQUALS( CompressedFile::compressionFromFileName( "query.ipq" ),
+                          CompressedFile::NONE );
+    }
+
+    void test_round_trip()
+    {
+        List<CompressedFile::Compression> compressions;
+        compressions.append( CompressedFile::NONE );
+        if ( CompressedFile::supported( CompressedFile::GZIP ) )
+            compressions.append( CompressedFile::GZIP );
+        if ( CompressedFile::supported( CompressedFile::ZSTD ) )
+            compressions.append( CompressedFile::ZSTD );
+
+        // Enough lines for the stream to span several chunks
+        const unsigned numLines = 100000;
+        for ( const auto &compression : compressions )
+        {
+            String path = Stringf( "CompressedFileTest%u", compression );
+            double values[3] = { 1.5, -2.25, 1e300 };
+
+            {
+                CompressedFile file( path, compression );
+                TS_ASSERT_THROWS_NOTHING( file.open( IFile::MODE_WRITE_TRUNCATE ) );
+                for ( unsigned i = 0; i < numLines; ++i )
+                    file.write( Stringf( "%u,line number %u\n", i, i * i ) );
+                file.write( "last line without a separator" );
+                file.writeBytes( values, sizeof( values ) );
+                TS_ASSERT_THROWS_NOTHING( file.close() );
+            }
+
+            TS_ASSERT_EQUALS( CompressedFile::detectCompression( path ), compression );
+
+            CompressedFile file( path, compression );
+            TS_ASSERT_THROWS_NOTHING( file.open( IFile::MODE_READ ) );
+            bool allLinesMatch = true;
+            for ( unsigned i = 0; i < numLines; ++i )
+                allLinesMatch &= ( file.readLine() == Stringf( "%u,line number %u", i, i * i ) );
+            TS_ASSERT( allLinesMatch );
+
+            String lastLine = "last line without a separator";
+            char lastLineRead[30] = { 0 };
+            TS_ASSERT_EQUALS( file.readBytes( lastLineRead, lastLine.length() ), lastLine.length() );
+            TS_ASSERT_EQUALS( String( lastLineRead ), lastLine );
+
+            double valuesRead[3];
+            TS_ASSERT_EQUALS( file.readBytes( valuesRead, sizeof( valuesRead ) ), sizeof( valuesRead ) );
+            for ( unsigned i = 0; i < 3; ++i )
+                TS_ASSERT_EQUALS( valuesRead[i], values[i] );
+
+            TS_ASSERT_EQUALS( file.readBytes( valuesRead, sizeof( valuesRead ) ), 0U );
+            TS_ASSERT_THROWS_EQUALS( file.readLine(),
+                                     const CommonError &e,
+                                     e.getCode(),
+                                     CommonError::READ_FAILED );
+            file.close();
+
+            std::remove( path.ascii() );
+        }
+    }
+
+    void test_unsupported_compression()
+    {
+        if ( CompressedFile::supported( CompressedFile::ZSTD ) )
+            return;
+
+        CompressedFile file( "CompressedFileTest.zst", CompressedFile::ZSTD );
+        TS_ASSERT_THROWS_EQUALS( file.open( IFile::MODE_WRITE_TRUNCATE ),
+                                 const CommonError &e,
+                                 e.getCode(),
+                                 CommonError::UNSUPPORTED_COMPRESSION );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../../.. "
+// tags-file-name: "../../../TAGS"
+// c-basic-offset: 4
+// End:
+//
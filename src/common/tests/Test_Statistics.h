@@ -0,0 +1,85 @@
+/*********************                                                        */
+/*! \file Test_Statistics.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** \brief [[ Add one-line brief description here ]]
+ **
+ ** [[ Add lengthier description here ]]
+ **/
+
+#include <cxxtest/TestSuite.h>
+
+#include "Statistics.h"
+
+class StatisticsTestSuite : public CxxTest::TestSuite
+{
+public:
+    void test_merge()
+    {
+        Statistics first;
+        first.stampStartingTime();
+        first.setUnsignedAttribute( Statistics::NUM_SPLITS, 3 );
+        first.setUnsignedAttribute( Statistics::MAX_DECISION_LEVEL, 5 );
+        first.setLongAttribute( Statistics::NUM_MAIN_LOOP_ITERATIONS, 10 );
+        first.setDoubleAttribute( Statistics::MAX_DEGRADATION, 0.5 );
+
+        Statistics second;
+        second.stampStartingTime();
+        second.setUnsignedAttribute( Statistics::NUM_SPLITS, 4 );
+        second.setUnsignedAttribute( Statistics::MAX_DECISION_LEVEL, 2 );
+        second.setLongAttribute( Statistics::NUM_MAIN_LOOP_ITERATIONS, 7 );
+        second.setDoubleAttribute( Statistics::MAX_DEGRADATION, 0.25 );
+        second.setDoubleAttribute( Statistics::MIN_COST_OF_PHASE_PATTERN, 1.5 );
+        second.timeout();
+
+        TS_ASSERT_THROWS_NOTHING( first.merge( second ) );
+
+        TS_ASSERT_EQUALS( first.getUnsignedAttribute( Statistics::NUM_SPLITS ), 7U );
+        TS_ASSERT_EQUALS( first.getUnsignedAttribute( Statistics::MAX_DECISION_LEVEL ), 5U );
+        TS_ASSERT_EQUALS( first.getLongAttribute( Statistics::NUM_MAIN_LOOP_ITERATIONS ), 17ULL );
+        TS_ASSERT_EQUALS( first.getDoubleAttribute( Statistics::MAX_DEGRADATION ), 0.5 );
+        TS_ASSERT_EQUALS( first.getDoubleAttribute( Statistics::MIN_COST_OF_PHASE_PATTERN ), 1.5 );
+        TS_ASSERT( first.hasTimedOut() );
+    }
+
+    void test_serialize()
+    {
+        Statistics statistics;
+        statistics.stampStartingTime();
+        statistics.setUnsignedAttribute( Statistics::NUM_PL_CONSTRAINTS, 42 );
+        statistics.setLongAttribute( Statistics::TIME_MAIN_LOOP_MICRO, 12345678901ULL );
+        statistics.setDoubleAttribute( Statistics::CURRENT_DEGRADATION, 0.1 );
+        statistics.timeout();
+
+        Statistics restored;
+        TS_ASSERT_THROWS_NOTHING( restored.deserialize( statistics.serialize() ) );
+
+        TS_ASSERT_EQUALS( restored.getUnsignedAttribute( Statistics::NUM_PL_CONSTRAINTS ), 42U );
+        TS_ASSERT_EQUALS( restored.getLongAttribute( Statistics::TIME_MAIN_LOOP_MICRO ),
+                          12345678901ULL );
+        TS_ASSERT_EQUALS( restored.getDoubleAttribute( Statistics::CURRENT_DEGRADATION ), 0.1 );
+        TS_ASSERT_EQUALS( restored.getDoubleAttribute( Statistics::MIN_COST_OF_PHASE_PATTERN ),
+                          statistics.getDoubleAttribute( Statistics::MIN_COST_OF_PHASE_PATTERN ) );
+        TS_ASSERT( restored.hasTimedOut() );
+
+        // The starting time is restored exactly, so the clock read later counts at least as long
+        TS_ASSERT_EQUALS( restored.serialize(), statistics.serialize() );
+        unsigned long long totalTime = statistics.getTotalTimeInMicro();
+        TS_ASSERT( restored.getTotalTimeInMicro() >= totalTime );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../../.. "
+// tags-file-name: "../../../TAGS"
+// c-basic-offset: 4
+// End:
+//
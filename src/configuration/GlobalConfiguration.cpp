@@ -99,6 +99,9 @@ const GlobalConfiguration::BasisFactorizationType GlobalConfiguration::BASIS_FAC
 const unsigned GlobalConfiguration::POLARITY_CANDIDATES_THRESHOLD = 5;
 
 const unsigned GlobalConfiguration::DNC_DEPTH_THRESHOLD = 5;
+const double GlobalConfiguration::ADAPTIVE_DIVIDE_CONTINUE_PROGRESS = 0.5;
+const unsigned GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_DEPTH = 2;
+const double GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_PROGRESS = 0.05;
 
 const double GlobalConfiguration::MINIMAL_COEFFICIENT_FOR_TIGHTENING = 0.01;
 const double GlobalConfiguration::LEMMA_CERTIFICATION_TOLERANCE = 0.0000001;
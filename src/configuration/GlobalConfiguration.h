@@ -232,6 +232,15 @@ public:
     */
     static const unsigned DNC_DEPTH_THRESHOLD;
 
+    /* In the adaptive SnC divide strategy, a subquery that timed out is solved
+       again without dividing it if at least this fraction of its search tree
+       was explored, and the ReLU-based divider replaces the input-based one
+       for subqueries at least this deep and explored less than this fraction
+    */
+    static const double ADAPTIVE_DIVIDE_CONTINUE_PROGRESS;
+    static const unsigned ADAPTIVE_DIVIDE_SWITCH_DEPTH;
+    static const double ADAPTIVE_DIVIDE_SWITCH_PROGRESS;
+
     /* Minimal coefficient of a variable in a Tableau row, that is used for bound tightening
     */
     static const double MINIMAL_COEFFICIENT_FOR_TIGHTENING;
@@ -59,7 +59,7 @@ void OptionParser::initialize()
           "Prints the version number.")
         ( "input-query",
           boost::program_options::value<std::string>( &((*_stringOptions)[Options::INPUT_QUERY_FILE_PATH]) )->default_value( (*_stringOptions)[Options::INPUT_QUERY_FILE_PATH] ),
-          "Input Query file. When specified, Marabou will solve this instead of the network and property pair." )
+          "Input Query file, in the text or the binary format. When specified, Marabou will solve this instead of the network and property pair." )
         ( "num-workers",
           boost::program_options::value<int>( &(*_intOptions)[Options::NUM_WORKERS] )->default_value( (*_intOptions)[Options::NUM_WORKERS] ),
           "Number of threads to use." )
@@ -91,6 +91,9 @@ void OptionParser::initialize()
         ( "query-dump-file",
           boost::program_options::value<std::string>( &(*_stringOptions)[Options::QUERY_DUMP_FILE] )->default_value( (*_stringOptions)[Options::QUERY_DUMP_FILE] ),
           "Dump the verification query in Marabou's input query format." )
+        ( "binary-query-dump",
+          boost::program_options::bool_switch( &((*_boolOptions)[Options::BINARY_QUERY_DUMP]) )->default_value( (*_boolOptions)[Options::BINARY_QUERY_DUMP] ),
+          "Write the query dump file in the binary input query format. Both formats can be read with --input-query." )
         ( "summary-file",
           boost::program_options::value<std::string>( &((*_stringOptions)[Options::SUMMARY_FILE]) )->default_value( (*_stringOptions)[Options::SUMMARY_FILE] ),
           "Produce a summary file of the run." )
@@ -138,7 +141,7 @@ void OptionParser::initialize()
           "(DeepSoI) The beta parameter in MCMC search.\n" )
         ( "split-strategy",
           boost::program_options::value<std::string>( &((*_stringOptions)[Options::SNC_SPLITTING_STRATEGY]) )->default_value( (*_stringOptions)[Options::SNC_SPLITTING_STRATEGY] ),
-          "(SnC) The splitting strategy." )
+          "(SnC) The splitting strategy (auto/largest-interval/polarity/adaptive)." )
         ( "initial-divides",
           boost::program_options::value<int>( &((*_intOptions)[Options::NUM_INITIAL_DIVIDES]) )->default_value( (*_intOptions)[Options::NUM_INITIAL_DIVIDES] ),
           "(SnC) Number of times to initially bisect the input region." )
@@ -154,6 +157,12 @@ void OptionParser::initialize()
         ( "restore-tree-states",
           boost::program_options::bool_switch( &((*_boolOptions)[Options::RESTORE_TREE_STATES]) )->default_value( (*_boolOptions)[Options::RESTORE_TREE_STATES] ),
           "(SnC) Restore tree states in SnC mode.\n" )
+        ( "snc-export-tree",
+          boost::program_options::value<std::string>( &((*_stringOptions)[Options::SNC_EXPORT_TREE_FILE]) )->default_value( (*_stringOptions)[Options::SNC_EXPORT_TREE_FILE] ),
+          "(SnC) Save the work tree (the regions and whether they were solved) to this file." )
+        ( "snc-import-tree",
+          boost::program_options::value<std::string>( &((*_stringOptions)[Options::SNC_IMPORT_TREE_FILE]) )->default_value( (*_stringOptions)[Options::SNC_IMPORT_TREE_FILE] ),
+          "(SnC) Start from the work tree saved in this file instead of the initial divides." )
         ( "blas-threads",
           boost::program_options::value<int>( &((*_intOptions)[Options::NUM_BLAS_THREADS]) )->default_value( (*_intOptions)[Options::NUM_BLAS_THREADS] ),
           "Number of threads to use for matrix multiplication with OpenBLAS." )
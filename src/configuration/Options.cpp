@@ -52,6 +52,7 @@ void Options::initializeDefaultValues()
     _boolOptions[EXPORT_ASSIGNMENT] = false;
     _boolOptions[DEBUG_ASSIGNMENT] = false;
     _boolOptions[PRODUCE_PROOFS] = false;
+    _boolOptions[BINARY_QUERY_DUMP] = false;
 
     /*
       Int options
@@ -94,6 +95,8 @@ void Options::initializeDefaultValues()
     _stringOptions[SOI_SEARCH_STRATEGY] = "mcmc";
     _stringOptions[SOI_INITIALIZATION_STRATEGY] = "input-assignment";
     _stringOptions[LP_SOLVER] = gurobiEnabled() ? "gurobi" : "native";
+    _stringOptions[SNC_EXPORT_TREE_FILE] = "";
+    _stringOptions[SNC_IMPORT_TREE_FILE] = "";
 }
 
 void Options::parseOptions( int argc, char **argv )
@@ -171,6 +174,8 @@ SnCDivideStrategy Options::getSnCDivideStrategy() const
         return SnCDivideStrategy::Polarity;
     else if ( strategyString == "largest-interval" )
         return SnCDivideStrategy::LargestInterval;
+    else if ( strategyString == "adaptive" )
+        return SnCDivideStrategy::Adaptive;
     else
         return SnCDivideStrategy::Auto;
 }
@@ -76,6 +76,9 @@ public:
 
         // Use different epsilons for comparison at different places
         DYNAMIC_EPS,
+
+        // Write the query dump file in the binary query format
+        BINARY_QUERY_DUMP,
     };
 
     enum IntOptions {
@@ -142,6 +145,11 @@ public:
         // The procedure/solver for solving the LP
         LP_SOLVER,
 
+        // Files to save the SnC work tree to, or to load the initial
+        // partition from
+        SNC_EXPORT_TREE_FILE,
+        SNC_IMPORT_TREE_FILE,
+
     };
 
     /*
@@ -0,0 +1,118 @@
+/*********************                                                        */
+/*! \file AdaptiveDividePolicy.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include "AdaptiveDividePolicy.h"
+#include "Debug.h"
+#include "GlobalConfiguration.h"
+
+#include <algorithm>
+#include <cmath>
+
+AdaptiveDividePolicy::AdaptiveDividePolicy( unsigned numNewSubQueries,
+                                            float timeoutFactor )
+    : _numNewSubQueries( numNewSubQueries > 0 ? numNewSubQueries : 1 )
+    , _timeoutFactor( timeoutFactor )
+{
+}
+
+AdaptiveDividePolicy::Decision AdaptiveDividePolicy::decide
+( const Statistics &statistics, unsigned timeoutInSeconds, unsigned depth,
+  SnCDivideStrategy divideStrategy ) const
+{
+    double progress = estimateProgress( statistics );
+    double totalTime = estimateTotalTimeInSeconds( statistics, timeoutInSeconds );
+
+    Decision decision;
+    if ( progress >= GlobalConfiguration::ADAPTIVE_DIVIDE_CONTINUE_PROGRESS &&
+         totalTime > 0 )
+    {
+        // Solving the subquery again is expected to take less than dividing it
+        decision._action = CONTINUE;
+        decision._timeoutInSeconds = capTimeout( totalTime * _timeoutFactor, depth );
+        return decision;
+    }
+
+    if ( divideStrategy == SnCDivideStrategy::LargestInterval &&
+         depth >= GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_DEPTH &&
+         statistics.getUnsignedAttribute( Statistics::NUM_SPLITS ) > 0 &&
+         progress < GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_PROGRESS )
+        decision._action = SWITCH_STRATEGY;
+    else
+        decision._action = DIVIDE;
+
+    // Each new subquery is expected to need its share of the total time. The
+    // timeout is never shorter than the current one, nor longer than the one
+    // given by the timeout factor
+    double timeout = timeoutInSeconds * _timeoutFactor;
+    if ( totalTime > 0 )
+        timeout = std::max<double>( timeoutInSeconds,
+                                    std::min( timeout, totalTime / _numNewSubQueries *
+                                              _timeoutFactor ) );
+    decision._timeoutInSeconds = capTimeout( timeout, depth );
+    return decision;
+}
+
+double AdaptiveDividePolicy::estimateProgress( const Statistics &statistics )
+{
+    unsigned numPops = statistics.getUnsignedAttribute( Statistics::NUM_POPS );
+    unsigned decisionLevel =
+        statistics.getUnsignedAttribute( Statistics::CURRENT_DECISION_LEVEL );
+    return (double)numPops / ( numPops + decisionLevel + 1 );
+}
+
+double AdaptiveDividePolicy::estimateTotalTimeInSeconds( const Statistics &statistics,
+                                                         double timeSpentInSeconds )
+{
+    unsigned numVisitedTreeStates =
+        statistics.getUnsignedAttribute( Statistics::NUM_VISITED_TREE_STATES );
+    double progress = estimateProgress( statistics );
+    if ( numVisitedTreeStates == 0 || progress == 0 || timeSpentInSeconds <= 0 )
+        return 0;
+
+    double treeStatesPerSecond = numVisitedTreeStates / timeSpentInSeconds;
+    double remainingTreeStates = numVisitedTreeStates * ( 1 - progress ) / progress;
+    return timeSpentInSeconds + remainingTreeStates / treeStatesPerSecond;
+}
+
+String AdaptiveDividePolicy::actionToString( Action action )
+{
+    switch ( action )
+    {
+    case CONTINUE:
+        return "continue";
+    case DIVIDE:
+        return "divide";
+    case SWITCH_STRATEGY:
+        return "switch to ReLU splitting";
+    default:
+        ASSERT( false );
+        return "UNKNOWN (this should never happen)";
+    }
+}
+
+unsigned AdaptiveDividePolicy::capTimeout( double timeoutInSeconds, unsigned depth )
+{
+    if ( depth >= GlobalConfiguration::DNC_DEPTH_THRESHOLD - 1 )
+        return 0;
+    return std::max<unsigned>( 1, (unsigned)std::ceil( timeoutInSeconds ) );
+}
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
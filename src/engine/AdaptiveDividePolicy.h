@@ -0,0 +1,96 @@
+/*********************                                                        */
+/*! \file AdaptiveDividePolicy.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** Decides what a DnC worker does with a subquery that timed out, in the
+ ** adaptive SnC divide strategy. The statistics of the engine estimate how
+ ** much of the search tree of the subquery was explored: a subquery that
+ ** was mostly explored is solved again with a longer timeout instead of
+ ** being divided, the timeout of the new subqueries grows less for
+ ** subqueries that made more progress, and deep subqueries of the input
+ ** splitting that made almost no progress are divided by splitting ReLUs.
+
+**/
+
+#ifndef __AdaptiveDividePolicy_h__
+#define __AdaptiveDividePolicy_h__
+
+#include "MString.h"
+#include "SnCDivideStrategy.h"
+#include "Statistics.h"
+
+class AdaptiveDividePolicy
+{
+public:
+    enum Action {
+        // Solve the same subquery again, with a longer timeout
+        CONTINUE = 0,
+
+        // Divide the subquery with the strategy it was created by
+        DIVIDE = 1,
+
+        // Divide the subquery, and its descendants, by splitting ReLUs
+        SWITCH_STRATEGY = 2,
+    };
+
+    struct Decision
+    {
+        Action _action;
+        unsigned _timeoutInSeconds;
+    };
+
+    AdaptiveDividePolicy( unsigned numNewSubQueries, float timeoutFactor );
+
+    /*
+      Decide what to do with a subquery that timed out, given the statistics
+      of the engine that solved it, its timeout, its depth, and the strategy
+      that its descendants are divided with
+    */
+    Decision decide( const Statistics &statistics, unsigned timeoutInSeconds,
+                     unsigned depth, SnCDivideStrategy divideStrategy ) const;
+
+    /*
+      An optimistic estimate of the fraction of the search tree that was
+      explored. Every pop closes a branch, and at most one branch per
+      decision level of the stack is still open, so at most
+      #pops / ( #pops + decision level + 1 ) of the branches are closed.
+    */
+    static double estimateProgress( const Statistics &statistics );
+
+    /*
+      The time needed to explore the whole search tree, given the time spent
+      so far, assuming that tree states are visited at the same rate. Return
+      0 if no progress was made, i.e., there is no estimate.
+    */
+    static double estimateTotalTimeInSeconds( const Statistics &statistics,
+                                              double timeSpentInSeconds );
+
+    static String actionToString( Action action );
+
+private:
+    unsigned _numNewSubQueries;
+    float _timeoutFactor;
+
+    /*
+      The timeout of a subquery created from one of the given depth. The
+      subqueries at the maximal depth have no timeout.
+    */
+    static unsigned capTimeout( double timeoutInSeconds, unsigned depth );
+};
+
+#endif // __AdaptiveDividePolicy_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -115,13 +115,13 @@ unsigned BoundManager::registerNewVariable()
 
     if (_allocated < _size)
     {
-        double *oldLowerBounds = _upperBounds;
-        double *oldUpperBounds = _lowerBounds;
+        double *oldLowerBounds = _lowerBounds;
+        double *oldUpperBounds = _upperBounds;
+        unsigned oldAllocated = _allocated;
 
-        allocateLocalBounds(2 * _allocated);
-        std::memcpy(_lowerBounds, oldLowerBounds, _allocated);
-        std::memcpy(_upperBounds, oldUpperBounds, _allocated);
-        _allocated *= 2;
+        allocateLocalBounds(2 * oldAllocated);
+        std::memcpy(_lowerBounds, oldLowerBounds, sizeof(double) * oldAllocated);
+        std::memcpy(_upperBounds, oldUpperBounds, sizeof(double) * oldAllocated);
 
         delete[] oldLowerBounds;
         delete[] oldUpperBounds;
@@ -37,14 +37,16 @@
 #include "cblas.h"
 #endif
 
-void DnCManager::dncSolve( WorkerQueue *workload, std::shared_ptr<Engine> engine,
+void DnCManager::dncSolve( WorkStealingQueue *workload, std::shared_ptr<Engine> engine,
                            std::unique_ptr<InputQuery> inputQuery,
                            std::atomic_int &numUnsolvedSubQueries,
                            std::atomic_bool &shouldQuitSolving,
                            unsigned threadId, unsigned onlineDivides,
                            float timeoutFactor, SnCDivideStrategy divideStrategy,
                            bool restoreTreeStates, unsigned verbosity,
-                           unsigned seed, bool parallelDeepSoI )
+                           unsigned seed, bool parallelDeepSoI,
+                           DnCWorkTree *workTree, bool adaptiveDivide,
+                           WorkerUtilization &utilization )
 {
     unsigned cpuId = 0;
     (void) threadId;
@@ -59,11 +61,18 @@ void DnCManager::dncSolve( WorkerQueue *workload, std::shared_ptr<Engine> engine
 
     DnCWorker worker( workload, engine, std::ref( numUnsolvedSubQueries ),
                       std::ref( shouldQuitSolving ), threadId, onlineDivides,
-                      timeoutFactor, divideStrategy, verbosity, parallelDeepSoI );
+                      timeoutFactor, divideStrategy, verbosity, parallelDeepSoI,
+                      workTree, adaptiveDivide );
+    struct timespec startTime = TimeUtils::sampleMicro();
     while ( !shouldQuitSolving.load() )
     {
         worker.popOneSubQueryAndSolve( restoreTreeStates );
     }
+
+    utilization._busyTimeInMicroSeconds = worker.getBusyTimeInMicroSeconds();
+    utilization._totalTimeInMicroSeconds =
+        TimeUtils::timePassed( startTime, TimeUtils::sampleMicro() );
+    utilization._numSolvedSubQueries = worker.getNumSolvedSubQueries();
 }
 
 DnCManager::DnCManager( InputQuery *inputQuery )
@@ -76,7 +85,11 @@ DnCManager::DnCManager( InputQuery *inputQuery )
     , _runParallelDeepSoI( !Options::get()->getBool( Options::NO_PARALLEL_DEEPSOI ) )
 {
     SnCDivideStrategy sncSplittingStrategy = Options::get()->getSnCDivideStrategy();
-    if ( sncSplittingStrategy == SnCDivideStrategy::Auto )
+
+    // The adaptive strategy starts from the strategy that would be picked
+    // automatically, and changes it in the workers
+    _adaptiveDivide = ( sncSplittingStrategy == SnCDivideStrategy::Adaptive );
+    if ( sncSplittingStrategy == SnCDivideStrategy::Auto || _adaptiveDivide )
     {
         DNC_MANAGER_LOG( Stringf( "Deciding splitting strategy automatically...\n" ).ascii() );
         if ( inputQuery->getNumInputVariables() <
@@ -130,6 +143,11 @@ void DnCManager::solve()
 
     unsigned numWorkers = Options::get()->getInt( Options::NUM_WORKERS );
 
+    // The work tree is only kept when the input region is partitioned
+    if ( !_runParallelDeepSoI &&
+         Options::get()->getString( Options::SNC_EXPORT_TREE_FILE ) != "" )
+        _workTree = std::unique_ptr<DnCWorkTree>( new DnCWorkTree );
+
 #ifdef ENABLE_OPENBLAS
     // When preprocess the input query with SBT, we leverage multi-threading.
     openblas_set_num_threads( numWorkers );
@@ -139,9 +157,20 @@ void DnCManager::solve()
     if ( !createEngines( numWorkers ) )
     {
         _exitCode = DnCManager::UNSAT;
+        if ( _workTree )
+        {
+            // The whole input region is unsat
+            DnCWorkTree::Region region;
+            region._solved = true;
+            _workTree->addRegion( region );
+            exportWorkTree();
+        }
         return;
     }
 
+    if ( _workTree || Options::get()->getString( Options::SNC_IMPORT_TREE_FILE ) != "" )
+        storeVariableMaps();
+
 #ifdef ENABLE_OPENBLAS
     // Now each worker occupies one thread. So SBT performed during the search
     // will be single-threaded.
@@ -155,13 +184,16 @@ void DnCManager::solve()
 
     // Partition the input query into initial subqueries, and place these
     // queries in the queue
-    _workload = new WorkerQueue( 0 );
+    _workload = new WorkStealingQueue( numWorkers );
     if ( !_workload )
         throw MarabouError( MarabouError::ALLOCATION_FAILED, "DnCManager::workload" );
 
     SubQueries subQueries;
     if ( !_runParallelDeepSoI )
-        initialDivide( subQueries );
+    {
+        if ( !importWorkTree( subQueries ) )
+            initialDivide( subQueries );
+    }
     else
     {
         for ( unsigned i = 0; i < numWorkers; ++i )
@@ -178,13 +210,20 @@ void DnCManager::solve()
         }
     }
 
+    // All the regions of an imported work tree may be unsat already
+    if ( subQueries.empty() )
+    {
+        _exitCode = DnCManager::UNSAT;
+        exportWorkTree();
+        return;
+    }
+
     // Create objects shared across workers
     _numUnsolvedSubQueries = _runParallelDeepSoI ? 1 : subQueries.size();
     std::atomic_bool shouldQuitSolving( false );
-    WorkerQueue *workload = new WorkerQueue( 0 );
     for ( auto &subQuery : subQueries )
     {
-        if ( !workload->push( subQuery ) )
+        if ( !_workload->push( subQuery ) )
         {
             // This should never happen
             ASSERT( false );
@@ -200,6 +239,7 @@ void DnCManager::solve()
         ( new InputQuery( *( _baseEngine->getInputQuery() ) ) );
 
     // Spawn threads and start solving
+    _workerUtilizations = Vector<WorkerUtilization>( numWorkers );
     std::list<std::thread> threads;
     for ( unsigned threadId = 0; threadId < numWorkers; ++threadId )
     {
@@ -209,7 +249,7 @@ void DnCManager::solve()
             inputQuery = std::unique_ptr<InputQuery>
                 ( new InputQuery( *( baseInputQuery ) ) );
 
-        threads.push_back( std::thread( dncSolve, workload, _engines[ threadId ],
+        threads.push_back( std::thread( dncSolve, _workload, _engines[ threadId ],
                                         threadId != 0 ? std::move( inputQuery ) : nullptr,
                                         std::ref( _numUnsolvedSubQueries ),
                                         std::ref( shouldQuitSolving ),
@@ -217,7 +257,9 @@ void DnCManager::solve()
                                         timeoutFactor, _sncSplittingStrategy,
                                         restoreTreeStates, _verbosity,
                                         _runParallelDeepSoI ? seed + threadId : seed,
-                                        _runParallelDeepSoI
+                                        _runParallelDeepSoI,
+                                        _workTree.get(), _adaptiveDivide,
+                                        std::ref( _workerUtilizations[threadId] )
                                         ) );
     }
 
@@ -241,7 +283,12 @@ void DnCManager::solve()
     for ( auto &thread : threads )
         thread.join();
 
+    for ( unsigned threadId = 0; threadId < numWorkers; ++threadId )
+        _workerUtilizations[threadId]._numStolenSubQueries =
+            _workload->getNumberOfSteals( threadId );
+
     updateDnCExitCode();
+    exportWorkTree();
     return;
 }
 
@@ -412,6 +459,27 @@ void DnCManager::printResult()
     default:
         ASSERT( false );
     }
+
+    if ( !_workerUtilizations.empty() )
+    {
+        printf( "\nWorker utilization:\n" );
+        for ( unsigned i = 0; i < _workerUtilizations.size(); ++i )
+        {
+            const WorkerUtilization &utilization = _workerUtilizations[i];
+            printf( "\tWorker %u: %.2f%% busy (%.2f of %.2f seconds), "
+                    "%u subqueries, %u stolen\n", i,
+                    utilization.getUtilization() * 100,
+                    utilization._busyTimeInMicroSeconds / 1000000.0,
+                    utilization._totalTimeInMicroSeconds / 1000000.0,
+                    utilization._numSolvedSubQueries,
+                    utilization._numStolenSubQueries );
+        }
+    }
+}
+
+const Vector<DnCManager::WorkerUtilization> &DnCManager::getWorkerUtilizations() const
+{
+    return _workerUtilizations;
 }
 
 bool DnCManager::createEngines( unsigned numberOfEngines )
@@ -474,6 +542,300 @@ void DnCManager::initialDivide( SubQueries &subQueries )
                                     *split, initialTimeout, subQueries );
 }
 
+bool DnCManager::importWorkTree( SubQueries &subQueries )
+{
+    String fileName = Options::get()->getString( Options::SNC_IMPORT_TREE_FILE );
+    if ( fileName == "" )
+        return false;
+
+    DnCWorkTree tree;
+    tree.loadTree( fileName );
+    if ( tree.getRegions().empty() ||
+         tree.getNumberOfVariables() != _baseInputQuery->getNumberOfVariables() )
+    {
+        DNC_MANAGER_LOG( "Work tree is empty or of a different query, ignoring it" );
+        return false;
+    }
+
+    // Regions that were unsat stay unsat only if the query is more restrictive
+    bool keepSolvedRegions = tree.isRestrictedBy( *_baseInputQuery );
+    DNC_MANAGER_LOG( Stringf( "Importing %u regions, %s the solved ones",
+                              tree.getRegions().size(),
+                              keepSolvedRegions ? "skipping" : "re-solving" ).ascii() );
+
+    // As in the initial divide, the largest-interval divider expects the
+    // split of a subquery to bound each input variable
+    PiecewiseLinearCaseSplit inputRegion;
+    if ( _sncSplittingStrategy != SnCDivideStrategy::Polarity )
+    {
+        InputQuery *inputQuery = _baseEngine->getInputQuery();
+        for ( const auto &variable : _baseEngine->getInputVariables() )
+        {
+            inputRegion.storeBoundTightening
+                ( Tightening( variable, inputQuery->getLowerBound( variable ),
+                              Tightening::LB ) );
+            inputRegion.storeBoundTightening
+                ( Tightening( variable, inputQuery->getUpperBound( variable ),
+                              Tightening::UB ) );
+        }
+    }
+
+    unsigned numSkippedRegions = 0;
+    for ( const auto &region : tree.getRegions() )
+    {
+        PiecewiseLinearCaseSplit split = inputRegion;
+        if ( !toPreprocessedSplit( region._split, split ) )
+            // The region is infeasible for this query
+            continue;
+
+        if ( region._solved && keepSolvedRegions )
+        {
+            ++numSkippedRegions;
+            if ( _workTree )
+            {
+                DnCWorkTree::Region solvedRegion = region;
+                solvedRegion._split = split;
+                _workTree->addRegion( solvedRegion );
+            }
+            continue;
+        }
+
+        SubQuery *subQuery = new SubQuery;
+        subQuery->_queryId = region._queryId;
+        subQuery->_split = std::unique_ptr<PiecewiseLinearCaseSplit>
+            ( new PiecewiseLinearCaseSplit( split ) );
+        subQuery->_timeoutInSeconds = region._timeoutInSeconds;
+        subQuery->_depth = region._depth;
+        subQueries.append( subQuery );
+    }
+
+    if ( _verbosity > 0 )
+    {
+        printf( "Imported %u regions from the work tree, skipped %u solved ones\n",
+                tree.getRegions().size(), numSkippedRegions );
+        fflush( stdout );
+    }
+
+    return true;
+}
+
+void DnCManager::exportWorkTree()
+{
+    if ( !_workTree )
+        return;
+
+    DnCWorkTree tree;
+    tree.storeQuery( *_baseInputQuery );
+
+    // The subqueries left in the queue were not solved
+    SubQuery *subQuery = NULL;
+    while ( _workload && _workload->pop( subQuery ) )
+    {
+        DnCWorkTree::Region region;
+        region._queryId = subQuery->_queryId;
+        region._split = *subQuery->_split;
+        region._depth = subQuery->_depth;
+        region._timeoutInSeconds = subQuery->_timeoutInSeconds;
+        _workTree->addRegion( region );
+        delete subQuery;
+    }
+
+    for ( const auto &region : _workTree->getRegions() )
+    {
+        DnCWorkTree::Region originalRegion = region;
+        originalRegion._split = PiecewiseLinearCaseSplit();
+
+        // A region that is only known up to the dropped tightenings is not
+        // known to be unsat
+        if ( !toOriginalSplit( region._split, originalRegion._split ) )
+            originalRegion._solved = false;
+        tree.addRegion( originalRegion );
+    }
+
+    tree.saveTree( Options::get()->getString( Options::SNC_EXPORT_TREE_FILE ) );
+}
+
+void DnCManager::storeVariableMaps()
+{
+    _preprocessedToOriginal.clear();
+    _auxiliaryEquations.clear();
+
+    InputQuery *preprocessedQuery = _baseEngine->getInputQuery();
+    const Preprocessor *preprocessor = _baseEngine->preprocessingEnabled() ?
+        _baseEngine->getPreprocessor() : NULL;
+    for ( unsigned i = 0; i < _baseInputQuery->getNumberOfVariables(); ++i )
+    {
+        unsigned variable = i;
+        if ( preprocessor )
+        {
+            while ( preprocessor->variableIsMerged( variable ) )
+                variable = preprocessor->getMergedIndex( variable );
+            if ( preprocessor->variableIsFixed( variable ) )
+                continue;
+            variable = preprocessor->getNewIndex( variable );
+        }
+        if ( !_preprocessedToOriginal.exists( variable ) )
+            _preprocessedToOriginal[variable] = i;
+    }
+
+    // The remaining variables were added by the preprocessor, each in one
+    // equation
+    for ( const auto &equation : preprocessedQuery->getEquations() )
+    {
+        for ( const auto &addend : equation._addends )
+        {
+            if ( !_preprocessedToOriginal.exists( addend._variable ) )
+                _auxiliaryEquations[addend._variable] = equation;
+        }
+    }
+}
+
+bool DnCManager::toOriginalSplit( const PiecewiseLinearCaseSplit &split,
+                                  PiecewiseLinearCaseSplit &originalSplit ) const
+{
+    const InputQuery *preprocessedQuery = _baseEngine->getInputQuery();
+    bool exact = true;
+
+    auto toOriginalEquation = [&]( const Equation &equation, Equation &originalEquation )
+    {
+        originalEquation = Equation( equation._type );
+        originalEquation.setScalar( equation._scalar );
+        for ( const auto &addend : equation._addends )
+        {
+            if ( !_preprocessedToOriginal.exists( addend._variable ) )
+                return false;
+            originalEquation.addAddend( addend._coefficient,
+                                        _preprocessedToOriginal[addend._variable] );
+        }
+        return true;
+    };
+
+    for ( const auto &bound : split.getBoundTightenings() )
+    {
+        unsigned variable = bound._variable;
+
+        // Skip the bounds that do not divide the preprocessed query
+        if ( ( bound._type == Tightening::LB &&
+               FloatUtils::lte( bound._value, preprocessedQuery->getLowerBound( variable ) ) ) ||
+             ( bound._type == Tightening::UB &&
+               FloatUtils::gte( bound._value, preprocessedQuery->getUpperBound( variable ) ) ) )
+            continue;
+
+        if ( _preprocessedToOriginal.exists( variable ) )
+        {
+            originalSplit.storeBoundTightening
+                ( Tightening( _preprocessedToOriginal[variable], bound._value, bound._type ) );
+            continue;
+        }
+
+        if ( !_auxiliaryEquations.exists( variable ) )
+        {
+            exact = false;
+            continue;
+        }
+
+        /*
+          The auxiliary variable is defined by an equation
+              sum + c * aux = scalar
+          so the bound aux <= u becomes sum >= scalar - c * u if c is
+          positive, and sum <= scalar - c * u otherwise. Lower bounds
+          are translated in the same way.
+        */
+        const Equation &definition = _auxiliaryEquations[variable];
+        Equation sum;
+        double coefficient = 0;
+        for ( const auto &addend : definition._addends )
+        {
+            if ( addend._variable == variable )
+                coefficient += addend._coefficient;
+            else
+                sum.addAddend( addend._coefficient, addend._variable );
+        }
+        bool isUpperBound = ( bound._type == Tightening::UB );
+        sum._type = ( ( coefficient > 0 ) == isUpperBound ) ? Equation::GE : Equation::LE;
+        sum.setScalar( definition._scalar - coefficient * bound._value );
+
+        Equation originalEquation;
+        if ( FloatUtils::isZero( coefficient ) || !toOriginalEquation( sum, originalEquation ) )
+            exact = false;
+        else
+            originalSplit.addEquation( originalEquation );
+    }
+
+    for ( const auto &equation : split.getEquations() )
+    {
+        Equation originalEquation;
+        if ( toOriginalEquation( equation, originalEquation ) )
+            originalSplit.addEquation( originalEquation );
+        else
+            exact = false;
+    }
+
+    return exact;
+}
+
+bool DnCManager::toPreprocessedSplit( const PiecewiseLinearCaseSplit &originalSplit,
+                                      PiecewiseLinearCaseSplit &split ) const
+{
+    const Preprocessor *preprocessor = _baseEngine->preprocessingEnabled() ?
+        _baseEngine->getPreprocessor() : NULL;
+
+    // Follow the merges, and return true if the variable was fixed
+    auto toPreprocessedVariable = [&]( unsigned &variable, double &value )
+    {
+        if ( !preprocessor )
+            return false;
+        while ( preprocessor->variableIsMerged( variable ) )
+            variable = preprocessor->getMergedIndex( variable );
+        if ( preprocessor->variableIsFixed( variable ) )
+        {
+            value = preprocessor->getFixedValue( variable );
+            return true;
+        }
+        variable = preprocessor->getNewIndex( variable );
+        return false;
+    };
+
+    for ( const auto &bound : originalSplit.getBoundTightenings() )
+    {
+        unsigned variable = bound._variable;
+        double value = 0;
+        if ( toPreprocessedVariable( variable, value ) )
+        {
+            if ( ( bound._type == Tightening::LB && FloatUtils::lt( value, bound._value ) ) ||
+                 ( bound._type == Tightening::UB && FloatUtils::gt( value, bound._value ) ) )
+                return false;
+        }
+        else
+            split.storeBoundTightening( Tightening( variable, bound._value, bound._type ) );
+    }
+
+    for ( const auto &originalEquation : originalSplit.getEquations() )
+    {
+        Equation equation( originalEquation._type );
+        double scalar = originalEquation._scalar;
+        for ( const auto &addend : originalEquation._addends )
+        {
+            unsigned variable = addend._variable;
+            double value = 0;
+            if ( toPreprocessedVariable( variable, value ) )
+                scalar -= addend._coefficient * value;
+            else
+                equation.addAddend( addend._coefficient, variable );
+        }
+        equation.setScalar( scalar );
+
+        if ( !equation._addends.empty() )
+            split.addEquation( equation );
+        else if ( ( equation._type == Equation::EQ && !FloatUtils::isZero( scalar ) ) ||
+                  ( equation._type == Equation::GE && FloatUtils::isPositive( scalar ) ) ||
+                  ( equation._type == Equation::LE && FloatUtils::isNegative( scalar ) ) )
+            return false;
+    }
+
+    return true;
+}
+
 void DnCManager::updateTimeoutReached( timespec startTime, unsigned long long
                                        timeoutInMicroSeconds )
 {
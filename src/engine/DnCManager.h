@@ -17,9 +17,11 @@
 #define __DnCManager_h__
 
 #include "SnCDivideStrategy.h"
+#include "DnCWorkTree.h"
 #include "Engine.h"
 #include "InputQuery.h"
 #include "SubQuery.h"
+#include "WorkStealingQueue.h"
 #include "Vector.h"
 
 #include <atomic>
@@ -41,6 +43,33 @@ public:
             NOT_DONE = 999,
         };
 
+    /*
+      How a worker spent the run: the time it was busy handling subqueries
+      out of the time it ran, the number of subqueries it handled, and how
+      many of those it stole from the other workers
+    */
+    struct WorkerUtilization
+    {
+        WorkerUtilization()
+            : _busyTimeInMicroSeconds( 0 )
+            , _totalTimeInMicroSeconds( 0 )
+            , _numSolvedSubQueries( 0 )
+            , _numStolenSubQueries( 0 )
+        {
+        }
+
+        double getUtilization() const
+        {
+            return _totalTimeInMicroSeconds == 0 ? 0 :
+                (double)_busyTimeInMicroSeconds / _totalTimeInMicroSeconds;
+        }
+
+        unsigned long long _busyTimeInMicroSeconds;
+        unsigned long long _totalTimeInMicroSeconds;
+        unsigned _numSolvedSubQueries;
+        unsigned _numStolenSubQueries;
+    };
+
     DnCManager( InputQuery *inputQuery );
 
     ~DnCManager();
@@ -72,18 +101,25 @@ public:
     */
     void getSolution( std::map<int, double> &ret, InputQuery &inputQuery );
 
+    /*
+      The utilization of each worker in the last run
+    */
+    const Vector<WorkerUtilization> &getWorkerUtilizations() const;
+
 private:
     /*
       Create and run a DnCWorker
     */
-    static void dncSolve( WorkerQueue *workload, std::shared_ptr<Engine> engine,
+    static void dncSolve( WorkStealingQueue *workload, std::shared_ptr<Engine> engine,
                           std::unique_ptr<InputQuery> inputQuery,
                           std::atomic_int &numUnsolvedSubQueries,
                           std::atomic_bool &shouldQuitSolving,
                           unsigned threadId, unsigned onlineDivides,
                           float timeoutFactor, SnCDivideStrategy divideStrategy,
                           bool restoreTreeStates, unsigned verbosity,
-                          unsigned seed, bool parallelDeepSoI );
+                          unsigned seed, bool parallelDeepSoI,
+                          DnCWorkTree *workTree, bool adaptiveDivide,
+                          WorkerUtilization &utilization );
 
     /*
       Create the base engine from the network and property files,
@@ -97,6 +133,37 @@ private:
     */
     void initialDivide( SubQueries &subQueries );
 
+    /*
+      Invoked in SnC mode instead of the initial divide, if a work tree is
+      imported. Store the regions of the tree that are not known to be
+      unsat in subqueries, and return false if the tree cannot be used.
+    */
+    bool importWorkTree( SubQueries &subQueries );
+
+    /*
+      Save the regions solved and left unsolved by the workers, in terms
+      of the variables of the input query, if the work tree is exported
+    */
+    void exportWorkTree();
+
+    /*
+      Store how the variables of the preprocessed query relate to those of
+      the input query
+    */
+    void storeVariableMaps();
+
+    /*
+      Translate a split between the variables of the input query and those
+      of the preprocessed query. toOriginalSplit returns false if some
+      tightening could not be translated and was dropped, and
+      toPreprocessedSplit returns false if the split is infeasible in the
+      preprocessed query.
+    */
+    bool toOriginalSplit( const PiecewiseLinearCaseSplit &split,
+                          PiecewiseLinearCaseSplit &originalSplit ) const;
+    bool toPreprocessedSplit( const PiecewiseLinearCaseSplit &originalSplit,
+                              PiecewiseLinearCaseSplit &split ) const;
+
     /*
       Read the exitCode of the engine of each thread, and update the manager's
       exitCode.
@@ -136,9 +203,14 @@ private:
     DnCExitCode _exitCode;
 
     /*
-      Set of subQueries to be solved by workers
+      Set of subQueries to be solved by workers, in one deque per worker
     */
-    WorkerQueue *_workload;
+    WorkStealingQueue *_workload;
+
+    /*
+      The utilization of each worker
+    */
+    Vector<WorkerUtilization> _workerUtilizations;
 
     /*
       Whether the timeout has been reached
@@ -164,6 +236,26 @@ private:
       The strategy for dividing a query
     */
     SnCDivideStrategy _sncSplittingStrategy;
+
+    /*
+      Whether the workers decide how to handle each subquery that timed out
+      from its statistics, i.e., the adaptive strategy is used
+    */
+    bool _adaptiveDivide;
+
+    /*
+      The regions recorded by the workers, in terms of the variables of the
+      preprocessed query. NULL if the work tree is not exported.
+    */
+    std::unique_ptr<DnCWorkTree> _workTree;
+
+    /*
+      The variable of the input query for each variable of the preprocessed
+      query, and the equation defining each auxiliary variable that the
+      preprocessor added
+    */
+    Map<unsigned, unsigned> _preprocessedToOriginal;
+    Map<unsigned, Equation> _auxiliaryEquations;
 };
 
 #endif // __DnCManager_h__
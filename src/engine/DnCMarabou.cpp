@@ -94,7 +94,8 @@ void DnCMarabou::run()
     String queryDumpFilePath = Options::get()->getString( Options::QUERY_DUMP_FILE );
     if ( queryDumpFilePath.length() > 0 )
     {
-        _inputQuery.saveQuery( queryDumpFilePath );
+        _inputQuery.saveQuery( queryDumpFilePath,
+                               Options::get()->getBool( Options::BINARY_QUERY_DUMP ) );
         printf( "\nInput query successfully dumped to file\n" );
         exit( 0 );
     }
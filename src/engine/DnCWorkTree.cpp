@@ -0,0 +1,272 @@
+/*********************                                                        */
+/*! \file DnCWorkTree.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include "DnCWorkTree.h"
+#include "AutoFile.h"
+#include "FloatUtils.h"
+#include "MStringf.h"
+#include "MarabouError.h"
+#include "Set.h"
+
+DnCWorkTree::DnCWorkTree()
+    : _numberOfVariables( 0 )
+{
+}
+
+void DnCWorkTree::storeQuery( const InputQuery &inputQuery )
+{
+    _numberOfVariables = inputQuery.getNumberOfVariables();
+    _constraints = serializeConstraints( inputQuery );
+    _lowerBounds = inputQuery.getLowerBounds();
+    _upperBounds = inputQuery.getUpperBounds();
+    _equations = inputQuery.getEquations();
+}
+
+bool DnCWorkTree::isRestrictedBy( const InputQuery &inputQuery ) const
+{
+    if ( inputQuery.getNumberOfVariables() != _numberOfVariables ||
+         serializeConstraints( inputQuery ) != _constraints )
+        return false;
+
+    for ( const auto &bound : _lowerBounds )
+    {
+        if ( FloatUtils::lt( inputQuery.getLowerBound( bound.first ), bound.second ) )
+            return false;
+    }
+    for ( const auto &bound : _upperBounds )
+    {
+        if ( FloatUtils::gt( inputQuery.getUpperBound( bound.first ), bound.second ) )
+            return false;
+    }
+
+    Set<String> equations;
+    for ( const auto &equation : inputQuery.getEquations() )
+        equations.insert( equationToString( equation ) );
+    for ( const auto &equation : _equations )
+    {
+        if ( !equations.exists( equationToString( equation ) ) )
+            return false;
+    }
+
+    return true;
+}
+
+void DnCWorkTree::addRegion( const Region &region )
+{
+    std::lock_guard<std::mutex> lock( _regionsMutex );
+    _regions.append( region );
+}
+
+const List<DnCWorkTree::Region> &DnCWorkTree::getRegions() const
+{
+    return _regions;
+}
+
+unsigned DnCWorkTree::getNumberOfVariables() const
+{
+    return _numberOfVariables;
+}
+
+void DnCWorkTree::saveTree( const String &fileName ) const
+{
+    AutoFile treeFile( fileName );
+    treeFile->open( IFile::MODE_WRITE_TRUNCATE );
+
+    // The query that the tree partitions
+    treeFile->write( Stringf( "%u\n", _numberOfVariables ) );
+    unsigned numConstraints = 0;
+    for ( const auto &constraint : _constraints )
+        numConstraints += constraint.second;
+    treeFile->write( Stringf( "%u\n", numConstraints ) );
+    for ( const auto &constraint : _constraints )
+    {
+        for ( unsigned i = 0; i < constraint.second; ++i )
+            treeFile->write( constraint.first + "\n" );
+    }
+
+    treeFile->write( Stringf( "%u\n", _lowerBounds.size() ) );
+    for ( const auto &bound : _lowerBounds )
+        treeFile->write( Stringf( "%u,%.17g\n", bound.first, bound.second ) );
+
+    treeFile->write( Stringf( "%u\n", _upperBounds.size() ) );
+    for ( const auto &bound : _upperBounds )
+        treeFile->write( Stringf( "%u,%.17g\n", bound.first, bound.second ) );
+
+    treeFile->write( Stringf( "%u\n", _equations.size() ) );
+    for ( const auto &equation : _equations )
+        treeFile->write( equationToString( equation ) + "\n" );
+
+    // The regions: solved,depth,timeout,#tightenings,#equations[,queryId]
+    treeFile->write( Stringf( "%u\n", _regions.size() ) );
+    for ( const auto &region : _regions )
+    {
+        const List<Tightening> &bounds = region._split.getBoundTightenings();
+        const List<Equation> &equations = region._split.getEquations();
+        treeFile->write( Stringf( "%u,%u,%u,%u,%u,", region._solved ? 1 : 0,
+                                  region._depth, region._timeoutInSeconds,
+                                  bounds.size(), equations.size() ) );
+        treeFile->write( region._queryId + "\n" );
+
+        for ( const auto &bound : bounds )
+            treeFile->write( Stringf( "%u,%c,%.17g\n", bound._variable,
+                                      bound._type == Tightening::LB ? 'l' : 'u',
+                                      bound._value ) );
+        for ( const auto &equation : equations )
+            treeFile->write( equationToString( equation ) + "\n" );
+    }
+
+    treeFile->close();
+}
+
+void DnCWorkTree::loadTree( const String &fileName )
+{
+    if ( !IFile::exists( fileName ) )
+        throw MarabouError( MarabouError::FILE_DOES_NOT_EXIST,
+                            Stringf( "File %s not found.\n", fileName.ascii() ).ascii() );
+
+    AutoFile treeFile( fileName );
+    treeFile->open( IFile::MODE_READ );
+
+    _numberOfVariables = atoi( treeFile->readLine().trim().ascii() );
+
+    _constraints.clear();
+    unsigned numConstraints = atoi( treeFile->readLine().trim().ascii() );
+    for ( unsigned i = 0; i < numConstraints; ++i )
+    {
+        String constraint = treeFile->readLine().trim();
+        if ( constraint.length() == 0 )
+            throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid constraint" );
+        addConstraint( _constraints, constraint );
+    }
+
+    _lowerBounds.clear();
+    unsigned numLowerBounds = atoi( treeFile->readLine().trim().ascii() );
+    for ( unsigned i = 0; i < numLowerBounds; ++i )
+    {
+        List<String> tokens = treeFile->readLine().trim().tokenize( "," );
+        if ( tokens.size() != 2 )
+            throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid bound" );
+        _lowerBounds[atoi( tokens.front().ascii() )] = atof( tokens.back().ascii() );
+    }
+
+    _upperBounds.clear();
+    unsigned numUpperBounds = atoi( treeFile->readLine().trim().ascii() );
+    for ( unsigned i = 0; i < numUpperBounds; ++i )
+    {
+        List<String> tokens = treeFile->readLine().trim().tokenize( "," );
+        if ( tokens.size() != 2 )
+            throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid bound" );
+        _upperBounds[atoi( tokens.front().ascii() )] = atof( tokens.back().ascii() );
+    }
+
+    _equations.clear();
+    unsigned numEquations = atoi( treeFile->readLine().trim().ascii() );
+    for ( unsigned i = 0; i < numEquations; ++i )
+        _equations.append( stringToEquation( treeFile->readLine().trim() ) );
+
+    _regions.clear();
+    unsigned numRegions = atoi( treeFile->readLine().trim().ascii() );
+    for ( unsigned i = 0; i < numRegions; ++i )
+    {
+        List<String> tokens = treeFile->readLine().trim().tokenize( "," );
+        if ( tokens.size() < 5 || tokens.size() > 6 )
+            throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid region" );
+
+        Region region;
+        auto it = tokens.begin();
+        region._solved = atoi( it->ascii() ) != 0;
+        region._depth = atoi( ( ++it )->ascii() );
+        region._timeoutInSeconds = atoi( ( ++it )->ascii() );
+        unsigned numTightenings = atoi( ( ++it )->ascii() );
+        unsigned numSplitEquations = atoi( ( ++it )->ascii() );
+        if ( ++it != tokens.end() )
+            region._queryId = *it;
+
+        for ( unsigned j = 0; j < numTightenings; ++j )
+        {
+            List<String> boundTokens = treeFile->readLine().trim().tokenize( "," );
+            if ( boundTokens.size() != 3 )
+                throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid tightening" );
+            auto boundIt = boundTokens.begin();
+            unsigned variable = atoi( boundIt->ascii() );
+            Tightening::BoundType type = ( *( ++boundIt ) == "l" ) ? Tightening::LB : Tightening::UB;
+            double value = atof( ( ++boundIt )->ascii() );
+            region._split.storeBoundTightening( Tightening( variable, value, type ) );
+        }
+        for ( unsigned j = 0; j < numSplitEquations; ++j )
+            region._split.addEquation( stringToEquation( treeFile->readLine().trim() ) );
+
+        _regions.append( region );
+    }
+
+    treeFile->close();
+}
+
+Map<String, unsigned> DnCWorkTree::serializeConstraints( const InputQuery &inputQuery )
+{
+    Map<String, unsigned> constraints;
+    for ( const auto &constraint : inputQuery.getPiecewiseLinearConstraints() )
+        addConstraint( constraints, constraint->serializeToString() );
+    for ( const auto &constraint : inputQuery.getTranscendentalConstraints() )
+        addConstraint( constraints, constraint->serializeToString() );
+    return constraints;
+}
+
+void DnCWorkTree::addConstraint( Map<String, unsigned> &constraints, const String &constraint )
+{
+    if ( constraints.exists( constraint ) )
+        ++constraints[constraint];
+    else
+        constraints[constraint] = 1;
+}
+
+String DnCWorkTree::equationToString( const Equation &equation )
+{
+    // type,scalar,variable,coefficient,variable,coefficient,...
+    String result = Stringf( "%d,%.17g", equation._type, equation._scalar );
+    for ( const auto &addend : equation._addends )
+        result += Stringf( ",%u,%.17g", addend._variable, addend._coefficient );
+    return result;
+}
+
+Equation DnCWorkTree::stringToEquation( const String &line )
+{
+    List<String> tokens = line.tokenize( "," );
+    if ( tokens.size() < 2 || tokens.size() % 2 != 0 )
+        throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid equation" );
+
+    auto it = tokens.begin();
+    int type = atoi( it->ascii() );
+    if ( type != Equation::EQ && type != Equation::GE && type != Equation::LE )
+        throw MarabouError( MarabouError::INVALID_DNC_TREE_FILE, "Invalid equation type" );
+
+    Equation equation( (Equation::EquationType)type );
+    equation.setScalar( atof( ( ++it )->ascii() ) );
+    while ( ++it != tokens.end() )
+    {
+        unsigned variable = atoi( it->ascii() );
+        double coefficient = atof( ( ++it )->ascii() );
+        equation.addAddend( coefficient, variable );
+    }
+    return equation;
+}
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -0,0 +1,113 @@
+/*********************                                                        */
+/*! \file DnCWorkTree.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** The work tree of a split-and-conquer run: the regions that the input
+ ** query was divided into, and whether each of them was proven unsat.
+ ** A work tree can be saved once the run is over and loaded as the
+ ** initial partition of a related query.
+
+**/
+
+#ifndef __DnCWorkTree_h__
+#define __DnCWorkTree_h__
+
+#include "IFile.h"
+#include "InputQuery.h"
+#include "List.h"
+#include "MString.h"
+#include "Map.h"
+#include "PiecewiseLinearCaseSplit.h"
+
+#include <mutex>
+
+class DnCWorkTree
+{
+public:
+    /*
+      A leaf of the work tree
+    */
+    struct Region
+    {
+        Region()
+            : _depth( 0 )
+            , _timeoutInSeconds( 0 )
+            , _solved( false )
+        {
+        }
+
+        String _queryId;
+        PiecewiseLinearCaseSplit _split;
+        unsigned _depth;
+        unsigned _timeoutInSeconds;
+        bool _solved;
+    };
+
+    DnCWorkTree();
+
+    /*
+      Store the variables, non-linear constraints, bounds and equations
+      of the query that the tree partitions
+    */
+    void storeQuery( const InputQuery &inputQuery );
+
+    /*
+      Return true if every assignment satisfying the given query also
+      satisfies the query of the tree: the two have the same variables
+      and the same multiset of serialized non-linear constraints, the
+      bounds of the given query are at least as tight, and it has all the
+      equations of the query of the tree. Regions proven unsat then
+      remain unsat for the given query.
+    */
+    bool isRestrictedBy( const InputQuery &inputQuery ) const;
+
+    /*
+      Add a leaf to the tree. May be called by several workers at once.
+    */
+    void addRegion( const Region &region );
+    const List<Region> &getRegions() const;
+    unsigned getNumberOfVariables() const;
+
+    /*
+      Save the tree to a file, or load it from one
+    */
+    void saveTree( const String &fileName ) const;
+    void loadTree( const String &fileName );
+
+private:
+    unsigned _numberOfVariables;
+
+    /*
+      The serialized non-linear constraints of the query, mapped to the
+      number of times each of them appears
+    */
+    Map<String, unsigned> _constraints;
+    Map<unsigned, double> _lowerBounds;
+    Map<unsigned, double> _upperBounds;
+    List<Equation> _equations;
+
+    List<Region> _regions;
+    std::mutex _regionsMutex;
+
+    static void addConstraint( Map<String, unsigned> &constraints, const String &constraint );
+    static Map<String, unsigned> serializeConstraints( const InputQuery &inputQuery );
+    static String equationToString( const Equation &equation );
+    static Equation stringToEquation( const String &line );
+};
+
+#endif // __DnCWorkTree_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -25,22 +25,27 @@
 #include "PolarityBasedDivider.h"
 #include "SubQuery.h"
 #include "TableauStateStorageLevel.h"
+#include "TimeUtils.h"
 
 #include <atomic>
 #include <chrono>
 #include <cmath>
 #include <thread>
 
-DnCWorker::DnCWorker( WorkerQueue *workload, std::shared_ptr<IEngine> engine,
+DnCWorker::DnCWorker( WorkStealingQueue *workload, std::shared_ptr<IEngine> engine,
                       std::atomic_int &numUnsolvedSubQueries,
                       std::atomic_bool &shouldQuitSolving,
                       unsigned threadId, unsigned onlineDivides,
                       float timeoutFactor, SnCDivideStrategy divideStrategy,
-                      unsigned verbosity, bool parallelDeepSoI )
+                      unsigned verbosity, bool parallelDeepSoI,
+                      DnCWorkTree *workTree, bool adaptiveDivide )
     : _workload( workload )
     , _engine( engine )
     , _numUnsolvedSubQueries( &numUnsolvedSubQueries )
     , _shouldQuitSolving( &shouldQuitSolving )
+    , _workTree( workTree )
+    , _busyTimeInMicroSeconds( 0 )
+    , _numSolvedSubQueries( 0 )
     , _threadId( threadId )
     , _onlineDivides( onlineDivides )
     , _timeoutFactor( timeoutFactor )
@@ -48,6 +53,9 @@ DnCWorker::DnCWorker( WorkerQueue *workload, std::shared_ptr<IEngine> engine,
     , _parallelDeepSoI( parallelDeepSoI )
 {
     setQueryDivider( divideStrategy );
+    if ( adaptiveDivide )
+        _adaptiveDividePolicy = std::unique_ptr<AdaptiveDividePolicy>
+            ( new AdaptiveDividePolicy( pow( 2, _onlineDivides ), _timeoutFactor ) );
 
     // Obtain the current state of the engine
     if ( !_parallelDeepSoI )
@@ -61,24 +69,40 @@ DnCWorker::DnCWorker( WorkerQueue *workload, std::shared_ptr<IEngine> engine,
 void DnCWorker::setQueryDivider( SnCDivideStrategy divideStrategy )
 {
     if ( divideStrategy == SnCDivideStrategy::Polarity )
+    {
+        _divideStrategy = SnCDivideStrategy::Polarity;
         _queryDivider = std::unique_ptr<QueryDivider>
             ( new PolarityBasedDivider( _engine ) );
+    }
     else
     {
+        _divideStrategy = SnCDivideStrategy::LargestInterval;
         const List<unsigned> &inputVariables = _engine->getInputVariables();
         _queryDivider = std::unique_ptr<LargestIntervalDivider>
             ( new LargestIntervalDivider( inputVariables ) );
     }
 }
 
+QueryDivider &DnCWorker::getQueryDivider( SnCDivideStrategy divideStrategy )
+{
+    if ( divideStrategy != SnCDivideStrategy::Polarity ||
+         _divideStrategy == SnCDivideStrategy::Polarity )
+        return *_queryDivider;
+
+    if ( !_reluDivider )
+        _reluDivider = std::unique_ptr<QueryDivider>
+            ( new PolarityBasedDivider( _engine ) );
+    return *_reluDivider;
+}
+
 void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
 {
     SubQuery *subQuery = NULL;
-    // Boost queue stores the next element into the passed-in pointer
-    // and returns true if the pop is successful (aka, the queue is not empty
-    // in most cases)
-    if ( _workload->pop( subQuery ) )
+    // Take the most recent subQuery of this worker, or steal the
+    // shallowest subQuery of another worker if there is none
+    if ( _workload->pop( _threadId, subQuery ) )
     {
+        struct timespec startTime = TimeUtils::sampleMicro();
         String queryId = subQuery->_queryId;
         unsigned depth = subQuery->_depth;
         auto split = std::move( subQuery->_split );
@@ -120,6 +144,7 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
         if ( result == IEngine::UNSAT )
         {
             // If UNSAT, continue to solve
+            recordRegion( *subQuery, *split, true );
             *_numUnsolvedSubQueries -= 1;
             if ( _numUnsolvedSubQueries->load() == 0 || _parallelDeepSoI )
                 *_shouldQuitSolving = true;
@@ -132,7 +157,27 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
             SubQueries subQueries;
             unsigned newTimeout = ( depth >= GlobalConfiguration::DNC_DEPTH_THRESHOLD - 1 ?
                                     0 : ( unsigned ) timeoutInSeconds * _timeoutFactor );
-            unsigned numNewSubQueries = pow( 2, _onlineDivides );
+            SnCDivideStrategy divideStrategy = subQuery->_divideStrategy;
+            AdaptiveDividePolicy::Action action = AdaptiveDividePolicy::DIVIDE;
+            if ( _adaptiveDividePolicy )
+            {
+                // Let the statistics of the subquery decide whether to solve
+                // it again, divide it, or divide it by splitting ReLUs
+                AdaptiveDividePolicy::Decision decision =
+                    _adaptiveDividePolicy->decide
+                    ( *_engine->getStatistics(), timeoutInSeconds, depth,
+                      divideStrategy == SnCDivideStrategy::Auto ?
+                      _divideStrategy : divideStrategy );
+                if ( _verbosity > 0 )
+                    printDecision( queryId, timeoutInSeconds, decision );
+
+                action = decision._action;
+                newTimeout = decision._timeoutInSeconds;
+                if ( action == AdaptiveDividePolicy::SWITCH_STRATEGY )
+                    divideStrategy = SnCDivideStrategy::Polarity;
+            }
+            unsigned numNewSubQueries = ( action == AdaptiveDividePolicy::CONTINUE ?
+                                          1 : pow( 2, _onlineDivides ) );
             std::vector<std::unique_ptr<SmtState>> newSmtStates;
             if ( restoreTreeStates )
             {
@@ -145,19 +190,33 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
                 }
             }
 
-            _queryDivider->createSubQueries( numNewSubQueries, queryId, depth,
-                                             *split, newTimeout, subQueries );
+            if ( action == AdaptiveDividePolicy::CONTINUE )
+            {
+                SubQuery *sameSubQuery = new SubQuery;
+                sameSubQuery->_queryId = queryId;
+                sameSubQuery->_split = std::unique_ptr<PiecewiseLinearCaseSplit>
+                    ( new PiecewiseLinearCaseSplit( *split ) );
+                sameSubQuery->_timeoutInSeconds = newTimeout;
+                sameSubQuery->_depth = depth + 1;
+                subQueries.append( sameSubQuery );
+            }
+            else
+                getQueryDivider( divideStrategy ).createSubQueries
+                    ( numNewSubQueries, queryId, depth, *split, newTimeout,
+                      subQueries );
 
             unsigned i = 0;
             for ( auto &newSubQuery : subQueries )
             {
+                newSubQuery->_divideStrategy = divideStrategy;
+
                 // Store the SmtCore state
                 if ( restoreTreeStates )
                 {
                     newSubQuery->_smtState = std::move( newSmtStates[i++] );
                 }
 
-                if ( !_workload->push( std::move( newSubQuery ) ) )
+                if ( !_workload->push( _threadId, std::move( newSubQuery ) ) )
                 {
                     throw MarabouError( MarabouError::UNSUCCESSFUL_QUEUE_PUSH );
                 }
@@ -171,6 +230,7 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
         {
             // If engine was asked to quit, quit
             std::cout << "Quit requested by manager!" << std::endl;
+            recordRegion( *subQuery, *split, false );
             delete subQuery;
             ASSERT( _shouldQuitSolving->load() );
         }
@@ -180,6 +240,7 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
             // TIMEOUT. This way, the DnCManager will kill all the DnCWorkers.
 
             *_shouldQuitSolving = true;
+            recordRegion( *subQuery, *split, false );
             if ( result == IEngine::SAT )
             {
                 // case SAT
@@ -200,6 +261,9 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
                 delete subQuery;
             }
         }
+
+        _busyTimeInMicroSeconds += TimeUtils::timePassed( startTime, TimeUtils::sampleMicro() );
+        ++_numSolvedSubQueries;
     }
     else
     {
@@ -208,6 +272,31 @@ void DnCWorker::popOneSubQueryAndSolve( bool restoreTreeStates )
     }
 }
 
+unsigned long long DnCWorker::getBusyTimeInMicroSeconds() const
+{
+    return _busyTimeInMicroSeconds;
+}
+
+unsigned DnCWorker::getNumSolvedSubQueries() const
+{
+    return _numSolvedSubQueries;
+}
+
+void DnCWorker::recordRegion( const SubQuery &subQuery,
+                              const PiecewiseLinearCaseSplit &split, bool solved )
+{
+    if ( !_workTree || _parallelDeepSoI )
+        return;
+
+    DnCWorkTree::Region region;
+    region._queryId = subQuery._queryId;
+    region._split = split;
+    region._depth = subQuery._depth;
+    region._timeoutInSeconds = subQuery._timeoutInSeconds;
+    region._solved = solved;
+    _workTree->addRegion( region );
+}
+
 void DnCWorker::printProgress( String queryId, IEngine::ExitCode result ) const
 {
     printf( "Worker %d: Query %s %s, %d tasks remaining\n", _threadId,
@@ -215,6 +304,20 @@ void DnCWorker::printProgress( String queryId, IEngine::ExitCode result ) const
             _numUnsolvedSubQueries->load() );
 }
 
+void DnCWorker::printDecision( String queryId, unsigned timeoutInSeconds,
+                               const AdaptiveDividePolicy::Decision &decision ) const
+{
+    const Statistics &statistics = *_engine->getStatistics();
+    unsigned long long numPivots =
+        statistics.getLongAttribute( Statistics::NUM_TABLEAU_PIVOTS );
+    printf( "Worker %d: Query %s %.0f%% explored, %.0f pivots/sec, "
+            "%s with timeout %u\n", _threadId, queryId.ascii(),
+            AdaptiveDividePolicy::estimateProgress( statistics ) * 100,
+            timeoutInSeconds > 0 ? (double)numPivots / timeoutInSeconds : 0,
+            AdaptiveDividePolicy::actionToString( decision._action ).ascii(),
+            decision._timeoutInSeconds );
+}
+
 String DnCWorker::exitCodeToString( IEngine::ExitCode result )
 {
     switch ( result )
@@ -16,22 +16,26 @@
 #ifndef __DnCWorker_h__
 #define __DnCWorker_h__
 
+#include "AdaptiveDividePolicy.h"
 #include "SnCDivideStrategy.h"
+#include "DnCWorkTree.h"
 #include "Engine.h"
 #include "PiecewiseLinearCaseSplit.h"
 #include "QueryDivider.h"
+#include "WorkStealingQueue.h"
 
 #include <atomic>
 
 class DnCWorker
 {
 public:
-    DnCWorker( WorkerQueue *workload, std::shared_ptr<IEngine> engine,
+    DnCWorker( WorkStealingQueue *workload, std::shared_ptr<IEngine> engine,
                std::atomic_int &numUnsolvedSubqueries,
                std::atomic_bool &shouldQuitSolving, unsigned threadId,
                unsigned onlineDivides, float timeoutFactor,
                SnCDivideStrategy divideStrategy, unsigned verbosity,
-               bool parallelDeepSoI );
+               bool parallelDeepSoI, DnCWorkTree *workTree = NULL,
+               bool adaptiveDivide = false );
 
     /*
       Pop one subQuery, solve it and handle the result
@@ -39,12 +43,25 @@ public:
     */
     void popOneSubQueryAndSolve( bool restoreTreeStates = false );
 
+    /*
+      The time spent handling subQueries, and the number of subQueries
+      handled, since the worker was created
+    */
+    unsigned long long getBusyTimeInMicroSeconds() const;
+    unsigned getNumSolvedSubQueries() const;
+
 private:
     /*
       Initiate the query-divider object
     */
     void setQueryDivider( SnCDivideStrategy divideStrategy );
 
+    /*
+      The divider for the subqueries of the given strategy, where Auto
+      stands for the strategy of the worker
+    */
+    QueryDivider &getQueryDivider( SnCDivideStrategy divideStrategy );
+
     /*
       Convert the exitCode to string
     */
@@ -55,10 +72,23 @@ private:
     */
     void printProgress( String queryId, IEngine::ExitCode result ) const;
 
+    /*
+      Print how the adaptive policy handles a subquery that timed out
+    */
+    void printDecision( String queryId, unsigned timeoutInSeconds,
+                        const AdaptiveDividePolicy::Decision &decision ) const;
+
+    /*
+      Add a subQuery that is not divided further to the work tree, if
+      there is one
+    */
+    void recordRegion( const SubQuery &subQuery,
+                       const PiecewiseLinearCaseSplit &split, bool solved );
+
     /*
       The queue of subqueries (shared across threads)
     */
-    WorkerQueue *_workload;
+    WorkStealingQueue *_workload;
     std::shared_ptr<IEngine> _engine;
 
     /*
@@ -71,6 +101,15 @@ private:
     */
     std::atomic_bool *_shouldQuitSolving;
     std::unique_ptr<QueryDivider> _queryDivider;
+    SnCDivideStrategy _divideStrategy;
+
+    /*
+      In the adaptive strategy, the policy that handles the subqueries that
+      timed out, and the divider for the subqueries that it switched to ReLU
+      splitting. NULL otherwise.
+    */
+    std::unique_ptr<AdaptiveDividePolicy> _adaptiveDividePolicy;
+    std::unique_ptr<QueryDivider> _reluDivider;
 
     /*
       Initial state of the engine to which engine is restored after handling
@@ -78,6 +117,15 @@ private:
     */
     std::shared_ptr<EngineState> _initialState;
 
+    /*
+      The work tree that the regions are recorded in, or NULL if the work
+      tree is not exported
+    */
+    DnCWorkTree *_workTree;
+
+    unsigned long long _busyTimeInMicroSeconds;
+    unsigned _numSolvedSubQueries;
+
     unsigned _threadId;
     unsigned _onlineDivides;
     float _timeoutFactor;
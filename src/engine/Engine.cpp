@@ -135,6 +135,18 @@ void Engine::applySnCSplit( PiecewiseLinearCaseSplit sncSplit, String queryId )
     applySplit( sncSplit );
 }
 
+void Engine::pushSubQueryContext()
+{
+    preContextPushHook();
+    _context.push();
+}
+
+void Engine::popSubQueryContext()
+{
+    _context.popto( 0 );
+    postContextPopHook();
+}
+
 void Engine::setRandomSeed( unsigned seed )
 {
     srand( seed );
@@ -1658,6 +1670,40 @@ void Engine::extractSolution( InputQuery &inputQuery )
     }
 }
 
+void Engine::extractBounds( InputQuery &inputQuery )
+{
+    for ( unsigned i = 0; i < inputQuery.getNumberOfVariables(); ++i )
+    {
+        if ( _preprocessingEnabled )
+        {
+            // Has the variable been merged into another?
+            unsigned variable = i;
+            while ( _preprocessor.variableIsMerged( variable ) )
+                variable = _preprocessor.getMergedIndex( variable );
+
+            // Fixed variables are easy: they are bounded by their value
+            if ( _preprocessor.variableIsFixed( variable ) )
+            {
+                inputQuery.setLowerBound( i, _preprocessor.getFixedValue( variable ) );
+                inputQuery.setUpperBound( i, _preprocessor.getFixedValue( variable ) );
+                continue;
+            }
+
+            // We know which variable to look for, but it may have been assigned
+            // a new index, due to variable elimination
+            variable = _preprocessor.getNewIndex( variable );
+
+            inputQuery.setLowerBound( i, _preprocessedQuery->getLowerBound( variable ) );
+            inputQuery.setUpperBound( i, _preprocessedQuery->getUpperBound( variable ) );
+        }
+        else
+        {
+            inputQuery.setLowerBound( i, _preprocessedQuery->getLowerBound( i ) );
+            inputQuery.setUpperBound( i, _preprocessedQuery->getUpperBound( i ) );
+        }
+    }
+}
+
 
 void Engine::dumpVariableMapping( unsigned numberOfVar) const 
 {
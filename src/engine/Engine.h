@@ -107,6 +107,12 @@ public:
      */
     void extractSolution( InputQuery &inputQuery );
 
+    /*
+      After the input query has been processed, this method can be used
+      to store the tightened bounds in the variables of the original query.
+     */
+    void extractBounds( InputQuery &inputQuery );
+
     /*
       Methods for storing and restoring the state of the engine.
     */
@@ -213,6 +219,14 @@ public:
      */
     void applySnCSplit( PiecewiseLinearCaseSplit sncSplit, String queryId );
 
+    /*
+      Push a context on top of the root one before applying the split of
+      a subquery, and pop back to the root context and its bounds once the
+      subquery is solved, so that the same engine can solve another one
+    */
+    void pushSubQueryContext();
+    void popSubQueryContext();
+
     /*
        Apply bound tightenings stored in the bound manager.
      */
@@ -32,6 +32,7 @@ class EngineState;
 class Equation;
 class PiecewiseLinearCaseSplit;
 class SmtState;
+class Statistics;
 class String;
 class PiecewiseLinearConstraint;
 class UnsatCertificateNode;
@@ -103,6 +104,11 @@ public:
     virtual void reset() = 0;
     virtual List<unsigned> getInputVariables() const = 0;
 
+    /*
+      The statistics of the query solved since the last reset
+    */
+    virtual const Statistics *getStatistics() const = 0;
+
     /*
       Pick the piecewise linear constraint for internal splitting
     */
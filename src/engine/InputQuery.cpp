@@ -14,12 +14,17 @@
  **/
 
 #include "AutoFile.h"
+#include "BinaryQueryFormat.h"
+#include "CompressedFile.h"
 #include "Debug.h"
 #include "FloatUtils.h"
 #include "InputQuery.h"
 #include "MStringf.h"
 #include "MarabouError.h"
 #include "MaxConstraint.h"
+#include "ReluConstraint.h"
+#include "ReluGradConstraint.h"
+#include "SigmoidConstraint.h"
 
 #define INPUT_QUERY_LOG( x, ... ) LOG( GlobalConfiguration::INPUT_QUERY_LOGGING, "Input Query: %s\n", x )
 
@@ -275,28 +280,36 @@ InputQuery &InputQuery::operator=( const InputQuery &other )
         INPUT_QUERY_LOG( Stringf( "Number of piecewise linear constraints in topological order %u",
                                   other._networkLevelReasoner->getConstraintsInTopologicalOrder().size() ).ascii() );
 
-        unsigned numberOfDisjunctions = 0;
+        // Disjunctions are never part of the network, while maxs and ReLU
+        // gradients may not be
+        Set<PiecewiseLinearConstraint *> constraintsInNetwork;
+        for ( const auto &constraint : other._networkLevelReasoner->
+                  getConstraintsInTopologicalOrder() )
+            constraintsInNetwork.insert( constraint );
+
+        unsigned numberOfConstraintsOutsideOfNetwork = 0;
         unsigned numberOfMaxs = 0;
         for ( const auto &constraint : other._plConstraints )
         {
-            if ( constraint->getType() == DISJUNCTION )
+            if ( constraint->getType() == DISJUNCTION ||
+                 ( constraint->getType() == RELU_GRAD &&
+                   !constraintsInNetwork.exists( constraint ) ) )
             {
                 auto *newPlc = constraint->duplicateConstraint();
                 _plConstraints.append( newPlc );
-                ++numberOfDisjunctions;
+                ++numberOfConstraintsOutsideOfNetwork;
             }
             else if ( constraint->getType() == MAX &&
-                        !other._networkLevelReasoner->getConstraintsInTopologicalOrder().exists( constraint ) )
+                      !constraintsInNetwork.exists( constraint ) )
             {
                 auto *newPlc = constraint->duplicateConstraint();
                 _plConstraints.append( newPlc );
                 ++numberOfMaxs;
             }
-            
         }
 
-        ASSERT( other._networkLevelReasoner->getConstraintsInTopologicalOrder().size() +
-                numberOfDisjunctions +
+        ASSERT( constraintsInNetwork.size() +
+                numberOfConstraintsOutsideOfNetwork +
                 numberOfMaxs
                 == other._plConstraints.size() );
 
@@ -353,23 +366,46 @@ void InputQuery::storeDebuggingSolution( unsigned variable, double value )
     _debuggingSolution[variable] = value;
 }
 
-void InputQuery::saveQuery( const String &fileName )
+void InputQuery::saveQuery( const String &fileName, bool binary )
+{
+    CompressedFile::Compression compression = CompressedFile::compressionFromFileName( fileName );
+    if ( binary )
+    {
+        saveBinaryQuery( fileName, compression );
+        return;
+    }
+
+    if ( compression == CompressedFile::NONE )
+    {
+        AutoFile queryFile( fileName );
+        queryFile->open( IFile::MODE_WRITE_TRUNCATE );
+        saveTextQuery( queryFile );
+        queryFile->close();
+    }
+    else
+    {
+        CompressedFile queryFile( fileName, compression );
+        queryFile.open( IFile::MODE_WRITE_TRUNCATE );
+        saveTextQuery( queryFile );
+        queryFile.close();
+    }
+}
+
+void InputQuery::saveTextQuery( IFile &queryFile )
 {
-    AutoFile queryFile( fileName );
-    queryFile->open( IFile::MODE_WRITE_TRUNCATE );
 
     // Number of Variables
-    queryFile->write( Stringf( "%u\n", _numberOfVariables ) );
+    queryFile.write( Stringf( "%u\n", _numberOfVariables ) );
 
     // Number of Bounds
-    queryFile->write( Stringf( "%u\n", _lowerBounds.size() ) );
-    queryFile->write( Stringf( "%u\n", _upperBounds.size() ) );
+    queryFile.write( Stringf( "%u\n", _lowerBounds.size() ) );
+    queryFile.write( Stringf( "%u\n", _upperBounds.size() ) );
 
     // Number of Equations
-    queryFile->write( Stringf( "%u\n", _equations.size() ) );
+    queryFile.write( Stringf( "%u\n", _equations.size() ) );
 
     // Number of Non-linear Constraints
-    queryFile->write( Stringf( "%u", _plConstraints.size() + _tsConstraints.size() ) );
+    queryFile.write( Stringf( "%u", _plConstraints.size() + _tsConstraints.size() ) );
 
     printf( "Number of variables: %u\n", _numberOfVariables );
     printf( "Number of lower bounds: %u\n", _lowerBounds.size() );
@@ -378,51 +414,51 @@ void InputQuery::saveQuery( const String &fileName )
     printf( "Number of non-linear constraints: %u\n", _plConstraints.size() + _tsConstraints.size() );
 
     // Number of Input Variables
-    queryFile->write( Stringf( "\n%u", getNumInputVariables() ) );
+    queryFile.write( Stringf( "\n%u", getNumInputVariables() ) );
 
     // Input Variables
     unsigned i = 0;
     for ( const auto &inVar : getInputVariables() )
     {
-        queryFile->write( Stringf( "\n%u,%u", i, inVar ) );
+        queryFile.write( Stringf( "\n%u,%u", i, inVar ) );
         ++i;
     }
     ASSERT( i == getNumInputVariables() );
 
     // Number of Output Variables
-    queryFile->write( Stringf( "\n%u", getNumOutputVariables() ) );
+    queryFile.write( Stringf( "\n%u", getNumOutputVariables() ) );
 
     // Output Variables
     i = 0;
     for ( const auto &outVar : getOutputVariables() )
     {
-        queryFile->write( Stringf( "\n%u,%u", i, outVar ) );
+        queryFile.write( Stringf( "\n%u,%u", i, outVar ) );
         ++i;
     }
     ASSERT( i == getNumOutputVariables() );
 
     // Lower Bounds
     for ( const auto &lb : _lowerBounds )
-        queryFile->write( Stringf( "\n%d,%.10f", lb.first, lb.second ) );
+        queryFile.write( Stringf( "\n%d,%.10f", lb.first, lb.second ) );
 
     // Upper Bounds
     for ( const auto &ub : _upperBounds )
-        queryFile->write( Stringf( "\n%d,%.10f", ub.first, ub.second ) );
+        queryFile.write( Stringf( "\n%d,%.10f", ub.first, ub.second ) );
 
     // Equations
     i = 0;
     for ( const auto &e : _equations )
     {
         // Equation number
-        queryFile->write( Stringf( "\n%u,", i ) );
+        queryFile.write( Stringf( "\n%u,", i ) );
 
         // Equation type
-        queryFile->write( Stringf( "%01d,", e._type ) );
+        queryFile.write( Stringf( "%01d,", e._type ) );
 
         // Equation scalar
-        queryFile->write( Stringf( "%.10f", e._scalar ) );
+        queryFile.write( Stringf( "%.10f", e._scalar ) );
         for ( const auto &a : e._addends )
-            queryFile->write( Stringf( ",%u,%.10f", a._variable, a._coefficient ) );
+            queryFile.write( Stringf( ",%u,%.10f", a._variable, a._coefficient ) );
 
         ++i;
     }
@@ -432,8 +468,8 @@ void InputQuery::saveQuery( const String &fileName )
     for ( const auto &constraint : _plConstraints )
     {
         // Constraint number
-        queryFile->write( Stringf( "\n%u,", i ) );
-        queryFile->write( constraint->serializeToString() );
+        queryFile.write( Stringf( "\n%u,", i ) );
+        queryFile.write( constraint->serializeToString() );
         ++i;
     }
 
@@ -442,12 +478,194 @@ void InputQuery::saveQuery( const String &fileName )
     for ( const auto &constraint : _tsConstraints )
     {
         // Constraint number
-        queryFile->write( Stringf( "\n%u,", i ) );
-        queryFile->write( constraint->serializeToString() );
+        queryFile.write( Stringf( "\n%u,", i ) );
+        queryFile.write( constraint->serializeToString() );
         ++i;
     }
 
-    queryFile->close();
+}
+
+namespace {
+
+class BinaryQueryWriter
+{
+public:
+    BinaryQueryWriter( const String &fileName, CompressedFile::Compression compression )
+        : _file( fileName, compression )
+        , _offset( 0 )
+    {
+        _file.open( IFile::MODE_WRITE_TRUNCATE );
+    }
+
+    template <typename T> void write( const T &value )
+    {
+        writeBytes( &value, sizeof( T ) );
+    }
+
+    void writeBytes( const void *data, uint64_t size )
+    {
+        _file.writeBytes( data, size );
+        _offset += size;
+    }
+
+    /*
+      Pad the file so that the next array starts at an aligned offset
+    */
+    void pad()
+    {
+        static const char zeros[BinaryQueryFormat::ALIGNMENT] = { 0 };
+        writeBytes( zeros, BinaryQueryFormat::align( _offset ) - _offset );
+    }
+
+    void close()
+    {
+        _file.close();
+    }
+
+private:
+    CompressedFile _file;
+    uint64_t _offset;
+};
+
+}
+
+void InputQuery::saveBinaryQuery( const String &fileName,
+                                  CompressedFile::Compression compression )
+{
+    // Relu constraints without an aux variable and sigmoid constraints are
+    // stored as (f, b) pairs; everything else in its serialized form
+    List<uint8_t> kinds;
+    List<String> serialized;
+    uint64_t serializedSize = 0;
+    for ( const auto &constraint : _plConstraints )
+    {
+        if ( constraint->getType() == RELU &&
+             !( (ReluConstraint *)constraint )->auxVariableInUse() )
+        {
+            kinds.append( BinaryQueryFormat::CONSTRAINT_RELU );
+        }
+        else
+        {
+            kinds.append( BinaryQueryFormat::CONSTRAINT_SERIALIZED );
+            serialized.append( constraint->serializeToString() );
+            serializedSize += serialized.back().length();
+        }
+    }
+    for ( const auto &constraint : _tsConstraints )
+    {
+        if ( constraint->getType() == SIGMOID )
+        {
+            kinds.append( BinaryQueryFormat::CONSTRAINT_SIGMOID );
+        }
+        else
+        {
+            kinds.append( BinaryQueryFormat::CONSTRAINT_SERIALIZED );
+            serialized.append( constraint->serializeToString() );
+            serializedSize += serialized.back().length();
+        }
+    }
+
+    uint64_t numAddends = 0;
+    for ( const auto &e : _equations )
+        numAddends += e._addends.size();
+
+    BinaryQueryFormat::Header header;
+    memset( &header, 0, sizeof( header ) );
+    memcpy( header.magic, BinaryQueryFormat::MAGIC, sizeof( header.magic ) );
+    header.version = BinaryQueryFormat::VERSION;
+    header.byteOrder = BinaryQueryFormat::BYTE_ORDER_MARK;
+    header.numVariables = _numberOfVariables;
+    header.numLowerBounds = _lowerBounds.size();
+    header.numUpperBounds = _upperBounds.size();
+    header.numEquations = _equations.size();
+    header.numAddends = numAddends;
+    header.numInputVariables = getNumInputVariables();
+    header.numOutputVariables = getNumOutputVariables();
+    header.numConstraints = kinds.size();
+    header.numPairConstraints = kinds.size() - serialized.size();
+    header.serializedSize = serializedSize;
+
+    BinaryQueryWriter writer( fileName, compression );
+    writer.write( header );
+
+    // Input and output variables
+    for ( const auto &pair : _inputIndexToVariable )
+    {
+        writer.write<uint32_t>( pair.first );
+        writer.write<uint32_t>( pair.second );
+    }
+    writer.pad();
+    for ( const auto &pair : _outputIndexToVariable )
+    {
+        writer.write<uint32_t>( pair.first );
+        writer.write<uint32_t>( pair.second );
+    }
+    writer.pad();
+
+    // Bounds
+    for ( const auto &bounds : { &_lowerBounds, &_upperBounds } )
+    {
+        for ( const auto &bound : *bounds )
+            writer.write<uint32_t>( bound.first );
+        writer.pad();
+        for ( const auto &bound : *bounds )
+            writer.write<double>( bound.second );
+    }
+
+    // Equations
+    for ( const auto &e : _equations )
+        writer.write<uint32_t>( e._type );
+    writer.pad();
+    for ( const auto &e : _equations )
+        writer.write<double>( e._scalar );
+    uint64_t rowPointer = 0;
+    writer.write<uint64_t>( rowPointer );
+    for ( const auto &e : _equations )
+    {
+        rowPointer += e._addends.size();
+        writer.write<uint64_t>( rowPointer );
+    }
+    for ( const auto &e : _equations )
+        for ( const auto &a : e._addends )
+            writer.write<uint32_t>( a._variable );
+    writer.pad();
+    for ( const auto &e : _equations )
+        for ( const auto &a : e._addends )
+            writer.write<double>( a._coefficient );
+
+    // Non-linear constraints
+    for ( const auto &kind : kinds )
+        writer.write<uint8_t>( kind );
+    writer.pad();
+    for ( const auto &constraint : _plConstraints )
+    {
+        if ( constraint->getType() == RELU &&
+             !( (ReluConstraint *)constraint )->auxVariableInUse() )
+        {
+            writer.write<uint32_t>( ( (ReluConstraint *)constraint )->getF() );
+            writer.write<uint32_t>( ( (ReluConstraint *)constraint )->getB() );
+        }
+    }
+    for ( const auto &constraint : _tsConstraints )
+    {
+        if ( constraint->getType() == SIGMOID )
+        {
+            writer.write<uint32_t>( ( (SigmoidConstraint *)constraint )->getF() );
+            writer.write<uint32_t>( ( (SigmoidConstraint *)constraint )->getB() );
+        }
+    }
+    writer.pad();
+    uint64_t serializedOffset = 0;
+    writer.write<uint64_t>( serializedOffset );
+    for ( const auto &string : serialized )
+    {
+        serializedOffset += string.length();
+        writer.write<uint64_t>( serializedOffset );
+    }
+    for ( const auto &string : serialized )
+        writer.writeBytes( string.ascii(), string.length() );
+
+    writer.close();
 }
 
 void InputQuery::markInputVariable( unsigned variable, unsigned inputIndex )
@@ -667,6 +885,9 @@ bool InputQuery::constructNetworkLevelReasoner()
         return false;
     }
 
+    // The inputs of the backward pass, if there is one, are in layer 0 too
+    inputs.append( getGradientSeedVariables() );
+
     nlr->addLayer( 0, NLR::Layer::INPUT, inputs.size() );
     unsigned index = 0;
 
@@ -691,7 +912,8 @@ bool InputQuery::constructNetworkLevelReasoner()
             constructAbsoluteValueLayer( nlr, handledVariableToLayer, newLayerIndex ) ||
             constructSignLayer( nlr, handledVariableToLayer, newLayerIndex ) ||
             constructSigmoidLayer( nlr, handledVariableToLayer, newLayerIndex ) ||
-            constructMaxLayer( nlr, handledVariableToLayer, newLayerIndex )
+            constructMaxLayer( nlr, handledVariableToLayer, newLayerIndex ) ||
+            constructReluGradLayer( nlr, handledVariableToLayer, newLayerIndex )
             )
     {
         ++newLayerIndex;
@@ -1191,6 +1413,138 @@ bool InputQuery::constructSignLayer( NLR::NetworkLevelReasoner *nlr,
     return true;
 }
 
+bool InputQuery::constructReluGradLayer( NLR::NetworkLevelReasoner *nlr,
+                                         Map<unsigned, unsigned> &handledVariableToLayer,
+                                         unsigned newLayerIndex )
+{
+    INPUT_QUERY_LOG( "Attempting to construct ReluGradLayer..." );
+    struct NeuronInformation
+    {
+    public:
+
+        NeuronInformation( unsigned variable, unsigned neuron, unsigned bVariable, unsigned gOutVariable )
+            : _variable( variable )
+            , _neuron( neuron )
+            , _bVariable( bVariable )
+            , _gOutVariable( gOutVariable )
+        {
+        }
+
+        unsigned _variable;
+        unsigned _neuron;
+        unsigned _bVariable;
+        unsigned _gOutVariable;
+    };
+
+    List<NeuronInformation> newNeurons;
+
+    // Look for ReLU gradients where the b and gOut variables have already been handled
+    const List<PiecewiseLinearConstraint *> &plConstraints =
+        getPiecewiseLinearConstraints();
+
+    for ( const auto &plc : plConstraints )
+    {
+        // Only consider ReLU gradients
+        if ( plc->getType() != RELU_GRAD )
+            continue;
+
+        const ReluGradConstraint *reluGrad = (const ReluGradConstraint *)plc;
+
+        // Have the b and gOut variables been handled?
+        unsigned b = reluGrad->getB();
+        unsigned gOut = reluGrad->getGOut();
+        if ( !handledVariableToLayer.exists( b ) || !handledVariableToLayer.exists( gOut ) )
+            continue;
+
+        // If the gIn variable has also been handled, ignore this constraint
+        unsigned gIn = reluGrad->getGIn();
+        if ( handledVariableToLayer.exists( gIn ) )
+            continue;
+
+        // B and gOut have been handled, gIn hasn't. Add gIn
+        newNeurons.append( NeuronInformation( gIn, newNeurons.size(), b, gOut ) );
+        nlr->addConstraintInTopologicalOrder( plc );
+    }
+
+    // No neurons found for the new layer
+    if ( newNeurons.empty() )
+    {
+        INPUT_QUERY_LOG( "\tFailed!" );
+        return false;
+    }
+
+    nlr->addLayer( newLayerIndex, NLR::Layer::RELU_GRAD, newNeurons.size() );
+
+    NLR::Layer *layer = nlr->getLayer( newLayerIndex );
+    for ( const auto &newNeuron : newNeurons )
+    {
+        handledVariableToLayer[newNeuron._variable] = newLayerIndex;
+
+        layer->setLb( newNeuron._neuron, _lowerBounds.exists( newNeuron._variable ) ?
+                      _lowerBounds[newNeuron._variable] : FloatUtils::negativeInfinity() );
+        layer->setUb( newNeuron._neuron, _upperBounds.exists( newNeuron._variable ) ?
+                      _upperBounds[newNeuron._variable] : FloatUtils::infinity() );
+
+        // Add the new neuron
+        nlr->setNeuronVariable( NLR::NeuronIndex( newLayerIndex, newNeuron._neuron ), newNeuron._variable );
+
+        // Mark the layer dependencies and the activation connections:
+        // first to b, then to gOut
+        for ( const auto &sourceVariable : { newNeuron._bVariable, newNeuron._gOutVariable } )
+        {
+            unsigned sourceLayer = handledVariableToLayer[sourceVariable];
+            unsigned sourceNeuron = nlr->getLayer( sourceLayer )->variableToNeuron( sourceVariable );
+
+            nlr->addLayerDependency( sourceLayer, newLayerIndex );
+            nlr->addActivationSource( sourceLayer,
+                                      sourceNeuron,
+                                      newLayerIndex,
+                                      newNeuron._neuron );
+        }
+    }
+
+    INPUT_QUERY_LOG( "\tSuccessful!" );
+    return true;
+}
+
+List<unsigned> InputQuery::getGradientSeedVariables() const
+{
+    // The offset is gIn - b, which has to be the same for all the ReLU
+    // gradients
+    Set<unsigned> gradientsIn;
+    unsigned offset = 0;
+    for ( const auto &plc : _plConstraints )
+    {
+        if ( plc->getType() != RELU_GRAD )
+            continue;
+
+        const ReluGradConstraint *reluGrad = (const ReluGradConstraint *)plc;
+        unsigned b = reluGrad->getB();
+        unsigned gIn = reluGrad->getGIn();
+        if ( gIn <= b || ( offset != 0 && gIn - b != offset ) )
+            return List<unsigned>();
+
+        offset = gIn - b;
+        gradientsIn.insert( gIn );
+    }
+
+    List<unsigned> seeds;
+    if ( offset == 0 )
+        return seeds;
+
+    for ( const auto &output : getOutputVariables() )
+    {
+        unsigned seed = output + offset;
+        if ( seed >= _numberOfVariables || _variableToInputIndex.exists( seed ) ||
+             gradientsIn.exists( seed ) )
+            return List<unsigned>();
+
+        seeds.append( seed );
+    }
+
+    return seeds;
+}
+
 bool InputQuery::constructMaxLayer( NLR::NetworkLevelReasoner *nlr,
                                     Map<unsigned, unsigned> &handledVariableToLayer,
                                     unsigned newLayerIndex )
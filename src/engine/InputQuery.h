@@ -16,6 +16,7 @@
 #ifndef __InputQuery_h__
 #define __InputQuery_h__
 
+#include "CompressedFile.h"
 #include "Equation.h"
 #include "List.h"
 #include "MString.h"
@@ -110,8 +111,11 @@ public:
 
     /*
       Serializes the query to a file which can then be loaded using QueryLoader.
+      If binary is true, the query is written in the binary format described
+      in BinaryQueryFormat.h instead of the text format. Files ending in .gz
+      or .zst are compressed while they are written.
     */
-    void saveQuery( const String &fileName );
+    void saveQuery( const String &fileName, bool binary = false );
 
     /*
       Print input and output bounds
@@ -158,6 +162,12 @@ private:
     */
     void freeConstraintsIfNeeded();
 
+    /*
+      Write the query in the text or the binary format, called by saveQuery
+    */
+    void saveTextQuery( IFile &queryFile );
+    void saveBinaryQuery( const String &fileName, CompressedFile::Compression compression );
+
     /*
       Methods called by constructNetworkLevelReasoner
     */
@@ -179,6 +189,18 @@ private:
     bool constructMaxLayer( NLR::NetworkLevelReasoner *nlr,
                             Map<unsigned, unsigned> &handledVariableToLayer,
                             unsigned newLayerIndex );
+    bool constructReluGradLayer( NLR::NetworkLevelReasoner *nlr,
+                                 Map<unsigned, unsigned> &handledVariableToLayer,
+                                 unsigned newLayerIndex );
+
+    /*
+      If the query also encodes the backward pass of the network, where
+      the gradient of every variable x is x + offset, return the
+      gradients of the output variables. These are the inputs of the
+      backward pass. The offset is that of the ReLU gradient
+      constraints. Returns an empty list for other queries.
+    */
+    List<unsigned> getGradientSeedVariables() const;
 
 public:
     /*
@@ -134,7 +134,8 @@ void Marabou::prepareInputQuery()
     String queryDumpFilePath = Options::get()->getString( Options::QUERY_DUMP_FILE );
     if ( queryDumpFilePath.length() > 0 )
     {
-        _inputQuery.saveQuery( queryDumpFilePath );
+        _inputQuery.saveQuery( queryDumpFilePath,
+                               Options::get()->getBool( Options::BINARY_QUERY_DUMP ) );
         printf( "\nInput query successfully dumped to file\n" );
         exit( 0 );
     }
@@ -294,6 +295,15 @@ void Marabou::displayResults( unsigned long long microSecondsElapsed ) const
         summaryFile.write( Stringf( "%u",
                                     _engine.getStatistics()->getAveragePivotTimeInMicro() ) );
 
+        // Fields #5-#8: number of splits, main loop iterations, simplex
+        // steps and preprocessing time in micro seconds
+        const Statistics *statistics = _engine.getStatistics();
+        summaryFile.write( Stringf( " %u %llu %llu %llu",
+                                    statistics->getUnsignedAttribute( Statistics::NUM_SPLITS ),
+                                    statistics->getLongAttribute( Statistics::NUM_MAIN_LOOP_ITERATIONS ),
+                                    statistics->getLongAttribute( Statistics::NUM_SIMPLEX_STEPS ),
+                                    statistics->getLongAttribute( Statistics::PREPROCESSING_TIME_MICRO ) ) );
+
         summaryFile.write( "\n" );
     }
 }
@@ -59,6 +59,8 @@ public:
         UNSUPPORTED_TRANSCENDENTAL_CONSTRAINT = 103,
         UNSUPPORTED_NON_LINEAR_CONSTRAINT = 104,
         ONNX_PARSER_ERROR = 105,
+        INVALID_QUERY_FILE = 106,
+        INVALID_DNC_TREE_FILE = 107,
 
         FEATURE_NOT_YET_SUPPORTED = 900,
 
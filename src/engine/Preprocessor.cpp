@@ -100,6 +100,13 @@ std::unique_ptr<InputQuery> Preprocessor::preprocess( const InputQuery &query, b
         _uneliminableVariables.insert( var );
     for ( const auto &var : _preprocessed->getOutputVariables() )
         _uneliminableVariables.insert( var );
+    if ( _preprocessed->_networkLevelReasoner )
+    {
+        // Layer 0 may also hold the inputs of a backward pass
+        const NLR::Layer *inputLayer = _preprocessed->_networkLevelReasoner->getLayer( 0 );
+        for ( unsigned i = 0; i < inputLayer->getSize(); ++i )
+            _uneliminableVariables.insert( inputLayer->neuronToVariable( i ) );
+    }
     for ( const auto &constraint : _preprocessed->getPiecewiseLinearConstraints() )
         if ( !constraint->supportVariableElimination() )
             for ( const auto &var : constraint->getParticipatingVariables() )
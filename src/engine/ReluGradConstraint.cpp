@@ -0,0 +1,593 @@
+/*********************                                                        */
+/*! \file ReluGradConstraint.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** See the description of the class in ReluGradConstraint.h.
+ **/
+
+#include "ReluGradConstraint.h"
+
+#include "Debug.h"
+#include "FloatUtils.h"
+#include "GlobalConfiguration.h"
+#include "ITableau.h"
+#include "InputQuery.h"
+#include "MStringf.h"
+#include "MarabouError.h"
+#include "PiecewiseLinearCaseSplit.h"
+#include "Statistics.h"
+#include "Vector.h"
+
+#include <algorithm>
+
+ReluGradConstraint::ReluGradConstraint( unsigned b, unsigned gOut, unsigned gIn )
+    : PiecewiseLinearConstraint( TWO_PHASE_PIECEWISE_LINEAR_CONSTRAINT )
+    , _b( b )
+    , _gOut( gOut )
+    , _gIn( gIn )
+    , _auxVarInUse( false )
+{
+}
+
+ReluGradConstraint::ReluGradConstraint( const String &serializedReluGrad )
+    : PiecewiseLinearConstraint( TWO_PHASE_PIECEWISE_LINEAR_CONSTRAINT )
+{
+    String constraintType = serializedReluGrad.substring( 0, 8 );
+    ASSERT( constraintType == String( "reluGrad" ) );
+
+    // Remove the constraint type in serialized form
+    String serializedValues = serializedReluGrad.substring( 9, serializedReluGrad.length() - 9 );
+    List<String> values = serializedValues.tokenize( "," );
+
+    ASSERT( values.size() >= 3 && values.size() <= 4 );
+
+    auto var = values.begin();
+    _gIn = atoi( var->ascii() );
+    ++var;
+    _gOut = atoi( var->ascii() );
+    ++var;
+    _b = atoi( var->ascii() );
+
+    if ( values.size() == 4 )
+    {
+        ++var;
+        _aux = atoi( var->ascii() );
+        _auxVarInUse = true;
+    }
+    else
+        _auxVarInUse = false;
+}
+
+PiecewiseLinearFunctionType ReluGradConstraint::getType() const
+{
+    return PiecewiseLinearFunctionType::RELU_GRAD;
+}
+
+PiecewiseLinearConstraint *ReluGradConstraint::duplicateConstraint() const
+{
+    ReluGradConstraint *clone = new ReluGradConstraint( _b, _gOut, _gIn );
+    *clone = *this;
+    this->initializeDuplicateCDOs( clone );
+    return clone;
+}
+
+void ReluGradConstraint::restoreState( const PiecewiseLinearConstraint *state )
+{
+    const ReluGradConstraint *reluGrad = dynamic_cast<const ReluGradConstraint *>( state );
+
+    CVC4::context::CDO<bool> *activeStatus = _cdConstraintActive;
+    CVC4::context::CDO<PhaseStatus> *phaseStatus = _cdPhaseStatus;
+    CVC4::context::CDList<PhaseStatus> *infeasibleCases = _cdInfeasibleCases;
+    *this = *reluGrad;
+    _cdConstraintActive = activeStatus;
+    _cdPhaseStatus = phaseStatus;
+    _cdInfeasibleCases = infeasibleCases;
+}
+
+void ReluGradConstraint::registerAsWatcher( ITableau *tableau )
+{
+    tableau->registerToWatchVariable( this, _b );
+    tableau->registerToWatchVariable( this, _gOut );
+    tableau->registerToWatchVariable( this, _gIn );
+
+    if ( _auxVarInUse )
+        tableau->registerToWatchVariable( this, _aux );
+}
+
+void ReluGradConstraint::unregisterAsWatcher( ITableau *tableau )
+{
+    tableau->unregisterToWatchVariable( this, _b );
+    tableau->unregisterToWatchVariable( this, _gOut );
+    tableau->unregisterToWatchVariable( this, _gIn );
+
+    if ( _auxVarInUse )
+        tableau->unregisterToWatchVariable( this, _aux );
+}
+
+void ReluGradConstraint::notifyLowerBound( unsigned variable, double bound )
+{
+    if ( _statistics )
+        _statistics->incLongAttribute( Statistics::NUM_BOUND_NOTIFICATIONS_TO_PL_CONSTRAINTS );
+
+    // If there's an already-stored tighter bound, return
+    if ( _boundManager == nullptr && existsLowerBound( variable ) &&
+         !FloatUtils::gt( bound, getLowerBound( variable ) ) )
+        return;
+
+    // Otherwise - update bound
+    setLowerBound( variable, bound );
+
+    checkIfBoundsFixPhase();
+    propagateBounds();
+}
+
+void ReluGradConstraint::notifyUpperBound( unsigned variable, double bound )
+{
+    if ( _statistics )
+        _statistics->incLongAttribute( Statistics::NUM_BOUND_NOTIFICATIONS_TO_PL_CONSTRAINTS );
+
+    // If there's an already-stored tighter bound, return
+    if ( _boundManager == nullptr && existsUpperBound( variable ) &&
+         !FloatUtils::lt( bound, getUpperBound( variable ) ) )
+        return;
+
+    // Otherwise - update bound
+    setUpperBound( variable, bound );
+
+    checkIfBoundsFixPhase();
+    propagateBounds();
+}
+
+void ReluGradConstraint::checkIfBoundsFixPhase()
+{
+    if ( phaseFixed() )
+        return;
+
+    // A positive b, or a non-zero gradient, means the ReLU is active
+    if ( ( existsLowerBound( _b ) && FloatUtils::isPositive( getLowerBound( _b ) ) ) ||
+         ( existsLowerBound( _gIn ) && FloatUtils::isPositive( getLowerBound( _gIn ) ) ) ||
+         ( existsUpperBound( _gIn ) && FloatUtils::isNegative( getUpperBound( _gIn ) ) ) )
+        setPhaseStatus( RELU_PHASE_ACTIVE );
+    // A negative b, or gIn != gOut, means the ReLU is inactive
+    else if ( ( existsUpperBound( _b ) && FloatUtils::isNegative( getUpperBound( _b ) ) ) ||
+              ( _auxVarInUse && existsLowerBound( _aux ) &&
+                FloatUtils::isPositive( getLowerBound( _aux ) ) ) ||
+              ( _auxVarInUse && existsUpperBound( _aux ) &&
+                FloatUtils::isNegative( getUpperBound( _aux ) ) ) )
+        setPhaseStatus( RELU_PHASE_INACTIVE );
+}
+
+void ReluGradConstraint::propagateBounds()
+{
+    if ( _boundManager == nullptr || !isActive() )
+        return;
+
+    PhaseStatus phase = getPhaseStatus();
+    if ( phase == RELU_PHASE_ACTIVE )
+    {
+        _boundManager->tightenLowerBound( _b, 0 );
+        _boundManager->tightenLowerBound( _gIn, getLowerBound( _gOut ) );
+        _boundManager->tightenUpperBound( _gIn, getUpperBound( _gOut ) );
+        _boundManager->tightenLowerBound( _gOut, getLowerBound( _gIn ) );
+        _boundManager->tightenUpperBound( _gOut, getUpperBound( _gIn ) );
+
+        if ( _auxVarInUse )
+        {
+            _boundManager->tightenLowerBound( _aux, 0 );
+            _boundManager->tightenUpperBound( _aux, 0 );
+        }
+    }
+    else if ( phase == RELU_PHASE_INACTIVE )
+    {
+        _boundManager->tightenUpperBound( _b, 0 );
+        _boundManager->tightenLowerBound( _gIn, 0 );
+        _boundManager->tightenUpperBound( _gIn, 0 );
+    }
+    else
+    {
+        // gIn is either 0 or gOut
+        _boundManager->tightenLowerBound( _gIn, std::min( 0.0, getLowerBound( _gOut ) ) );
+        _boundManager->tightenUpperBound( _gIn, std::max( 0.0, getUpperBound( _gOut ) ) );
+    }
+}
+
+bool ReluGradConstraint::participatingVariable( unsigned variable ) const
+{
+    return ( variable == _b ) || ( variable == _gOut ) || ( variable == _gIn ) ||
+        ( _auxVarInUse && variable == _aux );
+}
+
+List<unsigned> ReluGradConstraint::getParticipatingVariables() const
+{
+    // The variables are listed in increasing order, so that the
+    // preprocessor never renames one of them to the index of another one
+    // that has not been renamed yet
+    Vector<unsigned> variables = { _b, _gOut, _gIn };
+    if ( _auxVarInUse )
+        variables.append( _aux );
+    std::sort( variables.begin(), variables.end() );
+
+    List<unsigned> result;
+    for ( const auto &variable : variables )
+        result.append( variable );
+    return result;
+}
+
+bool ReluGradConstraint::satisfied() const
+{
+    if ( !( existsAssignment( _b ) && existsAssignment( _gOut ) && existsAssignment( _gIn ) ) )
+        throw MarabouError( MarabouError::PARTICIPATING_VARIABLE_MISSING_ASSIGNMENT );
+
+    double bValue = getAssignment( _b );
+    double gOutValue = getAssignment( _gOut );
+    double gInValue = getAssignment( _gIn );
+
+    bool activeSatisfied = FloatUtils::areEqual( gInValue, gOutValue,
+                                                 GlobalConfiguration::CONSTRAINT_COMPARISON_TOLERANCE );
+    bool inactiveSatisfied = FloatUtils::isZero( gInValue,
+                                                 GlobalConfiguration::CONSTRAINT_COMPARISON_TOLERANCE );
+
+    if ( FloatUtils::isPositive( bValue ) )
+        return activeSatisfied;
+    if ( FloatUtils::isNegative( bValue ) )
+        return inactiveSatisfied;
+    return activeSatisfied || inactiveSatisfied;
+}
+
+List<PiecewiseLinearConstraint::Fix> ReluGradConstraint::getPossibleFixes() const
+{
+    // This should never be called when we are using Gurobi to solve LPs.
+    ASSERT( _gurobi == NULL );
+
+    ASSERT( !satisfied() );
+
+    double bValue = getAssignment( _b );
+    double gOutValue = getAssignment( _gOut );
+    double gInValue = getAssignment( _gIn );
+
+    List<PiecewiseLinearConstraint::Fix> fixes;
+    if ( FloatUtils::isNegative( bValue ) )
+    {
+        // Either the gradient is zero, or b is non-negative and the gradient is passed on
+        fixes.append( PiecewiseLinearConstraint::Fix( _gIn, 0 ) );
+        if ( FloatUtils::areEqual( gInValue, gOutValue ) )
+            fixes.append( PiecewiseLinearConstraint::Fix( _b, 0 ) );
+    }
+    else
+    {
+        // The gradient is passed on, or b is non-positive and the gradient is zero
+        fixes.append( PiecewiseLinearConstraint::Fix( _gIn, gOutValue ) );
+        fixes.append( PiecewiseLinearConstraint::Fix( _gOut, gInValue ) );
+        if ( FloatUtils::isZero( gInValue ) )
+            fixes.append( PiecewiseLinearConstraint::Fix( _b, 0 ) );
+    }
+
+    return fixes;
+}
+
+List<PiecewiseLinearConstraint::Fix> ReluGradConstraint::getSmartFixes( ITableau * ) const
+{
+    return getPossibleFixes();
+}
+
+List<PiecewiseLinearCaseSplit> ReluGradConstraint::getCaseSplits() const
+{
+    if ( _phaseStatus != PHASE_NOT_FIXED )
+        throw MarabouError( MarabouError::REQUESTED_CASE_SPLITS_FROM_FIXED_CONSTRAINT );
+
+    List<PiecewiseLinearCaseSplit> splits;
+    for ( const auto &phase : getAllCases() )
+        splits.append( getCaseSplit( phase ) );
+    return splits;
+}
+
+List<PhaseStatus> ReluGradConstraint::getAllCases() const
+{
+    // If we have existing knowledge about the assignment, use it to
+    // influence the order of splits
+    if ( existsAssignment( _b ) && FloatUtils::isPositive( getAssignment( _b ) ) )
+        return { RELU_PHASE_ACTIVE, RELU_PHASE_INACTIVE };
+
+    return { RELU_PHASE_INACTIVE, RELU_PHASE_ACTIVE };
+}
+
+PiecewiseLinearCaseSplit ReluGradConstraint::getCaseSplit( PhaseStatus phase ) const
+{
+    if ( phase == RELU_PHASE_INACTIVE )
+        return getInactiveSplit();
+    else if ( phase == RELU_PHASE_ACTIVE )
+        return getActiveSplit();
+    else
+        throw MarabouError( MarabouError::REQUESTED_NONEXISTENT_CASE_SPLIT );
+}
+
+PiecewiseLinearCaseSplit ReluGradConstraint::getActiveSplit() const
+{
+    // Active phase: b >= 0, gIn - gOut = 0
+    PiecewiseLinearCaseSplit activePhase;
+    activePhase.storeBoundTightening( Tightening( _b, 0.0, Tightening::LB ) );
+
+    if ( _auxVarInUse )
+    {
+        // gIn - gOut = aux = 0
+        activePhase.storeBoundTightening( Tightening( _aux, 0.0, Tightening::LB ) );
+        activePhase.storeBoundTightening( Tightening( _aux, 0.0, Tightening::UB ) );
+        return activePhase;
+    }
+
+    Equation activeEquation( Equation::EQ );
+    activeEquation.addAddend( 1, _gIn );
+    activeEquation.addAddend( -1, _gOut );
+    activeEquation.setScalar( 0 );
+    activePhase.addEquation( activeEquation );
+
+    return activePhase;
+}
+
+PiecewiseLinearCaseSplit ReluGradConstraint::getInactiveSplit() const
+{
+    // Inactive phase: b <= 0, gIn = 0
+    PiecewiseLinearCaseSplit inactivePhase;
+    inactivePhase.storeBoundTightening( Tightening( _b, 0.0, Tightening::UB ) );
+    inactivePhase.storeBoundTightening( Tightening( _gIn, 0.0, Tightening::LB ) );
+    inactivePhase.storeBoundTightening( Tightening( _gIn, 0.0, Tightening::UB ) );
+    return inactivePhase;
+}
+
+bool ReluGradConstraint::phaseFixed() const
+{
+    return _phaseStatus != PHASE_NOT_FIXED;
+}
+
+PiecewiseLinearCaseSplit ReluGradConstraint::getImpliedCaseSplit() const
+{
+    ASSERT( _phaseStatus != PHASE_NOT_FIXED );
+
+    if ( _phaseStatus == RELU_PHASE_ACTIVE )
+        return getActiveSplit();
+
+    return getInactiveSplit();
+}
+
+PiecewiseLinearCaseSplit ReluGradConstraint::getValidCaseSplit() const
+{
+    return getImpliedCaseSplit();
+}
+
+void ReluGradConstraint::eliminateVariable( unsigned /* variable */, double /* fixedValue */ )
+{
+    throw MarabouError( MarabouError::FEATURE_NOT_YET_SUPPORTED,
+                        "Eliminate variable from a ReluGradConstraint" );
+}
+
+void ReluGradConstraint::updateVariableIndex( unsigned oldIndex, unsigned newIndex )
+{
+    // Variable reindexing can only occur in preprocessing before Gurobi is
+    // registered.
+    ASSERT( _gurobi == NULL );
+
+    ASSERT( oldIndex == _b || oldIndex == _gOut || oldIndex == _gIn ||
+            ( _auxVarInUse && oldIndex == _aux ) );
+    ASSERT( !_boundManager );
+    ASSERT( !_lowerBounds.exists( newIndex ) &&
+            !_upperBounds.exists( newIndex ) &&
+            newIndex != _b && newIndex != _gOut && newIndex != _gIn &&
+            ( !_auxVarInUse || newIndex != _aux ) );
+
+    if ( existsLowerBound( oldIndex ) )
+    {
+        _lowerBounds[newIndex] = _lowerBounds.get( oldIndex );
+        _lowerBounds.erase( oldIndex );
+    }
+
+    if ( existsUpperBound( oldIndex ) )
+    {
+        _upperBounds[newIndex] = _upperBounds.get( oldIndex );
+        _upperBounds.erase( oldIndex );
+    }
+
+    if ( oldIndex == _b )
+        _b = newIndex;
+    else if ( oldIndex == _gOut )
+        _gOut = newIndex;
+    else if ( oldIndex == _gIn )
+        _gIn = newIndex;
+    else
+        _aux = newIndex;
+}
+
+bool ReluGradConstraint::constraintObsolete() const
+{
+    return false;
+}
+
+void ReluGradConstraint::getEntailedTightenings( List<Tightening> &tightenings ) const
+{
+    ASSERT( existsLowerBound( _b ) && existsLowerBound( _gOut ) && existsLowerBound( _gIn ) &&
+            existsUpperBound( _b ) && existsUpperBound( _gOut ) && existsUpperBound( _gIn ) );
+    ASSERT( !_auxVarInUse || ( existsLowerBound( _aux ) && existsUpperBound( _aux ) ) );
+
+    double bLowerBound = getLowerBound( _b );
+    double gOutLowerBound = getLowerBound( _gOut );
+    double gInLowerBound = getLowerBound( _gIn );
+
+    double bUpperBound = getUpperBound( _b );
+    double gOutUpperBound = getUpperBound( _gOut );
+    double gInUpperBound = getUpperBound( _gIn );
+
+    if ( FloatUtils::isPositive( bLowerBound ) ||
+         FloatUtils::isPositive( gInLowerBound ) ||
+         FloatUtils::isNegative( gInUpperBound ) )
+    {
+        // Active case: gIn = gOut
+        tightenings.append( Tightening( _b, 0, Tightening::LB ) );
+        tightenings.append( Tightening( _gIn, gOutLowerBound, Tightening::LB ) );
+        tightenings.append( Tightening( _gIn, gOutUpperBound, Tightening::UB ) );
+        tightenings.append( Tightening( _gOut, gInLowerBound, Tightening::LB ) );
+        tightenings.append( Tightening( _gOut, gInUpperBound, Tightening::UB ) );
+
+        if ( _auxVarInUse )
+        {
+            tightenings.append( Tightening( _aux, 0, Tightening::LB ) );
+            tightenings.append( Tightening( _aux, 0, Tightening::UB ) );
+        }
+    }
+    else if ( FloatUtils::isNegative( bUpperBound ) ||
+              ( _auxVarInUse && ( FloatUtils::isPositive( getLowerBound( _aux ) ) ||
+                                  FloatUtils::isNegative( getUpperBound( _aux ) ) ) ) )
+    {
+        // Inactive case: gIn = 0
+        tightenings.append( Tightening( _b, 0, Tightening::UB ) );
+        tightenings.append( Tightening( _gIn, 0, Tightening::LB ) );
+        tightenings.append( Tightening( _gIn, 0, Tightening::UB ) );
+    }
+    else
+    {
+        // gIn is either 0 or gOut
+        tightenings.append( Tightening( _gIn, std::min( 0.0, gOutLowerBound ), Tightening::LB ) );
+        tightenings.append( Tightening( _gIn, std::max( 0.0, gOutUpperBound ), Tightening::UB ) );
+    }
+}
+
+PhaseStatus ReluGradConstraint::getPhaseStatusInAssignment( const Map<unsigned, double>
+                                                            &assignment ) const
+{
+    ASSERT( assignment.exists( _b ) );
+    return FloatUtils::isNegative( assignment[_b] ) ?
+        RELU_PHASE_INACTIVE : RELU_PHASE_ACTIVE;
+}
+
+void ReluGradConstraint::transformToUseAuxVariables( InputQuery &inputQuery )
+{
+    /*
+      We want to add the equation
+
+          aux = gIn - gOut
+
+      Which actually becomes
+
+          gIn - gOut - aux = 0
+
+      The active phase is then aux = 0, which only consists of bounds.
+      The bounds of aux follow from those of gIn and gOut.
+    */
+    if ( _auxVarInUse )
+        return;
+
+    // Create the aux variable
+    _aux = inputQuery.getNumberOfVariables();
+    inputQuery.setNumberOfVariables( _aux + 1 );
+
+    // Create and add the equation
+    Equation equation( Equation::EQ );
+    equation.addAddend( 1.0, _gIn );
+    equation.addAddend( -1.0, _gOut );
+    equation.addAddend( -1.0, _aux );
+    equation.setScalar( 0 );
+    inputQuery.addEquation( equation );
+
+    // Adjust the bounds for the new variable
+    inputQuery.setLowerBound( _aux, inputQuery.getLowerBound( _gIn ) -
+                              inputQuery.getUpperBound( _gOut ) );
+    inputQuery.setUpperBound( _aux, inputQuery.getUpperBound( _gIn ) -
+                              inputQuery.getLowerBound( _gOut ) );
+
+    // We now care about the auxiliary variable, as well
+    _auxVarInUse = true;
+}
+
+String ReluGradConstraint::serializeToString() const
+{
+    // Output format is: reluGrad,gIn,gOut,b,aux
+    if ( _auxVarInUse )
+        return Stringf( "reluGrad,%u,%u,%u,%u", _gIn, _gOut, _b, _aux );
+
+    return Stringf( "reluGrad,%u,%u,%u", _gIn, _gOut, _b );
+}
+
+unsigned ReluGradConstraint::getB() const
+{
+    return _b;
+}
+
+unsigned ReluGradConstraint::getGOut() const
+{
+    return _gOut;
+}
+
+unsigned ReluGradConstraint::getGIn() const
+{
+    return _gIn;
+}
+
+bool ReluGradConstraint::auxVariableInUse() const
+{
+    return _auxVarInUse;
+}
+
+unsigned ReluGradConstraint::getAux() const
+{
+    return _aux;
+}
+
+String ReluGradConstraint::phaseToString( PhaseStatus phase )
+{
+    switch ( phase )
+    {
+    case PHASE_NOT_FIXED:
+        return "PHASE_NOT_FIXED";
+
+    case RELU_PHASE_ACTIVE:
+        return "RELU_PHASE_ACTIVE";
+
+    case RELU_PHASE_INACTIVE:
+        return "RELU_PHASE_INACTIVE";
+
+    default:
+        return "UNKNOWN";
+    }
+}
+
+void ReluGradConstraint::dump( String &output ) const
+{
+    output = Stringf( "ReluGradConstraint: x%u = ReLU'( x%u ) * x%u. Active? %s. PhaseStatus = %u (%s). ",
+                      _gIn, _b, _gOut,
+                      _constraintActive ? "Yes" : "No",
+                      _phaseStatus, phaseToString( _phaseStatus ).ascii() );
+
+    output += Stringf( "b in [%s, %s], ",
+                       existsLowerBound( _b ) ? Stringf( "%lf", getLowerBound( _b ) ).ascii() : "-inf",
+                       existsUpperBound( _b ) ? Stringf( "%lf", getUpperBound( _b ) ).ascii() : "inf" );
+
+    output += Stringf( "gOut in [%s, %s], ",
+                       existsLowerBound( _gOut ) ? Stringf( "%lf", getLowerBound( _gOut ) ).ascii() : "-inf",
+                       existsUpperBound( _gOut ) ? Stringf( "%lf", getUpperBound( _gOut ) ).ascii() : "inf" );
+
+    output += Stringf( "gIn in [%s, %s]",
+                       existsLowerBound( _gIn ) ? Stringf( "%lf", getLowerBound( _gIn ) ).ascii() : "-inf",
+                       existsUpperBound( _gIn ) ? Stringf( "%lf", getUpperBound( _gIn ) ).ascii() : "inf" );
+
+    if ( _auxVarInUse )
+    {
+        output += Stringf( ", aux in [%s, %s]",
+                           existsLowerBound( _aux ) ? Stringf( "%lf", getLowerBound( _aux ) ).ascii() : "-inf",
+                           existsUpperBound( _aux ) ? Stringf( "%lf", getUpperBound( _aux ) ).ascii() : "inf" );
+    }
+
+    output += "\n";
+}
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
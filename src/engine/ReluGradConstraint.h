@@ -0,0 +1,216 @@
+/*********************                                                        */
+/*! \file ReluGradConstraint.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** ReluGradConstraint implements the gradient of a ReLU in the backward
+ ** pass of a network:
+ ** gIn = ReLU'( b ) * gOut =    ( b > 0 -> gIn = gOut )
+ **                           /\ ( b < 0 -> gIn = 0 )
+ **
+ ** where b is the input of the ReLU, and gOut and gIn are the gradients
+ ** of its output and its input. At b = 0 either phase is allowed.
+ **
+ ** It distinguishes two relevant phases for search:
+ ** RELU_PHASE_ACTIVE:   b >= 0 and gIn = gOut
+ ** RELU_PHASE_INACTIVE: b <= 0 and gIn = 0
+ **
+ ** During preprocessing, an auxiliary variable aux = gIn - gOut is
+ ** introduced, so that the active phase becomes aux = 0 and both case
+ ** splits only consist of bounds.
+ **
+ ** The variables are never eliminated during preprocessing: a fixed
+ ** gradient does not fix the phase, so the constraint has to stay.
+ **/
+
+#ifndef __ReluGradConstraint_h__
+#define __ReluGradConstraint_h__
+
+#include "PiecewiseLinearConstraint.h"
+
+class ReluGradConstraint : public PiecewiseLinearConstraint
+{
+public:
+    /*
+      The gIn variable is the gradient of the ReLU input b, given the
+      gradient gOut of the ReLU output: gIn = ReLU'( b ) * gOut
+    */
+    ReluGradConstraint( unsigned b, unsigned gOut, unsigned gIn );
+    ReluGradConstraint( const String &serializedReluGrad );
+
+    /*
+      Get the type of this constraint.
+    */
+    PiecewiseLinearFunctionType getType() const override;
+
+    /*
+      Return a clone of the constraint.
+    */
+    PiecewiseLinearConstraint *duplicateConstraint() const override;
+
+    /*
+      Restore the state of this constraint from the given one.
+    */
+    void restoreState( const PiecewiseLinearConstraint *state ) override;
+
+    /*
+      Register/unregister the constraint with a talbeau.
+     */
+    void registerAsWatcher( ITableau *tableau ) override;
+    void unregisterAsWatcher( ITableau *tableau ) override;
+
+    /*
+      These callbacks are invoked when a watched variable's bounds
+      change. They fix the phase from the bounds of b and gIn, and
+      propagate the bounds of the fixed phase.
+    */
+    void notifyLowerBound( unsigned variable, double bound ) override;
+    void notifyUpperBound( unsigned variable, double bound ) override;
+
+    /*
+      Returns true iff the variable participates in this piecewise
+      linear constraint
+    */
+    bool participatingVariable( unsigned variable ) const override;
+
+    /*
+      Get the list of variables participating in this constraint, in
+      increasing order.
+    */
+    List<unsigned> getParticipatingVariables() const override;
+
+    /*
+      Returns true iff the assignment satisfies the constraint
+    */
+    bool satisfied() const override;
+
+    /*
+      Returns a list of possible fixes for the violated constraint.
+    */
+    List<PiecewiseLinearConstraint::Fix> getPossibleFixes() const override;
+
+    /*
+      Return a list of smart fixes for violated constraint.
+    */
+    List<PiecewiseLinearConstraint::Fix> getSmartFixes( ITableau *tableau ) const override;
+
+    /*
+      Returns the list of case splits that this piecewise linear
+      constraint breaks into: the active and the inactive phase.
+     */
+    List<PiecewiseLinearCaseSplit> getCaseSplits() const override;
+
+    /*
+      Check if the constraint's phase has been fixed.
+    */
+    bool phaseFixed() const override;
+
+    /*
+      If the constraint's phase has been fixed, get the (valid) case split.
+    */
+    PiecewiseLinearCaseSplit getValidCaseSplit() const override;
+    PiecewiseLinearCaseSplit getImpliedCaseSplit() const override;
+
+    /*
+       Returns a list of all cases - { RELU_PHASE_ACTIVE, RELU_PHASE_INACTIVE },
+       ordered by the current assignment of b if there is one.
+     */
+    List<PhaseStatus> getAllCases() const override;
+
+    /*
+       Returns case split corresponding to the given phase/id
+     */
+    PiecewiseLinearCaseSplit getCaseSplit( PhaseStatus phase ) const override;
+
+    /*
+      Dump the current state of the constraint.
+    */
+    void dump( String &output ) const override;
+
+    /*
+      The variables of the constraint are never eliminated, see the
+      description of the class.
+    */
+    void eliminateVariable( unsigned variable, double fixedValue ) override;
+    void updateVariableIndex( unsigned oldIndex, unsigned newIndex ) override;
+    bool constraintObsolete() const override;
+
+    inline bool supportVariableElimination() const override
+    {
+        return false;
+    }
+
+    /*
+      Get the tightenings entailed by the constraint: the bounds of the
+      fixed phase, or gIn between min( 0, lb(gOut) ) and max( 0, ub(gOut) )
+      if the phase is not fixed.
+    */
+    void getEntailedTightenings( List<Tightening> &tightenings ) const override;
+
+    /*
+      Return the phase status corresponding to the value of b in the
+      given assignment.
+    */
+    PhaseStatus getPhaseStatusInAssignment( const Map<unsigned, double>
+                                            &assignment ) const override;
+
+    /*
+      Add the auxiliary variable aux = gIn - gOut to the input query,
+      so that the active case split becomes aux = 0.
+    */
+    void transformToUseAuxVariables( InputQuery &inputQuery ) override;
+
+    /*
+      Returns string with shape: reluGrad,gIn,gOut,b[,aux]
+    */
+    String serializeToString() const override;
+
+    /*
+      Get the indices of the b, gOut and gIn variables.
+    */
+    unsigned getB() const;
+    unsigned getGOut() const;
+    unsigned getGIn() const;
+
+    /*
+      Check if the aux variable is in use and retrieve it
+    */
+    bool auxVariableInUse() const;
+    unsigned getAux() const;
+
+private:
+    unsigned _b, _gOut, _gIn;
+    unsigned _aux;
+    bool _auxVarInUse;
+
+    PiecewiseLinearCaseSplit getActiveSplit() const;
+    PiecewiseLinearCaseSplit getInactiveSplit() const;
+
+    /*
+      Fix the phase if the bounds of b, gIn or aux imply it
+    */
+    void checkIfBoundsFixPhase();
+
+    /*
+      Propagate the bounds of the current phase to the bound manager
+    */
+    void propagateBounds();
+
+    static String phaseToString( PhaseStatus phase );
+};
+
+#endif // __ReluGradConstraint_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
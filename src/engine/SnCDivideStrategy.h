@@ -25,6 +25,10 @@ enum class SnCDivideStrategy
     Polarity,      // Pick the ReLU with the polarity closest to 0 among the first K nodes
     EarliestReLU,
 
+    // Decide after each timeout whether to solve the subquery again, divide
+    // it, or switch from input splitting to ReLU splitting
+    Adaptive,
+
     Auto
 };
 
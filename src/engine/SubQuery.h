@@ -20,14 +20,15 @@
 #include "MString.h"
 #include "PiecewiseLinearCaseSplit.h"
 #include "SmtState.h"
+#include "SnCDivideStrategy.h"
 
-#include <boost/lockfree/queue.hpp>
 #include <utility>
 
 // Struct representing a subquery
 struct SubQuery
 {
     SubQuery()
+        : _divideStrategy( SnCDivideStrategy::Auto )
     {
     }
 
@@ -36,11 +37,11 @@ struct SubQuery
     std::unique_ptr<SmtState> _smtState;
     unsigned _timeoutInSeconds;
     unsigned _depth;
-};
 
-// Synchronized Queue containing the Sub-Queries shared by workers
-typedef boost::lockfree::queue<SubQuery *, boost::lockfree::
-  fixed_sized<false>>WorkerQueue;
+    // The strategy to divide the subquery with, or Auto for that of the
+    // worker. Only set when the adaptive strategy switches to ReLU splitting.
+    SnCDivideStrategy _divideStrategy;
+};
 
 // A vector of Sub-Queries
 
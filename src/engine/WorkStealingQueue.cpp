@@ -0,0 +1,142 @@
+/*********************                                                        */
+/*! \file WorkStealingQueue.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include "WorkStealingQueue.h"
+#include "Debug.h"
+
+WorkStealingQueue::WorkStealingQueue( unsigned numberOfWorkers )
+    : _numberOfWorkers( numberOfWorkers > 0 ? numberOfWorkers : 1 )
+    , _deques( new WorkerDeque[_numberOfWorkers] )
+    , _numberOfSteals( _numberOfWorkers, 0 )
+    , _nextWorker( 0 )
+{
+}
+
+bool WorkStealingQueue::push( unsigned workerId, SubQuery *subQuery )
+{
+    if ( workerId >= _numberOfWorkers || !subQuery )
+        return false;
+
+    std::lock_guard<std::mutex> lock( _deques[workerId]._mutex );
+    _deques[workerId]._subQueries.append( subQuery );
+    return true;
+}
+
+bool WorkStealingQueue::push( SubQuery *subQuery )
+{
+    return push( _nextWorker++ % _numberOfWorkers, subQuery );
+}
+
+bool WorkStealingQueue::pop( unsigned workerId, SubQuery *&subQuery )
+{
+    ASSERT( workerId < _numberOfWorkers );
+
+    {
+        std::lock_guard<std::mutex> lock( _deques[workerId]._mutex );
+        List<SubQuery *> &subQueries = _deques[workerId]._subQueries;
+        if ( !subQueries.empty() )
+        {
+            subQuery = subQueries.back();
+            subQueries.popBack();
+            return true;
+        }
+    }
+
+    if ( steal( workerId, subQuery ) )
+    {
+        ++_numberOfSteals[workerId];
+        return true;
+    }
+    return false;
+}
+
+bool WorkStealingQueue::pop( SubQuery *&subQuery )
+{
+    return steal( _numberOfWorkers, subQuery );
+}
+
+bool WorkStealingQueue::steal( unsigned skippedWorker, SubQuery *&subQuery )
+{
+    // Another thread may empty the chosen deque before it is locked again,
+    // in which case we look for a victim again
+    while ( true )
+    {
+        bool found = false;
+        unsigned victim = 0;
+        unsigned shallowestDepth = 0;
+        for ( unsigned i = 0; i < _numberOfWorkers; ++i )
+        {
+            if ( i == skippedWorker )
+                continue;
+
+            std::lock_guard<std::mutex> lock( _deques[i]._mutex );
+            List<SubQuery *> &subQueries = _deques[i]._subQueries;
+            if ( !subQueries.empty() &&
+                 ( !found || subQueries.front()->_depth < shallowestDepth ) )
+            {
+                found = true;
+                victim = i;
+                shallowestDepth = subQueries.front()->_depth;
+            }
+        }
+
+        if ( !found )
+            return false;
+
+        std::lock_guard<std::mutex> lock( _deques[victim]._mutex );
+        List<SubQuery *> &subQueries = _deques[victim]._subQueries;
+        if ( !subQueries.empty() )
+        {
+            subQuery = subQueries.front();
+            subQueries.erase( subQueries.begin() );
+            return true;
+        }
+    }
+}
+
+bool WorkStealingQueue::empty() const
+{
+    return size() == 0;
+}
+
+unsigned WorkStealingQueue::size() const
+{
+    unsigned size = 0;
+    for ( unsigned i = 0; i < _numberOfWorkers; ++i )
+    {
+        std::lock_guard<std::mutex> lock( _deques[i]._mutex );
+        size += _deques[i]._subQueries.size();
+    }
+    return size;
+}
+
+unsigned WorkStealingQueue::getNumberOfWorkers() const
+{
+    return _numberOfWorkers;
+}
+
+unsigned WorkStealingQueue::getNumberOfSteals( unsigned workerId ) const
+{
+    ASSERT( workerId < _numberOfWorkers );
+    return _numberOfSteals[workerId];
+}
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -0,0 +1,90 @@
+/*********************                                                        */
+/*! \file WorkStealingQueue.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** The subqueries shared by the DnC workers. Each worker has its own
+ ** deque: it pushes the subqueries it creates to the back, and pops
+ ** from the back, so that it keeps working on the region it divided.
+ ** A worker whose deque is empty steals from the front of the deque
+ ** whose front subquery is the shallowest, i.e., the largest pending
+ ** region.
+
+**/
+
+#ifndef __WorkStealingQueue_h__
+#define __WorkStealingQueue_h__
+
+#include "List.h"
+#include "SubQuery.h"
+#include "Vector.h"
+
+#include <atomic>
+#include <memory>
+#include <mutex>
+
+class WorkStealingQueue
+{
+public:
+    WorkStealingQueue( unsigned numberOfWorkers );
+
+    /*
+      Push a subquery to the deque of the given worker. The overload
+      without a worker distributes the subqueries over the deques in
+      a round-robin fashion.
+    */
+    bool push( unsigned workerId, SubQuery *subQuery );
+    bool push( SubQuery *subQuery );
+
+    /*
+      Pop a subquery from the back of the deque of the given worker, or
+      steal the shallowest subquery of another worker if that deque is
+      empty. Return false if all deques are empty. The overload without
+      a worker only steals.
+    */
+    bool pop( unsigned workerId, SubQuery *&subQuery );
+    bool pop( SubQuery *&subQuery );
+
+    bool empty() const;
+    unsigned size() const;
+    unsigned getNumberOfWorkers() const;
+
+    /*
+      The number of subqueries the given worker took from other deques
+    */
+    unsigned getNumberOfSteals( unsigned workerId ) const;
+
+private:
+    struct WorkerDeque
+    {
+        mutable std::mutex _mutex;
+        List<SubQuery *> _subQueries;
+    };
+
+    unsigned _numberOfWorkers;
+    std::unique_ptr<WorkerDeque[]> _deques;
+    Vector<unsigned> _numberOfSteals;
+    std::atomic_uint _nextWorker;
+
+    /*
+      Take the front of the deque whose front is the shallowest, skipping
+      the given deque
+    */
+    bool steal( unsigned skippedWorker, SubQuery *&subQuery );
+};
+
+#endif // __WorkStealingQueue_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
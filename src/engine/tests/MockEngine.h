@@ -20,6 +20,7 @@
 #include "List.h"
 #include "PiecewiseLinearCaseSplit.h"
 #include "PiecewiseLinearConstraint.h"
+#include "Statistics.h"
 #include "context/context.h"
 
 class String;
@@ -150,6 +151,12 @@ public:
         return _inputVariables;
     }
 
+    Statistics _statistics;
+    const Statistics *getStatistics() const
+    {
+        return &_statistics;
+    }
+
     void updateScores( DivideStrategy /**/ )
     {
     }
@@ -0,0 +1,141 @@
+/*********************                                                        */
+/*! \file Test_AdaptiveDividePolicy.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include <cxxtest/TestSuite.h>
+
+#include "AdaptiveDividePolicy.h"
+#include "FloatUtils.h"
+#include "GlobalConfiguration.h"
+#include "Statistics.h"
+
+class AdaptiveDividePolicyTestSuite : public CxxTest::TestSuite
+{
+public:
+
+    void setSearchTree( Statistics &statistics, unsigned numSplits,
+                        unsigned numPops, unsigned decisionLevel )
+    {
+        statistics.setUnsignedAttribute( Statistics::NUM_SPLITS, numSplits );
+        statistics.setUnsignedAttribute( Statistics::NUM_POPS, numPops );
+        statistics.setUnsignedAttribute( Statistics::CURRENT_DECISION_LEVEL,
+                                         decisionLevel );
+        statistics.setUnsignedAttribute( Statistics::NUM_VISITED_TREE_STATES,
+                                         numSplits + numPops );
+    }
+
+    void test_estimates()
+    {
+        Statistics statistics;
+        TS_ASSERT_EQUALS( AdaptiveDividePolicy::estimateProgress( statistics ), 0 );
+        TS_ASSERT_EQUALS( AdaptiveDividePolicy::estimateTotalTimeInSeconds
+                          ( statistics, 10 ), 0 );
+
+        // 4 closed branches and 1 open one
+        setSearchTree( statistics, 4, 4, 0 );
+        TS_ASSERT( FloatUtils::areEqual
+                   ( AdaptiveDividePolicy::estimateProgress( statistics ), 0.8 ) );
+        TS_ASSERT( FloatUtils::areEqual
+                   ( AdaptiveDividePolicy::estimateTotalTimeInSeconds
+                     ( statistics, 10 ), 12.5 ) );
+
+        // An open branch at each of the 3 decision levels, and the current one
+        setSearchTree( statistics, 7, 4, 3 );
+        TS_ASSERT( FloatUtils::areEqual
+                   ( AdaptiveDividePolicy::estimateProgress( statistics ), 0.5 ) );
+        TS_ASSERT( FloatUtils::areEqual
+                   ( AdaptiveDividePolicy::estimateTotalTimeInSeconds
+                     ( statistics, 10 ), 20 ) );
+    }
+
+    void test_continue_mostly_explored()
+    {
+        AdaptiveDividePolicy policy( 4, 1.5 );
+        Statistics statistics;
+        setSearchTree( statistics, 4, 4, 0 );
+
+        // The whole tree takes 12.5 seconds, and the factor gives some slack
+        AdaptiveDividePolicy::Decision decision =
+            policy.decide( statistics, 10, 1, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::CONTINUE );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 19U );
+
+        // Nothing is left at the maximal depth
+        decision = policy.decide( statistics, 10,
+                                  GlobalConfiguration::DNC_DEPTH_THRESHOLD - 1,
+                                  SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::CONTINUE );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 0U );
+    }
+
+    void test_divide()
+    {
+        AdaptiveDividePolicy policy( 4, 1.5 );
+        Statistics statistics;
+
+        // Without an estimate, the timeout grows by the factor
+        AdaptiveDividePolicy::Decision decision =
+            policy.decide( statistics, 10, 1, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 15U );
+
+        // 3 of 7 branches are closed, so the tree takes about 23 seconds and
+        // each of the 4 new subqueries about 6: the timeout stays the same
+        setSearchTree( statistics, 6, 3, 3 );
+        decision = policy.decide( statistics, 10, 1, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 10U );
+
+        // 1 of 5 branches is closed: the tree takes 50 seconds, and the
+        // timeout of the new subqueries is capped by the factor
+        setSearchTree( statistics, 5, 1, 3 );
+        decision = policy.decide( statistics, 10, 1, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 15U );
+    }
+
+    void test_switch_strategy()
+    {
+        AdaptiveDividePolicy policy( 4, 1.5 );
+        Statistics statistics;
+        setSearchTree( statistics, 30, 1, 29 );
+        unsigned depth = GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_DEPTH;
+
+        // Deep subqueries of the input splitting that barely progressed switch
+        AdaptiveDividePolicy::Decision decision =
+            policy.decide( statistics, 10, depth, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::SWITCH_STRATEGY );
+        TS_ASSERT_EQUALS( decision._timeoutInSeconds, 15U );
+
+        // Shallower ones, and those already splitting ReLUs, do not
+        decision = policy.decide( statistics, 10, depth - 1,
+                                  SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+        decision = policy.decide( statistics, 10, depth, SnCDivideStrategy::Polarity );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+
+        // Nor do those that did not split at all
+        Statistics noSplits;
+        decision = policy.decide( noSplits, 10, depth, SnCDivideStrategy::LargestInterval );
+        TS_ASSERT_EQUALS( decision._action, AdaptiveDividePolicy::DIVIDE );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
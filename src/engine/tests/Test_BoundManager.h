@@ -79,6 +79,13 @@ public:
                                          FloatUtils::negativeInfinity() ) );
         TS_ASSERT( FloatUtils::areEqual( boundManager.getUpperBound( 4 ),
                                          FloatUtils::infinity() ) );
+
+        for ( unsigned i = 0; i < numberOfVariables; ++i )
+        {
+            boundManager.setLowerBound( i, -1.0 * i );
+            boundManager.setUpperBound( i, 1.0 * i );
+        }
+
         TS_ASSERT_THROWS_NOTHING( boundManager.registerNewVariable() );
         TS_ASSERT_THROWS_NOTHING( boundManager.registerNewVariable() );
         TS_ASSERT_EQUALS( boundManager.getNumberOfVariables(), 7u );
@@ -86,6 +93,15 @@ public:
                                          FloatUtils::negativeInfinity() ) );
         TS_ASSERT( FloatUtils::areEqual( boundManager.getUpperBound( 6 ),
                                          FloatUtils::infinity() ) );
+
+        // The bounds of existing variables survive the reallocation
+        for ( unsigned i = 0; i < numberOfVariables; ++i )
+        {
+            TS_ASSERT_EQUALS( boundManager.getLowerBound( i ), -1.0 * i );
+            TS_ASSERT_EQUALS( boundManager.getUpperBound( i ), 1.0 * i );
+            TS_ASSERT_EQUALS( boundManager.getLowerBounds()[i], -1.0 * i );
+            TS_ASSERT_EQUALS( boundManager.getUpperBounds()[i], 1.0 * i );
+        }
     }
 
     /*
@@ -0,0 +1,224 @@
+/*********************                                                        */
+/*! \file Test_DnCWorkTree.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include <cxxtest/TestSuite.h>
+
+#include "DnCWorkTree.h"
+#include "InputQuery.h"
+#include "MarabouError.h"
+#include "MockErrno.h"
+#include "MockFileFactory.h"
+#include "ReluConstraint.h"
+#include "T/unistd.h"
+
+class MockForDnCWorkTree
+    : public MockFileFactory
+    , public MockErrno
+    , public T::Base_stat
+{
+public:
+    String existingPath;
+
+    int stat( const char *path, StructStat */* buf */ )
+    {
+        return existingPath == path ? 0 : -1;
+    }
+};
+
+class DnCWorkTreeTestSuite : public CxxTest::TestSuite
+{
+public:
+    MockForDnCWorkTree *mock;
+    MockFile *file;
+    const char *fileName = "DnCWorkTree.test";
+
+    void setUp()
+    {
+        TS_ASSERT( mock = new MockForDnCWorkTree );
+
+        file = &( mock->mockFile );
+        mock->existingPath = fileName;
+    }
+
+    void tearDown()
+    {
+        TS_ASSERT_THROWS_NOTHING( delete mock );
+    }
+
+    void reopenFile()
+    {
+        file->wasCreated = false;
+        file->wasDiscarded = false;
+    }
+
+    void populateQuery( InputQuery &inputQuery )
+    {
+        //   -1 <= x0 <= 1
+        //   x1 = 2 x0 + 0.5
+        //   x2 = relu( x1 )
+        inputQuery.setNumberOfVariables( 3 );
+        inputQuery.setLowerBound( 0, -1 );
+        inputQuery.setUpperBound( 0, 1 );
+
+        Equation equation;
+        equation.addAddend( 2, 0 );
+        equation.addAddend( -1, 1 );
+        equation.setScalar( -0.5 );
+        inputQuery.addEquation( equation );
+
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( 1, 2 ) );
+    }
+
+    void test_save_and_load_tree()
+    {
+        InputQuery inputQuery;
+        populateQuery( inputQuery );
+
+        DnCWorkTree tree;
+        tree.storeQuery( inputQuery );
+
+        DnCWorkTree::Region solved;
+        solved._queryId = "1-2";
+        solved._depth = 2;
+        solved._timeoutInSeconds = 7;
+        solved._solved = true;
+        solved._split.storeBoundTightening( Tightening( 0, -1.0 / 3, Tightening::LB ) );
+        solved._split.storeBoundTightening( Tightening( 0, 0.1, Tightening::UB ) );
+        tree.addRegion( solved );
+
+        DnCWorkTree::Region unsolved;
+        Equation equation( Equation::GE );
+        equation.addAddend( 1, 1 );
+        equation.addAddend( -1, 2 );
+        equation.setScalar( -2 );
+        unsolved._split.addEquation( equation );
+        tree.addRegion( unsolved );
+
+        TS_ASSERT_THROWS_NOTHING( tree.saveTree( fileName ) );
+        TS_ASSERT_EQUALS( file->lastPath, fileName );
+        TS_ASSERT_EQUALS( file->lastOpenMode, IFile::MODE_WRITE_TRUNCATE );
+
+        // The mock file reads back the lines that were written to it
+        reopenFile();
+        DnCWorkTree loadedTree;
+        TS_ASSERT_THROWS_NOTHING( loadedTree.loadTree( fileName ) );
+        TS_ASSERT_EQUALS( loadedTree.getNumberOfVariables(), 3U );
+        TS_ASSERT( loadedTree.isRestrictedBy( inputQuery ) );
+
+        const List<DnCWorkTree::Region> &regions = loadedTree.getRegions();
+        TS_ASSERT_EQUALS( regions.size(), 2U );
+
+        const DnCWorkTree::Region &first = regions.front();
+        TS_ASSERT_EQUALS( first._queryId, "1-2" );
+        TS_ASSERT_EQUALS( first._depth, 2U );
+        TS_ASSERT_EQUALS( first._timeoutInSeconds, 7U );
+        TS_ASSERT( first._solved );
+        TS_ASSERT( first._split == solved._split );
+
+        const DnCWorkTree::Region &second = regions.back();
+        TS_ASSERT_EQUALS( second._queryId, "" );
+        TS_ASSERT( !second._solved );
+        TS_ASSERT( second._split == unsolved._split );
+    }
+
+    void test_is_restricted_by()
+    {
+        InputQuery inputQuery;
+        populateQuery( inputQuery );
+
+        DnCWorkTree tree;
+        tree.storeQuery( inputQuery );
+        TS_ASSERT( tree.isRestrictedBy( inputQuery ) );
+
+        // Tighter bounds and an additional equation restrict the query
+        InputQuery restricted;
+        populateQuery( restricted );
+        restricted.setLowerBound( 0, -0.5 );
+        restricted.setUpperBound( 2, 1 );
+        Equation equation( Equation::LE );
+        equation.addAddend( 1, 2 );
+        equation.setScalar( 3 );
+        restricted.addEquation( equation );
+        TS_ASSERT( tree.isRestrictedBy( restricted ) );
+
+        // Looser bounds do not
+        InputQuery relaxed;
+        populateQuery( relaxed );
+        relaxed.setUpperBound( 0, 2 );
+        TS_ASSERT( !tree.isRestrictedBy( relaxed ) );
+
+        // Neither does a missing equation
+        InputQuery unconstrained;
+        unconstrained.setNumberOfVariables( 3 );
+        unconstrained.setLowerBound( 0, -1 );
+        unconstrained.setUpperBound( 0, 1 );
+        unconstrained.addPiecewiseLinearConstraint( new ReluConstraint( 1, 2 ) );
+        TS_ASSERT( !tree.isRestrictedBy( unconstrained ) );
+
+        // Nor a different constraint, even if there are as many of them
+        InputQuery swapped;
+        swapped.setNumberOfVariables( 3 );
+        swapped.setLowerBound( 0, -1 );
+        swapped.setUpperBound( 0, 1 );
+        for ( const auto &equation : inputQuery.getEquations() )
+            swapped.addEquation( equation );
+        swapped.addPiecewiseLinearConstraint( new ReluConstraint( 2, 1 ) );
+        TS_ASSERT( !tree.isRestrictedBy( swapped ) );
+
+        // Or an additional copy of a constraint
+        InputQuery duplicated;
+        populateQuery( duplicated );
+        duplicated.addPiecewiseLinearConstraint( new ReluConstraint( 1, 2 ) );
+        TS_ASSERT( !tree.isRestrictedBy( duplicated ) );
+
+        // Nor a different number of variables
+        InputQuery larger;
+        populateQuery( larger );
+        larger.setNumberOfVariables( 4 );
+        TS_ASSERT( !tree.isRestrictedBy( larger ) );
+    }
+
+    void test_load_invalid_tree()
+    {
+        DnCWorkTree tree;
+        TS_ASSERT_THROWS_EQUALS( tree.loadTree( "DnCWorkTree.missing" ),
+                                 const MarabouError &e,
+                                 e.getCode(),
+                                 MarabouError::FILE_DOES_NOT_EXIST );
+
+        // An empty constraint line
+        file->writtenLines = "3\n1\n\n";
+        TS_ASSERT_THROWS_EQUALS( tree.loadTree( fileName ),
+                                 const MarabouError &e,
+                                 e.getCode(),
+                                 MarabouError::INVALID_DNC_TREE_FILE );
+
+        // A bound line with a single token
+        reopenFile();
+        file->writtenLines = "3\n1\nrelu,2,1\n1\n0\n";
+        TS_ASSERT_THROWS_EQUALS( tree.loadTree( fileName ),
+                                 const MarabouError &e,
+                                 e.getCode(),
+                                 MarabouError::INVALID_DNC_TREE_FILE );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../../.. "
+// tags-file-name: "../../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -17,6 +17,7 @@
 
 #include "DnCWorker.h"
 #include "MockEngine.h"
+#include "ReluConstraint.h"
 
 #include <string.h>
 
@@ -24,7 +25,7 @@ class DnCWorkerTestSuite : public CxxTest::TestSuite
 {
 public:
 
-    WorkerQueue *_workload;
+    WorkStealingQueue *_workload;
     std::shared_ptr<MockEngine> _engine;
 
     DnCWorkerTestSuite()
@@ -34,7 +35,7 @@ public:
 
     void setUp()
     {
-        _workload = new WorkerQueue( 0 );
+        _workload = new WorkStealingQueue( 1 );
 
         // Initialize the mockEngine
         _engine = std::make_shared<MockEngine>();
@@ -258,6 +259,63 @@ public:
         TS_ASSERT( numUnsolvedSubQueries.load() == 1 );
         TS_ASSERT( shouldQuitSolving.load() );
     }
+
+    // Test the handling of timeouts in the adaptive strategy
+    void test_adaptive_divide()
+    {
+        createPlaceHolderSubQuery();
+        _engine->setTimeToSolve( 10 );
+        _engine->setExitCode( IEngine::TIMEOUT );
+        std::atomic_int numUnsolvedSubQueries( 1 );
+        std::atomic_bool shouldQuitSolving( false );
+        DnCWorker dncWorker( _workload, _engine, numUnsolvedSubQueries,
+                             shouldQuitSolving, 0, 2, 1.5,
+                             SnCDivideStrategy::LargestInterval, 0, false,
+                             NULL, true );
+
+        //  Most of the search tree of the subQuery was explored, so it is
+        //  solved again with a longer timeout instead of being divided
+        Statistics &statistics = _engine->_statistics;
+        statistics.setUnsignedAttribute( Statistics::NUM_SPLITS, 4 );
+        statistics.setUnsignedAttribute( Statistics::NUM_POPS, 4 );
+        statistics.setUnsignedAttribute( Statistics::NUM_VISITED_TREE_STATES, 8 );
+        dncWorker.popOneSubQueryAndSolve();
+        TS_ASSERT_EQUALS( _workload->size(), 1U );
+        TS_ASSERT_EQUALS( numUnsolvedSubQueries.load(), 1 );
+
+        SubQuery *subQuery = NULL;
+        TS_ASSERT( _workload->pop( 0, subQuery ) );
+        TS_ASSERT_EQUALS( subQuery->_queryId, "" );
+        TS_ASSERT_EQUALS( subQuery->_depth, 1U );
+        TS_ASSERT( subQuery->_timeoutInSeconds > 5 );
+        TS_ASSERT_EQUALS( subQuery->_split->getBoundTightenings().size(), 6U );
+        TS_ASSERT( subQuery->_divideStrategy == SnCDivideStrategy::Auto );
+
+        //  A deep subQuery that barely progressed is divided by splitting
+        //  ReLUs, and so are its descendants
+        ReluConstraint relu1( 1, 4 );
+        ReluConstraint relu2( 2, 5 );
+        ReluConstraint relu3( 3, 6 );
+        _engine->setSplitPLConstraint( &relu1 );
+        _engine->setSplitPLConstraint( &relu2 );
+        _engine->setSplitPLConstraint( &relu3 );
+        subQuery->_depth = GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_DEPTH;
+        TS_ASSERT( _workload->push( 0, subQuery ) );
+        statistics.setUnsignedAttribute( Statistics::NUM_SPLITS, 30 );
+        statistics.setUnsignedAttribute( Statistics::NUM_POPS, 0 );
+        statistics.setUnsignedAttribute( Statistics::CURRENT_DECISION_LEVEL, 30 );
+        dncWorker.popOneSubQueryAndSolve();
+        TS_ASSERT_EQUALS( _workload->size(), 4U );
+        TS_ASSERT_EQUALS( numUnsolvedSubQueries.load(), 4 );
+        while ( _workload->pop( 0, subQuery ) )
+        {
+            TS_ASSERT( subQuery->_divideStrategy == SnCDivideStrategy::Polarity );
+            TS_ASSERT_EQUALS( subQuery->_depth,
+                              GlobalConfiguration::ADAPTIVE_DIVIDE_SWITCH_DEPTH + 1 );
+            TS_ASSERT( subQuery->_split->getBoundTightenings().size() > 6U );
+            delete subQuery;
+        }
+    }
 };
 
 //
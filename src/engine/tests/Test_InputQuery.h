@@ -21,7 +21,9 @@
 #include "MockErrno.h"
 #include "MockFileFactory.h"
 #include "ReluConstraint.h"
+#include "ReluGradConstraint.h"
 #include "MarabouError.h"
+#include "NetworkLevelReasoner.h"
 
 #include <string.h>
 
@@ -237,6 +239,83 @@ public:
 
         delete inputQuery;
     }
+
+    void test_construct_network_level_reasoner_with_relu_grads()
+    {
+        /*
+          The forward pass x1 = x0, x2 = ReLU( x1 ), x3 = 2x2, and its
+          backward pass, where the gradient of xi is x( i + 4 ):
+
+          x6 = 2x7, x5 = ReLU'( x1 ) * x6, x4 = x5
+        */
+        InputQuery inputQuery;
+        inputQuery.setNumberOfVariables( 8 );
+        inputQuery.markInputVariable( 0, 0 );
+        inputQuery.markOutputVariable( 3, 0 );
+
+        Equation equation1;
+        equation1.addAddend( 1, 1 );
+        equation1.addAddend( -1, 0 );
+        inputQuery.addEquation( equation1 );
+
+        Equation equation2;
+        equation2.addAddend( 1, 3 );
+        equation2.addAddend( -2, 2 );
+        inputQuery.addEquation( equation2 );
+
+        Equation equation3;
+        equation3.addAddend( 1, 6 );
+        equation3.addAddend( -2, 7 );
+        inputQuery.addEquation( equation3 );
+
+        Equation equation4;
+        equation4.addAddend( 1, 4 );
+        equation4.addAddend( -1, 5 );
+        inputQuery.addEquation( equation4 );
+
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( 1, 2 ) );
+        inputQuery.addPiecewiseLinearConstraint( new ReluGradConstraint( 1, 6, 5 ) );
+
+        TS_ASSERT( inputQuery.constructNetworkLevelReasoner() );
+        NLR::NetworkLevelReasoner *nlr = inputQuery.getNetworkLevelReasoner();
+
+        // The gradient of the output is an input of the backward pass
+        const NLR::Layer *inputLayer = nlr->getLayer( 0 );
+        TS_ASSERT_EQUALS( inputLayer->getSize(), 2U );
+        TS_ASSERT_EQUALS( inputLayer->neuronToVariable( 0 ), 0U );
+        TS_ASSERT_EQUALS( inputLayer->neuronToVariable( 1 ), 7U );
+
+        // Every variable is in a layer, and x5 in a ReLU gradient layer
+        unsigned count = 0;
+        bool reluGradFound = false;
+        for ( unsigned i = 0; i < nlr->getNumberOfLayers(); ++i )
+        {
+            const NLR::Layer *layer = nlr->getLayer( i );
+            count += layer->getSize();
+            if ( layer->getLayerType() == NLR::Layer::RELU_GRAD )
+            {
+                TS_ASSERT_EQUALS( layer->getSize(), 1U );
+                TS_ASSERT_EQUALS( layer->neuronToVariable( 0 ), 5U );
+
+                List<NLR::NeuronIndex> sources = layer->getActivationSources( 0 );
+                TS_ASSERT_EQUALS( sources.size(), 2U );
+                TS_ASSERT_EQUALS( nlr->getLayer( sources.front()._layer )->
+                                  neuronToVariable( sources.front()._neuron ), 1U );
+                TS_ASSERT_EQUALS( nlr->getLayer( sources.back()._layer )->
+                                  neuronToVariable( sources.back()._neuron ), 6U );
+                reluGradFound = true;
+            }
+        }
+        TS_ASSERT_EQUALS( count, 8U );
+        TS_ASSERT( reluGradFound );
+        TS_ASSERT_EQUALS( nlr->getConstraintsInTopologicalOrder().size(), 2U );
+
+        // Both constraints survive a copy
+        InputQuery inputQuery2 = inputQuery;
+        TS_ASSERT_EQUALS( inputQuery2.getPiecewiseLinearConstraints().size(), 2U );
+        TS_ASSERT_EQUALS( inputQuery2.getNetworkLevelReasoner()->
+                          getConstraintsInTopologicalOrder().size(), 2U );
+    }
 };
 
 //
@@ -0,0 +1,492 @@
+/*********************                                                        */
+/*! \file Test_ReluGradConstraint.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Guy Katz
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include <cxxtest/TestSuite.h>
+
+#include "InputQuery.h"
+#include "MarabouError.h"
+#include "MockBoundManager.h"
+#include "MockErrno.h"
+#include "MockTableau.h"
+#include "PiecewiseLinearCaseSplit.h"
+#include "ReluGradConstraint.h"
+
+class MockForReluGradConstraint
+    : public MockErrno
+{
+public:
+};
+
+class ReluGradConstraintTestSuite : public CxxTest::TestSuite
+{
+public:
+    MockForReluGradConstraint *mock;
+
+    void setUp()
+    {
+        TS_ASSERT( mock = new MockForReluGradConstraint );
+    }
+
+    void tearDown()
+    {
+        TS_ASSERT_THROWS_NOTHING( delete mock );
+    }
+
+    void test_relu_grad_constraint()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        ReluGradConstraint reluGrad( b, gOut, gIn );
+        MockTableau tableau;
+        reluGrad.registerTableau( &tableau );
+
+        List<unsigned> participatingVariables = reluGrad.getParticipatingVariables();
+        TS_ASSERT_EQUALS( participatingVariables.size(), 3U );
+        auto it = participatingVariables.begin();
+        TS_ASSERT_EQUALS( *it, b );
+        ++it;
+        TS_ASSERT_EQUALS( *it, gOut );
+        ++it;
+        TS_ASSERT_EQUALS( *it, gIn );
+
+        TS_ASSERT( reluGrad.participatingVariable( b ) );
+        TS_ASSERT( reluGrad.participatingVariable( gOut ) );
+        TS_ASSERT( reluGrad.participatingVariable( gIn ) );
+        TS_ASSERT( !reluGrad.participatingVariable( 2 ) );
+
+        TS_ASSERT_THROWS_EQUALS( reluGrad.satisfied(),
+                                 const MarabouError &e,
+                                 e.getCode(),
+                                 MarabouError::PARTICIPATING_VARIABLE_MISSING_ASSIGNMENT );
+
+        // Active: the gradient is passed on
+        tableau.setValue( b, 2 );
+        tableau.setValue( gOut, -3 );
+        tableau.setValue( gIn, -3 );
+        TS_ASSERT( reluGrad.satisfied() );
+
+        tableau.setValue( gIn, 0 );
+        TS_ASSERT( !reluGrad.satisfied() );
+
+        // Inactive: the gradient is zero
+        tableau.setValue( b, -2 );
+        TS_ASSERT( reluGrad.satisfied() );
+
+        tableau.setValue( gIn, -3 );
+        TS_ASSERT( !reluGrad.satisfied() );
+
+        // At zero, both phases are allowed
+        tableau.setValue( b, 0 );
+        TS_ASSERT( reluGrad.satisfied() );
+
+        tableau.setValue( gIn, 0 );
+        TS_ASSERT( reluGrad.satisfied() );
+
+        tableau.setValue( gIn, 1 );
+        TS_ASSERT( !reluGrad.satisfied() );
+    }
+
+    void test_relu_grad_fixes()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        ReluGradConstraint reluGrad( b, gOut, gIn );
+        MockTableau tableau;
+        reluGrad.registerTableau( &tableau );
+
+        tableau.setValue( b, 2 );
+        tableau.setValue( gOut, -3 );
+        tableau.setValue( gIn, 1 );
+
+        List<PiecewiseLinearConstraint::Fix> fixes = reluGrad.getPossibleFixes();
+        TS_ASSERT_EQUALS( fixes.size(), 2U );
+        auto it = fixes.begin();
+        TS_ASSERT_EQUALS( it->_variable, gIn );
+        TS_ASSERT_EQUALS( it->_value, -3 );
+        ++it;
+        TS_ASSERT_EQUALS( it->_variable, gOut );
+        TS_ASSERT_EQUALS( it->_value, 1 );
+
+        tableau.setValue( b, -2 );
+
+        fixes = reluGrad.getPossibleFixes();
+        TS_ASSERT_EQUALS( fixes.size(), 1U );
+        TS_ASSERT_EQUALS( fixes.begin()->_variable, gIn );
+        TS_ASSERT_EQUALS( fixes.begin()->_value, 0 );
+    }
+
+    void test_relu_grad_case_splits()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        ReluGradConstraint reluGrad( b, gOut, gIn );
+
+        List<PiecewiseLinearCaseSplit> splits = reluGrad.getCaseSplits();
+        TS_ASSERT_EQUALS( splits.size(), 2U );
+
+        // Inactive first when there is no assignment
+        auto split = splits.begin();
+        List<Tightening> bounds = split->getBoundTightenings();
+        TS_ASSERT_EQUALS( bounds.size(), 3U );
+        auto bound = bounds.begin();
+        TS_ASSERT_EQUALS( bound->_variable, b );
+        TS_ASSERT_EQUALS( bound->_value, 0.0 );
+        TS_ASSERT_EQUALS( bound->_type, Tightening::UB );
+        ++bound;
+        TS_ASSERT_EQUALS( bound->_variable, gIn );
+        TS_ASSERT_EQUALS( bound->_value, 0.0 );
+        TS_ASSERT_EQUALS( bound->_type, Tightening::LB );
+        ++bound;
+        TS_ASSERT_EQUALS( bound->_variable, gIn );
+        TS_ASSERT_EQUALS( bound->_value, 0.0 );
+        TS_ASSERT_EQUALS( bound->_type, Tightening::UB );
+        TS_ASSERT( split->getEquations().empty() );
+
+        ++split;
+        bounds = split->getBoundTightenings();
+        TS_ASSERT_EQUALS( bounds.size(), 1U );
+        TS_ASSERT_EQUALS( bounds.begin()->_variable, b );
+        TS_ASSERT_EQUALS( bounds.begin()->_value, 0.0 );
+        TS_ASSERT_EQUALS( bounds.begin()->_type, Tightening::LB );
+
+        List<Equation> equations = split->getEquations();
+        TS_ASSERT_EQUALS( equations.size(), 1U );
+        Equation equation = *equations.begin();
+        TS_ASSERT_EQUALS( equation._type, Equation::EQ );
+        TS_ASSERT_EQUALS( equation._addends.size(), 2U );
+        TS_ASSERT_EQUALS( equation._scalar, 0.0 );
+        auto addend = equation._addends.begin();
+        TS_ASSERT_EQUALS( addend->_coefficient, 1.0 );
+        TS_ASSERT_EQUALS( addend->_variable, gIn );
+        ++addend;
+        TS_ASSERT_EQUALS( addend->_coefficient, -1.0 );
+        TS_ASSERT_EQUALS( addend->_variable, gOut );
+
+        TS_ASSERT_THROWS_EQUALS( reluGrad.getCaseSplit( SIGN_PHASE_POSITIVE ),
+                                 const MarabouError &e,
+                                 e.getCode(),
+                                 MarabouError::REQUESTED_NONEXISTENT_CASE_SPLIT );
+
+        // A positive assignment of b puts the active phase first
+        MockTableau tableau;
+        reluGrad.registerTableau( &tableau );
+        tableau.setValue( b, 1 );
+        List<PhaseStatus> cases = reluGrad.getAllCases();
+        TS_ASSERT_EQUALS( cases.size(), 2U );
+        TS_ASSERT_EQUALS( *cases.begin(), RELU_PHASE_ACTIVE );
+        TS_ASSERT_EQUALS( *cases.rbegin(), RELU_PHASE_INACTIVE );
+    }
+
+    void test_transform_to_use_aux_variables()
+    {
+        unsigned b = 0;
+        unsigned gOut = 1;
+        unsigned gIn = 2;
+
+        InputQuery inputQuery;
+        inputQuery.setNumberOfVariables( 3 );
+        inputQuery.setLowerBound( b, -1 );
+        inputQuery.setUpperBound( b, 1 );
+        inputQuery.setLowerBound( gOut, -2 );
+        inputQuery.setUpperBound( gOut, 3 );
+        inputQuery.setLowerBound( gIn, -2 );
+        inputQuery.setUpperBound( gIn, 3 );
+
+        ReluGradConstraint reluGrad( b, gOut, gIn );
+        TS_ASSERT( !reluGrad.auxVariableInUse() );
+        TS_ASSERT_THROWS_NOTHING( reluGrad.transformToUseAuxVariables( inputQuery ) );
+        TS_ASSERT( reluGrad.auxVariableInUse() );
+
+        unsigned aux = reluGrad.getAux();
+        TS_ASSERT_EQUALS( aux, 3U );
+        TS_ASSERT_EQUALS( inputQuery.getNumberOfVariables(), 4U );
+        TS_ASSERT_EQUALS( inputQuery.getLowerBound( aux ), -5 );
+        TS_ASSERT_EQUALS( inputQuery.getUpperBound( aux ), 5 );
+
+        // gIn - gOut - aux = 0
+        TS_ASSERT_EQUALS( inputQuery.getEquations().size(), 1U );
+        Equation equation = *inputQuery.getEquations().begin();
+        TS_ASSERT_EQUALS( equation._type, Equation::EQ );
+        TS_ASSERT_EQUALS( equation._scalar, 0.0 );
+        TS_ASSERT_EQUALS( equation._addends.size(), 3U );
+        auto addend = equation._addends.begin();
+        TS_ASSERT_EQUALS( addend->_coefficient, 1.0 );
+        TS_ASSERT_EQUALS( addend->_variable, gIn );
+        ++addend;
+        TS_ASSERT_EQUALS( addend->_coefficient, -1.0 );
+        TS_ASSERT_EQUALS( addend->_variable, gOut );
+        ++addend;
+        TS_ASSERT_EQUALS( addend->_coefficient, -1.0 );
+        TS_ASSERT_EQUALS( addend->_variable, aux );
+
+        List<unsigned> participatingVariables = reluGrad.getParticipatingVariables();
+        TS_ASSERT_EQUALS( participatingVariables,
+                          List<unsigned>( { b, gOut, gIn, aux } ) );
+
+        // The active split is now aux = 0, without equations
+        PiecewiseLinearCaseSplit activeSplit = reluGrad.getCaseSplit( RELU_PHASE_ACTIVE );
+        TS_ASSERT( activeSplit.getEquations().empty() );
+        List<Tightening> bounds = activeSplit.getBoundTightenings();
+        TS_ASSERT_EQUALS( bounds.size(), 3U );
+        auto bound = bounds.begin();
+        TS_ASSERT_EQUALS( *bound, Tightening( b, 0.0, Tightening::LB ) );
+        ++bound;
+        TS_ASSERT_EQUALS( *bound, Tightening( aux, 0.0, Tightening::LB ) );
+        ++bound;
+        TS_ASSERT_EQUALS( *bound, Tightening( aux, 0.0, Tightening::UB ) );
+
+        // A non-zero aux fixes the inactive phase
+        reluGrad.notifyLowerBound( aux, 1 );
+        TS_ASSERT( reluGrad.phaseFixed() );
+        TS_ASSERT_EQUALS( reluGrad.getPhaseStatus(), RELU_PHASE_INACTIVE );
+
+        // Transforming twice does nothing
+        TS_ASSERT_THROWS_NOTHING( reluGrad.transformToUseAuxVariables( inputQuery ) );
+        TS_ASSERT_EQUALS( inputQuery.getNumberOfVariables(), 4U );
+    }
+
+    void test_constraint_phase_gets_fixed()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        {
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.notifyUpperBound( b, -0.1 );
+            TS_ASSERT( reluGrad.phaseFixed() );
+            TS_ASSERT_EQUALS( reluGrad.getPhaseStatus(), RELU_PHASE_INACTIVE );
+            TS_ASSERT_THROWS_EQUALS( reluGrad.getCaseSplits(),
+                                     const MarabouError &e,
+                                     e.getCode(),
+                                     MarabouError::REQUESTED_CASE_SPLITS_FROM_FIXED_CONSTRAINT );
+        }
+
+        {
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.notifyLowerBound( b, 0.1 );
+            TS_ASSERT( reluGrad.phaseFixed() );
+            TS_ASSERT_EQUALS( reluGrad.getPhaseStatus(), RELU_PHASE_ACTIVE );
+        }
+
+        {
+            // A non-zero gradient can only flow through an active ReLU
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.notifyUpperBound( gIn, -0.5 );
+            TS_ASSERT( reluGrad.phaseFixed() );
+            TS_ASSERT_EQUALS( reluGrad.getPhaseStatus(), RELU_PHASE_ACTIVE );
+        }
+
+        {
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.notifyLowerBound( b, 0 );
+            reluGrad.notifyUpperBound( b, 0 );
+            reluGrad.notifyLowerBound( gOut, 1 );
+            reluGrad.notifyLowerBound( gIn, 0 );
+            TS_ASSERT( !reluGrad.phaseFixed() );
+        }
+    }
+
+    void initializeBounds( MockBoundManager &boundManager )
+    {
+        boundManager.initialize( 7 );
+        for ( unsigned i = 0; i < 7; ++i )
+        {
+            boundManager.setLowerBound( i, -10 );
+            boundManager.setUpperBound( i, 10 );
+        }
+        boundManager.clearTightenings();
+    }
+
+    void test_notify_bounds()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        List<Tightening> tightenings;
+
+        {
+            // Unfixed: gIn is between min( 0, lb(gOut) ) and max( 0, ub(gOut) )
+            MockBoundManager boundManager;
+            initializeBounds( boundManager );
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.registerBoundManager( &boundManager );
+
+            reluGrad.notifyLowerBound( b, -1 );
+            reluGrad.notifyUpperBound( b, 1 );
+            reluGrad.notifyLowerBound( gOut, 2 );
+            reluGrad.notifyUpperBound( gOut, 3 );
+            TS_ASSERT( !reluGrad.phaseFixed() );
+
+            boundManager.getTightenings( tightenings );
+            TS_ASSERT( tightenings.exists( Tightening( gIn, 0, Tightening::LB ) ) );
+            TS_ASSERT( tightenings.exists( Tightening( gIn, 3, Tightening::UB ) ) );
+            TS_ASSERT_EQUALS( boundManager.getLowerBound( gIn ), 0 );
+            TS_ASSERT_EQUALS( boundManager.getUpperBound( gIn ), 3 );
+        }
+
+        {
+            // Active: the bounds of gOut and gIn are copied to each other
+            MockBoundManager boundManager;
+            initializeBounds( boundManager );
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.registerBoundManager( &boundManager );
+
+            reluGrad.notifyLowerBound( gOut, -2 );
+            reluGrad.notifyUpperBound( gOut, 3 );
+            reluGrad.notifyLowerBound( b, 0.5 );
+            TS_ASSERT( reluGrad.phaseFixed() );
+
+            TS_ASSERT_EQUALS( boundManager.getLowerBound( gIn ), -2 );
+            TS_ASSERT_EQUALS( boundManager.getUpperBound( gIn ), 3 );
+
+            reluGrad.notifyUpperBound( gIn, 1 );
+            TS_ASSERT_EQUALS( boundManager.getUpperBound( gOut ), 1 );
+        }
+
+        {
+            // Inactive: the gradient is zero
+            MockBoundManager boundManager;
+            initializeBounds( boundManager );
+            ReluGradConstraint reluGrad( b, gOut, gIn );
+            reluGrad.registerBoundManager( &boundManager );
+
+            reluGrad.notifyLowerBound( gOut, -2 );
+            reluGrad.notifyUpperBound( gOut, 3 );
+            reluGrad.notifyUpperBound( b, -0.5 );
+            TS_ASSERT( reluGrad.phaseFixed() );
+
+            TS_ASSERT_EQUALS( boundManager.getLowerBound( gIn ), 0 );
+            TS_ASSERT_EQUALS( boundManager.getUpperBound( gIn ), 0 );
+            TS_ASSERT_EQUALS( boundManager.getLowerBound( gOut ), -2 );
+        }
+    }
+
+    void test_relu_grad_entailed_tightenings()
+    {
+        unsigned b = 1;
+        unsigned gOut = 4;
+        unsigned gIn = 6;
+
+        ReluGradConstraint reluGrad( b, gOut, gIn );
+        reluGrad.notifyLowerBound( b, -1 );
+        reluGrad.notifyUpperBound( b, 1 );
+        reluGrad.notifyLowerBound( gOut, -2 );
+        reluGrad.notifyUpperBound( gOut, -1 );
+        reluGrad.notifyLowerBound( gIn, -5 );
+        reluGrad.notifyUpperBound( gIn, 5 );
+
+        List<Tightening> entailedTightenings;
+        reluGrad.getEntailedTightenings( entailedTightenings );
+        TS_ASSERT_EQUALS( entailedTightenings.size(), 2U );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gIn, -2, Tightening::LB ) ) );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gIn, 0, Tightening::UB ) ) );
+
+        reluGrad.notifyUpperBound( gIn, -0.5 );
+        entailedTightenings.clear();
+        reluGrad.getEntailedTightenings( entailedTightenings );
+        TS_ASSERT_EQUALS( entailedTightenings.size(), 5U );
+        TS_ASSERT( entailedTightenings.exists( Tightening( b, 0, Tightening::LB ) ) );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gIn, -2, Tightening::LB ) ) );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gIn, -1, Tightening::UB ) ) );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gOut, -5, Tightening::LB ) ) );
+        TS_ASSERT( entailedTightenings.exists( Tightening( gOut, -0.5, Tightening::UB ) ) );
+    }
+
+    void test_relu_grad_duplicate_and_restore()
+    {
+        ReluGradConstraint *reluGrad1 = new ReluGradConstraint( 1, 4, 6 );
+        reluGrad1->setActiveConstraint( false );
+        reluGrad1->notifyUpperBound( 1, -1 );
+
+        PiecewiseLinearConstraint *reluGrad2 = reluGrad1->duplicateConstraint();
+        TS_ASSERT( !reluGrad2->isActive() );
+        TS_ASSERT( reluGrad2->phaseFixed() );
+
+        ReluGradConstraint *reluGrad3 = new ReluGradConstraint( 1, 4, 6 );
+        reluGrad3->restoreState( reluGrad1 );
+        TS_ASSERT( !reluGrad3->isActive() );
+        TS_ASSERT( reluGrad3->phaseFixed() );
+
+        TS_ASSERT_THROWS_NOTHING( delete reluGrad3 );
+        TS_ASSERT_THROWS_NOTHING( delete reluGrad2 );
+        TS_ASSERT_THROWS_NOTHING( delete reluGrad1 );
+    }
+
+    void test_update_variable_index()
+    {
+        // gOut is renamed to the old index of gIn, as the preprocessor
+        // does after eliminating variables
+        ReluGradConstraint reluGrad( 1, 6, 4 );
+        Map<unsigned, unsigned> oldIndexToNewIndex;
+        oldIndexToNewIndex[1] = 0;
+        oldIndexToNewIndex[4] = 3;
+        oldIndexToNewIndex[6] = 4;
+
+        for ( unsigned variable : reluGrad.getParticipatingVariables() )
+            reluGrad.updateVariableIndex( variable, oldIndexToNewIndex[variable] );
+
+        TS_ASSERT_EQUALS( reluGrad.getB(), 0U );
+        TS_ASSERT_EQUALS( reluGrad.getGOut(), 4U );
+        TS_ASSERT_EQUALS( reluGrad.getGIn(), 3U );
+    }
+
+    void test_serialize_and_unserialize()
+    {
+        ReluGradConstraint originalReluGrad( 42, 7, 13 );
+        String originalSerialized = originalReluGrad.serializeToString();
+        TS_ASSERT_EQUALS( originalSerialized, String( "reluGrad,13,7,42" ) );
+
+        ReluGradConstraint recoveredReluGrad( originalSerialized );
+        TS_ASSERT_EQUALS( recoveredReluGrad.getB(), 42U );
+        TS_ASSERT_EQUALS( recoveredReluGrad.getGOut(), 7U );
+        TS_ASSERT_EQUALS( recoveredReluGrad.getGIn(), 13U );
+        TS_ASSERT_EQUALS( recoveredReluGrad.getType(), RELU_GRAD );
+        TS_ASSERT_EQUALS( originalReluGrad.serializeToString(),
+                          recoveredReluGrad.serializeToString() );
+    }
+
+    void test_serialize_and_unserialize_with_aux()
+    {
+        InputQuery inputQuery;
+        inputQuery.setNumberOfVariables( 43 );
+
+        ReluGradConstraint originalReluGrad( 42, 7, 13 );
+        originalReluGrad.transformToUseAuxVariables( inputQuery );
+        String originalSerialized = originalReluGrad.serializeToString();
+        TS_ASSERT_EQUALS( originalSerialized, String( "reluGrad,13,7,42,43" ) );
+
+        ReluGradConstraint recoveredReluGrad( originalSerialized );
+        TS_ASSERT( recoveredReluGrad.auxVariableInUse() );
+        TS_ASSERT_EQUALS( recoveredReluGrad.getAux(), 43U );
+        TS_ASSERT_EQUALS( originalReluGrad.serializeToString(),
+                          recoveredReluGrad.serializeToString() );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../../.. "
+// tags-file-name: "../../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -0,0 +1,166 @@
+/*********************                                                        */
+/*! \file Test_WorkStealingQueue.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include <cxxtest/TestSuite.h>
+
+#include "MStringf.h"
+#include "SubQuery.h"
+#include "WorkStealingQueue.h"
+
+#include <atomic>
+#include <thread>
+
+class WorkStealingQueueTestSuite : public CxxTest::TestSuite
+{
+public:
+
+    SubQuery *createSubQuery( const String &queryId, unsigned depth )
+    {
+        SubQuery *subQuery = new SubQuery;
+        subQuery->_queryId = queryId;
+        subQuery->_split = std::unique_ptr<PiecewiseLinearCaseSplit>
+            ( new PiecewiseLinearCaseSplit );
+        subQuery->_timeoutInSeconds = 5;
+        subQuery->_depth = depth;
+        return subQuery;
+    }
+
+    String popQueryId( WorkStealingQueue &queue, unsigned workerId )
+    {
+        SubQuery *subQuery = NULL;
+        TS_ASSERT( queue.pop( workerId, subQuery ) );
+        String queryId = subQuery->_queryId;
+        delete subQuery;
+        return queryId;
+    }
+
+    void test_owner_pops_last_pushed()
+    {
+        WorkStealingQueue queue( 2 );
+        TS_ASSERT( queue.empty() );
+
+        TS_ASSERT( queue.push( 0, createSubQuery( "1", 1 ) ) );
+        TS_ASSERT( queue.push( 0, createSubQuery( "1-1", 2 ) ) );
+        TS_ASSERT( queue.push( 0, createSubQuery( "1-2", 2 ) ) );
+        TS_ASSERT_EQUALS( queue.size(), 3U );
+
+        TS_ASSERT_EQUALS( popQueryId( queue, 0 ), "1-2" );
+        TS_ASSERT_EQUALS( popQueryId( queue, 0 ), "1-1" );
+        TS_ASSERT_EQUALS( popQueryId( queue, 0 ), "1" );
+        TS_ASSERT_EQUALS( queue.getNumberOfSteals( 0 ), 0U );
+
+        SubQuery *subQuery = NULL;
+        TS_ASSERT( !queue.pop( 0, subQuery ) );
+        TS_ASSERT( queue.empty() );
+
+        // Pushing to a worker that does not exist fails
+        subQuery = createSubQuery( "2", 1 );
+        TS_ASSERT( !queue.push( 2, subQuery ) );
+        delete subQuery;
+    }
+
+    void test_steal_shallowest()
+    {
+        WorkStealingQueue queue( 3 );
+
+        //  Worker 0: 2-1-1 (depth 3), 2-1-2 (depth 3)
+        //  Worker 1: 1-1 (depth 2), 1-2 (depth 2)
+        //  Worker 2: nothing
+        //
+        //  Worker 2 steals from the front of the deque whose front is the
+        //  shallowest, i.e., 1-1, 1-2 and then 2-1-1.
+        TS_ASSERT( queue.push( 0, createSubQuery( "2-1-1", 3 ) ) );
+        TS_ASSERT( queue.push( 0, createSubQuery( "2-1-2", 3 ) ) );
+        TS_ASSERT( queue.push( 1, createSubQuery( "1-1", 2 ) ) );
+        TS_ASSERT( queue.push( 1, createSubQuery( "1-2", 2 ) ) );
+
+        TS_ASSERT_EQUALS( popQueryId( queue, 2 ), "1-1" );
+        TS_ASSERT_EQUALS( popQueryId( queue, 2 ), "1-2" );
+        TS_ASSERT_EQUALS( popQueryId( queue, 2 ), "2-1-1" );
+        TS_ASSERT_EQUALS( queue.getNumberOfSteals( 2 ), 3U );
+
+        // The owner still has its own last subquery
+        TS_ASSERT_EQUALS( popQueryId( queue, 0 ), "2-1-2" );
+        TS_ASSERT_EQUALS( queue.getNumberOfSteals( 0 ), 0U );
+        TS_ASSERT( queue.empty() );
+    }
+
+    void test_round_robin_push_and_pop_without_worker()
+    {
+        WorkStealingQueue queue( 2 );
+
+        // Subqueries pushed without a worker are spread over the deques
+        TS_ASSERT( queue.push( createSubQuery( "1", 1 ) ) );
+        TS_ASSERT( queue.push( createSubQuery( "2", 1 ) ) );
+        TS_ASSERT( queue.push( createSubQuery( "3", 1 ) ) );
+        TS_ASSERT_EQUALS( popQueryId( queue, 1 ), "2" );
+        TS_ASSERT_EQUALS( queue.getNumberOfSteals( 1 ), 0U );
+
+        // Popping without a worker takes the shallowest front
+        SubQuery *subQuery = NULL;
+        TS_ASSERT( queue.pop( subQuery ) );
+        TS_ASSERT_EQUALS( subQuery->_queryId, "1" );
+        delete subQuery;
+        TS_ASSERT( queue.pop( subQuery ) );
+        TS_ASSERT_EQUALS( subQuery->_queryId, "3" );
+        delete subQuery;
+        TS_ASSERT( !queue.pop( subQuery ) );
+    }
+
+    void test_concurrent_pops()
+    {
+        //  Each subquery is popped by exactly one of the workers
+        unsigned numWorkers = 4;
+        unsigned numSubQueries = 1000;
+        WorkStealingQueue queue( numWorkers );
+        for ( unsigned i = 0; i < numSubQueries; ++i )
+            TS_ASSERT( queue.push( 0, createSubQuery( Stringf( "%u", i ), i % 5 ) ) );
+
+        std::atomic_uint numPopped( 0 );
+        std::list<std::thread> threads;
+        for ( unsigned workerId = 0; workerId < numWorkers; ++workerId )
+        {
+            threads.push_back( std::thread( [&queue, &numPopped, workerId]()
+            {
+                SubQuery *subQuery = NULL;
+                while ( queue.pop( workerId, subQuery ) )
+                {
+                    ++numPopped;
+                    delete subQuery;
+                }
+            } ) );
+        }
+        for ( auto &thread : threads )
+            thread.join();
+
+        TS_ASSERT_EQUALS( numPopped.load(), numSubQueries );
+        TS_ASSERT( queue.empty() );
+
+        // Only the owner of the subqueries did not steal any
+        unsigned numStolen = 0;
+        for ( unsigned workerId = 1; workerId < numWorkers; ++workerId )
+            numStolen += queue.getNumberOfSteals( workerId );
+        TS_ASSERT_EQUALS( queue.getNumberOfSteals( 0 ), 0U );
+        TS_ASSERT( numStolen <= numSubQueries );
+    }
+};
+
+//
+// Local Variables:
+// compile-command: "make -C ../../.. "
+// tags-file-name: "../../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -20,6 +20,7 @@
 #include "DeepPolyMaxPoolElement.h"
 #include "DeepPolyWeightedSumElement.h"
 #include "DeepPolyReLUElement.h"
+#include "DeepPolyReluGradElement.h"
 #include "DeepPolySigmoidElement.h"
 #include "DeepPolySignElement.h"
 #include "FloatUtils.h"
@@ -213,6 +214,8 @@ DeepPolyElement *DeepPolyAnalysis::createDeepPolyElement( Layer *layer )
         deepPolyElement = new DeepPolyMaxPoolElement( layer );
     else if ( type == Layer::SIGMOID )
         deepPolyElement = new DeepPolySigmoidElement( layer );
+    else if ( type == Layer::RELU_GRAD )
+        deepPolyElement = new DeepPolyReluGradElement( layer );
     else
         throw NLRError( NLRError::LAYER_TYPE_NOT_SUPPORTED,
                         Stringf( "Layer %u not yet supported",
@@ -0,0 +1,284 @@
+/*********************                                                        */
+/*! \file DeepPolyReluGradElement.cpp
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Andrew Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** [[ Add lengthier description here ]]
+
+**/
+
+#include "DeepPolyReluGradElement.h"
+#include "FloatUtils.h"
+
+namespace NLR {
+
+DeepPolyReluGradElement::DeepPolyReluGradElement( Layer *layer )
+{
+    _layer = layer;
+    _size = layer->getSize();
+    _layerIndex = layer->getLayerIndex();
+
+    const Map<unsigned, unsigned> &sourceLayers = _layer->getSourceLayers();
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        unsigned gOutLayer = _layer->getActivationSources( i ).back()._layer;
+        _gOutLayers[gOutLayer] = sourceLayers[gOutLayer];
+    }
+}
+
+DeepPolyReluGradElement::~DeepPolyReluGradElement()
+{
+    freeMemoryIfNeeded();
+}
+
+const Map<unsigned, unsigned> &DeepPolyReluGradElement::getPredecessorIndices() const
+{
+    return _gOutLayers;
+}
+
+void DeepPolyReluGradElement::execute( const Map<unsigned, DeepPolyElement *>
+                                       &deepPolyElementsBefore )
+{
+    log( "Executing..." );
+    ASSERT( hasPredecessor() );
+    allocateMemory();
+
+    // Update the symbolic and concrete upper- and lower- bounds
+    // of each neuron
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        List<NeuronIndex> sources = _layer->getActivationSources( i );
+        NeuronIndex bIndex = sources.front();
+        NeuronIndex gOutIndex = sources.back();
+
+        DeepPolyElement *bElement = deepPolyElementsBefore[bIndex._layer];
+        double bLb = bElement->getLowerBound( bIndex._neuron );
+        double bUb = bElement->getUpperBound( bIndex._neuron );
+
+        DeepPolyElement *gOutElement = deepPolyElementsBefore[gOutIndex._layer];
+        double gOutLb = gOutElement->getLowerBound( gOutIndex._neuron );
+        double gOutUb = gOutElement->getUpperBound( gOutIndex._neuron );
+
+        if ( FloatUtils::isPositive( bLb ) ||
+             FloatUtils::isPositive( getLowerBoundFromLayer( i ) ) ||
+             FloatUtils::isNegative( getUpperBoundFromLayer( i ) ) )
+        {
+            // Phase active (a non-zero gradient also implies it)
+            // Symbolic bound: gOut <= gIn <= gOut
+            // Concrete bound: lb_gOut <= gIn <= ub_gOut
+            _symbolicLb[i] = 1;
+            _symbolicLowerBias[i] = 0;
+            _lb[i] = gOutLb;
+
+            _symbolicUb[i] = 1;
+            _symbolicUpperBias[i] = 0;
+            _ub[i] = gOutUb;
+        }
+        else if ( FloatUtils::isNegative( bUb ) )
+        {
+            // Phase inactive
+            // Symbolic bound: 0 <= gIn <= 0
+            // Concrete bound: 0 <= gIn <= 0
+            _symbolicLb[i] = 0;
+            _symbolicLowerBias[i] = 0;
+            _lb[i] = 0;
+
+            _symbolicUb[i] = 0;
+            _symbolicUpperBias[i] = 0;
+            _ub[i] = 0;
+        }
+        else if ( gOutLb >= 0 )
+        {
+            // Phase not fixed, gOut non-negative
+            // Symbolic bound: 0 <= gIn <= gOut
+            // Concrete bound: 0 <= gIn <= ub_gOut
+            _symbolicLb[i] = 0;
+            _symbolicLowerBias[i] = 0;
+            _lb[i] = 0;
+
+            _symbolicUb[i] = 1;
+            _symbolicUpperBias[i] = 0;
+            _ub[i] = gOutUb;
+        }
+        else if ( gOutUb <= 0 )
+        {
+            // Phase not fixed, gOut non-positive
+            // Symbolic bound: gOut <= gIn <= 0
+            // Concrete bound: lb_gOut <= gIn <= 0
+            _symbolicLb[i] = 1;
+            _symbolicLowerBias[i] = 0;
+            _lb[i] = gOutLb;
+
+            _symbolicUb[i] = 0;
+            _symbolicUpperBias[i] = 0;
+            _ub[i] = 0;
+        }
+        else if ( FloatUtils::isFinite( gOutLb ) && FloatUtils::isFinite( gOutUb ) )
+        {
+            // Phase not fixed, l < gOut < u. The convex hull of the phases:
+            // Symbolic lower bound: gIn >= l * ( u - gOut ) / ( u - l )
+            // Symbolic upper bound: gIn <= u * ( gOut - l ) / ( u - l )
+            // Concrete bound: l <= gIn <= u
+            double width = gOutUb - gOutLb;
+            _symbolicLb[i] = -gOutLb / width;
+            _symbolicLowerBias[i] = gOutLb * gOutUb / width;
+            _lb[i] = gOutLb;
+
+            _symbolicUb[i] = gOutUb / width;
+            _symbolicUpperBias[i] = -gOutLb * gOutUb / width;
+            _ub[i] = gOutUb;
+        }
+        else
+        {
+            // Phase not fixed and gOut unbounded, only concrete bounds
+            _symbolicLb[i] = 0;
+            _symbolicLowerBias[i] = gOutLb;
+            _lb[i] = gOutLb;
+
+            _symbolicUb[i] = 0;
+            _symbolicUpperBias[i] = gOutUb;
+            _ub[i] = gOutUb;
+        }
+        log( Stringf( "Neuron%u LB: %f gOut + %f, UB: %f gOut + %f",
+                      i, _symbolicLb[i], _symbolicLowerBias[i],
+                      _symbolicUb[i], _symbolicUpperBias[i] ) );
+        log( Stringf( "Neuron%u LB: %f, UB: %f", i, _lb[i], _ub[i] ) );
+    }
+    log( "Executing - done" );
+}
+
+void DeepPolyReluGradElement::symbolicBoundInTermsOfPredecessor
+( const double *symbolicLb, const double*symbolicUb, double
+  *symbolicLowerBias, double *symbolicUpperBias, double
+  *symbolicLbInTermsOfPredecessor, double *symbolicUbInTermsOfPredecessor,
+  unsigned targetLayerSize, DeepPolyElement *predecessor )
+{
+    log( Stringf( "Computing symbolic bounds with respect to layer %u...",
+                  predecessor->getLayerIndex() ) );
+
+    /*
+      We have the symbolic bound of the target layer in terms of the
+      gradients gIn, the goal is to compute the symbolic bound of the
+      target layer in terms of the gradients gOut in the predecessor.
+
+      The gOut variables may be spread over several predecessors, and
+      only one of them is given the biases (the others are residuals).
+      The biases of all the neurons are therefore added whenever they
+      are given, and the coefficients only for the neurons whose gOut
+      is in the predecessor.
+    */
+    unsigned predecessorIndex = predecessor->getLayerIndex();
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        NeuronIndex gOutIndex = _layer->getActivationSources( i ).back();
+        bool inPredecessor = ( gOutIndex._layer == predecessorIndex );
+        if ( !inPredecessor && !symbolicLowerBias )
+            continue;
+
+        // Symbolic bounds of gIn in terms of gOut
+        // coeffLb * gOut + lowerBias <= gIn <= coeffUb * gOut + upperBias
+        double coeffLb = _symbolicLb[i];
+        double coeffUb = _symbolicUb[i];
+        double lowerBias = _symbolicLowerBias[i];
+        double upperBias = _symbolicUpperBias[i];
+
+        // Substitute gOut for gIn
+        for ( unsigned j = 0; j < targetLayerSize; ++j )
+        {
+            unsigned newIndex = gOutIndex._neuron * targetLayerSize + j;
+            unsigned oldIndex = i * targetLayerSize + j;
+
+            // Update the symbolic lower bound
+            double weightLb = symbolicLb[oldIndex];
+            if ( weightLb >= 0 )
+            {
+                if ( inPredecessor )
+                    symbolicLbInTermsOfPredecessor[newIndex] += weightLb * coeffLb;
+                if ( symbolicLowerBias )
+                    symbolicLowerBias[j] += weightLb * lowerBias;
+            }
+            else
+            {
+                if ( inPredecessor )
+                    symbolicLbInTermsOfPredecessor[newIndex] += weightLb * coeffUb;
+                if ( symbolicLowerBias )
+                    symbolicLowerBias[j] += weightLb * upperBias;
+            }
+
+            // Update the symbolic upper bound
+            double weightUb = symbolicUb[oldIndex];
+            if ( weightUb >= 0 )
+            {
+                if ( inPredecessor )
+                    symbolicUbInTermsOfPredecessor[newIndex] += weightUb * coeffUb;
+                if ( symbolicUpperBias )
+                    symbolicUpperBias[j] += weightUb * upperBias;
+            }
+            else
+            {
+                if ( inPredecessor )
+                    symbolicUbInTermsOfPredecessor[newIndex] += weightUb * coeffLb;
+                if ( symbolicUpperBias )
+                    symbolicUpperBias[j] += weightUb * lowerBias;
+            }
+        }
+    }
+}
+
+void DeepPolyReluGradElement::allocateMemory()
+{
+    freeMemoryIfNeeded();
+
+    DeepPolyElement::allocateMemory();
+
+    _symbolicLb = new double[_size];
+    _symbolicUb = new double[_size];
+
+    std::fill_n( _symbolicLb, _size, 0 );
+    std::fill_n( _symbolicUb, _size, 0 );
+
+    _symbolicLowerBias = new double[_size];
+    _symbolicUpperBias = new double[_size];
+
+    std::fill_n( _symbolicLowerBias, _size, 0 );
+    std::fill_n( _symbolicUpperBias, _size, 0 );
+}
+
+void DeepPolyReluGradElement::freeMemoryIfNeeded()
+{
+    DeepPolyElement::freeMemoryIfNeeded();
+    if ( _symbolicLb )
+    {
+        delete[] _symbolicLb;
+        _symbolicLb = NULL;
+    }
+    if ( _symbolicUb )
+    {
+        delete[] _symbolicUb;
+        _symbolicUb = NULL;
+    }
+    if ( _symbolicLowerBias )
+    {
+        delete[] _symbolicLowerBias;
+        _symbolicLowerBias = NULL;
+    }
+    if ( _symbolicUpperBias )
+    {
+        delete[] _symbolicUpperBias;
+        _symbolicUpperBias = NULL;
+    }
+}
+
+void DeepPolyReluGradElement::log( const String &message )
+{
+    if ( GlobalConfiguration::NETWORK_LEVEL_REASONER_LOGGING )
+        printf( "DeepPolyReluGradElement: %s\n", message.ascii() );
+}
+
+} // namespace NLR
@@ -0,0 +1,61 @@
+/*********************                                                        */
+/*! \file DeepPolyReluGradElement.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Haoze Andrew Wu
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** The abstract element of a layer of ReLU gradient gates,
+ ** gIn = ReLU'( b ) * gOut. The symbolic bounds of each gIn are given in
+ ** terms of gOut only, so the back substitution follows the backward
+ ** pass, and the layers of the b variables are not predecessors of the
+ ** element.
+
+**/
+
+#ifndef __DeepPolyReluGradElement_h__
+#define __DeepPolyReluGradElement_h__
+
+#include "DeepPolyElement.h"
+#include "Layer.h"
+#include "MStringf.h"
+#include "NLRError.h"
+#include <climits>
+
+namespace NLR {
+
+class DeepPolyReluGradElement : public DeepPolyElement
+{
+public:
+    DeepPolyReluGradElement( Layer *layer );
+    ~DeepPolyReluGradElement();
+
+    void execute( const Map<unsigned, DeepPolyElement *>
+                  &deepPolyElementsBefore );
+
+    void symbolicBoundInTermsOfPredecessor
+    ( const double *symbolicLb, const double*symbolicUb, double
+      *symbolicLowerBias, double *symbolicUpperBias, double
+      *symbolicLbInTermsOfPredecessor, double *symbolicUbInTermsOfPredecessor,
+      unsigned targetLayerSize, DeepPolyElement *predecessor );
+
+    /*
+      The layers of the gOut variables.
+    */
+    const Map<unsigned, unsigned> &getPredecessorIndices() const;
+
+private:
+    Map<unsigned, unsigned> _gOutLayers;
+
+    void allocateMemory();
+    void freeMemoryIfNeeded();
+    void log( const String &message );
+};
+
+} // namespace NLR
+
+#endif // __DeepPolyReluGradElement_h__
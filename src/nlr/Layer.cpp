@@ -206,6 +206,19 @@ void Layer::computeAssignment()
         }
     }
 
+    else if ( _type == RELU_GRAD )
+    {
+        for ( unsigned i = 0; i < _size; ++i )
+        {
+            NeuronIndex bIndex = *_neuronToActivationSources[i].begin();
+            NeuronIndex gOutIndex = _neuronToActivationSources[i].back();
+            double bValue = _layerOwner->getLayer( bIndex._layer )->getAssignment( bIndex._neuron );
+            double gOutValue = _layerOwner->getLayer( gOutIndex._layer )->getAssignment( gOutIndex._neuron );
+
+            _assignment[i] = FloatUtils::isPositive( bValue ) ? gOutValue : 0;
+        }
+    }
+
     else
     {
         printf( "Error! Neuron type %u unsupported\n", _type );
@@ -226,6 +239,13 @@ void Layer::computeSimulations()
     unsigned simulationSize = Options::get()->getInt( Options::NUMBER_OF_SIMULATIONS );
     if ( _type == WEIGHTED_SUM )
     {
+        // Initialize to bias
+        for ( unsigned i = 0; i < _size; i++ )
+        {
+            for ( unsigned j = 0; j < simulationSize; ++j )
+                _simulations[i][j] = _bias[i];
+        }
+
         // Process each of the source layers
         for ( auto &sourceLayerEntry : _sourceLayers )
         {
@@ -235,12 +255,6 @@ void Layer::computeSimulations()
             unsigned sourceSize = sourceLayerEntry.second;
             const double *weights = _layerToWeights[sourceLayerEntry.first];
 
-            for ( unsigned i = 0; i < _size; i++ )
-            {
-                for ( unsigned j = 0; j < simulationSize; ++j )
-                    _simulations[i][j] = _bias[i];
-            }
-
             for ( unsigned i = 0; i < sourceSize; ++i )
                 for ( unsigned j = 0; j < simulationSize; ++j )
                     for ( unsigned k = 0; k < _size; ++k )
@@ -305,6 +319,18 @@ void Layer::computeSimulations()
                 _simulations[i][j] = 1 / ( 1 + std::exp( -simulations.get( j ) ) );
         }
     }
+    else if ( _type == RELU_GRAD )
+    {
+        for ( unsigned i = 0; i < _size; ++i )
+        {
+            NeuronIndex bIndex = *_neuronToActivationSources[i].begin();
+            NeuronIndex gOutIndex = _neuronToActivationSources[i].back();
+            const Vector<double> &bSimulations = ( *( _layerOwner->getLayer( bIndex._layer )->getSimulations() ) ).get( bIndex._neuron );
+            const Vector<double> &gOutSimulations = ( *( _layerOwner->getLayer( gOutIndex._layer )->getSimulations() ) ).get( gOutIndex._neuron );
+            for ( unsigned j = 0; j < simulationSize; ++j )
+                _simulations[i][j] = FloatUtils::isPositive( bSimulations.get( j ) ) ? gOutSimulations.get( j ) : 0;
+        }
+    }
     else
     {
         printf( "Error! Neuron type %u unsupported\n", _type );
@@ -424,7 +450,8 @@ double *Layer::getBiases() const
 
 void Layer::addActivationSource( unsigned sourceLayer, unsigned sourceNeuron, unsigned targetNeuron )
 {
-    ASSERT( _type == RELU || _type == ABSOLUTE_VALUE || _type == MAX || _type == SIGN || _type == SIGMOID );
+    ASSERT( _type == RELU || _type == ABSOLUTE_VALUE || _type == MAX || _type == SIGN || _type == SIGMOID ||
+            _type == RELU_GRAD );
 
     if ( !_neuronToActivationSources.exists( targetNeuron ) )
         _neuronToActivationSources[targetNeuron] = List<NeuronIndex>();
@@ -434,6 +461,8 @@ void Layer::addActivationSource( unsigned sourceLayer, unsigned sourceNeuron, un
     DEBUG({
             if ( _type == RELU || _type == ABSOLUTE_VALUE || _type == SIGN )
                 ASSERT( _neuronToActivationSources[targetNeuron].size() == 1 );
+            if ( _type == RELU_GRAD )
+                ASSERT( _neuronToActivationSources[targetNeuron].size() <= 2 );
         });
 }
 
@@ -558,6 +587,10 @@ void Layer::computeIntervalArithmeticBounds()
         computeIntervalArithmeticBoundsForSign();
         break;
 
+    case RELU_GRAD:
+        computeIntervalArithmeticBoundsForReluGrad();
+        break;
+
     case MAX:
 
     default:
@@ -745,6 +778,57 @@ void Layer::computeIntervalArithmeticBoundsForSign()
     }
 }
 
+void Layer::computeIntervalArithmeticBoundsForReluGrad()
+{
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        if ( _eliminatedNeurons.exists( i ) )
+            continue;
+
+        NeuronIndex bIndex = _neuronToActivationSources[i].front();
+        NeuronIndex gOutIndex = _neuronToActivationSources[i].back();
+        const Layer *bLayer = _layerOwner->getLayer( bIndex._layer );
+        const Layer *gOutLayer = _layerOwner->getLayer( gOutIndex._layer );
+
+        double bLb = bLayer->getLb( bIndex._neuron );
+        double bUb = bLayer->getUb( bIndex._neuron );
+        double gOutLb = gOutLayer->getLb( gOutIndex._neuron );
+        double gOutUb = gOutLayer->getUb( gOutIndex._neuron );
+
+        double lb;
+        double ub;
+        if ( FloatUtils::isPositive( bLb ) )
+        {
+            // Active phase, gIn = gOut
+            lb = gOutLb;
+            ub = gOutUb;
+        }
+        else if ( FloatUtils::isNegative( bUb ) )
+        {
+            // Inactive phase, gIn = 0
+            lb = 0;
+            ub = 0;
+        }
+        else
+        {
+            // gIn is either gOut or 0
+            lb = FloatUtils::min( gOutLb, 0 );
+            ub = FloatUtils::max( gOutUb, 0 );
+        }
+
+        if ( lb > _lb[i] )
+        {
+            _lb[i] = lb;
+            _layerOwner->receiveTighterBound( Tightening( _neuronToVariable[i], _lb[i], Tightening::LB ) );
+        }
+        if ( ub < _ub[i] )
+        {
+            _ub[i] = ub;
+            _layerOwner->receiveTighterBound( Tightening( _neuronToVariable[i], _ub[i], Tightening::UB ) );
+        }
+    }
+}
+
 void Layer::computeSymbolicBounds()
 {
     switch ( _type )
@@ -770,6 +854,10 @@ void Layer::computeSymbolicBounds()
         computeSymbolicBoundsForAbsoluteValue();
         break;
 
+    case RELU_GRAD:
+        computeSymbolicBoundsForReluGrad();
+        break;
+
     default:
         computeSymbolicBoundsDefault();
         break;
@@ -1319,6 +1407,148 @@ void Layer::computeSymbolicBoundsForAbsoluteValue()
     }
 }
 
+void Layer::computeSymbolicBoundsForReluGrad()
+{
+    std::fill_n( _symbolicLb, _size * _inputLayerSize, 0 );
+    std::fill_n( _symbolicUb, _size * _inputLayerSize, 0 );
+
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        if ( _eliminatedNeurons.exists( i ) )
+        {
+            _symbolicLowerBias[i] = _eliminatedNeurons[i];
+            _symbolicUpperBias[i] = _eliminatedNeurons[i];
+
+            _symbolicLbOfLb[i] = _eliminatedNeurons[i];
+            _symbolicUbOfLb[i] = _eliminatedNeurons[i];
+            _symbolicLbOfUb[i] = _eliminatedNeurons[i];
+            _symbolicUbOfUb[i] = _eliminatedNeurons[i];
+        }
+    }
+
+    for ( unsigned i = 0; i < _size; ++i )
+    {
+        if ( _eliminatedNeurons.exists( i ) )
+            continue;
+
+        ASSERT( _neuronToActivationSources.exists( i ) );
+        NeuronIndex bIndex = _neuronToActivationSources[i].front();
+        NeuronIndex gOutIndex = _neuronToActivationSources[i].back();
+        const Layer *bLayer = _layerOwner->getLayer( bIndex._layer );
+        const Layer *gOutLayer = _layerOwner->getLayer( gOutIndex._layer );
+
+        double bLb = bLayer->getLb( bIndex._neuron );
+        double bUb = bLayer->getUb( bIndex._neuron );
+        double gOutLb = gOutLayer->getLb( gOutIndex._neuron );
+        double gOutUb = gOutLayer->getUb( gOutIndex._neuron );
+
+        /*
+          The gradient is bounded by linear functions of gOut, with
+          non-negative coefficients:
+
+            coeffLb * gOut + lowerBias <= gIn <= coeffUb * gOut + upperBias
+
+          The symbolic bounds of gIn are then obtained from those of
+          gOut. A non-zero gIn also fixes the phase to active.
+        */
+        double coeffLb = 0;
+        double coeffUb = 0;
+        double lowerBias = 0;
+        double upperBias = 0;
+
+        if ( FloatUtils::isPositive( bLb ) || FloatUtils::isPositive( _lb[i] ) ||
+             FloatUtils::isNegative( _ub[i] ) )
+        {
+            // Active phase, gIn = gOut
+            coeffLb = 1;
+            coeffUb = 1;
+        }
+        else if ( FloatUtils::isNegative( bUb ) )
+        {
+            // Inactive phase, gIn = 0
+        }
+        else if ( gOutLb >= 0 )
+        {
+            // 0 <= gIn <= gOut
+            coeffUb = 1;
+        }
+        else if ( gOutUb <= 0 )
+        {
+            // gOut <= gIn <= 0
+            coeffLb = 1;
+        }
+        else if ( FloatUtils::isFinite( gOutLb ) && FloatUtils::isFinite( gOutUb ) )
+        {
+            // The convex hull of the two phases, for l < gOut < u:
+            // l * ( u - gOut ) / ( u - l ) <= gIn <= u * ( gOut - l ) / ( u - l )
+            coeffLb = -gOutLb / ( gOutUb - gOutLb );
+            lowerBias = gOutLb * gOutUb / ( gOutUb - gOutLb );
+            coeffUb = gOutUb / ( gOutUb - gOutLb );
+            upperBias = -gOutLb * coeffUb;
+        }
+        else
+        {
+            // Only the concrete bounds are known
+            lowerBias = gOutLb;
+            upperBias = gOutUb;
+        }
+
+        unsigned gOutLayerSize = gOutLayer->getSize();
+        unsigned gOutNeuron = gOutIndex._neuron;
+
+        if ( coeffLb != 0 )
+        {
+            const double *gOutSymbolicLb = gOutLayer->getSymbolicLb();
+            for ( unsigned j = 0; j < _inputLayerSize; ++j )
+                _symbolicLb[j * _size + i] = coeffLb * gOutSymbolicLb[j * gOutLayerSize + gOutNeuron];
+
+            _symbolicLowerBias[i] = coeffLb * gOutLayer->getSymbolicLowerBias()[gOutNeuron] + lowerBias;
+            _symbolicLbOfLb[i] = coeffLb * gOutLayer->getSymbolicLbOfLb( gOutNeuron ) + lowerBias;
+            _symbolicUbOfLb[i] = coeffLb * gOutLayer->getSymbolicUbOfLb( gOutNeuron ) + lowerBias;
+        }
+        else
+        {
+            _symbolicLowerBias[i] = lowerBias;
+            _symbolicLbOfLb[i] = lowerBias;
+            _symbolicUbOfLb[i] = lowerBias;
+        }
+
+        if ( coeffUb != 0 )
+        {
+            const double *gOutSymbolicUb = gOutLayer->getSymbolicUb();
+            for ( unsigned j = 0; j < _inputLayerSize; ++j )
+                _symbolicUb[j * _size + i] = coeffUb * gOutSymbolicUb[j * gOutLayerSize + gOutNeuron];
+
+            _symbolicUpperBias[i] = coeffUb * gOutLayer->getSymbolicUpperBias()[gOutNeuron] + upperBias;
+            _symbolicLbOfUb[i] = coeffUb * gOutLayer->getSymbolicLbOfUb( gOutNeuron ) + upperBias;
+            _symbolicUbOfUb[i] = coeffUb * gOutLayer->getSymbolicUbOfUb( gOutNeuron ) + upperBias;
+        }
+        else
+        {
+            _symbolicUpperBias[i] = upperBias;
+            _symbolicLbOfUb[i] = upperBias;
+            _symbolicUbOfUb[i] = upperBias;
+        }
+
+        /*
+          We now have the tightest bounds we can for the gradient
+          variable. If they are tigheter than what was previously
+          known, store them.
+        */
+        if ( _lb[i] < _symbolicLbOfLb[i] )
+        {
+            _lb[i] = _symbolicLbOfLb[i];
+            _layerOwner->receiveTighterBound( Tightening( _neuronToVariable[i], _lb[i], Tightening::LB ) );
+        }
+
+        if ( _ub[i] > _symbolicUbOfUb[i] )
+        {
+            _ub[i] = _symbolicUbOfUb[i];
+            _layerOwner->receiveTighterBound( Tightening( _neuronToVariable[i], _ub[i], Tightening::UB ) );
+        }
+    }
+}
+
 void Layer::computeSymbolicBoundsForWeightedSum()
 {
     std::fill_n( _symbolicLb, _size * _inputLayerSize, 0 );
@@ -1755,6 +1985,10 @@ String Layer::typeToString( Type type )
         return "SIGN";
         break;
 
+    case RELU_GRAD:
+        return "RELU_GRAD";
+        break;
+
     default:
         return "UNKNOWN TYPE";
         break;
@@ -1813,6 +2047,7 @@ void Layer::dump() const
     case MAX:
     case SIGN:
     case SIGMOID:
+    case RELU_GRAD:
 
         for ( unsigned i = 0; i < _size; ++i )
         {
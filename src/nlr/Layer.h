@@ -45,6 +45,9 @@ public:
         MAX,
         SIGN,
         SIGMOID,
+
+        // Gradient gates of the backward pass
+        RELU_GRAD,
     };
 
     /*
@@ -83,6 +86,10 @@ public:
     double getBias( unsigned neuron ) const;
     double *getBiases() const;
 
+    /*
+      The sources of a RELU_GRAD neuron gIn = ReLU'( b ) * gOut are b,
+      followed by gOut.
+    */
     void addActivationSource( unsigned sourceLayer,
                               unsigned sourceNeuron,
                               unsigned targetNeuron );
@@ -200,6 +207,7 @@ private:
     void computeSymbolicBoundsForSign();
     void computeSymbolicBoundsForAbsoluteValue();
     void computeSymbolicBoundsForWeightedSum();
+    void computeSymbolicBoundsForReluGrad();
     void computeSymbolicBoundsDefault();
 
     /*
@@ -209,6 +217,7 @@ private:
     void computeIntervalArithmeticBoundsForRelu();
     void computeIntervalArithmeticBoundsForAbs();
     void computeIntervalArithmeticBoundsForSign();
+    void computeIntervalArithmeticBoundsForReluGrad();
 
     const double *getSymbolicLb() const;
     const double *getSymbolicUb() const;
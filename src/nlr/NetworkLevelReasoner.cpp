@@ -29,6 +29,7 @@
 #include "NetworkLevelReasoner.h"
 #include "Options.h"
 #include "ReluConstraint.h"
+#include "ReluGradConstraint.h"
 #include "SignConstraint.h"
 #include <cstring>
 
@@ -56,6 +57,9 @@ bool NetworkLevelReasoner::functionTypeSupported( PiecewiseLinearFunctionType ty
     if ( type == PiecewiseLinearFunctionType::SIGN )
         return true;
 
+    if ( type == PiecewiseLinearFunctionType::RELU_GRAD )
+        return true;
+
     return false;
 }
 
@@ -450,6 +454,10 @@ void NetworkLevelReasoner::generateInputQueryForLayer( InputQuery &inputQuery,
         generateInputQueryForMaxLayer( inputQuery, layer );
         break;
 
+    case Layer::RELU_GRAD:
+        generateInputQueryForReluGradLayer( inputQuery, layer );
+        break;
+
     default:
         throw NLRError( NLRError::LAYER_TYPE_NOT_SUPPORTED,
                         Stringf( "Layer %u not yet supported", layer.getLayerType() ).ascii() );
@@ -518,6 +526,21 @@ void NetworkLevelReasoner::generateInputQueryForMaxLayer( InputQuery &inputQuery
     }
 }
 
+void NetworkLevelReasoner::generateInputQueryForReluGradLayer( InputQuery &inputQuery, const Layer &layer )
+{
+    for ( unsigned i = 0; i < layer.getSize(); ++i )
+    {
+        NeuronIndex bIndex = layer.getActivationSources( i ).front();
+        NeuronIndex gOutIndex = layer.getActivationSources( i ).back();
+        const Layer *bLayer = _layerIndexToLayer[bIndex._layer];
+        const Layer *gOutLayer = _layerIndexToLayer[gOutIndex._layer];
+        ReluGradConstraint *reluGrad = new ReluGradConstraint( bLayer->neuronToVariable( bIndex._neuron ),
+                                                               gOutLayer->neuronToVariable( gOutIndex._neuron ),
+                                                               layer.neuronToVariable( i ) );
+        inputQuery.addPiecewiseLinearConstraint( reluGrad );
+    }
+}
+
 void NetworkLevelReasoner::generateInputQueryForWeightedSumLayer( InputQuery &inputQuery, const Layer &layer )
 {
     for ( unsigned i = 0; i < layer.getSize(); ++i )
@@ -207,6 +207,7 @@ private:
     void generateInputQueryForSignLayer( InputQuery &inputQuery, const Layer &layer );
     void generateInputQueryForAbsoluteValueLayer( InputQuery &inputQuery, const Layer &layer );
     void generateInputQueryForMaxLayer( InputQuery &inputQuery, const Layer &layer );
+    void generateInputQueryForReluGradLayer( InputQuery &inputQuery, const Layer &layer );
 
     bool suitableForMerging( unsigned secondLayerIndex );
     void mergeWSLayers( unsigned secondLayerIndex );
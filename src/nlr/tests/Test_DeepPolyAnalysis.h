@@ -909,4 +909,148 @@ public:
         TS_ASSERT( FloatUtils::areEqual( nlr.getLayer(3)->getLb( 1 ), -0.5516, 0.0001 ) );
         TS_ASSERT( FloatUtils::areEqual( nlr.getLayer(3)->getUb( 1 ), 0.5516, 0.0001 ) );
     }
+
+    void populateNetworkWithReluGrads( NLR::NetworkLevelReasoner &nlr, MockTableau &tableau )
+    {
+        /*
+          The forward and backward pass of a network with two ReLUs.
+          x0 is the input of the network, and x1 the gradient of its
+          output. x2 and x3 are the ReLU inputs, x4 and x5 the gradients
+          of the ReLU outputs, and x6 and x7 the gradients of the ReLU
+          inputs:
+
+          x2 = x0          x6 = ReLU'( x2 ) * x4       x8 = x6 - x4
+          x3 = x0 + 2      x7 = ReLU'( x3 ) * x5       x9 = x7 + x1
+          x4 = 2x1
+          x5 = -x1
+        */
+
+        // Create the layers
+        nlr.addLayer( 0, NLR::Layer::INPUT, 2 );
+        nlr.addLayer( 1, NLR::Layer::WEIGHTED_SUM, 4 );
+        nlr.addLayer( 2, NLR::Layer::RELU_GRAD, 2 );
+        nlr.addLayer( 3, NLR::Layer::WEIGHTED_SUM, 2 );
+
+        // Mark layer dependencies
+        for ( unsigned i = 1; i <= 3; ++i )
+            nlr.addLayerDependency( i - 1, i );
+        nlr.addLayerDependency( 0, 3 );
+        nlr.addLayerDependency( 1, 3 );
+
+        // Set the weights and biases for the weighted sum layers
+        nlr.setWeight( 0, 0, 1, 0, 1 );
+        nlr.setWeight( 0, 0, 1, 1, 1 );
+        nlr.setWeight( 0, 1, 1, 2, 2 );
+        nlr.setWeight( 0, 1, 1, 3, -1 );
+
+        nlr.setBias( 1, 1, 2 );
+
+        nlr.setWeight( 2, 0, 3, 0, 1 );
+        nlr.setWeight( 1, 2, 3, 0, -1 );
+        nlr.setWeight( 2, 1, 3, 1, 1 );
+        nlr.setWeight( 0, 1, 3, 1, 1 );
+
+        // Mark the ReLU gradient sources: b, then gOut
+        nlr.addActivationSource( 1, 0, 2, 0 );
+        nlr.addActivationSource( 1, 2, 2, 0 );
+        nlr.addActivationSource( 1, 1, 2, 1 );
+        nlr.addActivationSource( 1, 3, 2, 1 );
+
+        // Variable indexing
+        nlr.setNeuronVariable( NLR::NeuronIndex( 0, 0 ), 0 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 0, 1 ), 1 );
+
+        nlr.setNeuronVariable( NLR::NeuronIndex( 1, 0 ), 2 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 1, 1 ), 3 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 1, 2 ), 4 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 1, 3 ), 5 );
+
+        nlr.setNeuronVariable( NLR::NeuronIndex( 2, 0 ), 6 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 2, 1 ), 7 );
+
+        nlr.setNeuronVariable( NLR::NeuronIndex( 3, 0 ), 8 );
+        nlr.setNeuronVariable( NLR::NeuronIndex( 3, 1 ), 9 );
+
+        // Very loose bounds for neurons except inputs
+        double large = 1000000;
+
+        tableau.getBoundManager().initialize( 10 );
+        for ( unsigned i = 2; i < 10; ++i )
+        {
+            tableau.setLowerBound( i, -large );
+            tableau.setUpperBound( i, large );
+        }
+    }
+
+    void test_deeppoly_relu_grads()
+    {
+        NLR::NetworkLevelReasoner nlr;
+        MockTableau tableau;
+        nlr.setTableau( &tableau );
+        populateNetworkWithReluGrads( nlr, tableau );
+
+        tableau.setLowerBound( 0, -1 );
+        tableau.setUpperBound( 0, 2 );
+        tableau.setLowerBound( 1, -1 );
+        tableau.setUpperBound( 1, 1 );
+
+        // Invoke Deeppoly
+        TS_ASSERT_THROWS_NOTHING( nlr.obtainCurrentBounds() );
+        TS_ASSERT_THROWS_NOTHING( nlr.deepPolyPropagation() );
+
+        /*
+          Input ranges:
+
+          x0: [-1, 2]
+          x1: [-1, 1]
+
+          Layer 1:
+
+          x2: [-1, 2]
+          x3: [1, 4]
+          x4: [-2, 2]
+          x5: [-1, 1]
+
+          Layer 2:
+
+          x6: not fixed, 0.5x4 - 1 <= x6 <= 0.5x4 + 1 : [-2, 2]
+          x7: active, x7 = x5 : [-1, 1]
+
+          Layer 3, back substituted through the gradients:
+
+          x8 = x6 - x4: -0.5x4 - 1 <= x8 <= -0.5x4 + 1
+                        -x1 - 1 <= x8 <= -x1 + 1 : [-2, 2]
+          x9 = x7 + x1 = x5 + x1 = 0 : [0, 0]
+
+          Interval arithmetic would give [-4, 4] and [-2, 2].
+        */
+
+        List<Tightening> expectedBounds({
+                Tightening( 2, -1, Tightening::LB ),
+                Tightening( 2, 2, Tightening::UB ),
+                Tightening( 3, 1, Tightening::LB ),
+                Tightening( 3, 4, Tightening::UB ),
+                Tightening( 4, -2, Tightening::LB ),
+                Tightening( 4, 2, Tightening::UB ),
+                Tightening( 5, -1, Tightening::LB ),
+                Tightening( 5, 1, Tightening::UB ),
+
+                Tightening( 6, -2, Tightening::LB ),
+                Tightening( 6, 2, Tightening::UB ),
+                Tightening( 7, -1, Tightening::LB ),
+                Tightening( 7, 1, Tightening::UB ),
+
+                Tightening( 8, -2, Tightening::LB ),
+                Tightening( 8, 2, Tightening::UB ),
+                Tightening( 9, 0, Tightening::LB ),
+                Tightening( 9, 0, Tightening::UB ),
+            });
+
+        List<Tightening> bounds;
+        TS_ASSERT_THROWS_NOTHING( nlr.getConstraintTightenings( bounds ) );
+
+        TS_ASSERT_EQUALS( expectedBounds.size(), bounds.size() );
+        for ( const auto &bound : expectedBounds )
+            TS_ASSERT( bounds.exists( bound ) );
+    }
 };
@@ -0,0 +1,94 @@
+/*********************                                                        */
+/*! \file BinaryQueryFormat.h
+ ** \verbatim
+ ** Top contributors (to current version):
+ **   Christopher Lazarus, Kyle Julian
+ ** This file is part of the Marabou project.
+ ** Copyright (c) 2017-2019 by the authors listed in the file AUTHORS
+ ** in the top-level source directory) and their institutional affiliations.
+ ** All rights reserved. See the file COPYING in the top-level source
+ ** directory for licensing information.\endverbatim
+ **
+ ** \brief Layout of the binary input query format
+ **
+ ** A binary query file starts with a fixed-width BinaryQueryHeader,
+ ** followed by contiguous arrays in the order below. Every array
+ ** starts at an offset that is a multiple of
+ ** BinaryQueryFormat::ALIGNMENT, so that a memory-mapped file can be
+ ** read in place.
+ **
+ **   inputVariables        uint32[2 * numInputVariables]   (index, variable)
+ **   outputVariables       uint32[2 * numOutputVariables]  (index, variable)
+ **   lowerBoundVariables   uint32[numLowerBounds]
+ **   lowerBoundValues      double[numLowerBounds]
+ **   upperBoundVariables   uint32[numUpperBounds]
+ **   upperBoundValues      double[numUpperBounds]
+ **   equationTypes         uint32[numEquations]
+ **   equationScalars       double[numEquations]
+ **   equationRowPointers   uint64[numEquations + 1]
+ **   addendVariables       uint32[numAddends]
+ **   addendCoefficients    double[numAddends]
+ **   constraintKinds       uint8[numConstraints]
+ **   constraintVariables   uint32[2 * numPairConstraints]  (f, b)
+ **   serializedOffsets     uint64[numConstraints - numPairConstraints + 1]
+ **   serializedData        char[serializedSize]
+ **
+ ** Relu constraints without an auxiliary variable and sigmoid
+ ** constraints are stored as (f, b) pairs. All other constraints are
+ ** stored in their serializeToString() form. Constraints keep the order
+ ** of the text format: piecewise-linear first, then transcendental.
+ **/
+
+#ifndef __BinaryQueryFormat_h__
+#define __BinaryQueryFormat_h__
+
+#include <cstdint>
+
+namespace BinaryQueryFormat {
+
+static const char MAGIC[8] = { 'M', 'A', 'R', 'A', 'I', 'P', 'Q', 'B' };
+static const uint32_t VERSION = 1;
+static const uint32_t BYTE_ORDER_MARK = 0x01020304;
+static const uint64_t ALIGNMENT = 8;
+
+enum ConstraintKind {
+    CONSTRAINT_RELU = 0,
+    CONSTRAINT_SIGMOID = 1,
+    CONSTRAINT_SERIALIZED = 2,
+};
+
+struct Header
+{
+    char magic[8];
+    uint32_t version;
+    uint32_t byteOrder;
+    uint64_t numVariables;
+    uint64_t numLowerBounds;
+    uint64_t numUpperBounds;
+    uint64_t numEquations;
+    uint64_t numAddends;
+    uint64_t numInputVariables;
+    uint64_t numOutputVariables;
+    uint64_t numConstraints;
+    uint64_t numPairConstraints;
+    uint64_t serializedSize;
+};
+
+static_assert( sizeof( Header ) == 96, "Binary query header must be 96 bytes" );
+
+inline uint64_t align( uint64_t offset )
+{
+    return ( offset + ALIGNMENT - 1 ) / ALIGNMENT * ALIGNMENT;
+}
+
+}
+
+#endif // __BinaryQueryFormat_h__
+
+//
+// Local Variables:
+// compile-command: "make -C ../.. "
+// tags-file-name: "../../TAGS"
+// c-basic-offset: 4
+// End:
+//
@@ -15,6 +15,9 @@
  **/
 
 #include "AutoFile.h"
+#include "BinaryQueryFormat.h"
+#include "CommonError.h"
+#include "CompressedFile.h"
 #include "Debug.h"
 #include "DisjunctionConstraint.h"
 #include "Equation.h"
@@ -25,8 +28,21 @@
 #include "MaxConstraint.h"
 #include "QueryLoader.h"
 #include "ReluConstraint.h"
+#include "ReluGradConstraint.h"
 #include "SignConstraint.h"
 
+#include <cstring>
+#include <fstream>
+#include <memory>
+#include <vector>
+
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
 InputQuery QueryLoader::loadQuery( const String &fileName )
 {
     if ( !IFile::exists( fileName ) )
@@ -35,14 +51,35 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     }
 
     InputQuery inputQuery;
-    AutoFile input( fileName );
-    input->open( IFile::MODE_READ );
+    CompressedFile::Compression compression = CompressedFile::detectCompression( fileName );
+    if ( isBinaryQuery( fileName ) )
+    {
+        loadBinaryQuery( fileName, inputQuery );
+    }
+    else if ( compression == CompressedFile::NONE )
+    {
+        AutoFile input( fileName );
+        input->open( IFile::MODE_READ );
+        loadTextQuery( input, inputQuery );
+    }
+    else
+    {
+        CompressedFile input( fileName, compression );
+        input.open( IFile::MODE_READ );
+        loadTextQuery( input, inputQuery );
+    }
 
-    unsigned numVars = atoi( input->readLine().trim().ascii() );
-    unsigned numLowerBounds = atoi( input->readLine().trim().ascii() );
-    unsigned numUpperBounds = atoi( input->readLine().trim().ascii() );
-    unsigned numEquations = atoi( input->readLine().trim().ascii() );
-    unsigned numConstraints = atoi( input->readLine().trim().ascii() );
+    inputQuery.constructNetworkLevelReasoner();
+    return inputQuery;
+}
+
+void QueryLoader::loadTextQuery( IFile &input, InputQuery &inputQuery )
+{
+    unsigned numVars = atoi( input.readLine().trim().ascii() );
+    unsigned numLowerBounds = atoi( input.readLine().trim().ascii() );
+    unsigned numUpperBounds = atoi( input.readLine().trim().ascii() );
+    unsigned numEquations = atoi( input.readLine().trim().ascii() );
+    unsigned numConstraints = atoi( input.readLine().trim().ascii() );
 
     QL_LOG( Stringf( "Number of variables: %u\n", numVars ).ascii() );
     QL_LOG( Stringf( "Number of lower bounds: %u\n", numLowerBounds ).ascii() );
@@ -53,10 +90,10 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     inputQuery.setNumberOfVariables( numVars );
 
     // Input Variables
-    unsigned numInputVars = atoi( input->readLine().trim().ascii() );
+    unsigned numInputVars = atoi( input.readLine().trim().ascii() );
     for ( unsigned i = 0; i < numInputVars; ++i )
     {
-        String line = input->readLine();
+        String line = input.readLine();
         List<String> tokens = line.tokenize( "," );
         auto it = tokens.begin();
         unsigned inputIndex = atoi( it->ascii() );
@@ -67,10 +104,10 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     }
 
     // Output Variables
-    unsigned numOutputVars = atoi( input->readLine().trim().ascii() );
+    unsigned numOutputVars = atoi( input.readLine().trim().ascii() );
     for ( unsigned i = 0; i < numOutputVars; ++i )
     {
-        String line = input->readLine();
+        String line = input.readLine();
         List<String> tokens = line.tokenize( "," );
         auto it = tokens.begin();
         unsigned outputIndex = atoi( it->ascii() );
@@ -84,7 +121,7 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     for ( unsigned i = 0; i < numLowerBounds; ++i )
     {
         QL_LOG( Stringf( "Bound: %u\n", i ).ascii() );
-        String line = input->readLine();
+        String line = input.readLine();
         List<String> tokens = line.tokenize( "," );
 
         // format: <var, lb>
@@ -105,7 +142,7 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     for ( unsigned i = 0; i < numUpperBounds; ++i )
     {
         QL_LOG( Stringf( "Bound: %u\n", i ).ascii() );
-        String line = input->readLine();
+        String line = input.readLine();
         List<String> tokens = line.tokenize( "," );
 
         // format: <var, ub>
@@ -126,7 +163,7 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     for( unsigned i = 0; i < numEquations; ++i )
     {
         QL_LOG( Stringf( "Equation: %u ", i ).ascii() );
-        String line = input->readLine();
+        String line = input.readLine();
 
         List<String> tokens = line.tokenize( "," );
         ASSERT( tokens.size() > 4 );
@@ -184,14 +221,13 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
     // Non-Linear(Piecewise and Transcendental) Constraints
     for ( unsigned i = 0; i < numConstraints; ++i )
     {
-        String line = input->readLine();
+        String line = input.readLine();
 
         List<String> tokens = line.tokenize( "," );
         auto it = tokens.begin();
 
         // Skip constraint number
         ++it;
-        String coType = *it;
         String serializeConstraint;
         // include type in serializeConstraint as well
         while ( it != tokens.end() ) {
@@ -200,43 +236,329 @@ InputQuery QueryLoader::loadQuery( const String &fileName )
         }
         serializeConstraint = serializeConstraint.substring( 0, serializeConstraint.length() - 1 );
 
-        QL_LOG( Stringf( "Non-Linear Constraint: %u, Type: %s \n", i, coType.ascii() ).ascii() );
-        QL_LOG( Stringf( "\tserialized:\t%s \n", serializeConstraint.ascii() ).ascii() );
-        if ( coType == "relu" )
-        {
-            inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( serializeConstraint ) );
-        }
-        else if ( coType == "max" )
-        {
-            inputQuery.addPiecewiseLinearConstraint( new MaxConstraint( serializeConstraint ) );
-        }
-        else if ( coType == "absoluteValue" )
-        {
-            inputQuery.addPiecewiseLinearConstraint( new AbsoluteValueConstraint( serializeConstraint ) );
-        }
-        else if ( coType == "sign" )
+        QL_LOG( Stringf( "Non-Linear Constraint: %u\n", i ).ascii() );
+        addSerializedConstraint( serializeConstraint, inputQuery );
+    }
+}
+
+void QueryLoader::addSerializedConstraint( const String &serializeConstraint,
+                                           InputQuery &inputQuery )
+{
+    String coType = *serializeConstraint.tokenize( "," ).begin();
+
+    QL_LOG( Stringf( "\tType: %s \n", coType.ascii() ).ascii() );
+    QL_LOG( Stringf( "\tserialized:\t%s \n", serializeConstraint.ascii() ).ascii() );
+    if ( coType == "relu" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "max" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new MaxConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "absoluteValue" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new AbsoluteValueConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "sign" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new SignConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "reluGrad" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new ReluGradConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "disj" )
+    {
+        inputQuery.addPiecewiseLinearConstraint( new DisjunctionConstraint( serializeConstraint ) );
+    }
+    else if ( coType == "sigmoid")
+    {
+        inputQuery.addTranscendentalConstraint( new SigmoidConstraint( serializeConstraint ) );
+    }
+    else
+    {
+        throw MarabouError( MarabouError::UNSUPPORTED_NON_LINEAR_CONSTRAINT, Stringf( "Unsupported non-linear constraint: %s\n", coType.ascii() ).ascii() );
+    }
+}
+
+namespace {
+
+/*
+  Read-only view of a whole query file. On POSIX systems the file is
+  memory-mapped, elsewhere it is read into memory.
+*/
+class MappedQueryFile
+{
+public:
+    MappedQueryFile( const String &fileName )
+        : _data( NULL )
+        , _size( 0 )
+    {
+#ifdef _WIN32
+        std::ifstream stream( fileName.ascii(), std::ios::in | std::ios::binary | std::ios::ate );
+        if ( !stream )
+            throw CommonError( CommonError::OPEN_FAILED, fileName.ascii() );
+        _buffer.resize( stream.tellg() );
+        stream.seekg( 0 );
+        if ( !stream.read( _buffer.data(), _buffer.size() ) )
+            throw CommonError( CommonError::READ_FAILED, fileName.ascii() );
+        _data = _buffer.data();
+        _size = _buffer.size();
+#else
+        int descriptor = ::open( fileName.ascii(), O_RDONLY );
+        if ( descriptor < 0 )
+            throw CommonError( CommonError::OPEN_FAILED, fileName.ascii() );
+
+        struct stat fileData;
+        if ( ::fstat( descriptor, &fileData ) != 0 )
         {
-            inputQuery.addPiecewiseLinearConstraint( new SignConstraint( serializeConstraint ) );
+            ::close( descriptor );
+            throw CommonError( CommonError::STAT_FAILED, fileName.ascii() );
         }
-        else if ( coType == "disj" )
+        _size = fileData.st_size;
+
+        if ( _size > 0 )
         {
-            inputQuery.addPiecewiseLinearConstraint( new DisjunctionConstraint( serializeConstraint ) );
+            void *mapped = ::mmap( NULL, _size, PROT_READ, MAP_PRIVATE, descriptor, 0 );
+            if ( mapped == MAP_FAILED )
+            {
+                ::close( descriptor );
+                throw CommonError( CommonError::READ_FAILED, fileName.ascii() );
+            }
+            ::madvise( mapped, _size, MADV_SEQUENTIAL );
+            _data = static_cast<const char *>( mapped );
         }
-        else if ( coType == "sigmoid")
+        ::close( descriptor );
+#endif
+    }
+
+    ~MappedQueryFile()
+    {
+#ifndef _WIN32
+        if ( _data )
+            ::munmap( const_cast<char *>( _data ), _size );
+#endif
+    }
+
+    const char *data() const
+    {
+        return _data;
+    }
+
+    uint64_t size() const
+    {
+        return _size;
+    }
+
+private:
+    const char *_data;
+    uint64_t _size;
+#ifdef _WIN32
+    std::vector<char> _buffer;
+#endif
+};
+
+/*
+  Walks the arrays of a binary query, checking that every array lies
+  within the file. Arrays point into the mapped file, or for compressed
+  files into buffers that stay valid until release() is called.
+*/
+class BinaryQueryCursor
+{
+public:
+    BinaryQueryCursor( const MappedQueryFile *file, CompressedFile *stream )
+        : _file( file )
+        , _stream( stream )
+        , _offset( 0 )
+    {
+    }
+
+    template <typename T> const T *array( uint64_t count )
+    {
+        uint64_t padding = BinaryQueryFormat::align( _offset ) - _offset;
+        if ( count > UINT64_MAX / sizeof( T ) )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Binary query file is corrupted" );
+
+        uint64_t size = count * sizeof( T );
+        const char *data = _file ? mapped( _offset + padding, size ) : streamed( padding, size );
+        _offset += padding + size;
+        return reinterpret_cast<const T *>( data );
+    }
+
+    void release()
+    {
+        _buffers.clear();
+    }
+
+private:
+    const MappedQueryFile *_file;
+    CompressedFile *_stream;
+    uint64_t _offset;
+    std::vector<std::vector<uint64_t>> _buffers;
+
+    const char *mapped( uint64_t start, uint64_t size )
+    {
+        if ( start > _file->size() || size > _file->size() - start )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Binary query file is truncated" );
+        return _file->data() + start;
+    }
+
+    const char *streamed( uint64_t padding, uint64_t size )
+    {
+        char skipped[BinaryQueryFormat::ALIGNMENT];
+        if ( _stream->readBytes( skipped, padding ) != padding )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Binary query file is truncated" );
+
+        // uint64_t elements keep the buffer aligned for every array type
+        _buffers.push_back( std::vector<uint64_t>( size / sizeof( uint64_t ) + 1 ) );
+        char *data = reinterpret_cast<char *>( _buffers.back().data() );
+        if ( _stream->readBytes( data, size ) != size )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Binary query file is truncated" );
+        return data;
+    }
+};
+
+}
+
+bool QueryLoader::isBinaryQuery( const String &fileName )
+{
+    char magic[sizeof( BinaryQueryFormat::MAGIC )];
+    CompressedFile::Compression compression = CompressedFile::detectCompression( fileName );
+    if ( compression == CompressedFile::NONE )
+    {
+        std::ifstream stream( fileName.ascii(), std::ios::in | std::ios::binary );
+        if ( !stream.read( magic, sizeof( magic ) ) )
+            return false;
+    }
+    else
+    {
+        CompressedFile stream( fileName, compression );
+        stream.open( IFile::MODE_READ );
+        if ( stream.readBytes( magic, sizeof( magic ) ) != sizeof( magic ) )
+            return false;
+    }
+    return memcmp( magic, BinaryQueryFormat::MAGIC, sizeof( magic ) ) == 0;
+}
+
+void QueryLoader::loadBinaryQuery( const String &fileName, InputQuery &inputQuery )
+{
+    // Uncompressed files are mapped, compressed files are decompressed
+    // one array at a time
+    CompressedFile::Compression compression = CompressedFile::detectCompression( fileName );
+    std::unique_ptr<MappedQueryFile> file;
+    std::unique_ptr<CompressedFile> stream;
+    if ( compression == CompressedFile::NONE )
+    {
+        file.reset( new MappedQueryFile( fileName ) );
+    }
+    else
+    {
+        stream.reset( new CompressedFile( fileName, compression ) );
+        stream->open( IFile::MODE_READ );
+    }
+
+    BinaryQueryCursor cursor( file.get(), stream.get() );
+    BinaryQueryFormat::Header header = *cursor.array<BinaryQueryFormat::Header>( 1 );
+    if ( header.version != BinaryQueryFormat::VERSION )
+        throw MarabouError( MarabouError::INVALID_QUERY_FILE,
+                            Stringf( "Unsupported binary query version: %u\n", header.version ).ascii() );
+    if ( header.byteOrder != BinaryQueryFormat::BYTE_ORDER_MARK )
+        throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Binary query was written with a different byte order" );
+
+    QL_LOG( Stringf( "Number of variables: %llu\n", (unsigned long long)header.numVariables ).ascii() );
+    QL_LOG( Stringf( "Number of lower bounds: %llu\n", (unsigned long long)header.numLowerBounds ).ascii() );
+    QL_LOG( Stringf( "Number of upper bounds: %llu\n", (unsigned long long)header.numUpperBounds ).ascii() );
+    QL_LOG( Stringf( "Number of equations: %llu\n", (unsigned long long)header.numEquations ).ascii() );
+    QL_LOG( Stringf( "Number of non-linear constraints: %llu\n", (unsigned long long)header.numConstraints ).ascii() );
+
+    inputQuery.setNumberOfVariables( header.numVariables );
+
+    // Input and output variables
+    const uint32_t *inputVariables = cursor.array<uint32_t>( 2 * header.numInputVariables );
+    for ( uint64_t i = 0; i < header.numInputVariables; ++i )
+        inputQuery.markInputVariable( inputVariables[2 * i + 1], inputVariables[2 * i] );
+
+    const uint32_t *outputVariables = cursor.array<uint32_t>( 2 * header.numOutputVariables );
+    for ( uint64_t i = 0; i < header.numOutputVariables; ++i )
+        inputQuery.markOutputVariable( outputVariables[2 * i + 1], outputVariables[2 * i] );
+
+    // Bounds
+    const uint32_t *lowerBoundVariables = cursor.array<uint32_t>( header.numLowerBounds );
+    const double *lowerBoundValues = cursor.array<double>( header.numLowerBounds );
+    for ( uint64_t i = 0; i < header.numLowerBounds; ++i )
+        inputQuery.setLowerBound( lowerBoundVariables[i], lowerBoundValues[i] );
+
+    const uint32_t *upperBoundVariables = cursor.array<uint32_t>( header.numUpperBounds );
+    const double *upperBoundValues = cursor.array<double>( header.numUpperBounds );
+    for ( uint64_t i = 0; i < header.numUpperBounds; ++i )
+        inputQuery.setUpperBound( upperBoundVariables[i], upperBoundValues[i] );
+    cursor.release();
+
+    // Equations
+    const uint32_t *equationTypes = cursor.array<uint32_t>( header.numEquations );
+    const double *equationScalars = cursor.array<double>( header.numEquations );
+    const uint64_t *rowPointers = cursor.array<uint64_t>( header.numEquations + 1 );
+    const uint32_t *addendVariables = cursor.array<uint32_t>( header.numAddends );
+    const double *addendCoefficients = cursor.array<double>( header.numAddends );
+    for ( uint64_t i = 0; i < header.numEquations; ++i )
+    {
+        if ( equationTypes[i] > Equation::LE )
+            throw MarabouError( MarabouError::INVALID_EQUATION_TYPE, Stringf( "Invalid Equation Type\n" ).ascii() );
+        if ( rowPointers[i] > rowPointers[i + 1] || rowPointers[i + 1] > header.numAddends )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Invalid equation row pointers" );
+
+        Equation equation( (Equation::EquationType)equationTypes[i] );
+        equation.setScalar( equationScalars[i] );
+        for ( uint64_t j = rowPointers[i]; j < rowPointers[i + 1]; ++j )
+            equation.addAddend( addendCoefficients[j], addendVariables[j] );
+        inputQuery.addEquation( equation );
+    }
+    cursor.release();
+
+    // Non-linear constraints, in the order in which they were saved
+    if ( header.numPairConstraints > header.numConstraints )
+        throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Invalid number of constraints" );
+    uint64_t numSerialized = header.numConstraints - header.numPairConstraints;
+    const uint8_t *kinds = cursor.array<uint8_t>( header.numConstraints );
+    const uint32_t *pairVariables = cursor.array<uint32_t>( 2 * header.numPairConstraints );
+    const uint64_t *serializedOffsets = cursor.array<uint64_t>( numSerialized + 1 );
+    const char *serializedData = cursor.array<char>( header.serializedSize );
+
+    uint64_t pair = 0;
+    uint64_t serialized = 0;
+    for ( uint64_t i = 0; i < header.numConstraints; ++i )
+    {
+        if ( kinds[i] == BinaryQueryFormat::CONSTRAINT_SERIALIZED )
         {
-            inputQuery.addTranscendentalConstraint( new SigmoidConstraint( serializeConstraint ) );
+            if ( serialized >= numSerialized ||
+                 serializedOffsets[serialized] > serializedOffsets[serialized + 1] ||
+                 serializedOffsets[serialized + 1] > header.serializedSize )
+                throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Invalid serialized constraint" );
+
+            String serializeConstraint( serializedData + serializedOffsets[serialized],
+                                        serializedOffsets[serialized + 1] - serializedOffsets[serialized] );
+            addSerializedConstraint( serializeConstraint, inputQuery );
+            ++serialized;
+            continue;
         }
+
+        if ( pair >= header.numPairConstraints )
+            throw MarabouError( MarabouError::INVALID_QUERY_FILE, "Invalid number of constraints" );
+        unsigned f = pairVariables[2 * pair];
+        unsigned b = pairVariables[2 * pair + 1];
+        ++pair;
+
+        if ( kinds[i] == BinaryQueryFormat::CONSTRAINT_RELU )
+            inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( b, f ) );
+        else if ( kinds[i] == BinaryQueryFormat::CONSTRAINT_SIGMOID )
+            inputQuery.addTranscendentalConstraint( new SigmoidConstraint( b, f ) );
         else
-        {
-            throw MarabouError( MarabouError::UNSUPPORTED_NON_LINEAR_CONSTRAINT, Stringf( "Unsupported non-linear constraint: %s\n", coType.ascii() ).ascii() );
-        }
+            throw MarabouError( MarabouError::UNSUPPORTED_NON_LINEAR_CONSTRAINT,
+                                Stringf( "Unsupported non-linear constraint kind: %u\n", kinds[i] ).ascii() );
     }
-
-    inputQuery.constructNetworkLevelReasoner();
-    return inputQuery;
 }
 
-
 //
 // Local Variables:
 // compile-command: "make -C ../.. "
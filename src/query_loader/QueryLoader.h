@@ -29,9 +29,29 @@ public:
     unsigned _numConstraunsigneds;
 
     /*
-      Parse a serialized query and return it in InputQuery form
+      Parse a serialized query and return it in InputQuery form. Both the
+      text format and the binary format (see BinaryQueryFormat.h) are
+      accepted, either of them optionally gzip or zstd compressed; the
+      format and compression are detected from the file header.
+      Compressed files are decompressed while they are parsed.
     */
     static InputQuery loadQuery( const String &fileName );
+
+    /*
+      Return true iff the file starts with the binary query header
+    */
+    static bool isBinaryQuery( const String &fileName );
+
+private:
+    static void loadTextQuery( IFile &input, InputQuery &inputQuery );
+    static void loadBinaryQuery( const String &fileName, InputQuery &inputQuery );
+
+    /*
+      Construct a non-linear constraint from its serialized form and add
+      it to the query
+    */
+    static void addSerializedConstraint( const String &serializeConstraint,
+                                         InputQuery &inputQuery );
 };
 
 #endif // __QueryLoader_h__
@@ -16,14 +16,19 @@
 #include <cxxtest/TestSuite.h>
 
 #include "AutoFile.h"
+#include "CompressedFile.h"
 #include "Equation.h"
 #include "InputQuery.h"
+#include "MaxConstraint.h"
 #include "MockFileFactory.h"
 #include "QueryLoader.h"
 #include "ReluConstraint.h"
 #include "T/unistd.h"
 
+#include <cstdio>
+
 const String QUERY_TEST_FILE( "QueryTest.txt" );
+const String BINARY_QUERY_TEST_FILE( "QueryTest.ipqb" );
 
 class MockForQueryLoader
     : public MockFileFactory
@@ -178,6 +183,126 @@ public:
         tsConstraint2 = (SigmoidConstraint *)*tsIt2;
         TS_ASSERT( tsConstraint->serializeToString() == tsConstraint2->serializeToString() );
     }
+
+    void test_load_binary_query()
+    {
+        InputQuery inputQuery;
+        inputQuery.setNumberOfVariables( 9 );
+
+        inputQuery.markInputVariable( 0, 0 );
+        inputQuery.markInputVariable( 1, 1 );
+        inputQuery.setLowerBound( 0, -1.0 );
+        inputQuery.setUpperBound( 0, 1.0 );
+        inputQuery.setLowerBound( 1, -2.5 );
+        inputQuery.setUpperBound( 1, 0.125 );
+        inputQuery.markOutputVariable( 8, 0 );
+        inputQuery.setUpperBound( 8, 3.0 );
+
+        Equation equation0;
+        equation0.addAddend( -1.0, 2 );
+        equation0.addAddend( 0.3, 0 );
+        equation0.addAddend( -0.7, 1 );
+        equation0.setScalar( 0.1 );
+        inputQuery.addEquation( equation0 );
+
+        Equation equation1;
+        equation1.addAddend( -1.0, 3 );
+        equation1.addAddend( 2.0, 0 );
+        equation1.setScalar( -0.5 );
+        inputQuery.addEquation( equation1 );
+
+        Equation equation2( Equation::GE );
+        equation2.addAddend( 1.0, 0 );
+        equation2.addAddend( 1.0, 1 );
+        equation2.setScalar( -1.0 );
+        inputQuery.addEquation( equation2 );
+
+        Equation equation3( Equation::LE );
+        equation3.addAddend( 1.0, 8 );
+        equation3.setScalar( 2.0 );
+        inputQuery.addEquation( equation3 );
+
+        // Relu and sigmoid constraints are stored as pairs, max constraints serialized
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( 2, 4 ) );
+        Set<unsigned> elements;
+        elements.insert( 4 );
+        elements.insert( 5 );
+        inputQuery.addPiecewiseLinearConstraint( new MaxConstraint( 8, elements ) );
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( 3, 5 ) );
+        inputQuery.addTranscendentalConstraint( new SigmoidConstraint( 4, 6 ) );
+        inputQuery.addTranscendentalConstraint( new SigmoidConstraint( 5, 7 ) );
+
+        TS_ASSERT_THROWS_NOTHING( inputQuery.saveQuery( BINARY_QUERY_TEST_FILE, true ) );
+        TS_ASSERT( QueryLoader::isBinaryQuery( BINARY_QUERY_TEST_FILE ) );
+
+        InputQuery inputQuery2 = QueryLoader::loadQuery( BINARY_QUERY_TEST_FILE );
+        std::remove( BINARY_QUERY_TEST_FILE.ascii() );
+
+        TS_ASSERT_EQUALS( inputQuery.getNumberOfVariables(), inputQuery2.getNumberOfVariables() );
+        TS_ASSERT( inputQuery.getInputVariables() == inputQuery2.getInputVariables() );
+        TS_ASSERT( inputQuery.getOutputVariables() == inputQuery2.getOutputVariables() );
+        TS_ASSERT( inputQuery.getLowerBounds() == inputQuery2.getLowerBounds() );
+        TS_ASSERT( inputQuery.getUpperBounds() == inputQuery2.getUpperBounds() );
+        TS_ASSERT( inputQuery.getEquations() == inputQuery2.getEquations() );
+
+        // Constraints keep their order
+        TS_ASSERT_EQUALS( inputQuery2.getPiecewiseLinearConstraints().size(), 3U );
+        auto it = inputQuery.getPiecewiseLinearConstraints().begin();
+        for ( const auto &constraint : inputQuery2.getPiecewiseLinearConstraints() )
+        {
+            TS_ASSERT_EQUALS( ( *it )->serializeToString(), constraint->serializeToString() );
+            ++it;
+        }
+
+        TS_ASSERT_EQUALS( inputQuery2.getTranscendentalConstraints().size(), 2U );
+        auto tsIt = inputQuery.getTranscendentalConstraints().begin();
+        for ( const auto &constraint : inputQuery2.getTranscendentalConstraints() )
+        {
+            TS_ASSERT_EQUALS( ( *tsIt )->serializeToString(), constraint->serializeToString() );
+            ++tsIt;
+        }
+    }
+
+    void test_load_compressed_query()
+    {
+        if ( !CompressedFile::supported( CompressedFile::GZIP ) )
+            return;
+
+        InputQuery inputQuery;
+        inputQuery.setNumberOfVariables( 4 );
+        inputQuery.markInputVariable( 0, 0 );
+        inputQuery.markOutputVariable( 3, 0 );
+        inputQuery.setLowerBound( 0, -1.0 );
+        inputQuery.setUpperBound( 0, 1.0 );
+
+        Equation equation;
+        equation.addAddend( -1.0, 1 );
+        equation.addAddend( 0.5, 0 );
+        equation.setScalar( 0.25 );
+        inputQuery.addEquation( equation );
+        inputQuery.addPiecewiseLinearConstraint( new ReluConstraint( 1, 2 ) );
+        inputQuery.addTranscendentalConstraint( new SigmoidConstraint( 2, 3 ) );
+
+        for ( bool binary : { false, true } )
+        {
+            String fileName = binary ? "QueryTest.ipqb.gz" : "QueryTest.ipq.gz";
+            TS_ASSERT_THROWS_NOTHING( inputQuery.saveQuery( fileName, binary ) );
+            TS_ASSERT_EQUALS( CompressedFile::detectCompression( fileName ), CompressedFile::GZIP );
+            TS_ASSERT_EQUALS( QueryLoader::isBinaryQuery( fileName ), binary );
+
+            InputQuery inputQuery2 = QueryLoader::loadQuery( fileName );
+            std::remove( fileName.ascii() );
+
+            TS_ASSERT_EQUALS( inputQuery.getNumberOfVariables(), inputQuery2.getNumberOfVariables() );
+            TS_ASSERT( inputQuery.getInputVariables() == inputQuery2.getInputVariables() );
+            TS_ASSERT( inputQuery.getOutputVariables() == inputQuery2.getOutputVariables() );
+            TS_ASSERT( inputQuery.getLowerBounds() == inputQuery2.getLowerBounds() );
+            TS_ASSERT( inputQuery.getUpperBounds() == inputQuery2.getUpperBounds() );
+            TS_ASSERT( inputQuery.getEquations() == inputQuery2.getEquations() );
+            TS_ASSERT_EQUALS( inputQuery2.getPiecewiseLinearConstraints().size(), 1U );
+            TS_ASSERT_EQUALS( inputQuery2.getTranscendentalConstraints().size(), 1U );
+        }
+    }
 };
 
 //